@@ -24,6 +24,8 @@ class AssistedWayfindingBackendStack(Stack):
 
         # Update config with the DynamoDB table
         config["dynamodb_table"] = dynamodb_stack.table
+        config["enrolment_jobs_table"] = dynamodb_stack.jobs_table
+        config["venue_conditions_table"] = dynamodb_stack.venue_conditions_table
 
         # Create the Storage nested stack
         storage_stack = StorageStack(
@@ -59,6 +61,9 @@ class AssistedWayfindingBackendStack(Stack):
             "DYNAMODB_TABLE_NAME", dynamodb_stack.table_name
         )
 
+        # Integrations call lambda_stack.invoke_targets, which is the "live"
+        # alias for functions with provisioned concurrency
+
         # Create API Gateway with CORS
         api = apigw.RestApi(
             self,
@@ -73,19 +78,25 @@ class AssistedWayfindingBackendStack(Stack):
         )
 
         face_recognition_integration = apigw.LambdaIntegration(
-            lambda_stack.face_recognition_function
+            lambda_stack.invoke_targets["face_recognition"]
         )
         face_indexing_integration = apigw.LambdaIntegration(
-            lambda_stack.face_indexing_function
+            lambda_stack.invoke_targets["face_indexing"]
         )
 
         api.root.add_resource("recognize").add_method(
             "POST", face_recognition_integration
         )
-        api.root.add_resource("index").add_method("POST", face_indexing_integration)
+        index_resource = api.root.add_resource("index")
+        index_resource.add_method("POST", face_indexing_integration)
+
+        # Asynchronous enrolment: submit a job, then poll its status
+        jobs_resource = index_resource.add_resource("jobs")
+        jobs_resource.add_method("POST", face_indexing_integration)
+        jobs_resource.add_resource("{jobId}").add_method("GET", face_indexing_integration)
 
         remove_all_faces_integration = apigw.LambdaIntegration(
-            lambda_stack.remove_all_faces_function
+            lambda_stack.invoke_targets["remove_all_faces"]
         )
 
         api.root.add_resource("remove_all_faces").add_method(
@@ -94,7 +105,7 @@ class AssistedWayfindingBackendStack(Stack):
 
         # Add get passenger data integration
         get_passenger_data_integration = apigw.LambdaIntegration(
-            lambda_stack.get_passenger_data_function
+            lambda_stack.invoke_targets["get_passenger_data"]
         )
 
         # Add the /passenger/{personaId} endpoint with GET method
@@ -102,17 +113,39 @@ class AssistedWayfindingBackendStack(Stack):
         persona_id_resource = passenger_resource.add_resource("{personaId}")
         persona_id_resource.add_method("GET", get_passenger_data_integration)
 
+        # Add the /passenger/batch endpoint for fetching many personas at once
+        passenger_resource.add_resource("batch").add_method(
+            "POST", get_passenger_data_integration
+        )
+
+        # Add the /flights/{flightNo}/passengers endpoint for paged flight listings
+        api.root.add_resource("flights").add_resource("{flightNo}").add_resource(
+            "passengers"
+        ).add_method("GET", get_passenger_data_integration)
+
         directions_integration = apigw.LambdaIntegration(
-            lambda_stack.directions_function
+            lambda_stack.invoke_targets["directions"]
         )
         directions_resource = api.root.add_resource("directions")
         from_resource = directions_resource.add_resource("{from}")
         to_resource = from_resource.add_resource("{to}")
         to_resource.add_method("GET", directions_integration)
+        # Walks through several stops, e.g. lounge then gate
+        directions_resource.add_resource("itinerary").add_method(
+            "POST", directions_integration
+        )
+        # The nearest toilets, charging points, ... from a kiosk
+        directions_resource.add_resource("nearest").add_method(
+            "GET", directions_integration
+        )
+        # Live walking conditions: read them, or override walkways
+        conditions_resource = directions_resource.add_resource("conditions")
+        conditions_resource.add_method("GET", directions_integration)
+        conditions_resource.add_method("POST", directions_integration)
 
         # Add manual user lookup integration
         manual_user_lookup_integration = apigw.LambdaIntegration(
-            lambda_stack.manual_user_lookup_function
+            lambda_stack.invoke_targets["manual_user_lookup"]
         )
 
         # Add the /manual-lookup endpoint with GET method
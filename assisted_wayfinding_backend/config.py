@@ -11,19 +11,184 @@ def get_config(env: str) -> Dict[str, Any]:
         "s3_bucket_name": f"assistedwayfinding-passenger-photos-{env}",
         "MAP_IMAGE_BUCKET": f"assistedwayfinding-map-images-{env}",
         'websocket_api_endpoint': '',  # This will be updated during deployment
+        # Request-path logging (wayfinding_common.structured_logging). Sampled
+        # requests log at DEBUG; rates are keyed by "<METHOD> <resource>".
+        "logging": {
+            "level": "INFO",
+            "sample_rates": {
+                "POST /recognize": 0.01,
+                "*": 0.05,
+            },
+        },
+        # Per-stage latency metrics (wayfinding_common.timing)
+        "stage_timing": {
+            "enabled": True,
+        },
+        # In-container read-through cache used by get_passenger_data. Entries
+        # older than revalidate_seconds cost a version read before they are
+        # served; DynamoDB charges it for the whole item, like a full fetch
+        "passenger_cache": {
+            "max_entries": 256,
+            "ttl_seconds": 60,
+            "revalidate_seconds": 5,
+        },
+        # Asynchronous enrolment (POST /index/jobs and the enrolment worker)
+        "enrolment_jobs": {
+            "batch_size": 5,
+            "max_batching_window_seconds": 1,
+            "max_receives": 3,
+            "worker_timeout_seconds": 120,
+            "job_ttl_days": 7,
+        },
+        # GET /manual-lookup (wayfinding_common.name_index). Records
+        # enrolled before the index get its keys from name_index.backfill,
+        # run once. Until then fallback_scan can also try the old
+        # exact-match scan on an index miss, over one bounded page.
+        # index_enabled adds the index (see DynamoDBStack); without it every
+        # lookup is that scan.
+        "manual_lookup": {
+            "index_name": "lookup-index",
+            "index_enabled": True,
+            "fallback_scan": False,
+        },
+        # Per-flight passenger listing (wayfinding_common.flights). The index
+        # only copies these attributes, so listings read a fraction of each
+        # record; requested fields outside them are rejected. Without
+        # index_enabled the listing answers 503.
+        "flight_listing": {
+            "index_name": "flight-index",
+            "index_enabled": True,
+            "projected_attributes": [
+                "name",
+                "language",
+                "flightno",
+                "next_flight_id",
+                "scheduled_date",
+                "flight_time",
+                "terminal",
+                "gate",
+                "flight_status",
+                "has_lounge_access",
+                "lounge_name",
+                "accessibilityPreferences",
+            ],
+        },
+        # Post-departure expiry of passenger records (wayfinding_common.retention)
+        # and the stream worker that then deletes their faces and photos.
+        # flight_time and scheduled_date are airport local time.
+        "record_expiry": {
+            "hours_after_departure": 6,
+            "undated_days": 30,
+            "airport_utc_offset_minutes": 480,
+            "cleanup_batch_size": 100,
+            "cleanup_batching_window_seconds": 60,
+            "cleanup_retry_attempts": 5,
+        },
+        # Second Rekognition collection holding only travellers departing
+        # between hours_after_departure ago and window_hours ahead
+        # (wayfinding_common.hot_collection). Recognition searches it first.
+        # Rotation reads the departure index; without index_enabled the tier
+        # is off and nothing rotates.
+        "hot_collection": {
+            "collection_id": "AssistedWayfindingFaces-hot",
+            "window_hours": 6,
+            "hours_after_departure": 2,
+            "rotation_minutes": 15,
+            "index_name": "departure-index",
+            "index_enabled": True,
+        },
+        # One Rekognition collection per terminal (wayfinding_common.shards).
+        # Enrolment indexes a traveller into the collection of their
+        # passengerData[attribute]; kiosks search the collection of the
+        # terminal in their request's location. Travellers without a known
+        # terminal stay in rekognition_collection_id. Empty to disable.
+        "collection_shards": {
+            "attribute": "terminal",
+            "collections": {
+                "1": "AssistedWayfindingFaces-T1",
+                "2": "AssistedWayfindingFaces-T2",
+                "3": "AssistedWayfindingFaces-T3",
+                "4": "AssistedWayfindingFaces-T4",
+            },
+        },
+        # Segmented parallel scans in admin functions (wayfinding_common.scan).
+        # rcu_budget caps read units per second; None reads as fast as allowed.
+        "bulk_scan": {
+            "segments": 4,
+            "rcu_budget": None,
+        },
+        # Per-container Rekognition call limits (wayfinding_common.rekognition).
+        # Keep tps times the functions' concurrency near the account's quota
+        # (SearchFacesByImage and IndexFaces default to 5-50 TPS by region).
+        # Functions not listed use "default".
+        "rekognition_gateway": {
+            "default": {
+                "tps": 5,
+                "burst": 5,
+                "max_attempts": 4,
+                "max_wait_seconds": 2,
+                "failure_threshold": 5,
+                "reset_seconds": 10,
+            },
+            # Nobody is waiting on the worker: back off longer before requeueing
+            "enrolment_worker": {
+                "tps": 2,
+                "max_attempts": 8,
+                "max_wait_seconds": 20,
+            },
+            # Off the request path; adds are spread over the rotation period
+            "hot_collection_rotation": {
+                "tps": 2,
+                "max_attempts": 8,
+                "max_wait_seconds": 20,
+            },
+            # DeleteFaces calls carry up to 4096 faces each, so one a second is plenty
+            "record_cleanup": {
+                "tps": 1,
+                "burst": 2,
+                "max_attempts": 8,
+                "max_wait_seconds": 20,
+            },
+        },
     }
 
     env_specific_config = {
         "dev": {
-            "lambda_memory_size": 128,
             "lambda_timeout": 30,
+            # Per-function Lambda sizing, see LambdaStack.performance_profile.
+            # Functions not listed use "default".
+            "performance_profiles": {
+                "default": {"memory_size": 128, "architecture": "arm64"},
+                "face_recognition": {
+                    "memory_size": 512,
+                    "warmer": {"rate_minutes": 5, "concurrency": 1},
+                },
+            },
             "face_recognition": {
                 "min_confidence": 70,
             },
         },
         "prod": {
-            "lambda_memory_size": 256,
             "lambda_timeout": 60,
+            # Justified by python -m benchmarks.performance_profiles --env prod
+            "performance_profiles": {
+                "default": {"memory_size": 256, "architecture": "arm64"},
+                # First call at every kiosk: no cold starts for up to two
+                # concurrent travellers. 10 containers at the gateway's 5 TPS
+                # each make 50 SearchFacesByImage calls a second, the top of
+                # Rekognition's default quota; lower it where the region's is
+                "face_recognition": {
+                    "memory_size": 1024,
+                    "provisioned_concurrency": 2,
+                    "reserved_concurrency": 10,
+                },
+                # Greeting lookup right after recognition
+                "get_passenger_data": {
+                    "warmer": {"rate_minutes": 5, "concurrency": 2, "hold_ms": 100},
+                },
+                # Bounded so indexing stays within Rekognition's IndexFaces TPS
+                "enrolment_worker": {"memory_size": 512, "reserved_concurrency": 5},
+            },
             "face_recognition": {
                 "min_confidence": 90,
             },
@@ -1,132 +1,357 @@
 import json
-import logging
 import os
 import random
-import traceback
 
-import boto3
 from botocore.exceptions import ClientError
+from wayfinding_common import aws
+from wayfinding_common.itinerary import plan_itinerary
+from wayfinding_common.messages import DEFAULT_LOCALE, catalogue
+from wayfinding_common.pois import DEFAULT_K, MAX_K, poi_index
+from wayfinding_common.responses import (
+    aws_error_response,
+    error_response,
+    json_response,
+)
+from wayfinding_common.route_geometry import route_geometry
+from wayfinding_common.route_maps import route_maps
+from wayfinding_common.structured_logging import (
+    Redacted,
+    configure_logging,
+    start_request,
+)
+from wayfinding_common.timing import span, traced_handler
+from wayfinding_common.venue_conditions import (
+    CLOSED,
+    current_venue,
+    parse_changes,
+    venue_conditions,
+)
+from wayfinding_common.warmer import skip_warmers
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = configure_logging()
 
-s3_client = boto3.client("s3")
+aws.prewarm(clients=("s3",), resources=("dynamodb",))
 
+# ?format=: a map image URL, or the route as data for the kiosk to draw
+RESPONSE_FORMATS = ("image", "geometry")
 
-def handler(event, context):
-    logger.info(f"Received event: {json.dumps(event)}")
-    try:
-        from_location = event["pathParameters"]["from"]
-        to_location = event["pathParameters"]["to"]
+ITINERARY_RESOURCE = "/directions/itinerary"
+CONDITIONS_RESOURCE = "/directions/conditions"
+NEAREST_RESOURCE = "/directions/nearest"
 
-        logger.info(f"Retrieving directions from {from_location} to {to_location}")
+# Message keys (wayfinding_common.messages) of the steps picked for routes
+# without written directions
+POSSIBLE_STEPS = [
+    "directions.turn_right",
+    "directions.turn_left",
+    "directions.straight",
+    "directions.escalator",
+    "directions.elevator",
+    "directions.follow_signs",
+    "directions.security",
+    "directions.corridor",
+    "directions.bridge",
+    "directions.stairs_down",
+]
 
-        if from_location == "checkin" and to_location == "gate_b4":
-            direction_steps = [
-                {"step": f"Leave {from_location} and turn right", "duration": "1 min"},
-                {"step": "Continue up escalator", "duration": "1 min"},
-                {"step": "Turn right", "duration": "8 min"},
-                {"step": "Turn left", "duration": "3 min"},
-                {"step": "Arrive at gate B4", "duration": "0 min"},
-            ]
-        else:
-            possible_steps = [
-                "Turn right",
-                "Turn left",
-                "Go straight",
-                "Take the escalator",
-                "Take the elevator",
-                "Follow the signs",
-                "Pass through security",
-                "Walk along the corridor",
-                "Cross the bridge",
-                "Go down the stairs",
-            ]
-
-            num_steps = random.randint(3, 7)
-            direction_steps = []
-
-            for _ in range(num_steps):
-                step = random.choice(possible_steps)
-                duration = f"{random.randint(1, 10)} min"
-                direction_steps.append({"step": step, "duration": duration})
-
-            direction_steps.append(
-                {"step": f"Arrive at {to_location}", "duration": "1 min"}
-            )
 
-        map_image = ""
-        try:
-            bucket_name = os.environ.get("MAP_IMAGE_BUCKET")
-            logger.info(f"MAP_IMAGE_BUCKET: {bucket_name}")
+def response_format_of(event):
+    """The requested ``format``; raises ValueError for an unknown one."""
+    response_format = (event.get("queryStringParameters") or {}).get("format", "image")
+    if response_format not in RESPONSE_FORMATS:
+        raise ValueError(
+            f"Unknown format '{response_format}', expected one of "
+            + ", ".join(RESPONSE_FORMATS)
+        )
+    return response_format
+
+
+def place_name(venue, location):
+    return venue.nodes[location]["name"] if location in venue else location
+
+
+def steps_between(messages, venue, from_location, to_location):
+    """``direction_steps`` in the language of ``messages``, a ``Catalogue``."""
+
+    def step(key, minutes, **params):
+        return {
+            "step": messages.render(key, **params),
+            "duration": messages.render("directions.duration", minutes=minutes),
+        }
+
+    if from_location == "checkin" and to_location == "gate_b4":
+        return [
+            step("directions.leave", 1, location=place_name(venue, from_location)),
+            step("directions.escalator_up", 1),
+            step("directions.turn_right", 8),
+            step("directions.turn_left", 3),
+            step("directions.arrive", 0, location=place_name(venue, to_location)),
+        ]
+
+    steps = [
+        step(random.choice(POSSIBLE_STEPS), random.randint(1, 10))
+        for _ in range(random.randint(3, 7))
+    ]
+    steps.append(step("directions.arrive", 1, location=place_name(venue, to_location)))
+    return steps
+
 
-            if bucket_name:
-                s3_key = f"maps/{from_location}_to_{to_location}.png"
+def find_map_image(venue, from_location, to_location):
+    """
+    The URL of the hand-drawn map for the pair, else of the drawn route, or
+    "" when there is neither. Hand-drawn maps show the usual walk, so they
+    are passed over while live conditions alter any walkway.
+    """
+    map_image = ""
+    try:
+        bucket_name = os.environ.get("MAP_IMAGE_BUCKET")
+        logger.debug("MAP_IMAGE_BUCKET: %s", bucket_name)
+
+        if bucket_name:
+            s3_key = f"maps/{from_location}_to_{to_location}.png"
+            draw = bool(venue.altered)
+            if not draw:
                 try:
-                    s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+                    with span("s3_head"):
+                        aws.client("s3").head_object(Bucket=bucket_name, Key=s3_key)
                     map_image = f"https://{bucket_name}.s3.amazonaws.com/{s3_key}"
-                    logger.info(f"Map image URL: {map_image}")
+                    logger.info("Map image URL: %s", map_image)
                 except ClientError as e:
                     if e.response["Error"]["Code"] == "404":
-                        logger.warning(f"Map image not found: {s3_key}")
+                        draw = True
                     else:
-                        logger.error(f"Error checking for map image: {str(e)}")
+                        logger.error("Error checking for map image: %s", e)
+            if draw:
+                # No hand-drawn map to use; draw the route, or reuse its drawing
+                route = venue.route(from_location, to_location)
+                if route:
+                    map_image = route_maps(aws.client("s3"), bucket_name).url(route)
+                    logger.info("Route map URL: %s", map_image)
+                else:
+                    logger.warning("Map image not found: %s", s3_key)
+        else:
+            logger.warning("MAP_IMAGE_BUCKET environment variable not set")
+    except Exception as e:
+        logger.error("Error processing map image: %s", e)
+    return map_image
+
+
+def conditions_body(conditions):
+    walkways = []
+    for key, value in sorted(conditions.walks.items()):
+        a, b = key.split("|")
+        walkway = {"from": a, "to": b}
+        walkway.update({"closed": True} if value == CLOSED else {"seconds": value})
+        walkways.append(walkway)
+    return {
+        "venue": conditions.venue.version,
+        "snapshot": conditions.snapshot,
+        "walkways": walkways,
+    }
+
+
+def handle_conditions_request(event):
+    """
+    ``GET /directions/conditions``: the walkways whose times are overridden.
+    ``POST`` with ``{"walkways": [{"from", "to", "seconds" | "closed"}]}``
+    overrides them; a walkway with neither gets its usual time back.
+    """
+    conditions = venue_conditions()
+    if conditions is None:
+        return error_response(404, "Not Found", message="Live conditions are not configured")
+
+    if event.get("httpMethod") == "POST":
+        try:
+            body = json.loads(event.get("body") or "{}")
+            changes = parse_changes(conditions.venue, body.get("walkways"))
+        except (ValueError, TypeError, AttributeError) as e:
+            return error_response(400, "Bad Request", message=str(e))
+        try:
+            with span("update"):
+                snapshot, _ = conditions.update(changes)
+        except ClientError as e:
+            logger.error("Error updating conditions: %s", e)
+            return aws_error_response(e)
+        logger.info("Conditions snapshot %d: %d walkway(s) changed", snapshot, len(changes))
+    else:
+        conditions.current()
+
+    return json_response(200, conditions_body(conditions))
+
+
+def handle_itinerary_request(event):
+    """
+    ``POST /directions/itinerary``: the walk from ``from`` through ``stops``
+    (to ``to``), in the given order with ``ordered``, else the fastest one.
+    """
+    try:
+        response_format = response_format_of(event)
+        body = json.loads(event.get("body") or "{}")
+    except (ValueError, TypeError) as e:
+        return error_response(400, "Bad Request", message=str(e))
+
+    start = body.get("from")
+    end = body.get("to")
+    stops = body.get("stops", [])
+    if (
+        not isinstance(start, str)
+        or not start
+        or (end is not None and not isinstance(end, str))
+        or not isinstance(stops, list)
+        or not all(isinstance(stop, str) and stop for stop in stops)
+    ):
+        return error_response(
+            400,
+            "Bad Request",
+            message="'from' must be a location, 'to' a location or null and "
+            "'stops' a list of locations",
+        )
+
+    ordered = body.get("ordered") is True
+    logger.info("Planning itinerary from %s through %d stop(s)", start, len(stops))
+    venue = current_venue()
+    try:
+        with span("plan"):
+            itinerary = plan_itinerary(venue, start, stops, end or None, ordered)
+    except ValueError as e:
+        return error_response(400, "Bad Request", message=str(e))
+
+    legs = []
+    for route in itinerary.legs:
+        leg = {"from": route.nodes[0], "to": route.nodes[-1], "seconds": route.seconds}
+        if response_format == "geometry":
+            with span("geometry"):
+                leg["route_geometry"] = route_geometry(route)
+        else:
+            leg["map_image"] = find_map_image(venue, leg["from"], leg["to"])
+        legs.append(leg)
+
+    with span("serialize"):
+        response_body = json.dumps(
+            {
+                "from": start,
+                "to": end,
+                "stops": itinerary.order,
+                "ordered": ordered,
+                "method": itinerary.method,
+                "seconds": itinerary.seconds,
+                "legs": legs,
+            }
+        )
+    return json_response(200, response_body)
+
+
+def handle_nearest_request(event):
+    """
+    ``GET /directions/nearest?from=&category=[&k=][&floor=]``: the ``k``
+    facilities of ``category`` quickest to walk to, quickest first. With
+    ``format=geometry`` each carries the route to its location.
+    """
+    query = event.get("queryStringParameters") or {}
+    try:
+        response_format = response_format_of(event)
+        k = int(query.get("k", DEFAULT_K))
+        if not 1 <= k <= MAX_K:
+            raise ValueError(f"'k' must be between 1 and {MAX_K}")
+    except ValueError as e:
+        return error_response(400, "Bad Request", message=str(e))
+    origin = query.get("from")
+    category = query.get("category")
+    if not origin or not category:
+        return error_response(
+            400, "Bad Request", message="'from' and 'category' are required"
+        )
+
+    venue = current_venue()
+    try:
+        with span("nearest"):
+            nearest = poi_index(venue).nearest(origin, category, k, query.get("floor"))
+    except ValueError as e:
+        return error_response(400, "Bad Request", message=str(e))
+
+    pois = []
+    for seconds, poi in nearest:
+        entry = {
+            "id": poi["id"],
+            "name": poi["name"],
+            "category": poi["category"],
+            "floor": poi["floor"],
+            "location": poi["location"],
+            "seconds": seconds,
+        }
+        if response_format == "geometry":
+            with span("geometry"):
+                entry["route_geometry"] = route_geometry(venue.route(origin, poi["location"]))
+        pois.append(entry)
+
+    with span("serialize"):
+        response_body = json.dumps({"from": origin, "category": category, "pois": pois})
+    return json_response(200, response_body)
+
+
+@skip_warmers
+@traced_handler("directions")
+def handler(event, context):
+    start_request(logger, event, context)
+    logger.debug("Received event: %s", Redacted(event))
+    try:
+        if event.get("resource") == ITINERARY_RESOURCE:
+            return handle_itinerary_request(event)
+        if event.get("resource") == CONDITIONS_RESOURCE:
+            return handle_conditions_request(event)
+        if event.get("resource") == NEAREST_RESOURCE:
+            return handle_nearest_request(event)
+
+        from_location = event["pathParameters"]["from"]
+        to_location = event["pathParameters"]["to"]
+
+        try:
+            response_format = response_format_of(event)
+        except ValueError as e:
+            return error_response(400, "Bad Request", message=str(e))
+
+        logger.info("Retrieving directions from %s to %s", from_location, to_location)
+
+        venue = current_venue()
+        messages = catalogue(
+            (event.get("queryStringParameters") or {}).get("language", DEFAULT_LOCALE)
+        )
+        direction_steps = steps_between(messages, venue, from_location, to_location)
+
+        map_image = ""
+        geometry = None
+        if response_format == "geometry":
+            # No image to look up or draw; the kiosk draws over its own plans
+            route = venue.route(from_location, to_location)
+            if route:
+                with span("geometry"):
+                    geometry = route_geometry(route)
             else:
-                logger.warning("MAP_IMAGE_BUCKET environment variable not set")
-        except Exception as e:
-            logger.error(f"Error processing map image: {str(e)}")
+                logger.warning("No route from %s to %s", from_location, to_location)
+        else:
+            map_image = find_map_image(venue, from_location, to_location)
 
         response = {
             "from": from_location,
             "to": to_location,
+            "language": messages.locale,
             "map_image": map_image,
             "direction_steps": direction_steps,
         }
+        if response_format == "geometry":
+            response["route_geometry"] = geometry
 
-        logger.info(f"Returning response: {json.dumps(response)}")
-        return {
-            "statusCode": 200,
-            "body": json.dumps(response),
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-            },
-        }
+        with span("serialize"):
+            body = json.dumps(response)
+        logger.debug("Returning response: %s", body)
+        return json_response(200, body)
 
     except KeyError as e:
-        logger.error(f"Missing required parameter: {str(e)}")
-        return {
-            "statusCode": 400,
-            "body": json.dumps(
-                {
-                    "error": "Bad Request",
-                    "message": f"Missing required parameter: {str(e)}",
-                    "details": {"event": event, "missing_key": str(e)},
-                }
-            ),
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-            },
-        }
+        logger.error("Missing required parameter: %s", e)
+        return error_response(
+            400, "Bad Request", message=f"Missing required parameter: {str(e)}"
+        )
     except Exception as e:
-        logger.error(f"Error occurred: {str(e)}")
-        logger.error(traceback.format_exc())
-        return {
-            "statusCode": 500,
-            "body": json.dumps(
-                {
-                    "error": "Internal Server Error",
-                    "message": str(e),
-                    "details": {
-                        "event": event,
-                        "exception_type": type(e).__name__,
-                        "stacktrace": traceback.format_exc(),
-                    },
-                }
-            ),
-            "headers": {
-                "Content-Type": "application/json",
-                "Access-Control-Allow-Origin": "*",
-            },
-        }
+        # The traceback and event go to the log, not into the response body
+        logger.error("Error occurred: %s (event: %s)", e, Redacted(event), exc_info=True)
+        return error_response(500, "Internal Server Error", message=str(e))
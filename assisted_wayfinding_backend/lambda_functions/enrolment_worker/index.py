@@ -0,0 +1,153 @@
+import json
+import os
+
+from botocore.exceptions import ClientError
+from wayfinding_common import aws, jobs, rekognition
+from wayfinding_common.enrolment import Enrolment
+from wayfinding_common.hot_collection import HotCollection
+from wayfinding_common.responses import aws_error_status, bounded
+from wayfinding_common.shards import CollectionShards
+from wayfinding_common.timing import span, traced_handler
+
+# 409: another enrolment of the user committed first, rerun against it.
+# 5xx: throttling or a transient AWS fault.
+RETRYABLE_STATUS = {409, 500, 503}
+
+aws.prewarm(
+    clients=(("rekognition", rekognition.CLIENT_OPTIONS), "s3"), resources=("dynamodb",)
+)
+
+
+class RetryJob(Exception):
+    """The job failed in a way another attempt may fix."""
+
+
+def job_enrolment(message, table, rekognition, s3, collection_id, bucket_name):
+    return Enrolment(
+        table,
+        rekognition,
+        s3,
+        # The collection of the traveller's terminal
+        CollectionShards.from_environment(collection_id).for_passenger(message["passengerData"]),
+        bucket_name,
+        message["userId"],
+        hot_collection=HotCollection.from_environment(),
+    )
+
+
+def run_enrolment(message, *enrolment_args):
+    """Index and commit a staged enrolment; returns the HTTP-style outcome."""
+    enrolment = job_enrolment(message, *enrolment_args)
+    try:
+        # Reloaded: the record may have changed since the photos were staged
+        enrolment.load()
+        enrolment.index(message["imageHashes"])
+        return enrolment.commit(message["passengerData"])
+    except ClientError as e:
+        print(f"Error enrolling {message['userId']}: {str(e)}")
+        try:
+            enrolment.release()
+        except ClientError as cleanup_error:
+            print(f"Error releasing faces for {message['userId']}: {str(cleanup_error)}")
+        return aws_error_status(e), {"error": str(e)}
+
+
+def discard_photos(message, *enrolment_args):
+    """Delete the failed job's staged photos that the current record does not use."""
+    enrolment = job_enrolment(message, *enrolment_args)
+    try:
+        enrolment.load()
+        enrolment.discard(message["imageHashes"])
+    except ClientError as e:
+        print(f"Error deleting staged photos for {message['userId']}: {str(e)}")
+
+
+def notify(connection_id, job):
+    """Push the finished job to the kiosk's WebSocket connection, if any."""
+    endpoint = os.environ.get("WEBSOCKET_API_ENDPOINT")
+    if not connection_id or not endpoint:
+        return
+    try:
+        with span("post_to_connection"):
+            aws.client("apigatewaymanagementapi", endpoint_url=endpoint).post_to_connection(
+                ConnectionId=connection_id,
+                Data=json.dumps(
+                    {
+                        "category": "enrolment",
+                        "kind": "event",
+                        "name": "enrolmentJobUpdate",
+                        "body": job,
+                    },
+                    default=str,
+                ),
+            )
+    except ClientError as e:
+        print(f"Error notifying connection {connection_id}: {str(e)}")
+
+
+def process_record(record, store, enrolment_args, max_receives):
+    message = json.loads(record["body"])
+    job_id = message["jobId"]
+    receive_count = int(record.get("attributes", {}).get("ApproximateReceiveCount", 1))
+    store.update(job_id, jobs.RUNNING, attempts=receive_count)
+
+    try:
+        status_code, result = run_enrolment(message, *enrolment_args)
+    except Exception as e:
+        print(f"Unexpected error in enrolment job {job_id}: {str(e)}")
+        status_code, result = 500, {"error": "An unexpected error occurred."}
+
+    if status_code < 300:
+        job = store.update(job_id, jobs.SUCCEEDED, statusCode=status_code, result=result)
+    elif status_code in RETRYABLE_STATUS and receive_count < max_receives:
+        store.update(job_id, jobs.QUEUED, lastError=bounded(result["error"]))
+        raise RetryJob(result["error"])
+    else:
+        job = store.update(
+            job_id, jobs.FAILED, statusCode=status_code, error=bounded(result["error"])
+        )
+        discard_photos(message, *enrolment_args)
+    print(f"Enrolment job {job_id} {job['status']} after {receive_count} attempt(s)")
+    notify(message.get("connectionId"), job)
+
+
+@traced_handler("enrolment_worker")
+def handler(event, context):
+    """
+    Consume a batch of enrolment jobs from the queue. Jobs that should be
+    retried are reported as batch item failures, so only they are
+    redelivered; after ``ENROLMENT_MAX_RECEIVES`` deliveries a job fails.
+    """
+    table_name = os.environ["DYNAMODB_TABLE_NAME"]
+    collection_id = os.environ["REKOGNITION_COLLECTION_ID"]
+    bucket_name = os.environ["S3_BUCKET_NAME"]
+    max_receives = int(os.environ.get("ENROLMENT_MAX_RECEIVES", "3"))
+
+    dynamodb = aws.resource("dynamodb")
+    store = jobs.JobStore(dynamodb.Table(os.environ["ENROLMENT_JOBS_TABLE"]))
+    enrolment_args = (
+        dynamodb.Table(table_name),
+        # Throttled IndexFaces calls back off in the gateway (the worker's
+        # REKOGNITION_* settings allow more attempts); only what is still
+        # failing after that goes back to the queue
+        rekognition.gateway(),
+        aws.client("s3"),
+        collection_id,
+        bucket_name,
+    )
+
+    failures = []
+    for record in event.get("Records", []):
+        try:
+            process_record(record, store, enrolment_args, max_receives)
+        except RetryJob as e:
+            print(f"Retrying message {record['messageId']}: {str(e)}")
+            failures.append({"itemIdentifier": record["messageId"]})
+        except (ValueError, KeyError) as e:
+            # Malformed message: redelivering it cannot help
+            print(f"Dropping malformed message {record['messageId']}: {str(e)}")
+        except Exception as e:
+            print(f"Unexpected error processing {record['messageId']}: {str(e)}")
+            failures.append({"itemIdentifier": record["messageId"]})
+
+    return {"batchItemFailures": failures}
@@ -1,11 +1,107 @@
-import base64
 import json
 import os
 
-import boto3
 from botocore.exceptions import ClientError
-
-
+from wayfinding_common import aws, jobs, rekognition
+from wayfinding_common.enrolment import Enrolment
+from wayfinding_common.hot_collection import HotCollection
+from wayfinding_common.responses import (
+    aws_error_response,
+    error_response,
+    json_response,
+)
+from wayfinding_common.shards import CollectionShards
+from wayfinding_common.timing import span, traced_handler
+from wayfinding_common.warmer import skip_warmers
+
+JOBS_RESOURCE = "/index/jobs"
+JOB_STATUS_RESOURCE = "/index/jobs/{jobId}"
+
+aws.prewarm(
+    clients=(("rekognition", rekognition.CLIENT_OPTIONS), "s3"), resources=("dynamodb",)
+)
+
+
+def submit_job(event, table, s3, collection_id, bucket_name):
+    """
+    Stage the photos, record a queued job and enqueue it for the enrolment
+    worker. Answers 202 with the job ID without waiting for indexing.
+    """
+    jobs_table_name = os.environ.get("ENROLMENT_JOBS_TABLE")
+    if not jobs_table_name or not os.environ.get("ENROLMENT_QUEUE_URL"):
+        return error_response(500, "Asynchronous enrolment is not configured")
+
+    with span("parse"):
+        body = json.loads(event["body"])
+    user_id = body["userId"]
+    images = body["images"]
+    passenger_data = body["passengerData"]
+    if not isinstance(images, list) or not images:
+        return error_response(400, "'images' must be a non-empty list")
+
+    # The worker indexes into the same shard; resolve it the same way
+    enrolment = Enrolment(
+        table,
+        None,
+        s3,
+        CollectionShards.from_environment(collection_id).for_passenger(passenger_data),
+        bucket_name,
+        user_id,
+    )
+    enrolment.load()
+    image_hashes = enrolment.stage(images)
+
+    job_id = jobs.new_job_id()
+    store = jobs.JobStore(
+        aws.resource("dynamodb").Table(jobs_table_name),
+        ttl_seconds=int(os.environ.get("ENROLMENT_JOB_TTL_SECONDS", jobs.DEFAULT_TTL_SECONDS)),
+    )
+    job = store.create(job_id, user_id, len(image_hashes))
+    message = {
+        "jobId": job_id,
+        "userId": user_id,
+        "imageHashes": image_hashes,
+        "passengerData": passenger_data,
+    }
+    # Optional WebSocket connection to notify when the job finishes
+    if body.get("connectionId"):
+        message["connectionId"] = body["connectionId"]
+    try:
+        jobs.queue_from_environment().send(message)
+    except ClientError as e:
+        print(f"Error enqueueing enrolment job {job_id}: {str(e)}")
+        store.update(job_id, jobs.FAILED, error="Could not enqueue the job")
+        return aws_error_response(e, "Could not enqueue the enrolment job")
+
+    print(f"Enrolment job {job_id} queued for {user_id}")
+    return json_response(
+        202,
+        {
+            "message": "Enrolment job accepted",
+            "jobId": job_id,
+            "userId": user_id,
+            "status": job["status"],
+        },
+    )
+
+
+def job_status(event):
+    jobs_table_name = os.environ.get("ENROLMENT_JOBS_TABLE")
+    if not jobs_table_name:
+        return error_response(500, "Asynchronous enrolment is not configured")
+
+    job_id = (event.get("pathParameters") or {}).get("jobId")
+    if not job_id:
+        return error_response(400, "Missing 'jobId' in the event's path parameters")
+
+    job = jobs.JobStore(aws.resource("dynamodb").Table(jobs_table_name)).get(job_id)
+    if job is None:
+        return error_response(404, f"No enrolment job found with ID: {job_id}")
+    return json_response(200, job)
+
+
+@skip_warmers
+@traced_handler("face_indexing")
 def handler(event, context):
     print("Face Indexing Lambda function invoked")
 
@@ -27,83 +123,44 @@ def handler(event, context):
             error_message = (
                 f"Missing required environment variables: {', '.join(missing_vars)}"
             )
-            return {
-                "statusCode": 500,
-                "body": json.dumps({"error": error_message}),
-            }
+            return error_response(500, error_message)
+
+        if event.get("resource") == JOB_STATUS_RESOURCE:
+            return job_status(event)
 
         # Initialize AWS clients
-        dynamodb = boto3.resource("dynamodb")
-        rekognition = boto3.client("rekognition")
-        s3 = boto3.client("s3")
+        dynamodb = aws.resource("dynamodb")
+        s3 = aws.client("s3")
         table = dynamodb.Table(table_name)
 
+        if event.get("resource") == JOBS_RESOURCE:
+            return submit_job(event, table, s3, collection_id, bucket_name)
+
         # Extract data from the event
-        body = json.loads(event["body"])
+        with span("parse"):
+            body = json.loads(event["body"])
         user_id = body["userId"]
         images = body["images"]
         passenger_data = body["passengerData"]
 
-        face_ids = []
-        image_urls = []
-        for i, image in enumerate(images):
-            # Decode and upload image to S3
-            image_bytes = base64.b64decode(image)
-            s3_key = f"user_photos/{user_id}_face_{i}.jpg"
-            s3.put_object(Bucket=bucket_name, Key=s3_key, Body=image_bytes)
-
-            # Store the S3 URL
-            image_url = f"https://{bucket_name}.s3.amazonaws.com/{s3_key}"
-            image_urls.append(image_url)
-
-            # Index the face in Rekognition
-            index_response = rekognition.index_faces(
-                CollectionId=collection_id,
-                Image={"S3Object": {"Bucket": bucket_name, "Name": s3_key}},
-                ExternalImageId=user_id,  # Associate face with user_id
-                DetectionAttributes=["ALL"],
-            )
-
-            if index_response["FaceRecords"]:
-                face_ids.append(index_response["FaceRecords"][0]["Face"]["FaceId"])
-
-        # Optionally, handle if no faces are detected
-        if not face_ids:
-            return {
-                "statusCode": 400,
-                "body": json.dumps(
-                    {"error": "No faces detected in the provided images."}
-                ),
-            }
-
-        # Store user data in DynamoDB
-        table.put_item(
-            Item={
-                "userId": user_id,
-                "faceIds": face_ids,
-                "imageUrls": image_urls,
-                "rekognition_collection_id": collection_id,
-                **passenger_data,
-            }
+        enrolment = Enrolment(
+            table,
+            rekognition.gateway(),
+            s3,
+            # The collection of the traveller's terminal
+            CollectionShards.from_environment(collection_id).for_passenger(passenger_data),
+            bucket_name,
+            user_id,
+            hot_collection=HotCollection.from_environment(),
         )
-
-        return {
-            "statusCode": 200,
-            "body": json.dumps(
-                {
-                    "message": "User created and faces indexed successfully",
-                    "userId": user_id,
-                    "faceIds": face_ids,
-                }
-            ),
-        }
+        enrolment.load()
+        enrolment.index(enrolment.stage(images))
+        status_code, response_body = enrolment.commit(passenger_data)
+        return json_response(status_code, response_body)
 
     except ClientError as e:
         print(f"Error: {str(e)}")
-        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+        return aws_error_response(e)
     except Exception as e:
         print(f"Unexpected Error: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "An unexpected error occurred."}),
-        }
+        return error_response(500, "An unexpected error occurred.")
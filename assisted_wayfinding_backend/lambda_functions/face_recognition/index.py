@@ -1,26 +1,156 @@
 import base64
+import hashlib
 import json
 import os
-import logging
-from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
 
-import boto3
-from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
+from wayfinding_common import aws, rekognition
+from wayfinding_common.hot_collection import HotCollection, hot_user_id
+from wayfinding_common.responses import (
+    aws_error_response,
+    error_response,
+    json_response,
+)
+from wayfinding_common.serialization import dumps, json_object
+from wayfinding_common.shards import CollectionShards
+from wayfinding_common.structured_logging import (
+    Redacted,
+    configure_logging,
+    start_request,
+)
+from wayfinding_common.timing import metric, span, traced_handler
+from wayfinding_common.warmer import skip_warmers
 
 # Set up logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = configure_logging()
 
-# Helper function to handle Decimal serialization
-def decimal_default(obj):
-    if isinstance(obj, Decimal):
-        return float(obj)
-    raise TypeError
+aws.prewarm(
+    clients=(("rekognition", rekognition.CLIENT_OPTIONS), "s3"), resources=("dynamodb",)
+)
 
+HOT_TIER = "hot"
+SHARD_TIER = "shard"  # the kiosk's terminal
+FULL_TIER = "full"  # the default collection
+ALL_TIER = "all"  # every collection at once
+
+_executor = None
+
+def record_tier_metric(tier, hit):
+    """``<Tier>CollectionHit`` for the request; its average is the tier's hit rate."""
+    metric(f"{tier.capitalize()}CollectionHit", 1 if hit else 0)
+
+def search_tiers_for(body, shards, hot):
+    """
+    The ``(tier, [collection_id])`` pairs to search for a request, in order.
+    A kiosk that sends its ``location`` searches its terminal's shard, then
+    the default collection of unsharded records; transfer passengers, and
+    kiosks that send no known location, search every collection at once.
+    """
+    if not shards.enabled:
+        tiers = [(FULL_TIER, [shards.default_collection])]
+    else:
+        kiosk_collection = shards.for_location(body.get("location"))
+        if body.get("transfer") is True or kiosk_collection is None:
+            tiers = [(ALL_TIER, shards.all())]
+        else:
+            tiers = [(SHARD_TIER, [kiosk_collection])]
+            if kiosk_collection != shards.default_collection:
+                tiers.append((FULL_TIER, [shards.default_collection]))
+    if hot:
+        tiers.insert(0, (HOT_TIER, [hot.collection_id]))
+    return tiers
+
+def hot_match_items(table, search_response):
+    """The record of a hot match, found by the user ID its face carries."""
+    # Hot faces are not recorded on the item
+    face = search_response["FaceMatches"][0]["Face"]
+    external_image_id = face.get("ExternalImageId")
+    if not external_image_id:
+        return []
+    with span("dynamodb_get"):
+        response = table.get_item(Key={"userId": hot_user_id(external_image_id)})
+    return [response["Item"]] if "Item" in response else []
+
+def kiosk_may_recognize(item, tiers, shards):
+    """
+    Whether the kiosk searching ``tiers`` may recognize the passenger of
+    ``item``. The hot collection holds every terminal's travellers, so a hot
+    match counts only when its record is in a collection the kiosk searches.
+    """
+    collection = item.get("rekognition_collection_id") or shards.for_passenger(item)
+    return any(collection in ids for name, ids in tiers if name != HOT_TIER)
+
+def search_collection(collection_id, image_hash, image, required):
+    """One search, or None when an optional collection does not exist."""
+    try:
+        # Identical photos arriving together share one search
+        return rekognition.gateway().search_faces_by_image(
+            coalesce_key=(collection_id, image_hash),
+            CollectionId=collection_id,
+            Image=image,
+            MaxFaces=1,
+            FaceMatchThreshold=70,  # Adjust this threshold as needed
+        )
+    except ClientError as e:
+        if required or e.response["Error"]["Code"] != "ResourceNotFoundException":
+            raise
+        logger.warning("Collection %s not found, skipping it", collection_id)
+        return None
+
+def search_in_parallel(collection_ids, image_hash, image, default_collection):
+    """Search the collections concurrently; returns the best match's response."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(thread_name_prefix="search")
+    futures = [
+        _executor.submit(
+            search_collection, collection_id, image_hash, image,
+            collection_id == default_collection,
+        )
+        for collection_id in collection_ids
+    ]
+    responses = [response for response in (future.result() for future in futures) if response]
+    matched = [response for response in responses if response["FaceMatches"]]
+    if matched:
+        return max(matched, key=lambda response: response["FaceMatches"][0]["Similarity"])
+    return responses[0] if responses else None
+
+def search_tiers(tiers, image_bytes, image, default_collection=None):
+    """
+    Search the ``(tier, [collection_id])`` pairs in order until one matches;
+    a tier of several collections searches them in parallel. Returns the
+    last search response and the tier that matched, or None. Only the
+    ``default_collection`` must exist.
+    """
+    image_hash = hashlib.sha256(image_bytes).hexdigest()
+    response = {"FaceMatches": []}
+    for tier, collection_ids in tiers:
+        with span(f"rekognition_search_{tier}"):
+            if len(collection_ids) == 1:
+                tier_response = search_collection(
+                    collection_ids[0], image_hash, image,
+                    collection_ids[0] == default_collection,
+                )
+            else:
+                tier_response = search_in_parallel(
+                    collection_ids, image_hash, image, default_collection
+                )
+        if tier_response is None:
+            continue
+        response = tier_response
+        hit = bool(response["FaceMatches"])
+        record_tier_metric(tier, hit)
+        if hit:
+            return response, tier
+    return response, None
+
+@skip_warmers
+@traced_handler("face_recognition")
 def handler(event, context):
+    start_request(logger, event, context)
     logger.info("Face Recognition Lambda function invoked")
-    logger.info(f"Event: {json.dumps(event)}")
+    logger.debug("Event: %s", Redacted(event))
 
     # Get environment variables
     table_name = os.environ.get("DYNAMODB_TABLE_NAME")
@@ -29,134 +159,115 @@ def handler(event, context):
 
     if not table_name or not collection_id or not bucket_name:
         logger.error("Missing required environment variables")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "Missing required environment variables"}),
-        }
+        return error_response(500, "Missing required environment variables")
 
     # Initialize AWS clients
-    dynamodb = boto3.resource("dynamodb")
-    rekognition = boto3.client("rekognition")
-    s3 = boto3.client("s3")
+    dynamodb = aws.resource("dynamodb")
+    s3 = aws.client("s3")
     table = dynamodb.Table(table_name)
 
     try:
         # Extract base64-encoded image from the event
-        body = json.loads(event["body"])
-        if "image" not in body:
-            logger.error("Missing 'image' in request body")
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "Missing 'image' in request body"}),
-            }
-        image_bytes = base64.b64decode(body["image"])
+        with span("decode"):
+            body = json.loads(event["body"])
+            if "image" not in body:
+                logger.error("Missing 'image' in request body")
+                return error_response(400, "Missing 'image' in request body")
+            image_bytes = base64.b64decode(body["image"])
 
         # Upload image to S3 temporarily
         s3_key = f"temp_images/{context.aws_request_id}.jpg"
-        s3.put_object(Bucket=bucket_name, Key=s3_key, Body=image_bytes)
-        logger.info(f"Uploaded temporary image to S3: {s3_key}")
+        with span("s3_put"):
+            s3.put_object(Bucket=bucket_name, Key=s3_key, Body=image_bytes)
+        logger.info("Uploaded temporary image to S3: %s", s3_key)
 
-        # Search for matching faces in Rekognition
-        search_response = rekognition.search_faces_by_image(
-            CollectionId=collection_id,
-            Image={"S3Object": {"Bucket": bucket_name, "Name": s3_key}},
-            MaxFaces=1,
-            FaceMatchThreshold=70,  # Adjust this threshold as needed
+        # Search for matching faces in Rekognition: travellers departing soon
+        # first, then those enrolled in this kiosk's terminal
+        shards = CollectionShards.from_environment()
+        tiers = search_tiers_for(body, shards, HotCollection.from_environment())
+        image = {"S3Object": {"Bucket": bucket_name, "Name": s3_key}}
+        with span("rekognition_search"):
+            search_response, tier = search_tiers(
+                tiers, image_bytes, image, default_collection=collection_id
+            )
+
+        items = None
+        if tier == HOT_TIER:
+            items = hot_match_items(table, search_response)
+            if items and not kiosk_may_recognize(items[0], tiers, shards):
+                # Departs soon, but from another terminal: search this one's
+                logger.info("Hot match is enrolled in another terminal, searching on")
+                record_tier_metric(HOT_TIER, False)
+                with span("rekognition_search"):
+                    search_response, tier = search_tiers(
+                        [(name, ids) for name, ids in tiers if name != HOT_TIER],
+                        image_bytes,
+                        image,
+                        default_collection=collection_id,
+                    )
+                items = None
+        logger.info(
+            "Rekognition returned %d face match(es) from the %s collection",
+            len(search_response["FaceMatches"]),
+            tier or FULL_TIER,
         )
-        logger.info(f"Rekognition search response: {json.dumps(search_response)}")
+        logger.debug("Rekognition search response: %s", Redacted(search_response))
 
         # Delete the temporary image
-        s3.delete_object(Bucket=bucket_name, Key=s3_key)
-        logger.info(f"Deleted temporary image from S3: {s3_key}")
+        with span("s3_delete"):
+            s3.delete_object(Bucket=bucket_name, Key=s3_key)
+        logger.info("Deleted temporary image from S3: %s", s3_key)
 
         if search_response["FaceMatches"]:
             face_match = search_response["FaceMatches"][0]
             face_id = face_match["Face"]["FaceId"]
             similarity = face_match["Similarity"]
-            logger.info(f"Face match found. FaceId: {face_id}, Similarity: {similarity}")
+            logger.info("Face match found. FaceId: %s, Similarity: %s", face_id, similarity)
 
-            # Query DynamoDB
-            response = table.scan(
-                FilterExpression=boto3.dynamodb.conditions.Attr("faceIds").contains(face_id)
-            )
-            logger.info(f"DynamoDB scan response: {json.dumps(response, default=decimal_default)}")
-
-            if response["Items"]:
-                user_data = response["Items"][0]
-                logger.info(f"User data found: {json.dumps(user_data, default=decimal_default)}")
-                return {
-                    "statusCode": 200,
-                    "headers": {
-                        "Access-Control-Allow-Origin": "*",
-                        "Access-Control-Allow-Headers": "Content-Type",
-                        "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-                    },
-                    "body": json.dumps(
-                        {
-                            "message": "Face recognized",
-                            "passengerData": user_data,
-                        },
-                        default=decimal_default
-                    ),
-                }
+            if items is None:
+                # Query DynamoDB
+                # Only the match path builds a filter expression
+                from boto3.dynamodb.conditions import Attr
+
+                with span("dynamodb_scan"):
+                    response = table.scan(
+                        FilterExpression=Attr("faceIds").contains(face_id)
+                    )
+                items = response["Items"]
+            logger.info("DynamoDB returned %d item(s)", len(items))
+
+            if items:
+                # Serialize the passenger once and reuse it for the body and the log
+                with span("serialize"):
+                    user_json = dumps(items[0])
+                    body = json_object(
+                        {"message": "Face recognized"},
+                        raw={"passengerData": user_json},
+                    )
+                logger.debug("User data found: %s", user_json)
+                return json_response(200, body)
 
             logger.info("No passenger data found for the recognized face")
-            return {
-                "statusCode": 404,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type",
-                    "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-                },
-                "body": json.dumps({"message": "No passenger data found for the recognized face"}),
-            }
+            return json_response(
+                404, {"message": "No passenger data found for the recognized face"}
+            )
         else:
             logger.info("No matching face found")
-            return {
-                "statusCode": 404,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type",
-                    "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-                },
-                "body": json.dumps({"message": "No matching face found"}),
-            }
+            return json_response(404, {"message": "No matching face found"})
 
     except json.JSONDecodeError as e:
-        logger.error(f"JSON decode error: {str(e)}")
-        return {
-            "statusCode": 400,
-            "headers": {
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-            },
-            "body": json.dumps({"error": "Invalid JSON in request body"}),
-        }
+        logger.error("JSON decode error: %s", e)
+        return error_response(400, "Invalid JSON in request body")
     except ClientError as e:
-        logger.error(f"AWS client error: {str(e)}")
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-            },
-            "body": json.dumps({"error": str(e)}),
-        }
+        logger.error("AWS client error: %s", e)
+        return aws_error_response(e)
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-            },
-            "body": json.dumps({"error": "An unexpected error occurred"}),
-        }
+        logger.error("Unexpected error: %s", e, exc_info=True)
+        return error_response(500, "An unexpected error occurred")
 
 def get_passenger_id_from_face_id(face_id, table):
+    from boto3.dynamodb.conditions import Key
+
     try:
         # Query the table using a secondary index on faceId
         response = table.query(
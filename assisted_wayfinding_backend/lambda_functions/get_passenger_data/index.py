@@ -1,113 +1,494 @@
 import json
 import os
-import logging
-from decimal import Decimal
+import random
+import re
+import time
+from collections import OrderedDict
 
-import boto3
 from botocore.exceptions import ClientError
+from wayfinding_common import aws, flights
+from wayfinding_common.responses import (
+    aws_error_response,
+    error_response,
+    json_response,
+)
+from wayfinding_common.serialization import item_to_json, json_object
+from wayfinding_common.structured_logging import (
+    Redacted,
+    configure_logging,
+    start_request,
+)
+from wayfinding_common.timing import metric, span, timed, traced_handler
+from wayfinding_common.warmer import skip_warmers
 
 # Set up logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+logger = configure_logging()
 
-# Helper function to handle Decimal serialization
-def decimal_default(obj):
-    if isinstance(obj, Decimal):
-        return float(obj)
-    raise TypeError
+aws.prewarm(clients=("dynamodb",))
 
+# Named attribute sets so callers can fetch only what they render.
+# "full" returns the whole item without a projection.
+FIELD_PROFILES = {
+    "greeting": ["userId", "name", "language", "gender", "age"],
+    "boarding": [
+        "userId",
+        "name",
+        "language",
+        "flightno",
+        "next_flight_id",
+        "scheduled_date",
+        "flight_time",
+        "terminal",
+        "gate",
+        "flight_status",
+        "has_lounge_access",
+        "lounge_name",
+        "accessibilityPreferences",
+    ],
+    "full": None,
+}
+
+MAX_PROJECTED_FIELDS = 50
+FIELD_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+BATCH_RESOURCE = "/passenger/batch"
+MAX_BATCH_IDS = 500
+BATCH_GET_CHUNK_SIZE = 100  # DynamoDB BatchGetItem limit
+BATCH_GET_MAX_ATTEMPTS = 5
+BATCH_GET_BASE_DELAY = 0.05
+BATCH_GET_MAX_DELAY = 1.0
+
+FLIGHT_RESOURCE = "/flights/{flightNo}/passengers"
+DEFAULT_FLIGHT_PAGE_SIZE = 100
+MAX_FLIGHT_PAGE_SIZE = 500
+
+VERSION_ATTRIBUTE = "recordVersion"  # Bumped by face_indexing on every write
+_MISSING = object()
+
+def resolve_fields(query_params):
+    """
+    Work out which attributes to read from the ``profile`` and ``fields``
+    query parameters. Returns None when the whole item is wanted and raises
+    ValueError on an unknown profile or malformed field name.
+    """
+    profile = query_params.get("profile")
+    requested = query_params.get("fields")
+
+    if profile is not None and profile not in FIELD_PROFILES:
+        raise ValueError(
+            f"Unknown profile '{profile}', expected one of: {', '.join(FIELD_PROFILES)}"
+        )
+    if profile == "full" or (profile is None and not requested):
+        return None
+
+    fields = ["userId"]
+    if profile is not None:
+        fields.extend(FIELD_PROFILES[profile])
+    if requested:
+        fields.extend(field.strip() for field in requested.split(",") if field.strip())
+
+    # Preserve the caller's order while dropping duplicates
+    fields = list(dict.fromkeys(fields))
+
+    for field in fields:
+        if not FIELD_NAME_PATTERN.match(field):
+            raise ValueError(f"Invalid field name '{field}'")
+    if len(fields) > MAX_PROJECTED_FIELDS:
+        raise ValueError(f"At most {MAX_PROJECTED_FIELDS} fields can be requested")
+
+    return fields
+
+def projection_arguments(fields):
+    # Placeholders keep reserved words such as "name" usable in the projection
+    names = {f"#f{i}": field for i, field in enumerate(fields)}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+def passenger_key(persona_id):
+    return {'userId': {'S': persona_id}}
+
+@timed("dynamodb_get")
+def fetch_passenger(dynamodb, table_name, persona_id, fields=None):
+    """
+    Read one passenger with the low-level client, returning the item as JSON
+    text together with its version, or ``(None, None)`` when it is missing.
+    The version attribute is always read so the cache can validate the
+    entry later, but it is only returned in the item when it was asked for.
+    """
+    get_item_args = {'TableName': table_name, 'Key': passenger_key(persona_id)}
+    if fields is not None:
+        get_item_args.update(projection_arguments(
+            fields if VERSION_ATTRIBUTE in fields else fields + [VERSION_ATTRIBUTE]
+        ))
+    response = dynamodb.get_item(**get_item_args)
+    if 'Item' not in response:
+        return None, None
+
+    item = response['Item']
+    version = item.get(VERSION_ATTRIBUTE, {}).get('N')
+    if fields is not None and VERSION_ATTRIBUTE not in fields:
+        item.pop(VERSION_ATTRIBUTE, None)
+    return item_to_json(item), version
+
+class PassengerCache:
+    """
+    Bounded LRU read-through cache of serialized passenger items, kept for
+    the lifetime of the container. Hits are returned as ready-made JSON text.
+
+    Entries are keyed by persona and projection and expire ``ttl`` seconds
+    after they were read. Once an entry is older than ``revalidate_after``
+    seconds it is only served again after a projection read of the version
+    attribute shows the record has not been re-enrolled since. That read
+    saves transfer and deserialization, not capacity: DynamoDB charges a
+    GetItem for the whole item whatever the projection, so a revalidation
+    costs the same read units as a full fetch.
+    """
+
+    def __init__(self, max_entries, ttl, revalidate_after, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.revalidate_after = revalidate_after
+        self.clock = clock
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, dynamodb, table_name, persona_id, fields=None):
+        """Return ``(item, hit)``; item is None when the passenger does not exist."""
+        key = (persona_id, tuple(fields) if fields is not None else None)
+        now = self.clock()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            item, version, fetched_at, validated_at = entry
+            if now - fetched_at >= self.ttl:
+                self._evict(key)
+            elif now - validated_at < self.revalidate_after:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return item, True
+            elif self._current_version(dynamodb, table_name, persona_id) == version:
+                self._entries[key] = (item, version, fetched_at, now)
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return item, True
+            else:
+                self.stale += 1
+                self._evict(key)
+
+        self.misses += 1
+        item, version = fetch_passenger(dynamodb, table_name, persona_id, fields)
+        if item is not None:
+            self._entries[key] = (item, version, now, now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return item, False
+
+    def invalidate(self, persona_id):
+        """Drop every cached projection of ``persona_id``."""
+        for key in [key for key in self._entries if key[0] == persona_id]:
+            self._evict(key)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _evict(self, key):
+        del self._entries[key]
+        self.evictions += 1
+
+    @timed("dynamodb_version_read")
+    def _current_version(self, dynamodb, table_name, persona_id):
+        response = dynamodb.get_item(
+            TableName=table_name,
+            Key=passenger_key(persona_id),
+            ProjectionExpression="#v",
+            ExpressionAttributeNames={"#v": VERSION_ATTRIBUTE},
+        )
+        if 'Item' not in response:
+            return _MISSING
+        return response['Item'].get(VERSION_ATTRIBUTE, {}).get('N')
+
+passenger_cache = PassengerCache(
+    max_entries=int(os.environ.get("PASSENGER_CACHE_MAX_ENTRIES", "256")),
+    ttl=float(os.environ.get("PASSENGER_CACHE_TTL_SECONDS", "60")),
+    revalidate_after=float(os.environ.get("PASSENGER_CACHE_REVALIDATE_SECONDS", "5")),
+)
+
+def invalidate_passenger(persona_id):
+    """Invalidation hook for code sharing this container, e.g. after a local write."""
+    passenger_cache.invalidate(persona_id)
+
+def record_cache_metrics(hit):
+    """Cache counters for this request, on the stage timing metrics line."""
+    metric("PassengerCacheHit", 1 if hit else 0)
+    metric("PassengerCacheHitRatio", round(passenger_cache.hit_ratio, 4), unit="None")
+    metric("PassengerCacheEntries", len(passenger_cache))
+    metric("PassengerCacheEvictions", passenger_cache.evictions)
+
+@timed("dynamodb_batch_get")
+def batch_get_passengers(dynamodb, table_name, persona_ids, fields=None):
+    """
+    Fetch ``persona_ids`` with BatchGetItem in chunks of 100 keys, retrying
+    UnprocessedKeys with jittered exponential backoff.
+
+    Returns a dict of items as JSON text keyed by userId and the list of IDs
+    that were still unprocessed once the retries ran out.
+    """
+    found = {}
+    unprocessed_ids = []
+
+    for start in range(0, len(persona_ids), BATCH_GET_CHUNK_SIZE):
+        chunk = persona_ids[start:start + BATCH_GET_CHUNK_SIZE]
+        request = {"Keys": [passenger_key(persona_id) for persona_id in chunk]}
+        if fields is not None:
+            request.update(projection_arguments(fields))
+
+        pending = {table_name: request}
+        for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+            if attempt:
+                delay = min(BATCH_GET_MAX_DELAY, BATCH_GET_BASE_DELAY * 2 ** attempt)
+                time.sleep(random.uniform(0, delay))
+
+            response = dynamodb.batch_get_item(RequestItems=pending)
+            for item in response.get("Responses", {}).get(table_name, []):
+                found[item["userId"]["S"]] = item_to_json(item)
+
+            pending = response.get("UnprocessedKeys") or {}
+            if not pending:
+                break
+
+        if pending:
+            logger.warning("Keys still unprocessed after %d attempts", BATCH_GET_MAX_ATTEMPTS)
+            unprocessed_ids.extend(key["userId"]["S"] for key in pending[table_name]["Keys"])
+
+    return found, unprocessed_ids
+
+def handle_batch_request(event, dynamodb, table_name):
+    body = json.loads(event.get("body") or "{}")
+    persona_ids = body.get("personaIds")
+
+    if (
+        not isinstance(persona_ids, list)
+        or not persona_ids
+        or not all(isinstance(persona_id, str) and persona_id for persona_id in persona_ids)
+    ):
+        return error_response(400, "'personaIds' must be a non-empty list of IDs")
+
+    # Results come back in request order, so duplicates only need one read
+    persona_ids = list(dict.fromkeys(persona_ids))
+    if len(persona_ids) > MAX_BATCH_IDS:
+        return error_response(400, f"At most {MAX_BATCH_IDS} personaIds can be requested")
+
+    requested_fields = body.get("fields")
+    if isinstance(requested_fields, list):
+        requested_fields = ",".join(requested_fields)
+    try:
+        fields = resolve_fields({"profile": body.get("profile"), "fields": requested_fields})
+    except ValueError as e:
+        return error_response(400, str(e))
+
+    logger.info("Batch fetching %d passengers from '%s'", len(persona_ids), table_name)
+    found, unprocessed_ids = batch_get_passengers(dynamodb, table_name, persona_ids, fields)
+    unprocessed = set(unprocessed_ids)
+
+    with span("serialize"):
+        response_body = json_object(
+            {
+                "message": "Passenger data retrieved",
+                "notFound": [
+                    persona_id
+                    for persona_id in persona_ids
+                    if persona_id not in found and persona_id not in unprocessed
+                ],
+                "unprocessed": [persona_id for persona_id in persona_ids if persona_id in unprocessed],
+            },
+            raw={
+                "passengers": "[" + ",".join(
+                    found[persona_id] for persona_id in persona_ids if persona_id in found
+                ) + "]",
+            },
+        )
+
+    return json_response(200, response_body)
+
+def flight_listing_fields(query_params):
+    """
+    Attributes to read for a flight listing: the ``boarding`` profile unless
+    the caller chose otherwise, and only ones the index projects.
+    """
+    projected = [
+        field for field in os.environ.get("FLIGHT_INDEX_ATTRIBUTES", "").split(",") if field
+    ]
+    if not query_params.get("profile") and not query_params.get("fields"):
+        query_params = {**query_params, "profile": "boarding"}
+    fields = resolve_fields(query_params)
+    if not projected:
+        return fields
+    available = {"userId", "flightKey", *projected}
+    if fields is None:
+        return ["userId", *projected]
+    missing = [field for field in fields if field not in available]
+    if missing:
+        raise ValueError(f"Not available in flight listings: {', '.join(missing)}")
+    return fields
+
+def handle_flight_request(event, dynamodb, table_name):
+    """One page of the passengers booked on a flight, read from ``flight-index``."""
+    flight_number = (event.get("pathParameters") or {}).get("flightNo")
+    query_params = event.get("queryStringParameters") or {}
+    if not flight_number or not query_params.get("date"):
+        return error_response(400, "A flight number and a 'date' query parameter are required")
+    index_name = os.environ.get("FLIGHT_INDEX_NAME", flights.FLIGHT_INDEX_NAME)
+    if not index_name:
+        # The index is disabled; a scan per listing would read the whole table
+        return error_response(503, "Flight listings are not available")
+
+    try:
+        key = flights.flight_key(flight_number, query_params["date"])
+        fields = flight_listing_fields(query_params)
+        limit = int(query_params.get("limit", DEFAULT_FLIGHT_PAGE_SIZE))
+        if not 1 <= limit <= MAX_FLIGHT_PAGE_SIZE:
+            raise ValueError(f"'limit' must be between 1 and {MAX_FLIGHT_PAGE_SIZE}")
+        start_key = (
+            flights.decode_page_token(query_params["nextToken"], key)
+            if query_params.get("nextToken")
+            else None
+        )
+    except ValueError as e:
+        return error_response(400, str(e))
+
+    logger.info("Listing passengers of %s, limit %d", key, limit)
+    query_args = {
+        "TableName": table_name,
+        "IndexName": index_name,
+        "KeyConditionExpression": "#key = :key",
+        "ExpressionAttributeNames": {"#key": "flightKey"},
+        "ExpressionAttributeValues": {":key": {"S": key}},
+        "Limit": limit,
+    }
+    if fields is not None:
+        projection = projection_arguments(fields)
+        query_args["ProjectionExpression"] = projection["ProjectionExpression"]
+        query_args["ExpressionAttributeNames"].update(projection["ExpressionAttributeNames"])
+    if start_key:
+        query_args["ExclusiveStartKey"] = start_key
+
+    with span("dynamodb_query"):
+        response = dynamodb.query(**query_args)
+
+    last_key = response.get("LastEvaluatedKey")
+    with span("serialize"):
+        response_body = json_object(
+            {
+                "message": "Flight passengers retrieved",
+                "flightNo": flights.normalize_flight(flight_number),
+                "date": query_params["date"],
+                "count": response.get("Count", len(response["Items"])),
+                "nextToken": flights.encode_page_token(last_key) if last_key else None,
+            },
+            raw={
+                "passengers": "["
+                + ",".join(item_to_json(item) for item in response["Items"])
+                + "]",
+            },
+        )
+    return json_response(200, response_body)
+
+@skip_warmers
+@traced_handler("get_passenger_data")
 def handler(event, context):
+    start_request(logger, event, context)
     logger.info("Get Passenger Data Lambda function invoked")
-    logger.info(f"Event: {json.dumps(event)}")
+    logger.debug("Event: %s", Redacted(event))
 
     # Get environment variables
     table_name = os.environ.get("DYNAMODB_TABLE_NAME")
     collection_id = os.environ.get("REKOGNITION_COLLECTION_ID")
 
-    logger.info(f"DynamoDB Table Name: {table_name}")
-    logger.info(f"Rekognition Collection ID: {collection_id}")
+    logger.debug("DynamoDB Table Name: %s", table_name)
+    logger.debug("Rekognition Collection ID: %s", collection_id)
 
     if not table_name or not collection_id:
         logger.error("Missing required environment variables")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "Missing required environment variables"}),
-        }
+        return error_response(500, "Missing required environment variables")
 
-    # Initialize AWS clients
-    dynamodb = boto3.resource("dynamodb")
-    table = dynamodb.Table(table_name)
+    # Initialize AWS clients; the low-level client keeps type descriptors,
+    # so items are serialized without a Decimal round trip
+    dynamodb = aws.client("dynamodb")
 
     try:
+        if event.get('resource') == BATCH_RESOURCE:
+            return handle_batch_request(event, dynamodb, table_name)
+        if event.get('resource') == FLIGHT_RESOURCE:
+            return handle_flight_request(event, dynamodb, table_name)
+
         # Extract personaId from the event's path parameters
         persona_id = event.get('pathParameters', {}).get('personaId')
         
-        logger.info(f"Extracted personaId: {persona_id}")
+        logger.info("Extracted personaId: %s", persona_id)
 
         if not persona_id:
             logger.error("Missing 'personaId' in the event's path parameters")
-            return {
-                "statusCode": 400,
-                "body": json.dumps({"error": "Missing 'personaId' in the event's path parameters"}),
-            }
-
-        # Query DynamoDB
-        logger.info(f"Querying DynamoDB table '{table_name}' for userId: {persona_id}")
-        response = table.get_item(Key={'userId': persona_id})
-        logger.info(f"DynamoDB get_item response: {json.dumps(response, default=decimal_default)}")
-
-        if 'Item' in response:
-            user_data = response['Item']
-            logger.info(f"User data found: {json.dumps(user_data, default=decimal_default)}")
-            return {
-                "statusCode": 200,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type",
-                    "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-                },
-                "body": json.dumps(
-                    {
-                        "message": "Passenger data retrieved",
-                        "passengerData": user_data,
-                    },
-                    default=decimal_default
-                ),
-            }
+            return error_response(400, "Missing 'personaId' in the event's path parameters")
+
+        try:
+            fields = resolve_fields(event.get('queryStringParameters') or {})
+        except ValueError as e:
+            logger.error("Invalid field selection: %s", e)
+            return error_response(400, str(e))
+
+        # Query DynamoDB, through the container cache when it is enabled
+        logger.info("Querying DynamoDB table '%s' for userId: %s", table_name, persona_id)
+        with span("passenger_lookup"):
+            if passenger_cache.enabled:
+                user_data, hit = passenger_cache.get(dynamodb, table_name, persona_id, fields)
+            else:
+                user_data, _ = fetch_passenger(dynamodb, table_name, persona_id, fields)
+        if passenger_cache.enabled:
+            record_cache_metrics(hit)
+
+        if user_data is not None:
+            logger.info("User data found for personaId: %s", persona_id)
+            with span("serialize"):
+                body = json_object(
+                    {"message": "Passenger data retrieved"},
+                    raw={"passengerData": user_data},
+                )
+            logger.debug("Response body: %s", body)
+            return json_response(200, body)
         else:
-            logger.info(f"No passenger data found for personaId: {persona_id}")
-            return {
-                "statusCode": 404,
-                "headers": {
-                    "Access-Control-Allow-Origin": "*",
-                    "Access-Control-Allow-Headers": "Content-Type",
-                    "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-                },
-                "body": json.dumps({"message": f"No passenger data found for personaId: {persona_id}"}),
-            }
+            logger.info("No passenger data found for personaId: %s", persona_id)
+            return json_response(
+                404,
+                {"message": f"No passenger data found for personaId: {persona_id}"},
+            )
 
+    except json.JSONDecodeError as e:
+        logger.error("JSON decode error: %s", e)
+        return error_response(400, "Invalid JSON in request body")
     except ClientError as e:
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
-        logger.error(f"AWS client error: {error_code} - {error_message}")
-        logger.error(f"Full error: {str(e)}")
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-            },
-            "body": json.dumps({"error": f"AWS client error: {error_code} - {error_message}"}),
-        }
+        logger.error("AWS client error: %s - %s", error_code, error_message)
+        logger.error("Full error: %s", e)
+        return aws_error_response(e, f"AWS client error: {error_code} - {error_message}")
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}", exc_info=True)
-        return {
-            "statusCode": 500,
-            "headers": {
-                "Access-Control-Allow-Origin": "*",
-                "Access-Control-Allow-Headers": "Content-Type",
-                "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-            },
-            "body": json.dumps({"error": f"An unexpected error occurred: {str(e)}"}),
-        }
+        logger.error("Unexpected error: %s", e, exc_info=True)
+        return error_response(500, f"An unexpected error occurred: {str(e)}")
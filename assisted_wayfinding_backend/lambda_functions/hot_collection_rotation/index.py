@@ -0,0 +1,36 @@
+import os
+
+from wayfinding_common import aws, rekognition
+from wayfinding_common.hot_collection import DEPARTURE_INDEX_NAME, HotCollection
+from wayfinding_common.retention import RetentionPolicy
+from wayfinding_common.timing import span, traced_handler
+
+aws.prewarm(clients=(("rekognition", rekognition.CLIENT_OPTIONS),), resources=("dynamodb",))
+
+
+@traced_handler("hot_collection_rotation")
+def handler(event, context):
+    """
+    Scheduled: add travellers who now depart inside the hot collection's
+    window and remove those who have left it.
+    """
+    hot = HotCollection.from_environment()
+    if hot is None:
+        print("No hot collection configured, nothing to rotate")
+        return {"members": 0}
+
+    index_name = os.environ.get("DEPARTURE_INDEX_NAME", DEPARTURE_INDEX_NAME)
+    if not index_name:
+        print("No departure index configured, nothing to rotate")
+        return {"members": 0}
+
+    table = aws.resource("dynamodb").Table(os.environ["DYNAMODB_TABLE_NAME"])
+    with span("rotate"):
+        stats = hot.rotate(
+            table,
+            rekognition.gateway(),
+            RetentionPolicy.from_environment(),
+            index_name=index_name,
+        )
+    print(f"Rotated hot collection {hot.collection_id}: {stats}")
+    return stats
@@ -2,20 +2,33 @@ import json
 import os
 from urllib.parse import unquote_plus
 
-import boto3
-from boto3.dynamodb.conditions import Attr
 from botocore.exceptions import ClientError
+from wayfinding_common import aws, name_index
+from wayfinding_common.responses import (
+    aws_error_response,
+    error_response,
+    json_response,
+)
+from wayfinding_common.serialization import dumps
+from wayfinding_common.timing import span, traced_handler
+from wayfinding_common.warmer import skip_warmers
 
+aws.prewarm(resources=("dynamodb",))
 
+# Records read by the fallback scan on an index miss, filter or not
+LEGACY_SCAN_LIMIT = 500
+
+
+@skip_warmers
+@traced_handler("manual_user_lookup")
 def handler(event, context):
     print("Manual User Lookup Lambda function invoked")
-    print(f"Event: {json.dumps(event)}")  # Log the entire event for debugging
 
     # Get environment variables
     table_name = os.environ.get("DYNAMODB_TABLE_NAME")
 
     # Initialize DynamoDB client
-    dynamodb = boto3.resource("dynamodb")
+    dynamodb = aws.resource("dynamodb")
     table = dynamodb.Table(table_name)
 
     try:
@@ -34,55 +47,83 @@ def handler(event, context):
             flight_number = body.get("flightNumber", "")
         else:
             # Handle empty input (like in API Gateway Test Console)
-            return {
-                "statusCode": 400,
-                "body": json.dumps(
-                    {
-                        "error": "Missing input data",
-                        "message": "Please provide name, dateOfBirth, and flightNumber as query parameters or in the request body.",
-                    }
-                ),
-            }
+            return error_response(
+                400,
+                "Missing input data",
+                message="Please provide name, dateOfBirth, and flightNumber as query parameters or in the request body.",
+            )
 
         if not name or not date_of_birth or not flight_number:
-            return {
-                "statusCode": 400,
-                "body": json.dumps(
-                    {
-                        "error": "Missing required fields",
-                        "message": "Please provide name, dateOfBirth, and flightNumber.",
-                    }
-                ),
-            }
-
-        # Query DynamoDB table
-        response = table.scan(
-            FilterExpression=Attr("name").eq(name)
-            & Attr("dateOfBirth").eq(date_of_birth)
-            & Attr("next_flight_id").eq(flight_number)
-        )
+            return error_response(
+                400,
+                "Missing required fields",
+                message="Please provide name, dateOfBirth, and flightNumber.",
+            )
+
+        # Candidates share the flight and date of birth; rank them by name
+        from boto3.dynamodb.conditions import Key
 
-        if response["Items"]:
-            user_data = response["Items"][0]
-            return {
-                "statusCode": 200,
-                "body": json.dumps({"userData": user_data}),
-            }
+        index_name = os.environ.get("NAME_LOOKUP_INDEX", name_index.LOOKUP_INDEX_NAME)
+        if index_name:
+            with span("dynamodb_query"):
+                response = table.query(
+                    IndexName=index_name,
+                    KeyConditionExpression=Key("lookupKey").eq(
+                        name_index.lookup_key(flight_number, date_of_birth)
+                    ),
+                )
+            candidates = response["Items"]
         else:
-            return {
-                "statusCode": 404,
-                "body": json.dumps({"error": "User not found"}),
-            }
+            # The index is disabled: look up the way we did before it
+            candidates = legacy_lookup(table, name, date_of_birth, flight_number)
+
+        if not candidates and index_name and os.environ.get("NAME_LOOKUP_FALLBACK_SCAN") == "1":
+            # Records enrolled before the index carry no lookupKey
+            candidates = legacy_lookup(table, name, date_of_birth, flight_number)
+
+        with span("rank"):
+            match, ambiguous = name_index.best_match(name, candidates)
+
+        if match is None:
+            return error_response(404, "User not found")
+        if ambiguous:
+            return error_response(
+                409,
+                "Multiple users match",
+                message="More than one passenger on this flight matches the name; please check the spelling.",
+            )
+
+        with span("serialize"):
+            body = dumps(
+                {
+                    "userData": name_index.public_view(match.item),
+                    "match": {"score": round(match.score, 3), "exact": match.exact},
+                }
+            )
+        return json_response(200, body)
 
     except ClientError as e:
         print(f"Error querying DynamoDB: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "Internal server error"}),
-        }
+        return aws_error_response(e, "Internal server error")
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
-        return {
-            "statusCode": 500,
-            "body": json.dumps({"error": "Internal server error"}),
-        }
+        return error_response(500, "Internal server error")
+
+
+def legacy_lookup(table, name, date_of_birth, flight_number):
+    """
+    The exact-match scan used before the name index, over one page of at
+    most ``LEGACY_SCAN_LIMIT`` records so a miss costs a bounded read.
+    Records past that page are only found once ``name_index.backfill`` has
+    given them index keys.
+    """
+    from boto3.dynamodb.conditions import Attr
+
+    with span("dynamodb_scan"):
+        response = table.scan(
+            FilterExpression=Attr("name").eq(name)
+            & Attr("dateOfBirth").eq(date_of_birth)
+            & Attr("next_flight_id").eq(flight_number),
+            Limit=LEGACY_SCAN_LIMIT,
+        )
+    return response["Items"][:1]
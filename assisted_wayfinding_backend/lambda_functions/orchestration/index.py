@@ -1,12 +1,19 @@
 import json
 import os
-import boto3
+from wayfinding_common import aws
+from wayfinding_common.messages import catalogue
+from wayfinding_common.timing import timed, traced_handler
+from wayfinding_common.warmer import skip_warmers
 
+aws.prewarm(clients=('lambda',))
+
+@skip_warmers
+@traced_handler("orchestration")
 def handler(event, context):
     print("Orchestration Lambda function invoked")
 
     connection_id = event['requestContext']['connectionId']
-    api_client = boto3.client('apigatewaymanagementapi', endpoint_url=os.environ['WEBSOCKET_API_ENDPOINT'])
+    api_client = aws.client('apigatewaymanagementapi', endpoint_url=os.environ['WEBSOCKET_API_ENDPOINT'])
 
     try:
         body = json.loads(event['body'])
@@ -36,28 +43,39 @@ def handle_request(req):
 
     # Use the passenger data response as context for the chat
     context = generate_context(passenger_data_response)
+    messages = catalogue(context['language'])
 
     resp = {
         'input': {'text': input_text},
-        'output': {'text': generate_response(input_text, context)},
-        'variables': {}
+        'output': {'text': generate_response(input_text, context, messages)},
+        'variables': {'language': messages.locale}
     }
 
     optional_args = req.get('optionalArgs', {})
     if optional_args.get('kind') == 'init':
-        resp['output']['text'] = f"Hi there, {context['name']}!"
+        resp['output']['text'] = messages.render(
+            'orchestration.greeting', name=display_name(context, messages)
+        )
 
     return resp
 
-def call_get_passenger_data_lambda(persona_id):
+@timed("get_passenger_data_invoke")
+def call_get_passenger_data_lambda(persona_id, profile='greeting'):
     try:
-        lambda_client = boto3.client('lambda')
+        lambda_client = aws.client('lambda')
         response = lambda_client.invoke(
-            FunctionName='get_passenger_data_lambda',
+            FunctionName=os.environ.get('GET_PASSENGER_DATA_FUNCTION_NAME', 'get_passenger_data_lambda'),
             InvocationType='RequestResponse',
-            Payload=json.dumps({'personaId': persona_id})
+            Payload=json.dumps({
+                'pathParameters': {'personaId': persona_id},
+                'queryStringParameters': {'profile': profile},
+            })
         )
-        return json.loads(response['Payload'].read())
+        payload = json.loads(response['Payload'].read())
+        # The function answers in API Gateway proxy format
+        if 'body' in payload:
+            payload = json.loads(payload['body'])
+        return payload
     except Exception as e:
         print(f"Error calling get_passenger_data_lambda: {str(e)}")
         return {'passengerData': {}}  # Return default data on error
@@ -65,16 +83,22 @@ def call_get_passenger_data_lambda(persona_id):
 def generate_context(passenger_data_response):
     passenger_data = passenger_data_response.get('passengerData', {})
     return {
-        'name': passenger_data.get('name', 'Guest'),
+        'name': passenger_data.get('name'),
+        'language': passenger_data.get('language'),
         'gender': passenger_data.get('gender', 'Unknown'),
         'age': passenger_data.get('age', 'Unknown'),
         'userId': passenger_data.get('userId', 'Unknown')
     }
 
-def generate_response(input_text, context):
+def display_name(context, messages):
+    # Travellers without a record are greeted as a guest, in the kiosk's default language
+    return context['name'] or messages.render('orchestration.guest')
+
+def generate_response(input_text, context, messages):
     # TODO: Implement more sophisticated response generation using the context
-    return f"Hello {context['name']}, how can I assist you today?"
+    return messages.render('orchestration.assist', name=display_name(context, messages))
 
+@timed("post_to_connection")
 def send_message(api_client, connection_id, resp):
     message = {
         'category': 'scene',
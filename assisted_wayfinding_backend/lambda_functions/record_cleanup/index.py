@@ -0,0 +1,127 @@
+import os
+from collections import defaultdict
+
+from botocore.exceptions import ClientError
+from wayfinding_common import aws, rekognition
+from wayfinding_common.enrolment import photo_location
+from wayfinding_common.retention import is_ttl_removal
+from wayfinding_common.timing import span, traced_handler
+
+# API limits per call
+MAX_FACE_IDS_PER_CALL = 4096  # DeleteFaces
+MAX_KEYS_PER_CALL = 1000  # DeleteObjects
+
+aws.prewarm(clients=(("rekognition", rekognition.CLIENT_OPTIONS), "s3"))
+
+
+def strings(attribute):
+    """The strings of a low-level list or string set attribute."""
+    if not attribute:
+        return []
+    if "SS" in attribute:
+        return list(attribute["SS"])
+    return [element["S"] for element in attribute.get("L", []) if "S" in element]
+
+
+def chunks(entries, size):
+    for start in range(0, len(entries), size):
+        yield entries[start : start + size]
+
+
+def expired_resources(records, default_collection_id):
+    """
+    Group the faces and photos of the records' old images for batch deletes.
+    Returns ``{collection_id: [(face_id, sequence_number)]}`` and
+    ``{bucket: [(key, sequence_number)]}``.
+    """
+    faces, photos = defaultdict(list), defaultdict(list)
+    for record in records:
+        stream_record = record["dynamodb"]
+        sequence_number = stream_record["SequenceNumber"]
+        old_image = stream_record.get("OldImage") or {}
+        collection_id = (old_image.get("rekognition_collection_id") or {}).get(
+            "S", default_collection_id
+        )
+        for face_id in strings(old_image.get("faceIds")):
+            faces[collection_id].append((face_id, sequence_number))
+        for url in strings(old_image.get("imageUrls")):
+            location = photo_location(url)
+            if location:
+                bucket, key = location
+                photos[bucket].append((key, sequence_number))
+    return faces, photos
+
+
+def delete_faces(gateway, faces):
+    """Delete the faces in batches; returns the sequence numbers left undone."""
+    failed = set()
+    for collection_id, entries in faces.items():
+        for batch in chunks(entries, MAX_FACE_IDS_PER_CALL):
+            try:
+                with span("rekognition_delete"):
+                    gateway.delete_faces(
+                        CollectionId=collection_id,
+                        FaceIds=list(dict.fromkeys(face_id for face_id, _ in batch)),
+                    )
+            except ClientError as e:
+                if e.response["Error"]["Code"] == "ResourceNotFoundException":
+                    # The collection is gone, and its faces with it
+                    continue
+                print(f"Error deleting {len(batch)} face(s) from {collection_id}: {str(e)}")
+                failed.update(sequence_number for _, sequence_number in batch)
+    return failed
+
+
+def delete_photos(s3, photos):
+    """Delete the photos in batches; returns the sequence numbers left undone."""
+    failed = set()
+    for bucket, entries in photos.items():
+        for batch in chunks(entries, MAX_KEYS_PER_CALL):
+            sequence_numbers = defaultdict(set)
+            for key, sequence_number in batch:
+                sequence_numbers[key].add(sequence_number)
+            try:
+                with span("s3_delete"):
+                    response = s3.delete_objects(
+                        Bucket=bucket,
+                        Delete={
+                            "Objects": [{"Key": key} for key in sequence_numbers],
+                            "Quiet": True,
+                        },
+                    )
+            except ClientError as e:
+                print(f"Error deleting {len(batch)} photo(s) from {bucket}: {str(e)}")
+                failed.update(sequence_number for _, sequence_number in batch)
+                continue
+            for error in response.get("Errors", []):
+                print(f"Error deleting {bucket}/{error['Key']}: {error.get('Code')}")
+                failed.update(sequence_numbers[error["Key"]])
+    return failed
+
+
+@traced_handler("record_cleanup")
+def handler(event, context):
+    """
+    Release the faces and photos of passenger records deleted by TTL, read
+    from the passenger table's stream. Deletes are batched across the
+    records; if any fail, the earliest affected record is reported so the
+    stream resumes from it. Deleting again is harmless.
+    """
+    collection_id = os.environ["REKOGNITION_COLLECTION_ID"]
+
+    records = [record for record in event.get("Records", []) if is_ttl_removal(record)]
+    if not records:
+        return {"batchItemFailures": []}
+
+    faces, photos = expired_resources(records, collection_id)
+    failed = delete_faces(rekognition.gateway(), faces)
+    failed |= delete_photos(aws.client("s3"), photos)
+
+    print(
+        f"Released {sum(map(len, faces.values()))} face(s) and "
+        f"{sum(map(len, photos.values()))} photo(s) of {len(records)} expired record(s), "
+        f"{len(failed)} record(s) failed"
+    )
+    if not failed:
+        return {"batchItemFailures": []}
+    return {"batchItemFailures": [{"itemIdentifier": min(failed, key=int)}]}
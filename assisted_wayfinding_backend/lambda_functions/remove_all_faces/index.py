@@ -1,8 +1,26 @@
-import json
+import itertools
 import os
 
 import boto3
 from botocore.exceptions import ClientError
+from wayfinding_common.responses import aws_error_response, json_response
+from wayfinding_common.scan import ScanStats, parallel_scan
+from wayfinding_common.shards import CollectionShards
+
+# Face IDs per DeleteFaces call
+MAX_DELETE_FACES = 4096
+
+
+def list_face_ids(rekognition, collection_id):
+    """Every face ID in the collection, following ``NextToken``."""
+    face_ids = []
+    params = {"CollectionId": collection_id}
+    while True:
+        response = rekognition.list_faces(**params)
+        face_ids.extend(face["FaceId"] for face in response["Faces"])
+        if not response.get("NextToken"):
+            return face_ids
+        params["NextToken"] = response["NextToken"]
 
 
 def handler(event, context):
@@ -11,36 +29,51 @@ def handler(event, context):
     # Get environment variables
     table_name = os.environ.get("DYNAMODB_TABLE_NAME")
     collection_id = os.environ.get("REKOGNITION_COLLECTION_ID")
+    segments = int(os.environ.get("SCAN_SEGMENTS", "1"))
+    rcu_budget = float(os.environ.get("SCAN_RCU_BUDGET", "0")) or None
 
     # Initialize AWS clients
     dynamodb = boto3.resource("dynamodb")
     rekognition = boto3.client("rekognition")
     table = dynamodb.Table(table_name)
 
-    try:
-        # Remove all faces from Rekognition collection
-        response = rekognition.list_faces(CollectionId=collection_id)
-        face_ids = [face["FaceId"] for face in response["Faces"]]
-
-        if face_ids:
-            rekognition.delete_faces(CollectionId=collection_id, FaceIds=face_ids)
+    # Every terminal's collection, and the hot collection of travellers
+    # departing soon when there is one
+    collection_ids = CollectionShards.from_environment(collection_id).all()
+    if os.environ.get("HOT_COLLECTION_ID"):
+        collection_ids.append(os.environ["HOT_COLLECTION_ID"])
 
-        # Remove all items from DynamoDB table
-        scan = table.scan()
-        items = scan["Items"]
+    try:
+        # Remove all faces from the Rekognition collections, every page of
+        # them, listed in full before any are deleted
+        for collection in collection_ids:
+            face_ids = list_face_ids(rekognition, collection)
+            for start in range(0, len(face_ids), MAX_DELETE_FACES):
+                rekognition.delete_faces(
+                    CollectionId=collection,
+                    FaceIds=face_ids[start : start + MAX_DELETE_FACES],
+                )
 
-        if items:
+        # Remove all items from DynamoDB table, every page of every segment
+        stats = ScanStats()
+        items = parallel_scan(
+            table,
+            segments=segments,
+            projection=("userId",),
+            rcu_budget=rcu_budget,
+            stats=stats,
+        )
+        first = next(items, None)
+        if first is not None:
             with table.batch_writer() as batch:
-                for item in items:
+                for item in itertools.chain((first,), items):
                     batch.delete_item(Key={"userId": item["userId"]})
+        print(f"Deleted {stats.items} item(s): {stats.as_dict()}")
 
-        return {
-            "statusCode": 200,
-            "body": json.dumps(
-                {"message": "All faces and user data removed successfully"}
-            ),
-        }
+        return json_response(
+            200, {"message": "All faces and user data removed successfully"}
+        )
 
     except ClientError as e:
         print(f"Error: {str(e)}")
-        return {"statusCode": 500, "body": json.dumps({"error": str(e)})}
+        return aws_error_response(e)
@@ -0,0 +1,5 @@
+"""
+Helpers shared by the Assisted Wayfinding Lambda functions.
+
+Deployed as a Lambda layer, so functions import it as ``wayfinding_common``.
+"""
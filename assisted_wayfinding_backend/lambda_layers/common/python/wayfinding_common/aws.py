@@ -0,0 +1,59 @@
+"""
+Container-scoped boto3 clients and resources.
+
+Creating a client loads its service model and, for the first client in the
+process, the endpoint rules, so building them per invocation costs several
+milliseconds on every warm request and over 100 ms on the first one.
+``client`` and ``resource`` build each one once per container and hand out
+the same object afterwards.
+
+``prewarm`` is called at module level by the handlers. In Lambda it builds
+the listed clients during init, which runs with more CPU than invocations
+get at small memory sizes. Elsewhere (tests, local tools) it does nothing,
+and boto3 is not even imported until the first client is requested.
+"""
+import os
+
+_clients = {}
+
+
+def client(service_name, **kwargs):
+    """Shared low-level client for ``service_name`` and the given options."""
+    key = ("client", service_name, tuple(sorted(kwargs.items())))
+    if key not in _clients:
+        import boto3
+
+        _clients[key] = boto3.client(service_name, **kwargs)
+    return _clients[key]
+
+
+def resource(service_name):
+    """Shared resource for ``service_name``."""
+    key = ("resource", service_name)
+    if key not in _clients:
+        import boto3
+
+        _clients[key] = boto3.resource(service_name)
+    return _clients[key]
+
+
+def prewarm(clients=(), resources=()):
+    """
+    Build the given clients and resources now when running in Lambda.
+    ``clients`` entries are service names or ``(service_name, options)`` pairs.
+    """
+    if not os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        return
+    for entry in clients:
+        if isinstance(entry, str):
+            client(entry)
+        else:
+            service_name, options = entry
+            client(service_name, **options)
+    for service_name in resources:
+        resource(service_name)
+
+
+def reset():
+    """Forget every cached client, e.g. between tests that patch boto3."""
+    _clients.clear()
@@ -0,0 +1,356 @@
+"""
+Face enrolment, shared by ``POST /index`` and the enrolment worker.
+
+An enrolment has three steps:
+
+- ``stage``: decode the photos and upload those not enrolled yet to
+  content-addressed keys in the photo bucket;
+- ``index``: index every photo that is not enrolled yet in Rekognition,
+  into the collection of the traveller's terminal
+  (``wayfinding_common.shards``); a traveller whose terminal changed has
+  every photo indexed again in the new collection;
+- ``commit``: write the record, with its expiry, under an optimistic
+  lock on ``recordVersion``, then release the faces and photos it no
+  longer references, and add the new faces to the hot collection when
+  the traveller departs soon (``wayfinding_common.hot_collection``).
+
+The synchronous handler runs all three in one request. The asynchronous
+path stages in the API request and leaves ``index`` and ``commit`` to the
+worker, which reloads the record first. An enrolment that finds no face,
+or a job that fails for good, deletes the photos it staged that the
+record does not reference (``discard``); nothing else would.
+"""
+import base64
+import hashlib
+import re
+
+from botocore.exceptions import ClientError
+
+from wayfinding_common import flights, name_index, retention
+from wayfinding_common.timing import span
+
+# Attributes owned by the enrolment pipeline; everything else on the item is
+# passenger data supplied by the caller.
+SYSTEM_ATTRIBUTES = {
+    "userId",
+    "faceIds",
+    "imageUrls",
+    "rekognition_collection_id",
+    "enrolledImages",
+    "recordVersion",
+    retention.EXPIRY_ATTRIBUTE,
+    *retention.DEPARTURE_ATTRIBUTES,
+    *name_index.INDEX_ATTRIBUTES,
+    *flights.INDEX_ATTRIBUTES,
+}
+
+
+def image_hash(image_bytes):
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+def photo_key(user_id, content_hash):
+    # Content-addressed, so re-posting an unchanged photo maps onto the
+    # object that is already in the bucket instead of overwriting it.
+    return f"user_photos/{user_id}_{content_hash}.jpg"
+
+
+def photo_url(bucket_name, s3_key):
+    return f"https://{bucket_name}.s3.amazonaws.com/{s3_key}"
+
+
+def photo_location(url):
+    """The ``(bucket, key)`` of a ``photo_url``, or None for other URLs."""
+    match = re.match(r"^https://([^/]+)\.s3\.amazonaws\.com/(.+)$", url)
+    return match.groups() if match else None
+
+
+def superseded_entries(existing, enrolled, moved=False):
+    """
+    Return the face IDs and image URLs of ``existing`` that ``enrolled``
+    drops; all of its faces when the record ``moved`` to another collection.
+    """
+    if not existing:
+        return [], []
+
+    previous = existing.get("enrolledImages")
+    if previous is None or moved:
+        # Records written before incremental enrolment carry no content
+        # hashes, so none of their faces can be matched and all are replaced.
+        kept_urls = {entry["imageUrl"] for entry in enrolled.values()}
+        return (
+            list(existing.get("faceIds", [])),
+            [url for url in existing.get("imageUrls", []) if url not in kept_urls],
+        )
+
+    dropped = [entry for key, entry in previous.items() if key not in enrolled]
+    return (
+        [entry["faceId"] for entry in dropped if "faceId" in entry],
+        [entry["imageUrl"] for entry in dropped],
+    )
+
+
+def write_condition(existing):
+    """Optimistic lock on the record version observed before indexing."""
+    if not existing:
+        return {"ConditionExpression": "attribute_not_exists(userId)"}
+    if "recordVersion" not in existing:
+        return {
+            "ConditionExpression": "attribute_exists(userId) AND attribute_not_exists(recordVersion)"
+        }
+    return {
+        "ConditionExpression": "recordVersion = :version",
+        "ExpressionAttributeValues": {":version": existing["recordVersion"]},
+    }
+
+
+class Enrolment:
+    """One user's enrolment against the table, collection and photo bucket."""
+
+    def __init__(
+        self,
+        table,
+        rekognition,
+        s3,
+        collection_id,
+        bucket_name,
+        user_id,
+        retention_policy=None,
+        hot_collection=None,
+    ):
+        self.table = table
+        self.rekognition = rekognition
+        self.s3 = s3
+        self.collection_id = collection_id
+        self.bucket_name = bucket_name
+        self.user_id = user_id
+        self.retention_policy = retention_policy or retention.RetentionPolicy.from_environment()
+        self.hot_collection = hot_collection
+        self.existing = None
+        self.enrolled = {}
+        self.added_face_ids = []
+        self.added_image_urls = []
+        self.new_images = 0
+
+    @property
+    def previous_collection_id(self):
+        """The collection holding the existing record's faces."""
+        if not self.existing:
+            return self.collection_id
+        return self.existing.get("rekognition_collection_id", self.collection_id)
+
+    @property
+    def moved(self):
+        return self.previous_collection_id != self.collection_id
+
+    @property
+    def previous(self):
+        # Faces in another collection cannot be kept; all are indexed again
+        if not self.existing or self.moved:
+            return {}
+        return self.existing.get("enrolledImages", {})
+
+    def load(self):
+        """Read the current record, so unchanged images can be skipped."""
+        with span("dynamodb_get"):
+            response = self.table.get_item(Key={"userId": self.user_id}, ConsistentRead=True)
+        self.existing = response["Item"] if "Item" in response else None
+        return self.existing
+
+    def stage(self, images):
+        """
+        Decode the base64 ``images`` and upload the ones not enrolled yet.
+        Returns their content hashes in request order, without duplicates.
+        """
+        previous = self.previous
+        hashes = []
+        for image in images:
+            with span("decode"):
+                image_bytes = base64.b64decode(image)
+                content_hash = image_hash(image_bytes)
+
+            if content_hash in hashes:
+                continue
+            hashes.append(content_hash)
+            if content_hash in previous:
+                continue
+
+            with span("s3_put"):
+                self.s3.put_object(
+                    Bucket=self.bucket_name,
+                    Key=photo_key(self.user_id, content_hash),
+                    Body=image_bytes,
+                )
+        return hashes
+
+    def index(self, hashes):
+        """Index the staged photos for ``hashes`` that are not enrolled yet."""
+        previous = self.previous
+        for content_hash in hashes:
+            if content_hash in self.enrolled:
+                continue
+            if content_hash in previous:
+                self.enrolled[content_hash] = previous[content_hash]
+                continue
+
+            s3_key = photo_key(self.user_id, content_hash)
+            entry = {"imageUrl": photo_url(self.bucket_name, s3_key)}
+            self.new_images += 1
+
+            with span("rekognition_index"):
+                index_response = self.rekognition.index_faces(
+                    CollectionId=self.collection_id,
+                    Image={"S3Object": {"Bucket": self.bucket_name, "Name": s3_key}},
+                    ExternalImageId=self.user_id,  # Associate face with user_id
+                    DetectionAttributes=["ALL"],
+                )
+
+            if index_response["FaceRecords"]:
+                entry["faceId"] = index_response["FaceRecords"][0]["Face"]["FaceId"]
+                self.added_face_ids.append(entry["faceId"])
+                self.added_image_urls.append(entry["imageUrl"])
+
+            self.enrolled[content_hash] = entry
+
+    @property
+    def face_ids(self):
+        return [entry["faceId"] for entry in self.enrolled.values() if "faceId" in entry]
+
+    def commit(self, passenger_data):
+        """
+        Write the record and clean up what it supersedes. Returns the HTTP
+        status and response body; 409 means another enrolment of the same
+        user committed first and the faces indexed here were released.
+        """
+        existing = self.existing
+        face_ids = self.face_ids
+
+        if not face_ids:
+            # Nothing will reference the photos staged for this attempt
+            try:
+                self.discard(list(self.enrolled))
+            except ClientError as e:
+                print(f"Error deleting staged photos for {self.user_id}: {str(e)}")
+            return 400, {"error": "No faces detected in the provided images."}
+
+        removed_face_ids, removed_urls = superseded_entries(existing, self.enrolled, self.moved)
+        departure = self.retention_policy.departure_attributes(passenger_data)
+
+        # Records from before the expiry and departure were stamped are
+        # rewritten to gain them
+        if (
+            existing
+            and not self.new_images
+            and not removed_urls
+            and all(name in existing for name in (retention.EXPIRY_ATTRIBUTE, *departure))
+        ):
+            stored_data = {
+                key: value
+                for key, value in existing.items()
+                if key not in SYSTEM_ATTRIBUTES
+            }
+            if stored_data == passenger_data:
+                print(f"Enrolment for {self.user_id} is unchanged, skipping write")
+                return 200, {
+                    "message": "User already enrolled with identical data",
+                    "userId": self.user_id,
+                    "faceIds": face_ids,
+                }
+
+        version = int(existing.get("recordVersion", 0)) if existing else 0
+
+        # Store user data in DynamoDB, failing if another enrolment got there first
+        try:
+            with span("dynamodb_put"):
+                self.table.put_item(
+                    Item={
+                        **passenger_data,
+                        # Keys of the manual lookup, flight listing and departure indexes
+                        **name_index.index_attributes(passenger_data),
+                        **flights.index_attributes(passenger_data),
+                        **departure,
+                        "userId": self.user_id,
+                        "faceIds": face_ids,
+                        "imageUrls": [entry["imageUrl"] for entry in self.enrolled.values()],
+                        "enrolledImages": self.enrolled,
+                        "recordVersion": version + 1,
+                        "rekognition_collection_id": self.collection_id,
+                        # TTL, after which record cleanup releases the faces and photos
+                        retention.EXPIRY_ATTRIBUTE: self.retention_policy.expires_at(
+                            passenger_data
+                        ),
+                    },
+                    **write_condition(existing),
+                )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            print(f"Concurrent enrolment detected for {self.user_id}")
+            self.release()
+            return 409, {"error": "User record was modified concurrently, please retry."}
+
+        # The new record is committed; release what it no longer references
+        try:
+            with span("cleanup"):
+                if removed_face_ids:
+                    self.rekognition.delete_faces(
+                        CollectionId=self.previous_collection_id, FaceIds=removed_face_ids
+                    )
+                url_prefix = photo_url(self.bucket_name, "")
+                for url in removed_urls:
+                    if url.startswith(url_prefix):
+                        self.s3.delete_object(
+                            Bucket=self.bucket_name, Key=url[len(url_prefix) :]
+                        )
+        except ClientError as e:
+            print(f"Error cleaning up superseded faces for {self.user_id}: {str(e)}")
+
+        self.index_hot(departure.get("departureAt"))
+
+        return 200, {
+            "message": (
+                "User updated and faces re-indexed successfully"
+                if existing
+                else "User created and faces indexed successfully"
+            ),
+            "userId": self.user_id,
+            "faceIds": face_ids,
+            "addedFaceIds": self.added_face_ids,
+            "removedFaceIds": removed_face_ids,
+        }
+
+    def index_hot(self, departure_at):
+        """
+        Add the faces indexed by this attempt to the hot collection when the
+        traveller departs inside its window. Failures are left to the next
+        rotation of the collection.
+        """
+        hot = self.hot_collection
+        if not hot or not self.added_image_urls or not hot.includes(departure_at):
+            return
+        try:
+            with span("rekognition_index_hot"):
+                hot.add(self.rekognition, self.user_id, self.added_image_urls)
+        except ClientError as e:
+            print(f"Error adding {self.user_id} to the hot collection: {str(e)}")
+
+    def discard(self, hashes):
+        """
+        Delete the staged photos for ``hashes`` that the loaded record does
+        not reference, once the attempt that staged them has given up.
+        """
+        kept = set(self.existing.get("imageUrls", [])) if self.existing else set()
+        for content_hash in hashes:
+            s3_key = photo_key(self.user_id, content_hash)
+            if photo_url(self.bucket_name, s3_key) in kept:
+                continue
+            with span("s3_delete"):
+                self.s3.delete_object(Bucket=self.bucket_name, Key=s3_key)
+
+    def release(self):
+        """Delete the faces indexed by this attempt, which no record references."""
+        if self.added_face_ids:
+            self.rekognition.delete_faces(
+                CollectionId=self.collection_id, FaceIds=self.added_face_ids
+            )
+            self.added_face_ids = []
@@ -0,0 +1,75 @@
+"""
+Flight keys and the per-flight passenger listing.
+
+Enrolment writes ``flightKey`` (``index_attributes``) on every passenger
+record with a flight and a scheduled date: the normalized flight number
+and the date, e.g. ``"SQ123#2024-08-15"``. It is the partition key of the
+table's ``flight-index`` GSI, sorted by ``userId``, so listing one flight
+is a Query on one partition however large the table grows.
+
+Listings are paged with opaque ``nextToken``s, which wrap the Query's
+``LastEvaluatedKey`` and are only accepted for the flight they came from.
+"""
+import base64
+import json
+import re
+
+FLIGHT_INDEX_NAME = "flight-index"
+INDEX_ATTRIBUTES = ("flightKey",)
+
+_FLIGHT = re.compile(r"^([A-Z]{2,3}|[A-Z][0-9]|[0-9][A-Z])0*([0-9]+[A-Z]?)$")
+_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def normalize_flight(flight_number):
+    """``"sq 0123"`` -> ``"SQ123"``; other shapes are only upper-cased."""
+    flight = re.sub(r"[^0-9A-Za-z]", "", str(flight_number)).upper()
+    match = _FLIGHT.match(flight)
+    return match.group(1) + match.group(2) if match else flight
+
+
+def flight_key(flight_number, scheduled_date):
+    """Partition key of ``flight-index``; raises ValueError on a malformed date."""
+    scheduled_date = str(scheduled_date).strip()
+    if not _DATE.match(scheduled_date):
+        raise ValueError(f"Invalid date '{scheduled_date}', expected YYYY-MM-DD")
+    return f"{normalize_flight(flight_number)}#{scheduled_date}"
+
+
+def index_attributes(passenger_data):
+    """``flightKey`` for a passenger record, or {} without a flight and date."""
+    flight = passenger_data.get("next_flight_id") or passenger_data.get("flightno")
+    scheduled_date = passenger_data.get("scheduled_date")
+    if not flight or not scheduled_date:
+        return {}
+    try:
+        return {"flightKey": flight_key(flight, scheduled_date)}
+    except ValueError:
+        return {}
+
+
+def encode_page_token(last_evaluated_key):
+    """Opaque token for a low-level ``LastEvaluatedKey``."""
+    text = json.dumps(last_evaluated_key, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def decode_page_token(token, key):
+    """
+    The ``ExclusiveStartKey`` in ``token``. Raises ValueError unless it is a
+    token for the flight ``key``.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        start_key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid nextToken") from None
+    if (
+        not isinstance(start_key, dict)
+        or set(start_key) != {"flightKey", "userId"}
+        or start_key["flightKey"] != {"S": key}
+        or not isinstance(start_key["userId"], dict)
+        or not isinstance(start_key["userId"].get("S"), str)
+    ):
+        raise ValueError("Invalid nextToken")
+    return start_key
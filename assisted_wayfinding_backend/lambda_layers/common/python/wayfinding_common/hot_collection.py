@@ -0,0 +1,197 @@
+"""
+Hot Rekognition collection of travellers departing soon.
+
+The main collection holds every enrolled face. The hot collection holds
+only the faces of travellers whose departure falls between
+``hours_after_departure`` ago and ``window_hours`` ahead, a small fraction
+of the main one. Recognition searches it first and the main collection
+only on a miss.
+
+Enrolment writes ``departureDate`` (the airport-local date of departure)
+and ``departureAt`` (epoch seconds) on every dated record
+(``RetentionPolicy.departure_attributes``); they key the table's sparse
+``departure-index``. It also indexes a traveller's new photos into the
+hot collection straight away when their departure is inside the window.
+Every few minutes ``rotate`` reconciles the collection with the index,
+photo by photo: it adds the photos of travellers who moved into the
+window and those a member's record gained, and deletes the faces of
+travellers who left it and of photos a re-enrolment replaced.
+
+Hot faces are not recorded on the passenger item. Their
+``ExternalImageId`` is ``<userId>:<photo tag>``, the tag naming the photo
+they were indexed from (``photo_tag``); a hot match is resolved by the
+user ID (``hot_user_id``). Photos in which Rekognition finds no face have
+nothing to show for them in the collection, so they are tried again on
+every rotation.
+"""
+import hashlib
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from botocore.exceptions import ClientError
+from wayfinding_common.enrolment import photo_location
+
+DEPARTURE_INDEX_NAME = "departure-index"
+
+DEFAULT_WINDOW_HOURS = 6
+DEFAULT_HOURS_AFTER_DEPARTURE = 2
+
+# API limits per call
+MAX_FACE_IDS_PER_CALL = 4096  # DeleteFaces
+LIST_FACES_PAGE_SIZE = 4096  # ListFaces
+
+
+def photo_tag(image_url):
+    """A short, stable name for a photo, as allowed in an ``ExternalImageId``."""
+    return hashlib.sha256(image_url.encode("utf-8")).hexdigest()[:16]
+
+
+def hot_user_id(external_image_id):
+    """The user ID of a hot face's ``ExternalImageId``."""
+    user_id, separator, _ = external_image_id.rpartition(":")
+    # Faces indexed before photos were tagged carry the bare user ID
+    return user_id if separator else external_image_id
+
+
+class HotCollection:
+    """Which travellers belong in the hot collection ``collection_id``."""
+
+    def __init__(
+        self,
+        collection_id,
+        window_hours=DEFAULT_WINDOW_HOURS,
+        hours_after_departure=DEFAULT_HOURS_AFTER_DEPARTURE,
+        clock=time.time,
+    ):
+        self.collection_id = collection_id
+        self.window = window_hours * 3600
+        self.after_departure = hours_after_departure * 3600
+        self.clock = clock
+
+    @classmethod
+    def from_environment(cls):
+        """The tier set by ``HOT_COLLECTION_*``, or None when it is disabled."""
+        collection_id = os.environ.get("HOT_COLLECTION_ID")
+        if not collection_id:
+            return None
+        return cls(
+            collection_id,
+            window_hours=float(os.environ.get("HOT_WINDOW_HOURS", DEFAULT_WINDOW_HOURS)),
+            hours_after_departure=float(
+                os.environ.get("HOT_HOURS_AFTER_DEPARTURE", DEFAULT_HOURS_AFTER_DEPARTURE)
+            ),
+        )
+
+    def bounds(self):
+        """The ``departureAt`` range of members, as of now."""
+        now = self.clock()
+        return int(now - self.after_departure), int(now + self.window)
+
+    def includes(self, departure_at):
+        start, end = self.bounds()
+        return departure_at is not None and start <= departure_at <= end
+
+    def due(self, table, policy, index_name=DEPARTURE_INDEX_NAME):
+        """``{userId: imageUrls}`` of the travellers who belong now."""
+        # Only the rotation job queries; recognition never loads this
+        from boto3.dynamodb.conditions import Key
+
+        start, end = self.bounds()
+        day = datetime.fromtimestamp(start, policy.timezone).date()
+        last_day = datetime.fromtimestamp(end, policy.timezone).date()
+        members = {}
+        while day <= last_day:
+            kwargs = {
+                "IndexName": index_name,
+                "KeyConditionExpression": Key("departureDate").eq(day.isoformat())
+                & Key("departureAt").between(start, end),
+            }
+            while True:
+                response = table.query(**kwargs)
+                for item in response["Items"]:
+                    members[item["userId"]] = item.get("imageUrls", [])
+                if "LastEvaluatedKey" not in response:
+                    break
+                kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+            day += timedelta(days=1)
+        return members
+
+    def members(self, gateway):
+        """``{userId: {photo tag: [faceId]}}`` of the faces in the collection now."""
+        faces = defaultdict(lambda: defaultdict(list))
+        kwargs = {"CollectionId": self.collection_id, "MaxResults": LIST_FACES_PAGE_SIZE}
+        while True:
+            response = gateway.call("list_faces", **kwargs)
+            for face in response["Faces"]:
+                external_image_id = face.get("ExternalImageId") or ""
+                user_id, separator, tag = external_image_id.rpartition(":")
+                if not separator:
+                    # Untagged: matches no photo, so it is replaced
+                    user_id, tag = external_image_id, None
+                faces[user_id][tag].append(face["FaceId"])
+            if not response.get("NextToken"):
+                return faces
+            kwargs["NextToken"] = response["NextToken"]
+
+    def add(self, gateway, user_id, image_urls):
+        """Index ``user_id``'s photos; returns the number of faces added."""
+        added = 0
+        for url in image_urls:
+            location = photo_location(url)
+            if not location:
+                continue
+            bucket, key = location
+            response = gateway.index_faces(
+                CollectionId=self.collection_id,
+                Image={"S3Object": {"Bucket": bucket, "Name": key}},
+                ExternalImageId=f"{user_id}:{photo_tag(url)}",
+                MaxFaces=1,
+            )
+            added += len(response["FaceRecords"])
+        return added
+
+    def rotate(self, table, gateway, policy, index_name=DEPARTURE_INDEX_NAME):
+        """
+        Bring the collection in line with the travellers due now. Returns
+        counts of what changed.
+        """
+        due = self.due(table, policy, index_name)
+        current = self.members(gateway)
+
+        # Faces of travellers who left and of photos their records dropped
+        stale = []
+        for user_id, faces in current.items():
+            wanted = {photo_tag(url) for url in due.get(user_id, ())}
+            for tag, face_ids in faces.items():
+                if tag not in wanted:
+                    stale.extend(face_ids)
+        for start in range(0, len(stale), MAX_FACE_IDS_PER_CALL):
+            gateway.delete_faces(
+                CollectionId=self.collection_id,
+                FaceIds=stale[start : start + MAX_FACE_IDS_PER_CALL],
+            )
+
+        added_users = added_faces = failed_users = 0
+        for user_id, image_urls in due.items():
+            indexed = current.get(user_id, {})
+            missing = [url for url in image_urls if photo_tag(url) not in indexed]
+            if not missing:
+                continue
+            try:
+                added_faces += self.add(gateway, user_id, missing)
+                added_users += 1
+            except ClientError as e:
+                # Left for the next rotation; recognition falls back meanwhile
+                print(f"Error adding {user_id} to {self.collection_id}: {str(e)}")
+                failed_users += 1
+
+        return {
+            "members": len(due),
+            "addedUsers": added_users,
+            "addedFaces": added_faces,
+            "removedUsers": sum(user_id not in due for user_id in current),
+            "removedFaces": len(stale),
+            "failedUsers": failed_users,
+        }
@@ -0,0 +1,142 @@
+"""
+Visiting order for a walk through several stops.
+
+``POST /directions/itinerary`` routes a traveller from ``from`` through
+``stops`` (a lounge, a pharmacy, ...) and, optionally, on to ``to``. With
+``ordered`` the stops are visited as given. Otherwise they are visited in
+the order that needs the least walking: exactly, by dynamic programming
+over subsets of stops (Held-Karp), up to ``EXACT_LIMIT`` stops, and beyond
+that by nearest neighbour improved with 2-opt.
+
+Walking times are read off the venue's shortest-path trees
+(``Venue.tree``), one per location of the walk and kept by the container.
+The legs of the chosen order are walks up the same trees, so they cost
+nothing once the order is known.
+"""
+from itertools import combinations
+
+EXACT_LIMIT = 8
+MAX_STOPS = 20
+
+ORDERED = "ordered"
+EXACT = "exact"
+HEURISTIC = "heuristic"
+
+_UNREACHABLE = float("inf")
+
+
+class Itinerary:
+    """The stops in visiting order and the ``Route`` of every leg."""
+
+    def __init__(self, order, legs, method):
+        self.order = order
+        self.legs = legs
+        self.method = method
+
+    @property
+    def seconds(self):
+        return sum(leg.seconds for leg in self.legs)
+
+
+def _held_karp(matrix, n, has_end):
+    """
+    Cheapest order of stops ``1..n`` from location 0, ending at location
+    ``n + 1`` when ``has_end``. ``matrix[i][j]`` is the walk from i to j.
+    """
+    stops = range(1, n + 1)
+    # cost[(visited, last)]: cheapest walk from 0 through ``visited`` ending at ``last``
+    cost = {(frozenset([stop]), stop): (matrix[0][stop], 0) for stop in stops}
+    for size in range(2, n + 1):
+        for subset in combinations(stops, size):
+            visited = frozenset(subset)
+            for last in subset:
+                before = visited - {last}
+                cost[visited, last] = min(
+                    (cost[before, previous][0] + matrix[previous][last], previous)
+                    for previous in before
+                )
+
+    everything = frozenset(stops)
+    end = n + 1
+    last = min(
+        stops,
+        key=lambda stop: cost[everything, stop][0] + (matrix[stop][end] if has_end else 0),
+    )
+    order = []
+    visited = everything
+    while last:
+        order.append(last)
+        visited, last = visited - {last}, cost[visited, last][1]
+    return order[::-1]
+
+
+def _walk_cost(matrix, path):
+    return sum(matrix[a][b] for a, b in zip(path, path[1:]))
+
+
+def _nearest_neighbour_two_opt(matrix, n, has_end):
+    """A good order of stops ``1..n``, see ``_held_karp``."""
+    order = []
+    remaining = set(range(1, n + 1))
+    current = 0
+    while remaining:
+        current = min(remaining, key=lambda stop: (matrix[current][stop], stop))
+        order.append(current)
+        remaining.remove(current)
+
+    def path(order):
+        return [0, *order, n + 1] if has_end else [0, *order]
+
+    best = _walk_cost(matrix, path(order))
+    improved = True
+    while improved:
+        improved = False
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                candidate = order[:i] + order[i : j + 1][::-1] + order[j + 1 :]
+                candidate_cost = _walk_cost(matrix, path(candidate))
+                if candidate_cost < best:
+                    order, best, improved = candidate, candidate_cost, True
+    return order
+
+
+def plan_itinerary(venue, start, stops, end=None, ordered=False):
+    """
+    The ``Itinerary`` from ``start`` through ``stops`` (to ``end``). Raises
+    ValueError for unknown or unconnected locations and too many stops.
+    """
+    unknown = [
+        location
+        for location in dict.fromkeys([start, *stops, *([end] if end else [])])
+        if location not in venue
+    ]
+    if unknown:
+        raise ValueError(f"Unknown location(s): {', '.join(unknown)}")
+    stops = [stop for stop in dict.fromkeys(stops) if stop not in (start, end)]
+    if len(stops) > MAX_STOPS:
+        raise ValueError(f"At most {MAX_STOPS} stops can be planned")
+
+    if ordered:
+        order, method = stops, ORDERED
+    else:
+        locations = [start, *stops, *([end] if end else [])]
+        matrix = []
+        for source in locations:
+            seconds, _ = venue.tree(source)
+            matrix.append([seconds.get(target, _UNREACHABLE) for target in locations])
+        if len(stops) <= EXACT_LIMIT:
+            method = EXACT
+            plan = _held_karp(matrix, len(stops), bool(end)) if stops else []
+        else:
+            method = HEURISTIC
+            plan = _nearest_neighbour_two_opt(matrix, len(stops), bool(end))
+        order = [locations[index] for index in plan]
+
+    path = [start, *order, *([end] if end else [])]
+    legs = []
+    for origin, destination in zip(path, path[1:]):
+        route = venue.route(origin, destination)
+        if route is None:
+            raise ValueError(f"No route from {origin} to {destination}")
+        legs.append(route)
+    return Itinerary(order, legs, method)
@@ -0,0 +1,161 @@
+"""
+Asynchronous enrolment jobs: status records and the work queue.
+
+``POST /index/jobs`` stages the photos, records a job as ``queued`` and
+sends a message to the enrolment queue; the enrolment worker consumes it,
+moving the job through ``running`` to ``succeeded`` or ``failed``.
+``GET /index/jobs/{jobId}`` reads the record back. Records expire through
+the table's TTL on ``expiresAt``.
+
+``ENROLMENT_QUEUE_URL`` selects the queue. Set to ``local`` it is the
+process-wide ``LocalQueue``, an in-process stand-in for SQS and its Lambda
+event source, so the whole flow runs offline in tests and local tools.
+"""
+import collections
+import os
+import time
+import uuid
+
+from wayfinding_common import aws
+from wayfinding_common.serialization import dumps
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+LOCAL_QUEUE_URL = "local"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+class JobStore:
+    """Job status records in the jobs table, keyed by ``jobId``."""
+
+    def __init__(self, table, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+
+    def create(self, job_id, user_id, image_count, **fields):
+        now = int(time.time())
+        job = {
+            "jobId": job_id,
+            "userId": user_id,
+            "status": QUEUED,
+            "imageCount": image_count,
+            "createdAt": now,
+            "updatedAt": now,
+            "expiresAt": now + self.ttl_seconds,
+            **fields,
+        }
+        self.table.put_item(Item=job)
+        return job
+
+    def update(self, job_id, status, **fields):
+        """Set the status and ``fields``; returns the updated record."""
+        fields = {"status": status, "updatedAt": int(time.time()), **fields}
+        names = {f"#f{i}": name for i, name in enumerate(fields)}
+        values = {f":v{i}": value for i, value in enumerate(fields.values())}
+        response = self.table.update_item(
+            Key={"jobId": job_id},
+            UpdateExpression="SET " + ", ".join(f"#f{i} = :v{i}" for i in range(len(fields))),
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues="ALL_NEW",
+        )
+        return response.get("Attributes")
+
+    def get(self, job_id):
+        return self.table.get_item(Key={"jobId": job_id}).get("Item")
+
+
+class SqsQueue:
+    def __init__(self, queue_url):
+        self.queue_url = queue_url
+
+    def send(self, message):
+        aws.client("sqs").send_message(QueueUrl=self.queue_url, MessageBody=dumps(message))
+
+
+class LocalQueue:
+    """
+    In-process stand-in for the enrolment queue and its event source mapping.
+
+    ``send`` keeps messages in memory; ``drain`` hands them to a handler in
+    SQS event batches and honours partial batch responses the way the event
+    source does with ``ReportBatchItemFailures``: failed messages are
+    redelivered until received ``max_receives`` times, then moved to
+    ``dead_letters``.
+    """
+
+    def __init__(self, max_receives=3):
+        self.max_receives = max_receives
+        self.messages = collections.deque()
+        self.dead_letters = []
+        self._sequence = 0
+
+    def send(self, message):
+        self._sequence += 1
+        self.messages.append(
+            {"messageId": f"local-{self._sequence}", "body": dumps(message), "receiveCount": 0}
+        )
+
+    def drain(self, handler, context=None, batch_size=10):
+        """Deliver messages until the queue is empty; returns the number of deliveries."""
+        deliveries = 0
+        while self.messages:
+            batch = [self.messages.popleft() for _ in range(min(batch_size, len(self.messages)))]
+            records = []
+            for message in batch:
+                message["receiveCount"] += 1
+                records.append(
+                    {
+                        "messageId": message["messageId"],
+                        "receiptHandle": message["messageId"],
+                        "body": message["body"],
+                        "attributes": {
+                            "ApproximateReceiveCount": str(message["receiveCount"])
+                        },
+                        "eventSource": "aws:sqs",
+                    }
+                )
+            deliveries += len(records)
+
+            response = handler({"Records": records}, context) or {}
+            failed = {item["itemIdentifier"] for item in response.get("batchItemFailures", [])}
+            for message in batch:
+                if message["messageId"] not in failed:
+                    continue
+                if message["receiveCount"] >= self.max_receives:
+                    self.dead_letters.append(message)
+                else:
+                    self.messages.append(message)
+        return deliveries
+
+
+_local_queue = None
+
+
+def local_queue():
+    """The process-wide ``LocalQueue``."""
+    global _local_queue
+    if _local_queue is None:
+        _local_queue = LocalQueue()
+    return _local_queue
+
+
+def reset_local_queue():
+    global _local_queue
+    _local_queue = None
+
+
+def queue_from_environment():
+    queue_url = os.environ.get("ENROLMENT_QUEUE_URL")
+    if not queue_url:
+        raise RuntimeError("ENROLMENT_QUEUE_URL is not set")
+    if queue_url == LOCAL_QUEUE_URL:
+        return local_queue()
+    return SqsQueue(queue_url)
@@ -0,0 +1,110 @@
+"""
+Message catalogues: the text kiosks show and speak, per language.
+
+``messages/<locale>.json`` beside this module maps message keys to
+templates with ``{name}`` placeholders, one file per locale in
+``LOCALES``. ``catalogue`` reads and compiles a locale the first time it
+is asked for and keeps it for the container's lifetime. Compiling splits
+each template into literal text and placeholders, so rendering is one
+join, with no file reads or template parsing per request.
+
+Passenger records carry ``language`` as a code (``zh``, ``es-MX``) or a
+name (``Spanish``); ``locale_of`` maps either to a locale. Unknown ones
+get ``DEFAULT_LOCALE``, and a key missing from a locale its English text.
+"""
+import json
+import os
+from functools import lru_cache
+from string import Formatter
+
+MESSAGES_DIR = os.path.join(os.path.dirname(__file__), "messages")
+DEFAULT_LOCALE = "en"
+LOCALES = ("en", "zh", "es")
+
+_LANGUAGE_NAMES = {
+    "english": "en",
+    "chinese": "zh",
+    "mandarin": "zh",
+    "spanish": "es",
+    "español": "es",
+    "中文": "zh",
+}
+
+
+def locale_of(language):
+    """The locale for a passenger's ``language``; ``DEFAULT_LOCALE`` when unknown."""
+    if not isinstance(language, str):
+        return DEFAULT_LOCALE
+    language = language.strip().lower()
+    locale = language.replace("_", "-").split("-")[0]
+    if locale in LOCALES:
+        return locale
+    return _LANGUAGE_NAMES.get(language, DEFAULT_LOCALE)
+
+
+class Template:
+    """A message compiled to ``(literal, placeholder)`` parts."""
+
+    __slots__ = ("key", "fields", "_parts")
+
+    def __init__(self, key, text):
+        self.key = key
+        parts = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if field is not None and (not field.isidentifier() or spec or conversion):
+                raise ValueError(f"Message {key}: only {{name}} placeholders are supported")
+            parts.append((literal, field))
+        self._parts = tuple(parts)
+        self.fields = frozenset(field for _, field in parts if field)
+
+    def render(self, **params):
+        """The text with ``params`` filled in; raises KeyError for a missing one."""
+        return "".join(
+            literal if field is None else literal + str(params[field])
+            for literal, field in self._parts
+        )
+
+
+class Catalogue:
+    """The compiled templates of one locale, falling back to another's."""
+
+    def __init__(self, locale, templates, fallback=None):
+        self.locale = locale
+        self.templates = templates
+        self.fallback = fallback
+
+    def template(self, key):
+        if key in self.templates:
+            return self.templates[key]
+        if self.fallback is not None:
+            return self.fallback.template(key)
+        raise KeyError(f"No message {key}")
+
+    def render(self, key, **params):
+        return self.template(key).render(**params)
+
+
+def compile_catalogue(locale, messages, fallback=None):
+    """A ``Catalogue`` of ``{key: text}``, checked against ``fallback``'s placeholders."""
+    templates = {key: Template(key, text) for key, text in messages.items()}
+    if fallback is not None:
+        for key, template in templates.items():
+            expected = fallback.templates.get(key)
+            if expected is not None and template.fields != expected.fields:
+                raise ValueError(
+                    f"Message {key} in {locale} has placeholders "
+                    f"{sorted(template.fields)}, expected {sorted(expected.fields)}"
+                )
+    return Catalogue(locale, templates, fallback)
+
+
+def catalogue(language=DEFAULT_LOCALE):
+    """The catalogue for ``language`` (see ``locale_of``), read and compiled once."""
+    return _load(locale_of(language))
+
+
+@lru_cache(maxsize=None)
+def _load(locale):
+    fallback = None if locale == DEFAULT_LOCALE else _load(DEFAULT_LOCALE)
+    with open(os.path.join(MESSAGES_DIR, f"{locale}.json"), encoding="utf-8") as f:
+        return compile_catalogue(locale, json.load(f), fallback)
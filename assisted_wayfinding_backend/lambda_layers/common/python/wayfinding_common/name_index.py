@@ -0,0 +1,235 @@
+"""
+Passenger name index for manual lookup.
+
+Enrolment writes three extra attributes on every passenger record that has
+a flight and a date of birth (``index_attributes``):
+
+- ``lookupKey``: normalized flight number and date of birth, the partition
+  key of the table's sparse ``lookup-index`` GSI;
+- ``nameTokens``: the name case-folded, without accents or punctuation,
+  split into words;
+- ``namePhonetic``: the Soundex code of each token.
+
+A lookup queries ``lookup-index`` for the flight and date of birth, which
+returns the handful of passengers sharing them, and ``rank`` orders those
+by how well their name matches the typed one. Words may come in any order
+and missing middle names cost little; each word scores by edit distance,
+or at least ``PHONETIC_SIMILARITY`` when the Soundex codes agree, so "Jon"
+finds "John" and "Smyth" finds "Smith". A candidate whose name contains
+every typed word exactly beats any fuzzy match.
+
+Records enrolled before the index carry none of these attributes until
+``backfill`` has been run once against the table, after the index is
+created:
+
+    backfill(boto3.resource("dynamodb").Table(name), rcu_budget=500)
+"""
+import re
+import unicodedata
+from collections import namedtuple
+
+from botocore.exceptions import ClientError
+
+from wayfinding_common.flights import normalize_flight
+from wayfinding_common.scan import ScanStats, parallel_scan
+
+LOOKUP_INDEX_NAME = "lookup-index"
+INDEX_ATTRIBUTES = ("lookupKey", "nameTokens", "namePhonetic")
+
+# A candidate needs this score to count as a match, and must beat the
+# runner-up by AMBIGUITY_MARGIN to be returned on its own
+MIN_SCORE = 0.75
+AMBIGUITY_MARGIN = 0.1
+PHONETIC_SIMILARITY = 0.85
+# Share of the score for the typed words found in the candidate's name;
+# the rest is for the candidate's words found in the typed name
+QUERY_WEIGHT = 0.8
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"),
+    **dict.fromkeys("cgjkqsxz", "2"),
+    **dict.fromkeys("dt", "3"),
+    "l": "4",
+    **dict.fromkeys("mn", "5"),
+    "r": "6",
+}
+
+
+def normalize_date(date_of_birth):
+    return re.sub(r"[/.\s]+", "-", str(date_of_birth).strip())
+
+
+def lookup_key(flight_number, date_of_birth):
+    return f"{normalize_flight(flight_number)}#{normalize_date(date_of_birth)}"
+
+
+def name_tokens(name):
+    """Case-folded words of ``name`` with accents and punctuation removed."""
+    decomposed = unicodedata.normalize("NFKD", str(name).casefold())
+    letters = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return re.findall(r"[a-z0-9]+", letters.replace("'", ""))
+
+
+def soundex(token):
+    """American Soundex of one token, e.g. ``"robert"`` -> ``"R163"``."""
+    if not token:
+        return ""
+    code = token[0].upper()
+    previous = _SOUNDEX_CODES.get(token[0], "")
+    for char in token[1:]:
+        digit = _SOUNDEX_CODES.get(char, "")
+        if digit and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        # h and w do not separate letters with the same code; vowels do
+        if char not in "hw":
+            previous = digit
+    return code.ljust(4, "0")
+
+
+def index_attributes(passenger_data):
+    """The name index attributes for a passenger record, or {} without a name."""
+    name = passenger_data.get("name")
+    tokens = name_tokens(name) if name else []
+    if not tokens:
+        return {}
+    attributes = {
+        "nameTokens": tokens,
+        "namePhonetic": [soundex(token) for token in tokens],
+    }
+    flight, date_of_birth = passenger_data.get("next_flight_id"), passenger_data.get("dateOfBirth")
+    if flight and date_of_birth:
+        attributes["lookupKey"] = lookup_key(flight, date_of_birth)
+    return attributes
+
+
+def edit_distance(a, b):
+    """Levenshtein distance, two rows at a time."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            )
+        previous = current
+    return previous[-1]
+
+
+def token_similarity(a, a_phonetic, b, b_phonetic):
+    if a == b:
+        return 1.0
+    similarity = 1.0 - edit_distance(a, b) / max(len(a), len(b))
+    if a_phonetic == b_phonetic:
+        similarity = max(similarity, PHONETIC_SIMILARITY)
+    return similarity
+
+
+def _coverage(tokens, phonetic, other_tokens, other_phonetic):
+    """Mean over ``tokens`` of the best similarity to any of ``other_tokens``."""
+    if not tokens or not other_tokens:
+        return 0.0
+    return sum(
+        max(
+            token_similarity(token, code, other, other_code)
+            for other, other_code in zip(other_tokens, other_phonetic)
+        )
+        for token, code in zip(tokens, phonetic)
+    ) / len(tokens)
+
+
+def score(query, candidate):
+    """Similarity in [0, 1] of the typed name ``query`` to a passenger item."""
+    query_tokens = name_tokens(query)
+    query_phonetic = [soundex(token) for token in query_tokens]
+    tokens = candidate.get("nameTokens") or name_tokens(candidate.get("name", ""))
+    phonetic = candidate.get("namePhonetic") or [soundex(token) for token in tokens]
+    return QUERY_WEIGHT * _coverage(query_tokens, query_phonetic, tokens, phonetic) + (
+        1 - QUERY_WEIGHT
+    ) * _coverage(tokens, phonetic, query_tokens, query_phonetic)
+
+
+Match = namedtuple("Match", ["score", "exact", "item"])
+
+
+def rank(query, candidates):
+    """``Match``es scoring at least ``MIN_SCORE``, exact ones first, best first."""
+    query_tokens = set(name_tokens(query))
+    matches = []
+    for item in candidates:
+        value = score(query, item)
+        if value >= MIN_SCORE:
+            tokens = item.get("nameTokens") or name_tokens(item.get("name", ""))
+            matches.append(Match(value, query_tokens <= set(tokens), item))
+    return sorted(matches, key=lambda match: (match.exact, match.score), reverse=True)
+
+
+def best_match(query, candidates):
+    """
+    The best ``Match`` for ``query`` and whether it is ambiguous, i.e. the
+    runner-up is as exact and within ``AMBIGUITY_MARGIN`` of it. ``(None,
+    False)`` when nothing matches.
+    """
+    matches = rank(query, candidates)
+    if not matches:
+        return None, False
+    best = matches[0]
+    ambiguous = len(matches) > 1 and (
+        matches[1].exact == best.exact and best.score - matches[1].score < AMBIGUITY_MARGIN
+    )
+    return best, ambiguous
+
+
+def public_view(item):
+    """``item`` without the index attributes."""
+    return {key: value for key, value in item.items() if key not in INDEX_ATTRIBUTES}
+
+
+def backfill(table, segments=4, rcu_budget=None, stats=None):
+    """
+    Write the index attributes on every record of ``table`` that has a
+    name, flight and date of birth but no ``lookupKey``; returns how many
+    were updated. A record changed since it was read is left as it is, as
+    enrolment has written its attributes by then. ``stats`` (a
+    ``ScanStats``) collects the scan's totals.
+    """
+    items = parallel_scan(
+        table,
+        segments=segments,
+        projection=["userId", "name", "next_flight_id", "dateOfBirth"],
+        rcu_budget=rcu_budget,
+        stats=stats if stats is not None else ScanStats(),
+        FilterExpression="attribute_not_exists(lookupKey) AND attribute_exists(#name)"
+        " AND attribute_exists(next_flight_id) AND attribute_exists(dateOfBirth)",
+        ExpressionAttributeNames={"#name": "name"},
+    )
+    updated = 0
+    for item in items:
+        attributes = index_attributes(item)
+        if "lookupKey" not in attributes:
+            continue
+        names = {f"#a{i}": attribute for i, attribute in enumerate(attributes)}
+        values = {f":a{i}": value for i, value in enumerate(attributes.values())}
+        try:
+            table.update_item(
+                Key={"userId": item["userId"]},
+                UpdateExpression="SET " + ", ".join(f"{n} = :a{i}" for i, n in enumerate(names)),
+                ConditionExpression="#name = :name AND next_flight_id = :flight"
+                " AND dateOfBirth = :birth",
+                ExpressionAttributeNames={**names, "#name": "name"},
+                ExpressionAttributeValues={
+                    **values,
+                    ":name": item["name"],
+                    ":flight": item["next_flight_id"],
+                    ":birth": item["dateOfBirth"],
+                },
+            )
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            continue
+        updated += 1
+    return updated
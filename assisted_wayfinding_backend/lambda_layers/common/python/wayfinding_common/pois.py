@@ -0,0 +1,157 @@
+"""
+Facilities travellers look for: toilets, charging points, prayer rooms.
+
+Each of the venue's ``pois`` has a category, a floor, plan coordinates and
+the ``location`` it is reached from, ``seconds`` further on. ``PoiIndex``
+sorts them once per container into a grid per category, by the
+coordinates of their location, and answers "the three nearest toilets
+from kiosk_1" by walking time:
+
+- walking times come from the kiosk's shortest-path tree (``Venue.tree``),
+  a single-source search kept while the container is warm and repaired
+  under live conditions;
+- grid cells are visited ring by ring outwards from the kiosk's cell.
+  Nothing in a cell is quicker to reach than its distance from the kiosk
+  at the venue's fastest pace (``Venue.pace``), so cells that cannot beat
+  the k-th POI found are skipped, and the search stops at the first ring
+  that cannot. Floors share the plan's coordinates, so one grid serves
+  them all.
+"""
+import heapq
+import math
+from collections import defaultdict
+
+CELL_PIXELS = 100
+DEFAULT_K = 3
+MAX_K = 10
+
+
+class _Cell:
+    """The POIs of one floor in one grid cell, with the box of their locations."""
+
+    __slots__ = ("floor", "pois", "min_x", "min_y", "max_x", "max_y", "min_seconds")
+
+    def __init__(self, venue, floor, pois):
+        self.floor = floor
+        self.pois = pois
+        xs = [venue.nodes[poi["location"]]["x"] for poi in pois]
+        ys = [venue.nodes[poi["location"]]["y"] for poi in pois]
+        self.min_x, self.max_x = min(xs), max(xs)
+        self.min_y, self.max_y = min(ys), max(ys)
+        self.min_seconds = min(poi.get("seconds", 0) for poi in pois)
+
+    def bound(self, x, y, pace):
+        """No POI in the cell is less than this many seconds from ``(x, y)``."""
+        dx = max(self.min_x - x, 0, x - self.max_x)
+        dy = max(self.min_y - y, 0, y - self.max_y)
+        return math.hypot(dx, dy) * pace + self.min_seconds
+
+
+def _ring(i, j, radius):
+    """The grid cells ``radius`` cells away from ``(i, j)``, around a square."""
+    if radius == 0:
+        return [(i, j)]
+    cells = []
+    for offset in range(-radius, radius + 1):
+        cells.append((i + offset, j - radius))
+        cells.append((i + offset, j + radius))
+    for offset in range(-radius + 1, radius):
+        cells.append((i - radius, j + offset))
+        cells.append((i + radius, j + offset))
+    return cells
+
+
+class PoiIndex:
+    """The venue's POIs in a grid per category, one cell list per floor."""
+
+    def __init__(self, venue, cell_pixels=CELL_PIXELS):
+        self.venue = venue
+        self.cell_pixels = cell_pixels
+        grouped = defaultdict(list)
+        for poi in venue.pois:
+            if poi["location"] not in venue:
+                raise ValueError(
+                    f"POI {poi['id']} is reached from unknown location {poi['location']}"
+                )
+            grouped[poi["category"], self._cell_of(poi["location"]), poi["floor"]].append(poi)
+
+        # {category: {(i, j): [_Cell per floor]}}
+        self._grids = defaultdict(lambda: defaultdict(list))
+        for (category, cell, floor), pois in grouped.items():
+            self._grids[category][cell].append(_Cell(venue, floor, pois))
+        self._extents = {
+            category: (
+                min(i for i, _ in grid),
+                max(i for i, _ in grid),
+                min(j for _, j in grid),
+                max(j for _, j in grid),
+            )
+            for category, grid in self._grids.items()
+        }
+        self.categories = sorted(self._grids)
+
+    def _cell_of(self, location):
+        node = self.venue.nodes[location]
+        return int(node["x"] // self.cell_pixels), int(node["y"] // self.cell_pixels)
+
+    def nearest(self, origin, category, k=DEFAULT_K, floor=None):
+        """
+        ``[(seconds, poi)]`` for the ``k`` POIs of ``category`` (on ``floor``)
+        quickest to walk to from ``origin``, quickest first; POIs as far as
+        each other come in either order. Unreachable POIs are left out.
+        Raises ValueError for an unknown origin or category.
+        """
+        if origin not in self.venue:
+            raise ValueError(f"Unknown location(s): {origin}")
+        if category not in self._grids:
+            raise ValueError(
+                f"Unknown category '{category}', expected one of "
+                + ", ".join(self.categories)
+            )
+        grid = self._grids[category]
+        seconds, _ = self.venue.tree(origin)
+        x, y = self.venue.nodes[origin]["x"], self.venue.nodes[origin]["y"]
+        pace = self.venue.pace if self.venue.pace != math.inf else 0
+        i, j = self._cell_of(origin)
+        min_i, max_i, min_j, max_j = self._extents[category]
+        rings = max(i - min_i, max_i - i, j - min_j, max_j - j, 0)
+
+        # Max-heap of the best k so far, as (-seconds, id, poi)
+        best = []
+        for radius in range(rings + 1):
+            # Every cell of the ring is at least radius - 1 cells' width away
+            if len(best) == k and (radius - 1) * self.cell_pixels * pace >= -best[0][0]:
+                break
+            for key in _ring(i, j, radius):
+                for cell in grid.get(key, ()):
+                    if floor is not None and cell.floor != floor:
+                        continue
+                    if len(best) == k and cell.bound(x, y, pace) >= -best[0][0]:
+                        continue
+                    for poi in cell.pois:
+                        walk = seconds.get(poi["location"])
+                        if walk is None:
+                            continue
+                        walk += poi.get("seconds", 0)
+                        if len(best) < k:
+                            heapq.heappush(best, (-walk, poi["id"], poi))
+                        elif walk < -best[0][0]:
+                            heapq.heapreplace(best, (-walk, poi["id"], poi))
+        best.sort(key=lambda entry: (-entry[0], entry[1]))
+        return [(-negative, poi) for negative, _, poi in best]
+
+
+_poi_index = None
+
+
+def poi_index(venue):
+    """The container's ``PoiIndex`` for ``venue``, built on first use."""
+    global _poi_index
+    if _poi_index is None or _poi_index.venue is not venue:
+        _poi_index = PoiIndex(venue)
+    return _poi_index
+
+
+def reset():
+    global _poi_index
+    _poi_index = None
@@ -0,0 +1,332 @@
+"""
+Rekognition gateway: rate limiting, retry, circuit breaking and coalescing.
+
+Every container shares one ``RekognitionGateway`` (``gateway()``), which
+calls the client with botocore's own retries off and instead:
+
+- takes a token from a per-container bucket before each call, waiting up
+  to ``max_wait`` seconds for one. The refill rate adapts: it halves on a
+  throttling error and creeps back up on each success, so a container
+  settles near its share of the account's TPS instead of hammering it;
+- retries throttling, 5xx errors and connection errors (refused, dropped
+  or timed out) with full-jitter exponential backoff, up to
+  ``max_attempts`` calls in total;
+- opens a circuit after ``failure_threshold`` consecutive calls still fail
+  with a 5xx or a connection error after their retries, and fails fast
+  for ``reset_timeout`` seconds before letting one trial call through.
+  Anything but a success reopens it from the trial, throttling included;
+  otherwise throttling alone never opens it, as the bucket already slows
+  down for that;
+- coalesces identical in-flight calls: callers that pass the same
+  ``coalesce_key`` while a call is running share its result. In Lambda
+  that covers fan-out threads within one invocation; in-process hosts
+  such as the local servers share it across requests.
+
+When no token comes in time, or the circuit is open, the call raises
+``RekognitionUnavailable``, a ``ClientError`` the handlers already map to
+a 503 with ``Retry-After`` (``responses.AWS_ERROR_STATUS``).
+
+Settings come from ``REKOGNITION_TPS``, ``REKOGNITION_BURST``,
+``REKOGNITION_MAX_ATTEMPTS``, ``REKOGNITION_MAX_WAIT_SECONDS``,
+``REKOGNITION_FAILURE_THRESHOLD`` and ``REKOGNITION_RESET_SECONDS``.
+"""
+import os
+import random
+import threading
+import time
+
+from botocore.config import Config
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    ReadTimeoutError,
+)
+
+from wayfinding_common import aws
+
+# The gateway owns retries, connection errors included; one attempt per client call
+CLIENT_CONFIG = Config(retries={"total_max_attempts": 1, "mode": "standard"})
+CLIENT_OPTIONS = {"config": CLIENT_CONFIG}
+
+THROTTLING_CODES = {
+    "ThrottlingException",
+    "ProvisionedThroughputExceededException",
+    "LimitExceededException",
+    "TooManyRequestsException",
+}
+TRANSIENT_CODES = {"InternalServerError", "ServiceUnavailable", "ServiceUnavailableException"}
+CONNECTION_ERRORS = (
+    EndpointConnectionError,
+    ConnectionClosedError,
+    ConnectTimeoutError,
+    ReadTimeoutError,
+)
+
+UNAVAILABLE_CODE = "RekognitionUnavailable"
+
+
+class RekognitionUnavailable(ClientError):
+    """Rate limit wait exhausted or circuit open; retry after ``retry_after`` seconds."""
+
+    def __init__(self, operation_name, reason, retry_after):
+        super().__init__(
+            {"Error": {"Code": UNAVAILABLE_CODE, "Message": reason}}, operation_name
+        )
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate adapts between ``min_rate`` and ``max_rate``."""
+
+    def __init__(self, rate, burst, min_rate=None, clock=time.monotonic):
+        self.max_rate = float(rate)
+        self.min_rate = float(min_rate if min_rate is not None else max(rate / 20, 0.1))
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.clock = clock
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take a token now if there is one; otherwise return the seconds until one is due."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def throttled(self):
+        with self.lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def succeeded(self):
+        with self.lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        """
+        ``(wait, trial)``: ``wait`` is 0 if a call may go ahead, else the
+        seconds until the next trial; ``trial`` is True for the one call let
+        through to probe an open circuit, which must report its outcome.
+        """
+        with self.lock:
+            if self.state == self.CLOSED:
+                return 0.0, False
+            remaining = self.opened_at + self.reset_timeout - self.clock()
+            if self.state == self.OPEN and remaining <= 0:
+                # One trial call; everyone else keeps failing fast until it reports
+                self.state = self.HALF_OPEN
+                return 0.0, True
+            return max(remaining, 0.0) or self.reset_timeout, False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class _InFlight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RekognitionGateway:
+    def __init__(
+        self,
+        client_factory=None,
+        rate=10.0,
+        burst=10.0,
+        max_attempts=4,
+        max_wait=2.0,
+        base_delay=0.05,
+        max_delay=1.0,
+        failure_threshold=5,
+        reset_timeout=5.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+        rng=random.random,
+    ):
+        self.client_factory = client_factory or (
+            lambda: aws.client("rekognition", **CLIENT_OPTIONS)
+        )
+        self.bucket = TokenBucket(rate, burst, clock=clock)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock=clock)
+        self.max_attempts = max_attempts
+        self.max_wait = max_wait
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng
+        self.stats = {"calls": 0, "throttled": 0, "retries": 0, "coalesced": 0, "rejected": 0}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def search_faces_by_image(self, coalesce_key=None, **params):
+        return self.call("search_faces_by_image", coalesce_key, **params)
+
+    def index_faces(self, **params):
+        return self.call("index_faces", None, **params)
+
+    def delete_faces(self, **params):
+        return self.call("delete_faces", None, **params)
+
+    def call(self, operation, coalesce_key=None, **params):
+        if coalesce_key is None:
+            return self._call(operation, params)
+
+        key = (operation, coalesce_key)
+        with self._lock:
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = self._inflight[key] = _InFlight()
+            else:
+                self._count("coalesced")
+        if not leader:
+            inflight.done.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.result
+
+        try:
+            inflight.result = self._call(operation, params)
+            return inflight.result
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            inflight.done.set()
+
+    def _acquire(self, operation):
+        deadline = self.clock() + self.max_wait
+        while True:
+            wait = self.bucket.reserve()
+            if not wait:
+                return
+            if self.clock() + wait > deadline:
+                self._count("rejected")
+                raise RekognitionUnavailable(
+                    operation, "Request rate limit reached", retry_after=max(1, round(wait))
+                )
+            self.sleep(wait)
+
+    def _backoff(self, attempt):
+        # Full jitter: uniform in [0, min(max_delay, base * 2^attempt)]
+        return self.rng() * min(self.max_delay, self.base_delay * 2 ** attempt)
+
+    def _count(self, name):
+        # Handler threads share the gateway; increments are not atomic
+        with self.bucket.lock:
+            self.stats[name] += 1
+
+    def _call(self, operation, params):
+        retry_in, trial = self.breaker.allow()
+        if retry_in:
+            self._count("rejected")
+            raise RekognitionUnavailable(
+                operation, "Rekognition is failing, circuit open", retry_after=max(1, round(retry_in))
+            )
+
+        # True: Rekognition answered; False: it is failing; None: no verdict
+        healthy = None
+        try:
+            method = getattr(self.client_factory(), operation)
+            for attempt in range(self.max_attempts):
+                self._acquire(operation)
+                self._count("calls")
+                try:
+                    result = method(**params)
+                except ClientError as e:
+                    code = e.response.get("Error", {}).get("Code")
+                    if code in THROTTLING_CODES:
+                        self._count("throttled")
+                        self.bucket.throttled()
+                    elif code not in TRANSIENT_CODES:
+                        # The request itself is at fault; Rekognition is fine
+                        healthy = True
+                        raise
+                    if attempt + 1 == self.max_attempts:
+                        # Throttling is the bucket's job; only faults open the circuit
+                        if code in TRANSIENT_CODES:
+                            healthy = False
+                        raise
+                except CONNECTION_ERRORS:
+                    if attempt + 1 == self.max_attempts:
+                        healthy = False
+                        raise
+                else:
+                    self.bucket.succeeded()
+                    healthy = True
+                    return result
+                self._count("retries")
+                self.sleep(self._backoff(attempt))
+        finally:
+            if healthy:
+                self.breaker.record_success()
+            elif healthy is False or trial:
+                # A trial that ends any other way must not leave the circuit half open
+                self.breaker.record_failure()
+
+
+_gateway = None
+
+
+def gateway():
+    """The container's gateway, configured from the environment."""
+    global _gateway
+    if _gateway is None:
+        environ = os.environ
+        rate = float(environ.get("REKOGNITION_TPS", "10"))
+        _gateway = RekognitionGateway(
+            rate=rate,
+            burst=float(environ.get("REKOGNITION_BURST", rate)),
+            max_attempts=int(environ.get("REKOGNITION_MAX_ATTEMPTS", "4")),
+            max_wait=float(environ.get("REKOGNITION_MAX_WAIT_SECONDS", "2")),
+            failure_threshold=int(environ.get("REKOGNITION_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(environ.get("REKOGNITION_RESET_SECONDS", "5")),
+        )
+    return _gateway
+
+
+def reset():
+    """Forget the container's gateway and its state, e.g. between tests."""
+    global _gateway
+    _gateway = None
@@ -0,0 +1,100 @@
+"""
+API Gateway proxy responses for the REST handlers.
+
+Every response shares one module-level, read-only header map instead of
+building its own dict. Error bodies have the shape ``{"error": <message>}``,
+optionally with a few short extra fields, and every string in them is capped
+at ``MAX_ERROR_CHARS`` so exception texts or echoed input cannot inflate a
+response. Request events and stack traces go to the logs, never into a body.
+"""
+from wayfinding_common.serialization import dumps
+
+MAX_ERROR_CHARS = 300
+
+# AWS error codes caused by the request or by load rather than by a fault in
+# the function. Anything else, including InvalidParameterException and
+# ValidationException (a missing collection or a bad key schema here), is a 500.
+AWS_ERROR_STATUS = {
+    "ConditionalCheckFailedException": 409,
+    "TransactionConflictException": 409,
+    "InvalidImageFormatException": 400,
+    "ImageTooLargeException": 400,
+    "ProvisionedThroughputExceededException": 503,
+    "RequestLimitExceeded": 503,
+    "ThrottlingException": 503,
+    "TooManyRequestsException": 503,
+    "SlowDown": 503,
+    # Raised by the Rekognition gateway when it sheds load (see rekognition.py)
+    "RekognitionUnavailable": 503,
+}
+
+
+class HeaderMap(dict):
+    """A dict that refuses changes, so a shared instance cannot be mutated by one handler."""
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("response headers are shared and read-only")
+
+    __setitem__ = __delitem__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+    __ior__ = _read_only
+
+
+# A dict subclass rather than a mappingproxy: the Lambda runtime serializes
+# the returned dict with the json module.
+CORS_HEADERS = HeaderMap(
+    {
+        "Content-Type": "application/json",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type",
+        "Access-Control-Allow-Methods": "OPTIONS,POST,GET",
+    }
+)
+
+
+def bounded(text, limit=MAX_ERROR_CHARS):
+    text = str(text)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...(+{len(text) - limit} chars)"
+
+
+def json_response(status_code, body, headers=CORS_HEADERS):
+    """``body`` is either JSON text, passed through, or an object to serialize."""
+    return {
+        "statusCode": status_code,
+        "headers": headers,
+        "body": body if isinstance(body, str) else dumps(body),
+    }
+
+
+def error_response(status_code, error, headers=CORS_HEADERS, **fields):
+    """
+    Response with body ``{"error": error, **fields}``. String values are
+    bounded; ``fields`` is for short extras such as ``message``.
+    """
+    body = {"error": bounded(error)}
+    for name, value in fields.items():
+        body[name] = bounded(value) if isinstance(value, str) else value
+    return json_response(status_code, body, headers)
+
+
+def aws_error_status(error):
+    """HTTP status for a botocore ``ClientError``."""
+    return AWS_ERROR_STATUS.get(error.response.get("Error", {}).get("Code"), 500)
+
+
+def aws_error_response(error, message=None):
+    """
+    Error response for a botocore ``ClientError``, mapped by its error code.
+    Errors carrying a ``retry_after`` (seconds) add a ``Retry-After`` header.
+    """
+    headers = CORS_HEADERS
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is not None:
+        headers = HeaderMap({**CORS_HEADERS, "Retry-After": str(retry_after)})
+    return error_response(
+        aws_error_status(error), message if message is not None else str(error), headers
+    )
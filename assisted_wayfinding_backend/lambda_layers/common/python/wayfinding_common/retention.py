@@ -0,0 +1,108 @@
+"""
+Post-departure expiry of passenger records.
+
+Enrolment stamps every passenger record with ``expiresAt``, the passenger
+table's TTL attribute, in epoch seconds:
+
+- ``hours_after_departure`` after the departure given by
+  ``scheduled_date`` and ``flight_time``, both in the airport's local time
+  (``utc_offset_minutes`` east of UTC);
+- with a date but no usable time, the same hours after the end of that day;
+- without a usable date, ``undated_days`` after the enrolment, so no record
+  stays forever.
+
+DynamoDB deletes expired items in the background, usually within a day or
+two, and each deletion reaches the table's stream as a ``REMOVE`` by the
+DynamoDB service principal (``is_ttl_removal``). The record cleanup worker
+consumes those and deletes the faces and photos the old image referenced.
+"""
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+EXPIRY_ATTRIBUTE = "expiresAt"
+# Keys of the departure-index, see wayfinding_common.hot_collection
+DEPARTURE_ATTRIBUTES = ("departureDate", "departureAt")
+TTL_PRINCIPAL = "dynamodb.amazonaws.com"
+
+DEFAULT_HOURS_AFTER_DEPARTURE = 6
+DEFAULT_UNDATED_DAYS = 30
+
+_DATE = re.compile(r"^(\d{4})-(\d{2})-(\d{2})$")
+_TIME = re.compile(r"^(\d{1,2}):(\d{2})(?::\d{2})?$")
+
+
+class RetentionPolicy:
+    """When a passenger record expires, from its flight's departure."""
+
+    def __init__(
+        self,
+        hours_after_departure=DEFAULT_HOURS_AFTER_DEPARTURE,
+        undated_days=DEFAULT_UNDATED_DAYS,
+        utc_offset_minutes=0,
+        clock=time.time,
+    ):
+        self.after_departure = timedelta(hours=hours_after_departure)
+        self.undated = timedelta(days=undated_days)
+        self.timezone = timezone(timedelta(minutes=utc_offset_minutes))
+        self.clock = clock
+
+    @classmethod
+    def from_environment(cls):
+        """The policy set by ``RECORD_*`` and ``AIRPORT_UTC_OFFSET_MINUTES``."""
+        return cls(
+            hours_after_departure=float(
+                os.environ.get("RECORD_HOURS_AFTER_DEPARTURE", DEFAULT_HOURS_AFTER_DEPARTURE)
+            ),
+            undated_days=float(os.environ.get("RECORD_UNDATED_DAYS", DEFAULT_UNDATED_DAYS)),
+            utc_offset_minutes=int(os.environ.get("AIRPORT_UTC_OFFSET_MINUTES", "0")),
+        )
+
+    def departure(self, passenger_data):
+        """
+        The scheduled departure as an aware datetime, the end of the
+        scheduled day when the time is missing or malformed, or None
+        without a valid date.
+        """
+        date_match = _DATE.match(str(passenger_data.get("scheduled_date", "")).strip())
+        if not date_match:
+            return None
+        try:
+            day = datetime(*map(int, date_match.groups()), tzinfo=self.timezone)
+        except ValueError:
+            return None
+
+        time_match = _TIME.match(str(passenger_data.get("flight_time", "")).strip())
+        if time_match:
+            hour, minute = map(int, time_match.groups())
+            if hour < 24 and minute < 60:
+                return day.replace(hour=hour, minute=minute)
+        return day.replace(hour=23, minute=59, second=59)
+
+    def departure_attributes(self, passenger_data):
+        """``departureDate`` (local) and ``departureAt`` of a record, or {} undated."""
+        departure = self.departure(passenger_data)
+        if departure is None:
+            return {}
+        return {
+            "departureDate": departure.date().isoformat(),
+            "departureAt": int(departure.timestamp()),
+        }
+
+    def expires_at(self, passenger_data):
+        """``expiresAt`` for a record written now with ``passenger_data``."""
+        departure = self.departure(passenger_data)
+        if departure is None:
+            return int(self.clock() + self.undated.total_seconds())
+        return int((departure + self.after_departure).timestamp())
+
+
+def is_ttl_removal(record):
+    """Whether a DynamoDB stream record is a deletion by TTL."""
+    identity = record.get("userIdentity") or {}
+    return (
+        record.get("eventName") == "REMOVE"
+        and identity.get("type") == "Service"
+        and identity.get("principalId") == TTL_PRINCIPAL
+    )
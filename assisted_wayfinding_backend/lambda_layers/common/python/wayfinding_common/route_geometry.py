@@ -0,0 +1,93 @@
+"""
+Compact route geometry, for kiosks that draw routes over their own plans.
+
+Instead of a map image to download, ``GET /directions/{from}/{to}
+?format=geometry`` returns the route as data (``route_geometry``):
+
+- ``legs``: per floor walked, in order, the floor and its stretch of the
+  route as an encoded polyline;
+- ``transitions``: where the route changes floor, and how (``escalator``,
+  ``lift``, or ``walk`` for ramps and stairs without a kind);
+- ``bbox``: ``[min_x, min_y, max_x, max_y]`` of the whole route, for
+  framing it;
+- ``venue``: the venue version the coordinates belong to, so a kiosk can
+  tell when its cached plans are out of date.
+
+Polylines use Google's encoded polyline algorithm on plan pixel
+coordinates at precision 0 (no scaling, since they are integers), so a
+point usually costs two to four characters.
+"""
+
+
+def _encode_number(value):
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(points):
+    """Encode ``(x, y)`` integer points, each as the difference to the last."""
+    encoded = []
+    last_x = last_y = 0
+    for x, y in points:
+        x, y = int(round(x)), int(round(y))
+        encoded.append(_encode_number(x - last_x))
+        encoded.append(_encode_number(y - last_y))
+        last_x, last_y = x, y
+    return "".join(encoded)
+
+
+def decode_polyline(text):
+    """The points of an ``encode_polyline`` string."""
+    numbers = []
+    value = shift = 0
+    for char in text:
+        chunk = ord(char) - 63
+        value |= (chunk & 0x1F) << shift
+        shift += 5
+        if chunk < 0x20:
+            numbers.append(~(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    points = []
+    x = y = 0
+    for dx, dy in zip(numbers[::2], numbers[1::2]):
+        x, y = x + dx, y + dy
+        points.append((x, y))
+    return points
+
+
+def route_geometry(route):
+    """The ``route_geometry`` of a directions response for ``route``."""
+    venue = route.venue
+    points = route.points()
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+
+    transitions = []
+    for origin, destination in zip(route.nodes, route.nodes[1:]):
+        from_floor = venue.nodes[origin]["floor"]
+        to_floor = venue.nodes[destination]["floor"]
+        if from_floor != to_floor:
+            transitions.append(
+                {
+                    "from_floor": from_floor,
+                    "to_floor": to_floor,
+                    "location": origin,
+                    "kind": venue.kinds.get((origin, destination), "walk"),
+                }
+            )
+
+    return {
+        "venue": venue.version,
+        "seconds": route.seconds,
+        "bbox": [min(xs), min(ys), max(xs), max(ys)],
+        "legs": [
+            {"floor": floor, "polyline": encode_polyline(route.points(nodes))}
+            for floor, nodes in route.legs()
+        ],
+        "transitions": transitions,
+    }
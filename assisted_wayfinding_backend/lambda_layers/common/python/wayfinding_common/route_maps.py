@@ -0,0 +1,189 @@
+"""
+Route maps drawn on demand and cached in the map bucket.
+
+Every floor has a base plan in the map bucket, at the ``plan`` key the
+venue gives it (``wayfinding_common.venue``). A route's map is the plan of
+each floor it crosses, top to bottom in walking order, with the route
+drawn over it: the stretch walked on that floor, a green dot where it
+starts, amber where it changes floor and red at the destination.
+
+Maps are content-addressed: ``route_key`` hashes the venue version, the
+locations passed and ``RENDER_VERSION``, so a route already drawn costs a
+HEAD request (nothing once the container has seen it), and a new one is
+drawn once and stored for everyone. Base plans are read once per
+container; a floor without one is drawn from its walkways instead.
+
+Pillow is only imported when a map has to be drawn.
+"""
+import hashlib
+import io
+import json
+
+from botocore.exceptions import ClientError
+
+from wayfinding_common.timing import span
+
+# Bump when the drawing changes, so cached maps are redrawn
+RENDER_VERSION = 1
+ROUTE_PREFIX = "maps/routes/"
+MAP_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+ROUTE_COLOUR = (0, 102, 204)
+START_COLOUR = (0, 153, 68)
+TRANSFER_COLOUR = (230, 145, 0)
+END_COLOUR = (204, 0, 0)
+ROUTE_WIDTH = 8
+MARKER_RADIUS = 12
+
+_NOT_FOUND = ("404", "NoSuchKey")
+
+
+def route_key(route):
+    """The map bucket key of ``route``'s map."""
+    text = json.dumps(
+        [route.venue.version, RENDER_VERSION, route.nodes], separators=(",", ":")
+    )
+    return f"{ROUTE_PREFIX}{hashlib.sha256(text.encode()).hexdigest()[:32]}.png"
+
+
+def map_url(bucket_name, key):
+    return f"https://{bucket_name}.s3.amazonaws.com/{key}"
+
+
+class RouteMaps:
+    """Route maps in ``bucket_name``, with the container's plans and known maps."""
+
+    def __init__(self, s3, bucket_name):
+        self.s3 = s3
+        self.bucket_name = bucket_name
+        self.known = set()
+        self.plans = {}
+
+    def url(self, route):
+        """The URL of ``route``'s map, drawing and storing it first if needed."""
+        key = route_key(route)
+        if key not in self.known:
+            if not self.stored(key):
+                with span("render"):
+                    image = self.render(route)
+                with span("s3_put"):
+                    self.s3.put_object(
+                        Bucket=self.bucket_name,
+                        Key=key,
+                        Body=image,
+                        ContentType="image/png",
+                        CacheControl=MAP_CACHE_CONTROL,
+                    )
+            self.known.add(key)
+        return map_url(self.bucket_name, key)
+
+    def stored(self, key):
+        try:
+            with span("s3_head"):
+                self.s3.head_object(Bucket=self.bucket_name, Key=key)
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in _NOT_FOUND:
+                return False
+            raise
+
+    def base_plan(self, venue, floor):
+        """The floor's plan as an RGB image, read once per container."""
+        from PIL import Image
+
+        if floor not in self.plans:
+            try:
+                with span("s3_get_plan"):
+                    response = self.s3.get_object(
+                        Bucket=self.bucket_name, Key=venue.floors[floor]["plan"]
+                    )
+                    plan = Image.open(io.BytesIO(response["Body"].read())).convert("RGB")
+            except ClientError as e:
+                if e.response["Error"]["Code"] not in _NOT_FOUND:
+                    raise
+                plan = schematic_plan(venue, floor)
+            self.plans[floor] = plan
+        return self.plans[floor]
+
+    def render(self, route):
+        """``route``'s map as PNG bytes."""
+        from PIL import Image, ImageDraw
+
+        legs = route.legs()
+        panels = []
+        for index, (floor, nodes) in enumerate(legs):
+            panel = self.base_plan(route.venue, floor).copy()
+            draw = ImageDraw.Draw(panel)
+            points = route.points(nodes)
+            if len(points) > 1:
+                draw.line(points, fill=ROUTE_COLOUR, width=ROUTE_WIDTH, joint="curve")
+            start = START_COLOUR if index == 0 else TRANSFER_COLOUR
+            end = END_COLOUR if index == len(legs) - 1 else TRANSFER_COLOUR
+            for (x, y), colour in ((points[0], start), (points[-1], end)):
+                draw.ellipse(
+                    (x - MARKER_RADIUS, y - MARKER_RADIUS, x + MARKER_RADIUS, y + MARKER_RADIUS),
+                    fill=colour,
+                    outline=(255, 255, 255),
+                    width=3,
+                )
+            draw.text((16, 16), route.venue.floors[floor]["name"], fill=(0, 0, 0))
+            panels.append(panel)
+
+        image = Image.new(
+            "RGB",
+            (max(panel.width for panel in panels), sum(panel.height for panel in panels)),
+            (255, 255, 255),
+        )
+        top = 0
+        for panel in panels:
+            image.paste(panel, (0, top))
+            top += panel.height
+
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+
+def schematic_plan(venue, floor):
+    """
+    A plain plan of the floor's walkways, for floors without a base plan.
+    Drawn from the usual walkways, closed ones included: the plan is kept
+    for the container and route maps drawn on it are stored for good.
+    """
+    from PIL import Image, ImageDraw
+
+    spec = venue.floors[floor]
+    plan = Image.new("RGB", (spec["width"], spec["height"]), (245, 245, 240))
+    draw = ImageDraw.Draw(plan)
+    on_floor = {node for node, data in venue.nodes.items() if data["floor"] == floor}
+    for node in on_floor:
+        start = venue.nodes[node]
+        for neighbour in venue.usual[node]:
+            if neighbour in on_floor and node < neighbour:
+                end = venue.nodes[neighbour]
+                draw.line(
+                    ((start["x"], start["y"]), (end["x"], end["y"])),
+                    fill=(200, 200, 195),
+                    width=24,
+                )
+    for node in on_floor:
+        data = venue.nodes[node]
+        draw.text((data["x"] + 14, data["y"] - 24), data["name"], fill=(90, 90, 90))
+    return plan
+
+
+_route_maps = None
+
+
+def route_maps(s3, bucket_name):
+    """The container's ``RouteMaps`` for ``bucket_name``."""
+    global _route_maps
+    if _route_maps is None or _route_maps.bucket_name != bucket_name:
+        _route_maps = RouteMaps(s3, bucket_name)
+    return _route_maps
+
+
+def reset():
+    """Forget the container's plans and known maps, e.g. between tests."""
+    global _route_maps
+    _route_maps = None
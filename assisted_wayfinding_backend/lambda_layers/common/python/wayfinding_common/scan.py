@@ -0,0 +1,234 @@
+"""
+Segmented parallel scans for admin and bulk jobs.
+
+``parallel_scan`` splits a table scan into ``segments`` (DynamoDB's
+``Segment``/``TotalSegments``), reads every segment to its last page on a
+thread pool, and yields items as pages arrive. At most ``buffer_pages``
+pages wait for the consumer, plus the one each worker is reading, so a
+full-table pass holds a few pages in memory, never the table. Closing the generator early
+stops the workers after their current page.
+
+Every page asks for ``ReturnConsumedCapacity=TOTAL``. The units are added
+up in a ``ScanStats`` passed by the caller, and with ``rcu_budget`` the
+workers together average at most that many read capacity units per
+second. A page's cost is only known once it is read, so each worker waits
+before its next page until the units consumed so far fit the budget, and
+the first pages can overshoot it by up to one page per segment. Use
+``page_size`` to keep pages small against a tight budget; an eventually
+consistent 1 MB page costs 128 units.
+
+boto3 resources are not thread-safe, so each worker scans through a
+``Table`` of its own, built on its own session for the same table,
+region and endpoint. Stand-ins that are not boto3 resources are shared
+as given.
+
+Items come back in no particular order. This is for admin and batch
+work: a scan reads the whole table whatever the filter, so request
+handlers should query an index instead.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_SEGMENTS = 4
+# Pages read ahead of the consumer, across all workers
+DEFAULT_BUFFER_PAGES = 4
+_PUT_POLL_SECONDS = 0.1
+
+_DONE = object()
+
+
+class ScanStats:
+    """Totals of one scan, updated by its workers."""
+
+    def __init__(self):
+        self.items = 0
+        self.scanned = 0
+        self.pages = 0
+        self.consumed_capacity = 0.0
+        self.throttle_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_page(self, response):
+        with self._lock:
+            self.pages += 1
+            self.items += response.get("Count", len(response.get("Items", ())))
+            self.scanned += response.get("ScannedCount", 0)
+            self.consumed_capacity += _capacity_units(response)
+
+    def add_throttle(self, seconds):
+        with self._lock:
+            self.throttle_seconds += seconds
+
+    def as_dict(self):
+        return {
+            "items": self.items,
+            "scanned": self.scanned,
+            "pages": self.pages,
+            "consumed_capacity": round(self.consumed_capacity, 1),
+            "throttle_seconds": round(self.throttle_seconds, 3),
+        }
+
+
+class CapacityLimiter:
+    """
+    Keeps the units consumed since the first page under ``units_per_second``.
+    Shared by the workers of one scan.
+    """
+
+    def __init__(self, units_per_second, clock=time.monotonic, sleep=time.sleep):
+        if units_per_second <= 0:
+            raise ValueError("units_per_second must be positive")
+        self.units_per_second = float(units_per_second)
+        self.clock = clock
+        self.sleep = sleep
+        self.consumed = 0.0
+        self.started = None
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until another page fits the budget; returns the seconds waited."""
+        with self._lock:
+            now = self.clock()
+            if self.started is None:
+                self.started = now
+            delay = self.started + self.consumed / self.units_per_second - now
+        if delay > 0:
+            self.sleep(delay)
+            return delay
+        return 0.0
+
+    def consume(self, units):
+        with self._lock:
+            self.consumed += units
+
+
+def _capacity_units(response):
+    capacity = response.get("ConsumedCapacity") or {}
+    return float(capacity.get("CapacityUnits", 0.0))
+
+
+def _segment_tables(table, segments):
+    """A ``Table`` per segment; the caller's stays with the caller's thread."""
+    from boto3.resources.base import ServiceResource
+
+    if not isinstance(table, ServiceResource):
+        return [table] * segments
+    import boto3
+
+    meta = table.meta.client.meta
+    return [
+        boto3.session.Session()
+        .resource(
+            "dynamodb",
+            region_name=meta.region_name,
+            endpoint_url=meta.endpoint_url,
+            config=meta.config,
+        )
+        .Table(table.name)
+        for _ in range(segments)
+    ]
+
+
+def projection_arguments(attributes):
+    """``ProjectionExpression`` and names for a list of top-level attributes."""
+    names = {f"#p{i}": attribute for i, attribute in enumerate(attributes)}
+    return {
+        "ProjectionExpression": ", ".join(names),
+        "ExpressionAttributeNames": names,
+    }
+
+
+def parallel_scan(
+    table,
+    segments=DEFAULT_SEGMENTS,
+    projection=None,
+    page_size=None,
+    rcu_budget=None,
+    stats=None,
+    buffer_pages=DEFAULT_BUFFER_PAGES,
+    **scan_kwargs,
+):
+    """
+    Yield every item of ``table`` (a boto3 ``Table``), read as ``segments``
+    parallel segment scans.
+
+    ``projection`` lists the attributes to return, ``page_size`` sets the
+    scan ``Limit`` and ``rcu_budget`` caps read capacity units per second.
+    Other keyword arguments, such as ``FilterExpression``, go to every
+    ``scan`` call; names given in ``ExpressionAttributeNames`` are merged
+    with the projection's.
+    """
+    if segments < 1:
+        raise ValueError("segments must be at least 1")
+    stats = stats if stats is not None else ScanStats()
+    limiter = CapacityLimiter(rcu_budget) if rcu_budget else None
+
+    base = dict(scan_kwargs, ReturnConsumedCapacity="TOTAL")
+    if projection:
+        projected = projection_arguments(projection)
+        base["ProjectionExpression"] = projected["ProjectionExpression"]
+        base["ExpressionAttributeNames"] = {
+            **projected["ExpressionAttributeNames"],
+            **scan_kwargs.get("ExpressionAttributeNames", {}),
+        }
+    if page_size:
+        base["Limit"] = page_size
+
+    # One slot per worker on top of the buffer for the end-of-segment markers
+    pages = queue.Queue(maxsize=max(1, buffer_pages) + segments)
+    stop = threading.Event()
+
+    def put(entry):
+        # Poll so a closed consumer cannot leave a worker blocked forever
+        while not stop.is_set():
+            try:
+                pages.put(entry, timeout=_PUT_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    tables = _segment_tables(table, segments)
+
+    def scan_segment(segment):
+        table = tables[segment]
+        kwargs = dict(base)
+        if segments > 1:
+            kwargs.update(Segment=segment, TotalSegments=segments)
+        try:
+            while not stop.is_set():
+                if limiter:
+                    stats.add_throttle(limiter.wait())
+                response = table.scan(**kwargs)
+                stats.add_page(response)
+                if limiter:
+                    limiter.consume(_capacity_units(response))
+                if response.get("Items") and not put(response["Items"]):
+                    return
+                last_key = response.get("LastEvaluatedKey")
+                if not last_key:
+                    break
+                kwargs["ExclusiveStartKey"] = last_key
+        except Exception as e:
+            put(e)
+            return
+        put(_DONE)
+
+    executor = ThreadPoolExecutor(max_workers=segments, thread_name_prefix="scan")
+    try:
+        for segment in range(segments):
+            executor.submit(scan_segment, segment)
+        remaining = segments
+        while remaining:
+            entry = pages.get()
+            if entry is _DONE:
+                remaining -= 1
+            elif isinstance(entry, Exception):
+                raise entry
+            else:
+                yield from entry
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
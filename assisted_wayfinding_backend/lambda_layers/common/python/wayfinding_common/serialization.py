@@ -0,0 +1,98 @@
+"""
+JSON serialization for DynamoDB data.
+
+Items read with the low-level client keep their type descriptors
+(``{"N": "42"}``), so they can be written straight to JSON text: numbers are
+already valid JSON literals and never pass through ``Decimal``. Items read
+through the resource API still hold ``Decimal`` values and go through
+``dumps``, which converts them in the same pass as the encoding.
+
+Handlers should serialize a payload once and reuse the text for both the
+response body and any log line.
+"""
+import base64
+import json
+from decimal import Decimal
+
+try:
+    from _json import encode_basestring_ascii as _encode_string
+except ImportError:  # pragma: no cover - pure Python fallback
+    from json.encoder import py_encode_basestring_ascii as _encode_string
+
+
+def _encode_binary(value):
+    return _encode_string(base64.b64encode(value).decode("ascii"))
+
+
+def attribute_to_json(attribute):
+    """Encode one DynamoDB attribute value, e.g. ``{"S": "G14"}``, as JSON text."""
+    (tag, value), = attribute.items()
+    if tag == "S":
+        return _encode_string(value)
+    if tag == "N":
+        # DynamoDB returns canonical number strings, which are valid JSON
+        return value
+    if tag == "M":
+        return item_to_json(value)
+    if tag == "L":
+        return "[" + ",".join([attribute_to_json(element) for element in value]) + "]"
+    if tag == "BOOL":
+        return "true" if value else "false"
+    if tag == "NULL":
+        return "null"
+    if tag == "SS":
+        return "[" + ",".join([_encode_string(element) for element in value]) + "]"
+    if tag == "NS":
+        return "[" + ",".join(value) + "]"
+    if tag == "B":
+        return _encode_binary(value)
+    if tag == "BS":
+        return "[" + ",".join([_encode_binary(element) for element in value]) + "]"
+    raise TypeError(f"Unsupported DynamoDB type descriptor: {tag}")
+
+
+def item_to_json(item):
+    """Encode a low-level DynamoDB item (attribute name -> type descriptor) as a JSON object."""
+    return (
+        "{"
+        + ",".join(
+            [
+                _encode_string(name) + ":" + attribute_to_json(attribute)
+                for name, attribute in item.items()
+            ]
+        )
+        + "}"
+    )
+
+
+def items_to_json(items):
+    return "[" + ",".join([item_to_json(item) for item in items]) + "]"
+
+
+def decimal_default(obj):
+    if isinstance(obj, Decimal):
+        # Keep integral values as JSON integers rather than "42.0"
+        return int(obj) if obj == obj.to_integral_value() else float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Compact ``json.dumps`` that understands resource-API ``Decimal`` and set values."""
+    return json.dumps(obj, default=decimal_default, separators=(",", ":"))
+
+
+def json_object(fields=None, raw=None):
+    """
+    Build a JSON object from plain ``fields`` and ``raw`` values that are
+    already JSON text, so pre-serialized items are spliced in, not re-encoded.
+    """
+    members = [
+        _encode_string(name) + ":" + dumps(value)
+        for name, value in (fields or {}).items()
+    ]
+    members.extend(
+        _encode_string(name) + ":" + text for name, text in (raw or {}).items()
+    )
+    return "{" + ",".join(members) + "}"
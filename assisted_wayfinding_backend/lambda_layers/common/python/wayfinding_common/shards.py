@@ -0,0 +1,74 @@
+"""
+Rekognition collections sharded by terminal.
+
+A passenger is only ever recognized at kiosks in their own terminal, so
+each terminal gets its own collection and a kiosk searches only its own.
+``COLLECTION_SHARDS`` maps shard values to collection IDs and
+``COLLECTION_SHARD_ATTRIBUTE`` names the passenger attribute that picks
+one (``terminal`` by default). Values are compared after
+``normalize_shard``, so "T3", "t 3", "Terminal 3" and "3" are one shard.
+Records without a known value stay in the default collection
+(``REKOGNITION_COLLECTION_ID``). Without ``COLLECTION_SHARDS`` everything
+is in the default collection, as before sharding.
+
+Enrolment indexes into ``for_passenger`` and records the collection on
+the item (``rekognition_collection_id``). Recognition searches
+``for_location`` of the kiosk, then the default collection; transfer
+passengers, and kiosks that do not say where they are, search ``all``
+collections in parallel.
+"""
+import json
+import os
+import re
+
+DEFAULT_ATTRIBUTE = "terminal"
+
+
+def normalize_shard(value):
+    """``"Terminal 3"`` -> ``"3"``; other values upper-cased without punctuation."""
+    text = re.sub(r"[^0-9A-Z]", "", str(value).upper())
+    match = re.match(r"^(?:TERMINAL|T)(\d+)$", text)
+    return match.group(1) if match else text
+
+
+class CollectionShards:
+    """Which collection holds a passenger's faces."""
+
+    def __init__(self, default_collection, collections=None, attribute=DEFAULT_ATTRIBUTE):
+        self.default_collection = default_collection
+        self.collections = {
+            normalize_shard(value): collection_id
+            for value, collection_id in (collections or {}).items()
+        }
+        self.attribute = attribute
+
+    @classmethod
+    def from_environment(cls, default_collection=None):
+        return cls(
+            default_collection or os.environ.get("REKOGNITION_COLLECTION_ID"),
+            json.loads(os.environ.get("COLLECTION_SHARDS") or "{}"),
+            os.environ.get("COLLECTION_SHARD_ATTRIBUTE", DEFAULT_ATTRIBUTE),
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.collections)
+
+    def _lookup(self, value):
+        if value is None or value == "":
+            return None
+        return self.collections.get(normalize_shard(value))
+
+    def for_passenger(self, passenger_data):
+        """The collection to index ``passenger_data``'s faces into."""
+        return self._lookup(passenger_data.get(self.attribute)) or self.default_collection
+
+    def for_location(self, location):
+        """The shard of a kiosk ``location`` (a dict), or None when unknown."""
+        if not isinstance(location, dict):
+            return None
+        return self._lookup(location.get(self.attribute))
+
+    def all(self):
+        """Every collection, shards first, without duplicates."""
+        return list(dict.fromkeys([*self.collections.values(), self.default_collection]))
@@ -0,0 +1,217 @@
+"""
+Request-path logging for the Lambda functions.
+
+``configure_logging`` sets the level from ``LOG_LEVEL`` and, inside Lambda
+(or with ``LOG_FORMAT=json``), installs a one-line JSON formatter.
+``start_request`` is called at the top of a handler: it tags records with the
+request ID and route, resets the per-request record budget and draws the
+sampling decision for the route. Sampled requests log at DEBUG, the rest at
+the configured level, so full payload dumps belong at DEBUG. The records
+kept and dropped, and the time spent rendering them, go out with the
+request's stage timings as ``LogRecords``, ``LogRecordsDropped`` and
+``LogRenderMs``.
+
+Only the handlers' own logger (``APP_LOGGER`` unless named) switches to
+DEBUG, and only its records pass the budget and tagging filter. The root
+logger and the AWS SDK's loggers stay at the configured level, so a
+sampled request does not also dump botocore's wire logs, signed headers
+and request bodies included.
+
+Wrap payloads in ``Redacted`` and pass them as logging arguments. They are
+only redacted and encoded when a record is actually emitted. Sensitive keys
+and binary values are replaced with a size marker, and long strings and
+lists are truncated.
+"""
+import json
+import logging
+import os
+import random
+import time
+
+REDACTED_KEYS = frozenset(
+    {"image", "images", "authorization", "x-api-key", "cookie", "set-cookie"}
+)
+MAX_STRING_CHARS = 256
+MAX_LIST_ITEMS = 20
+MAX_DEPTH = 6
+MAX_MESSAGE_CHARS = 8192
+MAX_RECORDS_PER_REQUEST = 200
+APP_LOGGER = "wayfinding"
+# Kept at the configured level whatever the request's sampling decision
+LIBRARY_LOGGERS = ("boto3", "botocore", "s3transfer", "urllib3")
+
+
+def _size_marker(label, value):
+    try:
+        return f"<{label} {len(value)}>"
+    except TypeError:
+        return f"<{label}>"
+
+
+def redact(value, depth=0):
+    """Return a copy of ``value`` that is safe and cheap to log."""
+    if isinstance(value, dict):
+        if depth >= MAX_DEPTH:
+            return "<truncated object>"
+        return {
+            key: (
+                _size_marker("redacted", item)
+                if isinstance(key, str) and key.lower() in REDACTED_KEYS
+                else redact(item, depth + 1)
+            )
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        if depth >= MAX_DEPTH:
+            return "<truncated list>"
+        items = [redact(item, depth + 1) for item in value[:MAX_LIST_ITEMS]]
+        if len(value) > MAX_LIST_ITEMS:
+            items.append(f"<+{len(value) - MAX_LIST_ITEMS} items>")
+        return items
+    if isinstance(value, (bytes, bytearray)):
+        return _size_marker("bytes", value)
+    if isinstance(value, str) and len(value) > MAX_STRING_CHARS:
+        return f"{value[:MAX_STRING_CHARS]}...(+{len(value) - MAX_STRING_CHARS} chars)"
+    return value
+
+
+class Redacted:
+    """Defer redaction and JSON encoding of ``payload`` until the record is emitted."""
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __str__(self):
+        return json.dumps(redact(self.payload), default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Tags records with the current request and enforces the per-request
+    budget. Records past the budget are dropped unless they are errors.
+    Messages are rendered here, once, and capped at ``MAX_MESSAGE_CHARS``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.base_level = logging.INFO
+        self.sample_rates = {}
+        self.reset()
+
+    def reset(self, request_id=None, route=None, sampled=False):
+        self.request_id = request_id
+        self.route = route
+        self.sampled = sampled
+        self.records = 0
+        self.dropped = 0
+        self.render_seconds = 0.0
+
+    def filter(self, record):
+        if self.records >= MAX_RECORDS_PER_REQUEST and record.levelno < logging.ERROR:
+            self.dropped += 1
+            return False
+        self.records += 1
+
+        started = time.perf_counter()
+        message = record.getMessage()
+        if len(message) > MAX_MESSAGE_CHARS:
+            message = (
+                f"{message[:MAX_MESSAGE_CHARS]}...(+{len(message) - MAX_MESSAGE_CHARS} chars)"
+            )
+        record.msg, record.args = message, None
+        record.request_id = self.request_id
+        record.route = self.route
+        record.sampled = self.sampled
+        self.render_seconds += time.perf_counter() - started
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, as CloudWatch Logs Insights expects."""
+
+    converter = time.gmtime
+
+    def format(self, record):
+        entry = {
+            "timestamp": self.formatTime(record, "%Y-%m-%dT%H:%M:%S")
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "logger": record.name,
+            "requestId": getattr(record, "request_id", None),
+            "route": getattr(record, "route", None),
+        }
+        if getattr(record, "sampled", False):
+            entry["sampled"] = True
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+_request_filter = RequestContextFilter()
+
+
+def configure_logging(name=APP_LOGGER):
+    """Configure and return the logger used by a handler module."""
+    logger = logging.getLogger(name)
+    _request_filter.base_level = logging.getLevelName(
+        os.environ.get("LOG_LEVEL", "INFO").upper()
+    )
+    _request_filter.sample_rates = json.loads(os.environ.get("LOG_SAMPLE_RATES") or "{}")
+    logger.setLevel(_request_filter.base_level)
+    logging.getLogger().setLevel(_request_filter.base_level)
+    for library in LIBRARY_LOGGERS:
+        logging.getLogger(library).setLevel(_request_filter.base_level)
+
+    if _request_filter not in logger.filters:
+        logger.addFilter(_request_filter)
+
+    if os.environ.get("AWS_LAMBDA_FUNCTION_NAME") or os.environ.get("LOG_FORMAT") == "json":
+        for handler in logger.handlers or logging.getLogger().handlers:
+            handler.setFormatter(JsonFormatter())
+    return logger
+
+
+def route_key(event):
+    """``"<METHOD> <resource>"`` for API Gateway events, ``"direct"`` otherwise."""
+    if isinstance(event, dict) and event.get("resource"):
+        return f"{event.get('httpMethod', 'ANY')} {event['resource']}"
+    return "direct"
+
+
+def start_request(logger, event, context):
+    """Reset the per-request logging state and draw the sampling decision."""
+    route = route_key(event)
+    rate = _request_filter.sample_rates.get(route, _request_filter.sample_rates.get("*", 0))
+    sampled = rate > 0 and random.random() < rate
+    _request_filter.reset(
+        request_id=getattr(context, "aws_request_id", None),
+        route=route,
+        sampled=sampled,
+    )
+    logger.setLevel(logging.DEBUG if sampled else _request_filter.base_level)
+    return sampled
+
+
+def request_log_stats():
+    """Records, drops and rendering time spent on logs since ``start_request``."""
+    return {
+        "records": _request_filter.records,
+        "dropped": _request_filter.dropped,
+        "render_ms": round(_request_filter.render_seconds * 1000, 3),
+    }
+
+
+def finish_request():
+    """
+    ``request_log_stats`` for the request ``start_request`` began, or None
+    when none was begun since the last call. ``timing.traced_handler``
+    reports them with the request's metrics.
+    """
+    if _request_filter.route is None:
+        return None
+    stats = request_log_stats()
+    _request_filter.route = None
+    return stats
@@ -0,0 +1,238 @@
+"""
+Per-stage latency spans for the Lambda handlers.
+
+Decorate the handler with ``traced_handler`` and wrap its stages in
+``span("<stage>")`` (or decorate helpers with ``timed``). When the handler
+returns, the stage durations are printed as one CloudWatch Embedded Metric
+Format line in the ``AssistedWayfinding`` namespace, dimensioned by function
+and route. Stages entered more than once in a request are summed.
+Handlers add their own per-request values to the same line with
+``metric``.
+
+``STAGE_TIMING=0`` turns the whole module into pass-throughs: ``span``
+returns a shared no-op context manager and the decorators call straight
+through. ``STAGE_TRACE_FILE`` additionally appends each request's individual
+spans (start offset, duration and nesting depth) to a JSON Lines file, which
+is meant for local runs and benchmarks rather than Lambda.
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+from wayfinding_common.structured_logging import finish_request, route_key
+
+METRICS_NAMESPACE = "AssistedWayfinding"
+TOTAL_STAGE = "total"
+MAX_SPANS_PER_REQUEST = 500
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Times one stage and records it on exit, including when it raises."""
+
+    __slots__ = ("recorder", "name", "started", "depth")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        local = self.recorder.local
+        self.depth = getattr(local, "depth", 0)
+        local.depth = self.depth + 1
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        ended = time.perf_counter()
+        self.recorder.local.depth = self.depth
+        self.recorder.record(self.name, self.started, ended, self.depth)
+        return False
+
+
+class StageRecorder:
+    """Spans of the current request. Lambda runs one request per container at a time."""
+
+    def __init__(self):
+        self.enabled = True
+        self.trace_file = None
+        # Nesting depth is per thread so spans opened by worker threads
+        # do not corrupt the handler's own nesting
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self, function_name=None, route=None, request_id=None):
+        self.function_name = function_name
+        self.route = route
+        self.request_id = request_id
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.metrics = {}
+        self.dropped = 0
+        self.local.depth = 0
+
+    def record(self, name, started, ended, depth):
+        if len(self.spans) < MAX_SPANS_PER_REQUEST:
+            self.spans.append((name, started, ended, depth))
+        else:
+            self.dropped += 1
+
+    def durations(self):
+        """Milliseconds per stage, summed over repeated spans."""
+        totals = {}
+        for name, started, ended, _ in self.spans:
+            totals[name] = totals.get(name, 0.0) + (ended - started) * 1000
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+    def metrics_record(self, status_code=None):
+        durations = self.durations()
+        record = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [["FunctionName", "Route"]],
+                    "Metrics": [
+                        {"Name": name, "Unit": "Milliseconds"} for name in durations
+                    ] + [
+                        {"Name": name, "Unit": unit} for name, (_, unit) in self.metrics.items()
+                    ],
+                }],
+            },
+            "FunctionName": self.function_name,
+            "Route": self.route,
+            "requestId": self.request_id,
+            **durations,
+            **{name: value for name, (value, _) in self.metrics.items()},
+        }
+        if status_code is not None:
+            record["statusCode"] = status_code
+        if self.dropped:
+            record["droppedSpans"] = self.dropped
+        return record
+
+    def trace_record(self):
+        return {
+            "function": self.function_name,
+            "route": self.route,
+            "requestId": self.request_id,
+            "spans": [
+                {
+                    "name": name,
+                    "start_ms": round((started - self.origin) * 1000, 3),
+                    "duration_ms": round((ended - started) * 1000, 3),
+                    "depth": depth,
+                }
+                for name, started, ended, depth in sorted(self.spans, key=lambda s: s[1])
+            ],
+        }
+
+    def flush(self, status_code=None):
+        # CloudWatch Embedded Metric Format; must be printed as a bare JSON line
+        print(json.dumps(self.metrics_record(status_code), default=str))
+        if self.trace_file:
+            try:
+                with open(self.trace_file, "a") as trace:
+                    trace.write(json.dumps(self.trace_record(), default=str) + "\n")
+            except OSError as e:
+                print(f"Could not write stage trace to {self.trace_file}: {str(e)}")
+
+
+_recorder = StageRecorder()
+
+
+def configure_timing():
+    """Read ``STAGE_TIMING`` and ``STAGE_TRACE_FILE``; runs once at import."""
+    _recorder.enabled = os.environ.get("STAGE_TIMING", "1").lower() not in ("0", "false", "off")
+    _recorder.trace_file = os.environ.get("STAGE_TRACE_FILE") or None
+
+
+configure_timing()
+
+
+def span(name):
+    """Context manager timing the stage ``name`` of the current request."""
+    if not _recorder.enabled:
+        return _NULL_SPAN
+    return Span(_recorder, name)
+
+
+def metric(name, value, unit="Count"):
+    """Add ``name`` to the current request's metrics line; the last value wins."""
+    if _recorder.enabled:
+        _recorder.metrics[name] = (value, unit)
+
+
+def timed(name=None):
+    """Decorator timing every call of the function as stage ``name``."""
+
+    def decorate(func):
+        stage = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _recorder.enabled:
+                return func(*args, **kwargs)
+            with Span(_recorder, stage):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def traced_handler(function_name):
+    """
+    Decorator for a Lambda handler: starts a fresh set of spans, times the
+    whole invocation as ``total`` and emits the metrics line afterwards,
+    with the request's logging overhead when the handler called
+    ``structured_logging.start_request``.
+    """
+
+    def decorate(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            if not _recorder.enabled:
+                return handler(event, context)
+
+            _recorder.reset(
+                function_name=os.environ.get("AWS_LAMBDA_FUNCTION_NAME", function_name),
+                route=route_key(event),
+                request_id=getattr(context, "aws_request_id", None),
+            )
+            result = None
+            try:
+                with Span(_recorder, TOTAL_STAGE):
+                    result = handler(event, context)
+                return result
+            finally:
+                log_stats = finish_request()
+                if log_stats is not None:
+                    metric("LogRecords", log_stats["records"])
+                    metric("LogRecordsDropped", log_stats["dropped"])
+                    metric("LogRenderMs", log_stats["render_ms"], unit="Milliseconds")
+                status_code = result.get("statusCode") if isinstance(result, dict) else None
+                _recorder.flush(status_code)
+
+        return wrapper
+
+    return decorate
+
+
+def stage_durations():
+    """Milliseconds per stage recorded so far in the current request."""
+    return _recorder.durations()
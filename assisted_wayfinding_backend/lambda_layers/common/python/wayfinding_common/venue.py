@@ -0,0 +1,229 @@
+"""
+The airport's walking graph, for routes between named locations.
+
+``venue.json`` beside this module describes the floors (their plan's size
+in pixels and the key of its base image in the map bucket), the locations
+(with their floor and plan coordinates) and the walkways between them,
+with walking times in seconds. Walkways go both ways; escalators and lifts
+are walkways between locations on different floors. Floors share one
+coordinate frame, so a lift's locations line up. ``pois`` lists the
+facilities travellers look for (``wayfinding_common.pois``). ``VENUE_FILE``
+points at another description.
+
+``load_venue`` reads it once per container. Routes come from shortest-path
+trees (Dijkstra) kept per source for the container's lifetime, so every
+route from the same kiosk after the first is a walk up its tree.
+
+Walking times change through the day (``wayfinding_common.venue_conditions``).
+``set_walk`` repairs the kept trees in place instead of dropping them: a
+shorter walk is propagated from the end it improves, and a longer or
+closed one only re-settles the locations below it in trees that use it.
+"""
+import heapq
+import json
+import math
+import os
+from collections import defaultdict
+from functools import lru_cache
+
+_UNREACHABLE = float("inf")
+
+DEFAULT_VENUE_FILE = os.path.join(os.path.dirname(__file__), "venue.json")
+
+
+class Route:
+    """The locations passed from origin to destination, and the walking time."""
+
+    def __init__(self, venue, nodes, seconds):
+        self.venue = venue
+        self.nodes = nodes
+        self.seconds = seconds
+
+    def legs(self):
+        """``(floor, [node])`` for each stretch walked on one floor, in order."""
+        legs = []
+        for node in self.nodes:
+            floor = self.venue.nodes[node]["floor"]
+            if not legs or legs[-1][0] != floor:
+                legs.append((floor, []))
+            legs[-1][1].append(node)
+        return legs
+
+    def points(self, nodes=None):
+        """Plan coordinates of ``nodes`` (default: the whole route)."""
+        return [
+            (self.venue.nodes[node]["x"], self.venue.nodes[node]["y"])
+            for node in (self.nodes if nodes is None else nodes)
+        ]
+
+
+class Venue:
+    """Locations and walkways, with shortest-path trees cached per source."""
+
+    def __init__(self, description):
+        self.version = description["version"]
+        self.floors = description["floors"]
+        self.nodes = description["nodes"]
+        self.pois = description.get("pois", [])
+        self.edges = {node: {} for node in self.nodes}
+        # The walking times of the description, whatever the conditions
+        self.usual = {node: {} for node in self.nodes}
+        # "escalator", "lift", ... for walkways that are not plain walking
+        self.kinds = {}
+        for edge in description["edges"]:
+            self.edges[edge["from"]][edge["to"]] = edge["seconds"]
+            self.edges[edge["to"]][edge["from"]] = edge["seconds"]
+            self.usual[edge["from"]][edge["to"]] = edge["seconds"]
+            self.usual[edge["to"]][edge["from"]] = edge["seconds"]
+            if "kind" in edge:
+                self.kinds[edge["from"], edge["to"]] = edge["kind"]
+                self.kinds[edge["to"], edge["from"]] = edge["kind"]
+        # Walkways whose time differs from the usual one, as (a, b) with a < b
+        self.altered = set()
+        # Fewest seconds per plan pixel on any walkway: no walk between two
+        # points is quicker than their distance at this pace
+        self.pace = _UNREACHABLE
+        for edge in description["edges"]:
+            self._keep_pace(edge["from"], edge["to"], edge["seconds"])
+        self._trees = {}
+
+    def __contains__(self, location):
+        return location in self.nodes
+
+    def distance(self, a, b):
+        """Plan pixels between two locations, as the crow flies."""
+        return math.hypot(
+            self.nodes[a]["x"] - self.nodes[b]["x"], self.nodes[a]["y"] - self.nodes[b]["y"]
+        )
+
+    def _keep_pace(self, a, b, seconds):
+        distance = self.distance(a, b)
+        if distance:
+            self.pace = min(self.pace, seconds / distance)
+
+    def tree(self, source):
+        """``(seconds, previous)`` from ``source`` to every reachable location."""
+        if source not in self._trees:
+            seconds = {source: 0}
+            previous = {}
+            self._settle(seconds, previous, [(0, source)])
+            self._trees[source] = (seconds, previous)
+        return self._trees[source]
+
+    def _settle(self, seconds, previous, queue):
+        """Dijkstra from the locations in ``queue``, improving the tree in place."""
+        while queue:
+            cost, node = heapq.heappop(queue)
+            if cost > seconds[node]:
+                continue
+            for neighbour, walk in self.edges[node].items():
+                candidate = cost + walk
+                if candidate < seconds.get(neighbour, _UNREACHABLE):
+                    seconds[neighbour] = candidate
+                    previous[neighbour] = node
+                    heapq.heappush(queue, (candidate, neighbour))
+
+    def set_walk(self, a, b, seconds):
+        """
+        Walk ``seconds`` between ``a`` and ``b`` from now on, or not at all
+        when None, and repair the kept trees. Returns the sources whose
+        trees changed. Raises ValueError when there is no such walkway.
+        """
+        if b not in self.usual.get(a, {}):
+            raise ValueError(f"No walkway between {a} and {b}")
+        before = self.edges[a].get(b)
+        if seconds == before:
+            return set()
+        if seconds is None:
+            del self.edges[a][b], self.edges[b][a]
+        else:
+            self.edges[a][b] = self.edges[b][a] = seconds
+            # Only ever lowered, so it stays a bound whatever changes later
+            self._keep_pace(a, b, seconds)
+        if seconds == self.usual[a][b]:
+            self.altered.discard(tuple(sorted((a, b))))
+        else:
+            self.altered.add(tuple(sorted((a, b))))
+
+        shorter = before is None or (seconds is not None and seconds < before)
+        changed = set()
+        for source, (tree_seconds, previous) in self._trees.items():
+            if shorter:
+                repaired = self._shorten(tree_seconds, previous, a, b, seconds)
+            else:
+                repaired = self._lengthen(tree_seconds, previous, a, b)
+            if repaired:
+                changed.add(source)
+        return changed
+
+    def _shorten(self, seconds, previous, a, b, walk):
+        queue = []
+        for near, far in ((a, b), (b, a)):
+            if near in seconds and seconds[near] + walk < seconds.get(far, _UNREACHABLE):
+                seconds[far] = seconds[near] + walk
+                previous[far] = near
+                queue.append((seconds[far], far))
+        if not queue:
+            return False
+        heapq.heapify(queue)
+        self._settle(seconds, previous, queue)
+        return True
+
+    def _lengthen(self, seconds, previous, a, b):
+        if previous.get(b) == a:
+            top = b
+        elif previous.get(a) == b:
+            top = a
+        else:
+            # The tree does not walk this way; nothing in it gets slower
+            return False
+
+        below = defaultdict(list)
+        for node, parent in previous.items():
+            below[parent].append(node)
+        cut = []
+        stack = [top]
+        while stack:
+            node = stack.pop()
+            cut.append(node)
+            stack.extend(below[node])
+        for node in cut:
+            del seconds[node], previous[node]
+
+        # Reconnect the cut locations from the rest of the tree, whose times stand
+        queue = []
+        for node in cut:
+            for neighbour, walk in self.edges[node].items():
+                if neighbour in seconds and seconds[neighbour] + walk < seconds.get(
+                    node, _UNREACHABLE
+                ):
+                    seconds[node] = seconds[neighbour] + walk
+                    previous[node] = neighbour
+            if node in seconds:
+                queue.append((seconds[node], node))
+        heapq.heapify(queue)
+        self._settle(seconds, previous, queue)
+        return True
+
+    def route(self, origin, destination):
+        """The fastest ``Route``, or None for unknown or unconnected locations."""
+        if origin not in self.nodes or destination not in self.nodes:
+            return None
+        seconds, previous = self.tree(origin)
+        if destination not in seconds:
+            return None
+        nodes = [destination]
+        while nodes[-1] != origin:
+            nodes.append(previous[nodes[-1]])
+        return Route(self, nodes[::-1], seconds[destination])
+
+
+def load_venue(path=None):
+    """The venue in ``path``, ``VENUE_FILE`` or ``venue.json``, read once."""
+    return _load(path or os.environ.get("VENUE_FILE") or DEFAULT_VENUE_FILE)
+
+
+@lru_cache(maxsize=None)
+def _load(path):
+    with open(path) as f:
+        return Venue(json.load(f))
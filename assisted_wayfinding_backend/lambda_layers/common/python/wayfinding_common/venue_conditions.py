@@ -0,0 +1,210 @@
+"""
+Live walking conditions: security queues, closed corridors.
+
+``venue.json`` has the usual walking times. ``POST /directions/conditions``
+overrides some walkways: a longer time while a queue builds, or
+``closed``; a walkway given neither gets its usual time back. The
+overrides of a venue version are one snapshot item in the conditions
+table, numbered by ``snapshot``. Every update writes the next number with
+a conditional put, so concurrent updates retry on the latest snapshot
+instead of losing each other's walkways.
+
+Directions containers keep their venue's shortest-path trees while warm.
+``VenueConditions.current`` reads the snapshot at most every
+``check_seconds`` (one consistent read of a small item) and, when its
+number moved, applies only the walkways that differ from what the
+container has: ``Venue.set_walk`` repairs the trees those walkways are
+on and leaves the other trees and routes alone.
+"""
+import os
+import time
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+from wayfinding_common import aws
+from wayfinding_common.timing import timed
+from wayfinding_common.venue import load_venue
+
+CLOSED = "closed"
+DEFAULT_CHECK_SECONDS = 5
+MAX_UPDATE_ATTEMPTS = 3
+
+
+def walk_key(a, b):
+    """The snapshot key of the walkway between ``a`` and ``b``, either way round."""
+    return "|".join(sorted((a, b)))
+
+
+def parse_changes(venue, walkways):
+    """
+    ``{walk_key: seconds | CLOSED | None}`` from the ``walkways`` of an
+    update request. Raises ValueError for unknown walkways or bad times.
+    """
+    if not isinstance(walkways, list) or not walkways:
+        raise ValueError("'walkways' must be a non-empty list")
+    changes = {}
+    for walkway in walkways:
+        if not isinstance(walkway, dict):
+            raise ValueError("Each walkway must be an object with 'from' and 'to'")
+        a, b = walkway.get("from"), walkway.get("to")
+        if not isinstance(a, str) or not isinstance(b, str) or b not in venue.usual.get(a, {}):
+            raise ValueError(f"No walkway between {a} and {b}")
+        seconds = walkway.get("seconds")
+        if walkway.get("closed") is True:
+            changes[walk_key(a, b)] = CLOSED
+        elif seconds is None:
+            changes[walk_key(a, b)] = None
+        elif isinstance(seconds, bool) or not isinstance(seconds, (int, float)) or seconds <= 0:
+            raise ValueError(f"'seconds' of {a} to {b} must be a positive number")
+        else:
+            changes[walk_key(a, b)] = seconds
+    return changes
+
+
+def _number(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return value
+
+
+class VenueConditions:
+    """The conditions of ``venue`` in ``table``, as applied in this container."""
+
+    def __init__(self, table, venue, check_seconds=DEFAULT_CHECK_SECONDS, clock=time.monotonic):
+        self.table = table
+        self.venue = venue
+        self.check_seconds = check_seconds
+        self.clock = clock
+        self.snapshot = 0
+        self.walks = {}
+        self._checked_at = None
+
+    def current(self):
+        """
+        The venue, with the latest snapshot applied when it is due a check.
+        When the table cannot be read, the last snapshot applied stands.
+        """
+        now = self.clock()
+        if self._checked_at is None or now - self._checked_at >= self.check_seconds:
+            self._checked_at = now
+            try:
+                snapshot, walks = self.read()
+            except ClientError as e:
+                print(f"Error reading venue conditions: {str(e)}")
+                return self.venue
+            if snapshot != self.snapshot:
+                self.apply(snapshot, walks)
+        return self.venue
+
+    @timed("dynamodb_conditions_read")
+    def read(self):
+        """``(snapshot, walks)`` as stored; ``(0, {})`` before the first update."""
+        item = self.table.get_item(
+            Key={"venue": self.venue.version}, ConsistentRead=True
+        ).get("Item")
+        if not item:
+            return 0, {}
+        return _number(item["snapshot"]), {
+            key: _number(value) for key, value in item.get("walks", {}).items()
+        }
+
+    def apply(self, snapshot, walks):
+        """Bring the venue to ``walks``; returns the sources whose trees changed."""
+        changed = set()
+        for key in set(self.walks) | set(walks):
+            if self.walks.get(key) == walks.get(key):
+                continue
+            a, b = key.split("|")
+            value = walks.get(key)
+            if value is None:
+                seconds = self.venue.usual[a][b]
+            else:
+                seconds = None if value == CLOSED else value
+            changed |= self.venue.set_walk(a, b, seconds)
+        self.snapshot = snapshot
+        self.walks = dict(walks)
+        return changed
+
+    def update(self, changes):
+        """
+        Store ``changes`` (see ``parse_changes``) as the next snapshot and
+        apply it here; returns ``(snapshot, walks)``. A ClientError with
+        ``ConditionalCheckFailedException`` means updates kept colliding.
+        """
+        for attempt in range(MAX_UPDATE_ATTEMPTS):
+            snapshot, walks = self.read()
+            for key, value in changes.items():
+                if value is None:
+                    walks.pop(key, None)
+                else:
+                    walks[key] = value
+            condition = (
+                {"ConditionExpression": "attribute_not_exists(venue)"}
+                if snapshot == 0
+                else {
+                    "ConditionExpression": "snapshot = :snapshot",
+                    "ExpressionAttributeValues": {":snapshot": snapshot},
+                }
+            )
+            try:
+                self.table.put_item(
+                    Item={
+                        "venue": self.venue.version,
+                        "snapshot": snapshot + 1,
+                        # Numbers go to DynamoDB as Decimal; str() keeps floats exact
+                        "walks": {
+                            key: value if value == CLOSED else Decimal(str(value))
+                            for key, value in walks.items()
+                        },
+                        "updatedAt": int(time.time()),
+                    },
+                    **condition,
+                )
+            except ClientError as e:
+                if (
+                    e.response["Error"]["Code"] != "ConditionalCheckFailedException"
+                    or attempt == MAX_UPDATE_ATTEMPTS - 1
+                ):
+                    raise
+                continue
+            self.apply(snapshot + 1, walks)
+            self._checked_at = self.clock()
+            return snapshot + 1, walks
+
+
+_venue_conditions = None
+
+
+def venue_conditions():
+    """
+    The container's ``VenueConditions`` for ``VENUE_CONDITIONS_TABLE``, or
+    None when live conditions are not configured.
+    """
+    global _venue_conditions
+    table_name = os.environ.get("VENUE_CONDITIONS_TABLE")
+    if not table_name:
+        return None
+    if _venue_conditions is None or _venue_conditions.table.name != table_name:
+        reset()
+        _venue_conditions = VenueConditions(
+            aws.resource("dynamodb").Table(table_name),
+            load_venue(),
+            check_seconds=float(
+                os.environ.get("VENUE_CONDITIONS_CHECK_SECONDS", DEFAULT_CHECK_SECONDS)
+            ),
+        )
+    return _venue_conditions
+
+
+def current_venue():
+    """The venue under the latest conditions, or as described when there are none."""
+    conditions = venue_conditions()
+    return conditions.current() if conditions else load_venue()
+
+
+def reset():
+    """Restore the usual walking times and forget the conditions, e.g. between tests."""
+    global _venue_conditions
+    if _venue_conditions is not None:
+        _venue_conditions.apply(0, {})
+    _venue_conditions = None
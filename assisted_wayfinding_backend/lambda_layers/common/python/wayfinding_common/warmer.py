@@ -0,0 +1,33 @@
+"""
+Scheduled warm-up invocations.
+
+A function whose performance profile has a ``warmer`` is invoked on a
+schedule with ``{"warmer": true, "holdMs": N}``, once per environment to
+keep warm. ``skip_warmers`` answers those events before the handler runs,
+so they do no AWS calls and emit no logs or metrics. Each one holds for
+``holdMs`` so the simultaneous invocations are not served one after another
+by a single environment.
+"""
+import functools
+import time
+
+MAX_HOLD_MS = 1000
+
+
+def is_warmer(event):
+    return isinstance(event, dict) and event.get("warmer") is True
+
+
+def skip_warmers(handler):
+    """Decorator answering warm-up events without calling ``handler``."""
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        if not is_warmer(event):
+            return handler(event, context)
+        hold_ms = min(max(int(event.get("holdMs", 0)), 0), MAX_HOLD_MS)
+        if hold_ms:
+            time.sleep(hold_ms / 1000)
+        return {"warmed": True}
+
+    return wrapper
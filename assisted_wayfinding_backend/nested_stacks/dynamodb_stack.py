@@ -18,6 +18,83 @@ class DynamoDBStack(NestedStack):
                 name="userId", type=dynamodb.AttributeType.STRING
             ),
             # ... other table properties ...
+            # Records expire after their flight departs (wayfinding_common.retention);
+            # the stream carries the deleted items to the record cleanup worker
+            time_to_live_attribute="expiresAt",
+            stream=dynamodb.StreamViewType.OLD_IMAGE,
+        )
+
+        # DynamoDB creates at most one global secondary index per table
+        # update, and CloudFormation fails a deploy that adds more. Each
+        # index below has an index_enabled switch in its config section:
+        # stacks without the indexes deploy with them off and turn them on
+        # one deploy at a time, each after the previous index is ACTIVE.
+        # The functions reading an index work, degraded, while it is off.
+        # Give any new index a switch the same way.
+
+        # Manual lookup: passengers by normalized flight number and date of
+        # birth (wayfinding_common.name_index). Sparse; only records with
+        # both carry lookupKey.
+        if config["manual_lookup"]["index_enabled"]:
+            self._table.add_global_secondary_index(
+                index_name=config["manual_lookup"]["index_name"],
+                partition_key=dynamodb.Attribute(
+                    name="lookupKey", type=dynamodb.AttributeType.STRING
+                ),
+                projection_type=dynamodb.ProjectionType.ALL,
+            )
+
+        # Flight listing: passengers by normalized flight number and
+        # scheduled date (wayfinding_common.flights), sorted by userId so
+        # pages follow a stable order. Only the listing's attributes are
+        # projected, which keeps the index and its reads small.
+        if config["flight_listing"]["index_enabled"]:
+            self._table.add_global_secondary_index(
+                index_name=config["flight_listing"]["index_name"],
+                partition_key=dynamodb.Attribute(
+                    name="flightKey", type=dynamodb.AttributeType.STRING
+                ),
+                sort_key=dynamodb.Attribute(
+                    name="userId", type=dynamodb.AttributeType.STRING
+                ),
+                projection_type=dynamodb.ProjectionType.INCLUDE,
+                non_key_attributes=config["flight_listing"]["projected_attributes"],
+            )
+
+        # Hot collection rotation: passengers by local departure date and
+        # time (wayfinding_common.hot_collection). Sparse; undated records
+        # carry neither key. Photos are projected so they can be indexed.
+        if config["hot_collection"]["index_enabled"]:
+            self._table.add_global_secondary_index(
+                index_name=config["hot_collection"]["index_name"],
+                partition_key=dynamodb.Attribute(
+                    name="departureDate", type=dynamodb.AttributeType.STRING
+                ),
+                sort_key=dynamodb.Attribute(
+                    name="departureAt", type=dynamodb.AttributeType.NUMBER
+                ),
+                projection_type=dynamodb.ProjectionType.INCLUDE,
+                non_key_attributes=["imageUrls"],
+            )
+
+        # Status records of asynchronous enrolment jobs, expired by TTL
+        self._jobs_table = dynamodb.Table(
+            self,
+            "EnrolmentJobsTable",
+            partition_key=dynamodb.Attribute(
+                name="jobId", type=dynamodb.AttributeType.STRING
+            ),
+            time_to_live_attribute="expiresAt",
+        )
+
+        # Live walking conditions per venue version, one snapshot item each
+        # (wayfinding_common.venue_conditions)
+        self._venue_conditions_table = dynamodb.Table(
+            self,
+            "VenueConditionsTable",
+            partition_key=dynamodb.Attribute(
+                name="venue", type=dynamodb.AttributeType.STRING
+            ),
         )
 
     @property
@@ -27,3 +104,11 @@ class DynamoDBStack(NestedStack):
     @property
     def table(self):
         return self._table
+
+    @property
+    def jobs_table(self):
+        return self._jobs_table
+
+    @property
+    def venue_conditions_table(self):
+        return self._venue_conditions_table
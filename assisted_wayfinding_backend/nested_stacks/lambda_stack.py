@@ -1,18 +1,119 @@
+import json
+
 from aws_cdk import (
+    BundlingOptions,
     CfnOutput,
     Duration,
     NestedStack,
+    aws_events as events,
+    aws_events_targets as events_targets,
     aws_iam as iam,
     aws_lambda as _lambda,
+    aws_lambda_event_sources as lambda_event_sources,
+    aws_sqs as sqs,
 )
 from constructs import Construct
 
+ARCHITECTURES = {
+    "x86_64": _lambda.Architecture.X86_64,
+    "arm64": _lambda.Architecture.ARM_64,
+}
+# Wheels for binary layer dependencies, per architecture
+PIP_PLATFORMS = {
+    "x86_64": "manylinux2014_x86_64",
+    "arm64": "manylinux2014_aarch64",
+}
+
+# Targets of one EventBridge rule; beyond this use provisioned concurrency
+MAX_WARMER_CONCURRENCY = 5
+
 
 class LambdaStack(NestedStack):
     def __init__(
         self, scope: Construct, construct_id: str, config: dict, **kwargs
     ) -> None:
         super().__init__(scope, construct_id, **kwargs)
+        self._profiles = config["performance_profiles"]
+        self._rekognition_gateway = config["rekognition_gateway"]
+
+        # Shared helpers (the wayfinding_common package) used by the functions
+        self.common_layer = _lambda.LayerVersion(
+            self,
+            "CommonLayer",
+            code=_lambda.Code.from_asset(
+                "assisted_wayfinding_backend/lambda_layers/common"
+            ),
+            compatible_runtimes=[_lambda.Runtime.PYTHON_3_9],
+            compatible_architectures=list(ARCHITECTURES.values()),
+            description="Shared helpers for the Assisted Wayfinding functions",
+        )
+        # Pillow, for the route maps drawn by directions
+        # (wayfinding_common.route_maps), built for its architecture
+        directions_architecture = self.performance_profile("directions")["architecture"]
+        self.imaging_layer = _lambda.LayerVersion(
+            self,
+            "ImagingLayer",
+            code=_lambda.Code.from_asset(
+                "assisted_wayfinding_backend/lambda_layers/imaging",
+                bundling=BundlingOptions(
+                    image=_lambda.Runtime.PYTHON_3_9.bundling_image,
+                    command=[
+                        "bash",
+                        "-c",
+                        "pip install -r requirements.txt -t /asset-output/python "
+                        f"--platform {PIP_PLATFORMS[directions_architecture]} "
+                        "--only-binary=:all: --python-version 3.9",
+                    ],
+                ),
+            ),
+            compatible_runtimes=[_lambda.Runtime.PYTHON_3_9],
+            compatible_architectures=[ARCHITECTURES[directions_architecture]],
+            description="Pillow for the Assisted Wayfinding route maps",
+        )
+
+        # Logging settings read by wayfinding_common.structured_logging
+        log_environment = {
+            "LOG_LEVEL": config["logging"]["level"],
+            "LOG_SAMPLE_RATES": json.dumps(config["logging"]["sample_rates"]),
+        }
+
+        # Per-stage latency metrics emitted by wayfinding_common.timing
+        timing_environment = {
+            "STAGE_TIMING": "1" if config["stage_timing"]["enabled"] else "0",
+        }
+
+        # Record expiry set by wayfinding_common.retention at enrolment
+        record_expiry = config["record_expiry"]
+        retention_environment = {
+            "RECORD_HOURS_AFTER_DEPARTURE": str(record_expiry["hours_after_departure"]),
+            "RECORD_UNDATED_DAYS": str(record_expiry["undated_days"]),
+            "AIRPORT_UTC_OFFSET_MINUTES": str(record_expiry["airport_utc_offset_minutes"]),
+        }
+
+        # Hot collection of travellers departing soon (wayfinding_common.hot_collection).
+        # Nothing rotates without the departure index, so the tier is off too.
+        hot_collection = config["hot_collection"]
+        hot_environment = {
+            "HOT_COLLECTION_ID": (
+                hot_collection["collection_id"] if hot_collection["index_enabled"] else ""
+            ),
+            "HOT_WINDOW_HOURS": str(hot_collection["window_hours"]),
+            "HOT_HOURS_AFTER_DEPARTURE": str(hot_collection["hours_after_departure"]),
+        }
+        hot_collection_arn = (
+            f"arn:aws:rekognition:{self.region}:{self.account}:collection/{hot_collection['collection_id']}"
+        )
+
+        # Collections per terminal (wayfinding_common.shards)
+        collection_shards = config["collection_shards"]
+        shard_environment = {
+            "COLLECTION_SHARD_ATTRIBUTE": collection_shards["attribute"],
+            "COLLECTION_SHARDS": json.dumps(collection_shards["collections"]),
+        }
+        shard_collection_arns = [
+            f"arn:aws:rekognition:{self.region}:{self.account}:collection/{collection_id}"
+            for collection_id in collection_shards["collections"].values()
+        ]
 
         # Create a Lambda function for face recognition
         self.face_recognition_function = _lambda.Function(
@@ -23,13 +124,19 @@ class LambdaStack(NestedStack):
             code=_lambda.Code.from_asset(
                 "assisted_wayfinding_backend/lambda_functions/face_recognition"
             ),
-            memory_size=config["lambda_memory_size"],
+            layers=[self.common_layer],
             timeout=Duration.seconds(config["lambda_timeout"]),
+            **self.function_options("face_recognition"),
             environment={
                 "DYNAMODB_TABLE_NAME": f"{config['project_name']}-PassengerTable-{config['environment']}",
                 "REKOGNITION_COLLECTION_ID": config["rekognition_collection_id"],
                 "PROJECT_NAME": config["project_name"],
                 "ENVIRONMENT": config["environment"],
+                **log_environment,
+                **timing_environment,
+                **hot_environment,
+                **shard_environment,
+                **self.rekognition_environment("face_recognition"),
             },
         )
 
@@ -41,13 +148,19 @@ class LambdaStack(NestedStack):
             code=_lambda.Code.from_asset(
                 "assisted_wayfinding_backend/lambda_functions/face_indexing"
             ),
-            memory_size=config["lambda_memory_size"],
+            layers=[self.common_layer],
             timeout=Duration.seconds(config["lambda_timeout"]),
+            **self.function_options("face_indexing"),
             environment={
                 "DYNAMODB_TABLE_NAME": f"{config['project_name']}-PassengerTable-{config['environment']}",
                 "REKOGNITION_COLLECTION_ID": config["rekognition_collection_id"],
                 "PROJECT_NAME": config["project_name"],
                 "ENVIRONMENT": config["environment"],
+                **timing_environment,
+                **retention_environment,
+                **hot_environment,
+                **shard_environment,
+                **self.rekognition_environment("face_indexing"),
             },
         )
 
@@ -59,7 +172,9 @@ class LambdaStack(NestedStack):
                 "rekognition:IndexFaces",
             ],
             resources=[
-                f"arn:aws:rekognition:{self.region}:{self.account}:collection/{config['rekognition_collection_id']}"
+                f"arn:aws:rekognition:{self.region}:{self.account}:collection/{config['rekognition_collection_id']}",
+                hot_collection_arn,
+                *shard_collection_arns,
             ],
         )
 
@@ -104,9 +219,12 @@ class LambdaStack(NestedStack):
                 "rekognition:SearchFacesByImage",
                 "rekognition:ListFaces",
                 "rekognition:AssociateFaces",
+                "rekognition:DeleteFaces",
             ],
             resources=[
-                f"arn:aws:rekognition:{self.region}:{self.account}:collection/{config['rekognition_collection_id']}"
+                f"arn:aws:rekognition:{self.region}:{self.account}:collection/{config['rekognition_collection_id']}",
+                hot_collection_arn,
+                *shard_collection_arns,
             ],
         )
         self.face_indexing_function.add_to_role_policy(face_indexing_rekognition_policy)
@@ -135,10 +253,16 @@ class LambdaStack(NestedStack):
             code=_lambda.Code.from_asset(
                 "assisted_wayfinding_backend/lambda_functions/remove_all_faces"
             ),
+            **self.function_options("remove_all_faces"),
             environment={
                 "DYNAMODB_TABLE_NAME": config["dynamodb_table_name"],
                 "REKOGNITION_COLLECTION_ID": config["rekognition_collection_id"],
+                "SCAN_SEGMENTS": str(config["bulk_scan"]["segments"]),
+                "SCAN_RCU_BUDGET": str(config["bulk_scan"]["rcu_budget"] or 0),
+                **hot_environment,
+                **shard_environment,
             },
+            layers=[self.common_layer],
         )
 
         # Update permissions for the remove_all_faces_function
@@ -149,7 +273,9 @@ class LambdaStack(NestedStack):
                     "rekognition:DeleteFaces",
                 ],
                 resources=[
-                    f"arn:aws:rekognition:*:*:collection/{config['rekognition_collection_id']}"
+                    f"arn:aws:rekognition:*:*:collection/{config['rekognition_collection_id']}",
+                    hot_collection_arn,
+                    *shard_collection_arns,
                 ],
             )
         )
@@ -173,10 +299,12 @@ class LambdaStack(NestedStack):
             runtime=_lambda.Runtime.PYTHON_3_9,
             handler="index.handler",
             code=_lambda.Code.from_asset("assisted_wayfinding_backend/lambda_functions/orchestration"),
-            memory_size=config['lambda_memory_size'],
+            layers=[self.common_layer],
             timeout=Duration.seconds(config['lambda_timeout']),
+            **self.function_options("orchestration"),
             environment={
                 "WEBSOCKET_API_ENDPOINT": config['websocket_api_endpoint'],
+                **timing_environment,
             }
         )
 
@@ -195,13 +323,30 @@ class LambdaStack(NestedStack):
             code=_lambda.Code.from_asset(
                 "assisted_wayfinding_backend/lambda_functions/get_passenger_data"
             ),
-            memory_size=config["lambda_memory_size"],
+            layers=[self.common_layer],
             timeout=Duration.seconds(config["lambda_timeout"]),
+            **self.function_options("get_passenger_data"),
             environment={
                 "DYNAMODB_TABLE_NAME": config["dynamodb_table"].table_name,  # Use this instead
                 "REKOGNITION_COLLECTION_ID": config["rekognition_collection_id"],
                 "PROJECT_NAME": config["project_name"],
                 "ENVIRONMENT": config["environment"],
+                "PASSENGER_CACHE_MAX_ENTRIES": str(config["passenger_cache"]["max_entries"]),
+                "PASSENGER_CACHE_TTL_SECONDS": str(config["passenger_cache"]["ttl_seconds"]),
+                "PASSENGER_CACHE_REVALIDATE_SECONDS": str(
+                    config["passenger_cache"]["revalidate_seconds"]
+                ),
+                # Empty while the index is disabled
+                "FLIGHT_INDEX_NAME": (
+                    config["flight_listing"]["index_name"]
+                    if config["flight_listing"]["index_enabled"]
+                    else ""
+                ),
+                "FLIGHT_INDEX_ATTRIBUTES": ",".join(
+                    config["flight_listing"]["projected_attributes"]
+                ),
+                **log_environment,
+                **timing_environment,
             },
         )
 
@@ -209,19 +354,17 @@ class LambdaStack(NestedStack):
         dynamodb_policy = iam.PolicyStatement(
             actions=[
                 "dynamodb:GetItem",
+                "dynamodb:BatchGetItem",
                 "dynamodb:Query",
             ],
-            resources=[config["dynamodb_table"].table_arn],
+            resources=[
+                config["dynamodb_table"].table_arn,
+                # Flight listings query flight-index
+                f"{config['dynamodb_table'].table_arn}/index/*",
+            ],
         )
         self.get_passenger_data_function.add_to_role_policy(dynamodb_policy)
 
-        # Update the orchestration function to allow invoking the get_passenger_data function
-        self.orchestration_function.add_to_role_policy(
-            iam.PolicyStatement(
-                actions=["lambda:InvokeFunction"],
-                resources=[self.get_passenger_data_function.function_arn]
-            )
-        )
         # Add the Directions Lambda function
         self.directions_function = _lambda.Function(
             self,
@@ -231,8 +374,13 @@ class LambdaStack(NestedStack):
             code=_lambda.Code.from_asset(
                 "assisted_wayfinding_backend/lambda_functions/directions"
             ),
+            layers=[self.common_layer, self.imaging_layer],
+            **self.function_options("directions"),
             environment={
                 "MAP_IMAGE_BUCKET": config["map_image_bucket"],
+                "VENUE_CONDITIONS_TABLE": config["venue_conditions_table"].table_name,
+                **log_environment,
+                **timing_environment,
             },
         )
         CfnOutput(self, "MapImageBucketName", value=config["map_image_bucket"])
@@ -251,6 +399,15 @@ class LambdaStack(NestedStack):
                 ],
             )
         )
+        # Route maps drawn on demand are stored for the next request
+        self.directions_function.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["s3:PutObject"],
+                resources=[f"arn:aws:s3:::{config['map_image_bucket']}/maps/routes/*"],
+            )
+        )
+        # Reads live walking conditions, and writes them for POST /directions/conditions
+        config["venue_conditions_table"].grant_read_write_data(self.directions_function)
 
         # Add the manual user lookup function
         self.manual_user_lookup_function = _lambda.Function(
@@ -261,10 +418,318 @@ class LambdaStack(NestedStack):
             code=_lambda.Code.from_asset(
                 "assisted_wayfinding_backend/lambda_functions/manual_user_lookup"
             ),
+            layers=[self.common_layer],
+            **self.function_options("manual_user_lookup"),
             environment={
                 "DYNAMODB_TABLE_NAME": config["dynamodb_table"].table_name,
+                # Empty while the index is disabled
+                "NAME_LOOKUP_INDEX": (
+                    config["manual_lookup"]["index_name"]
+                    if config["manual_lookup"]["index_enabled"]
+                    else ""
+                ),
+                "NAME_LOOKUP_FALLBACK_SCAN": (
+                    "1" if config["manual_lookup"]["fallback_scan"] else "0"
+                ),
+                **timing_environment,
             },
         )
 
         # Grant DynamoDB read permissions to the manual user lookup function
         config["dynamodb_table"].grant_read_data(self.manual_user_lookup_function)
+
+        # Asynchronous enrolment: POST /index/jobs stages the photos and
+        # queues a job; the worker indexes and commits it
+        enrolment_jobs = config["enrolment_jobs"]
+        worker_timeout = Duration.seconds(enrolment_jobs["worker_timeout_seconds"])
+        self.enrolment_dead_letter_queue = sqs.Queue(
+            self,
+            "EnrolmentDeadLetterQueue",
+            retention_period=Duration.days(14),
+        )
+        self.enrolment_queue = sqs.Queue(
+            self,
+            "EnrolmentQueue",
+            # AWS recommends six times the consumer's timeout
+            visibility_timeout=Duration.seconds(6 * enrolment_jobs["worker_timeout_seconds"]),
+            dead_letter_queue=sqs.DeadLetterQueue(
+                max_receive_count=enrolment_jobs["max_receives"],
+                queue=self.enrolment_dead_letter_queue,
+            ),
+        )
+
+        self.enrolment_worker_function = _lambda.Function(
+            self,
+            "EnrolmentWorkerFunction",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="index.handler",
+            code=_lambda.Code.from_asset(
+                "assisted_wayfinding_backend/lambda_functions/enrolment_worker"
+            ),
+            layers=[self.common_layer],
+            timeout=worker_timeout,
+            **self.function_options("enrolment_worker"),
+            environment={
+                "DYNAMODB_TABLE_NAME": config["dynamodb_table"].table_name,
+                "REKOGNITION_COLLECTION_ID": config["rekognition_collection_id"],
+                "S3_BUCKET_NAME": config["s3_bucket_name"],
+                "ENROLMENT_JOBS_TABLE": config["enrolment_jobs_table"].table_name,
+                "ENROLMENT_MAX_RECEIVES": str(enrolment_jobs["max_receives"]),
+                "WEBSOCKET_API_ENDPOINT": config["websocket_api_endpoint"],
+                **timing_environment,
+                **retention_environment,
+                **hot_environment,
+                **shard_environment,
+                **self.rekognition_environment("enrolment_worker"),
+            },
+        )
+        self.enrolment_worker_function.add_event_source(
+            lambda_event_sources.SqsEventSource(
+                self.enrolment_queue,
+                batch_size=enrolment_jobs["batch_size"],
+                max_batching_window=Duration.seconds(
+                    enrolment_jobs["max_batching_window_seconds"]
+                ),
+                report_batch_item_failures=True,
+            )
+        )
+
+        self.enrolment_worker_function.add_to_role_policy(face_indexing_rekognition_policy)
+        self.enrolment_worker_function.add_to_role_policy(s3_policy)
+        config["dynamodb_table"].grant_read_write_data(self.enrolment_worker_function)
+        self.enrolment_worker_function.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["execute-api:ManageConnections"],
+                resources=[f"arn:aws:execute-api:{self.region}:{self.account}:*/*/*/*"],
+            )
+        )
+
+        self.face_indexing_function.add_environment(
+            "ENROLMENT_JOBS_TABLE", config["enrolment_jobs_table"].table_name
+        )
+        self.face_indexing_function.add_environment(
+            "ENROLMENT_QUEUE_URL", self.enrolment_queue.queue_url
+        )
+        self.face_indexing_function.add_environment(
+            "ENROLMENT_JOB_TTL_SECONDS", str(enrolment_jobs["job_ttl_days"] * 24 * 3600)
+        )
+        self.enrolment_queue.grant_send_messages(self.face_indexing_function)
+        for function in (self.face_indexing_function, self.enrolment_worker_function):
+            config["enrolment_jobs_table"].grant_read_write_data(function)
+
+        # Record cleanup: releases the faces and photos of passenger records
+        # deleted by TTL, read in batches from the table's stream
+        self.record_cleanup_dead_letter_queue = sqs.Queue(
+            self,
+            "RecordCleanupDeadLetterQueue",
+            retention_period=Duration.days(14),
+        )
+        self.record_cleanup_function = _lambda.Function(
+            self,
+            "RecordCleanupFunction",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="index.handler",
+            code=_lambda.Code.from_asset(
+                "assisted_wayfinding_backend/lambda_functions/record_cleanup"
+            ),
+            layers=[self.common_layer],
+            timeout=worker_timeout,
+            **self.function_options("record_cleanup"),
+            environment={
+                "REKOGNITION_COLLECTION_ID": config["rekognition_collection_id"],
+                **timing_environment,
+                **self.rekognition_environment("record_cleanup"),
+            },
+        )
+        self.record_cleanup_function.add_event_source(
+            lambda_event_sources.DynamoEventSource(
+                config["dynamodb_table"],
+                starting_position=_lambda.StartingPosition.TRIM_HORIZON,
+                batch_size=record_expiry["cleanup_batch_size"],
+                max_batching_window=Duration.seconds(
+                    record_expiry["cleanup_batching_window_seconds"]
+                ),
+                report_batch_item_failures=True,
+                bisect_batch_on_error=True,
+                retry_attempts=record_expiry["cleanup_retry_attempts"],
+                on_failure=lambda_event_sources.SqsDlq(self.record_cleanup_dead_letter_queue),
+                # Only deletions by TTL. remove_all_faces deletes the faces
+                # itself but leaves the photos in S3
+                filters=[
+                    _lambda.FilterCriteria.filter(
+                        {
+                            "eventName": _lambda.FilterRule.is_equal("REMOVE"),
+                            "userIdentity": {
+                                "type": _lambda.FilterRule.is_equal("Service"),
+                                "principalId": _lambda.FilterRule.is_equal(
+                                    "dynamodb.amazonaws.com"
+                                ),
+                            },
+                        }
+                    )
+                ],
+            )
+        )
+        self.record_cleanup_function.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["rekognition:DeleteFaces"],
+                resources=[
+                    f"arn:aws:rekognition:{self.region}:{self.account}:collection/{config['rekognition_collection_id']}",
+                    *shard_collection_arns,
+                ],
+            )
+        )
+        self.record_cleanup_function.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["s3:DeleteObject"],
+                resources=[f"arn:aws:s3:::{config['s3_bucket_name']}/user_photos/*"],
+            )
+        )
+
+        # Hot collection rotation: adds travellers entering the departure
+        # window and removes those who left it, on a schedule
+        self.hot_collection_rotation_function = _lambda.Function(
+            self,
+            "HotCollectionRotationFunction",
+            runtime=_lambda.Runtime.PYTHON_3_9,
+            handler="index.handler",
+            code=_lambda.Code.from_asset(
+                "assisted_wayfinding_backend/lambda_functions/hot_collection_rotation"
+            ),
+            layers=[self.common_layer],
+            # Finishes before the next rotation starts
+            timeout=Duration.minutes(min(hot_collection["rotation_minutes"], 15)),
+            **self.function_options("hot_collection_rotation"),
+            environment={
+                "DYNAMODB_TABLE_NAME": config["dynamodb_table"].table_name,
+                "DEPARTURE_INDEX_NAME": (
+                    hot_collection["index_name"] if hot_collection["index_enabled"] else ""
+                ),
+                **retention_environment,
+                **hot_environment,
+                **timing_environment,
+                **self.rekognition_environment("hot_collection_rotation"),
+            },
+        )
+        config["dynamodb_table"].grant_read_data(self.hot_collection_rotation_function)
+        self.hot_collection_rotation_function.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=[
+                    "rekognition:ListFaces",
+                    "rekognition:IndexFaces",
+                    "rekognition:DeleteFaces",
+                ],
+                resources=[hot_collection_arn],
+            )
+        )
+        # IndexFaces reads the enrolled photos with the caller's permissions
+        self.hot_collection_rotation_function.add_to_role_policy(
+            iam.PolicyStatement(
+                actions=["s3:GetObject"],
+                resources=[f"arn:aws:s3:::{config['s3_bucket_name']}/user_photos/*"],
+            )
+        )
+        if hot_collection["index_enabled"]:
+            events.Rule(
+                self,
+                "HotCollectionRotationSchedule",
+                schedule=events.Schedule.rate(
+                    Duration.minutes(hot_collection["rotation_minutes"])
+                ),
+                targets=[events_targets.LambdaFunction(self.hot_collection_rotation_function)],
+            )
+
+        # Aliases with provisioned concurrency, and warmers, from the profiles.
+        # API integrations and callers invoke these targets.
+        self.invoke_targets = {
+            name: self.keep_warm(name, function)
+            for name, function in (
+                ("face_recognition", self.face_recognition_function),
+                ("face_indexing", self.face_indexing_function),
+                ("remove_all_faces", self.remove_all_faces_function),
+                ("orchestration", self.orchestration_function),
+                ("get_passenger_data", self.get_passenger_data_function),
+                ("directions", self.directions_function),
+                ("manual_user_lookup", self.manual_user_lookup_function),
+                ("enrolment_worker", self.enrolment_worker_function),
+            )
+        }
+
+        self.orchestration_function.add_environment(
+            "GET_PASSENGER_DATA_FUNCTION_NAME",
+            self.invoke_targets["get_passenger_data"].function_arn,
+        )
+
+        # Update the orchestration function to allow invoking the get_passenger_data function
+        self.invoke_targets["get_passenger_data"].grant_invoke(self.orchestration_function)
+
+    def performance_profile(self, name):
+        """The ``performance_profiles`` entry for ``name`` over the default one."""
+        return {**self._profiles["default"], **self._profiles.get(name, {})}
+
+    def function_options(self, name):
+        """Memory, architecture and reserved concurrency for ``_lambda.Function``."""
+        profile = self.performance_profile(name)
+        options = {
+            "memory_size": profile["memory_size"],
+            "architecture": ARCHITECTURES[profile["architecture"]],
+        }
+        if profile.get("reserved_concurrency") is not None:
+            options["reserved_concurrent_executions"] = profile["reserved_concurrency"]
+        return options
+
+    def rekognition_environment(self, name):
+        """Settings read by ``wayfinding_common.rekognition.gateway`` in ``name``."""
+        settings = {
+            **self._rekognition_gateway["default"],
+            **self._rekognition_gateway.get(name, {}),
+        }
+        return {
+            "REKOGNITION_TPS": str(settings["tps"]),
+            "REKOGNITION_BURST": str(settings["burst"]),
+            "REKOGNITION_MAX_ATTEMPTS": str(settings["max_attempts"]),
+            "REKOGNITION_MAX_WAIT_SECONDS": str(settings["max_wait_seconds"]),
+            "REKOGNITION_FAILURE_THRESHOLD": str(settings["failure_threshold"]),
+            "REKOGNITION_RESET_SECONDS": str(settings["reset_seconds"]),
+        }
+
+    def keep_warm(self, name, function):
+        """
+        Add the profile's provisioned concurrency (on a ``live`` alias) or
+        scheduled warmers. Returns the alias when there is one, else the
+        function.
+        """
+        profile = self.performance_profile(name)
+        provisioned = profile.get("provisioned_concurrency")
+        warmer = profile.get("warmer")
+        if provisioned and warmer:
+            raise ValueError(f"{name}: use either provisioned_concurrency or a warmer, not both")
+
+        target = function
+        if provisioned:
+            target = function.add_alias(
+                "live", provisioned_concurrent_executions=provisioned
+            )
+
+        if warmer:
+            if not 1 <= warmer["concurrency"] <= MAX_WARMER_CONCURRENCY:
+                raise ValueError(
+                    f"{name}: warmer concurrency must be between 1 and {MAX_WARMER_CONCURRENCY}"
+                )
+            rule = events.Rule(
+                self,
+                f"{function.node.id}Warmer",
+                schedule=events.Schedule.rate(Duration.minutes(warmer["rate_minutes"])),
+            )
+            # One target per environment; wayfinding_common.warmer holds each
+            # invocation so they run side by side
+            for _ in range(warmer["concurrency"]):
+                rule.add_target(
+                    events_targets.LambdaFunction(
+                        target,
+                        event=events.RuleTargetInput.from_object(
+                            {"warmer": True, "holdMs": warmer.get("hold_ms", 100)}
+                        ),
+                    )
+                )
+        return target
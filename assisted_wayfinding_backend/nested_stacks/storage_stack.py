@@ -32,3 +32,16 @@ class StorageStack(NestedStack):
         self.face_collection = rekognition.CfnCollection(
             self, "FaceCollection", collection_id=config["rekognition_collection_id"]
         )
+        # Travellers departing soon, searched before the full collection
+        self.hot_face_collection = rekognition.CfnCollection(
+            self,
+            "HotFaceCollection",
+            collection_id=config["hot_collection"]["collection_id"],
+        )
+        # One collection per terminal, searched by that terminal's kiosks
+        self.shard_face_collections = {
+            shard: rekognition.CfnCollection(
+                self, f"FaceCollectionShard{shard}", collection_id=collection_id
+            )
+            for shard, collection_id in config["collection_shards"]["collections"].items()
+        }
@@ -0,0 +1,18 @@
+"""
+Performance benchmarks for the Assisted Wayfinding backend.
+
+Run a benchmark as a module from the project root, e.g.
+``python -m benchmarks.serialization``.
+"""
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Make the shared Lambda layer importable the way the Lambda runtime sees it
+sys.path.insert(
+    0,
+    os.path.join(
+        PROJECT_ROOT, "assisted_wayfinding_backend", "lambda_layers", "common", "python"
+    ),
+)
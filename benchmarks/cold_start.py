@@ -0,0 +1,203 @@
+"""
+Benchmark: cold-start import and init cost of each Lambda package.
+
+Imports every ``lambda_functions/*/index.py`` in a fresh interpreter with
+``-X importtime``, the way the Lambda runtime loads the handler (function
+directory and common layer on ``sys.path``), and reports:
+
+- init: wall time of ``import index``, including module-level clients;
+- imports: cumulative import time of ``index``, parsed from the
+  ``-X importtime`` trace, and its heaviest direct imports;
+- first/warm: wall time of the first and second invocation. AWS calls are
+  stubbed to fail with a ClientError, so this is the handler's own set-up
+  cost (deferred imports, client construction) without any network time.
+
+The child runs with ``AWS_LAMBDA_FUNCTION_NAME`` set, as in Lambda, where
+init runs with more CPU than invocations get at small memory sizes.
+
+Each function is measured ``--repeat`` times and the median is reported.
+``--save`` writes the medians to JSON, and ``--baseline`` prints the change
+against an earlier file.
+
+    python -m benchmarks.cold_start [--repeat 5] [--save before.json] [--baseline before.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from benchmarks import PROJECT_ROOT
+
+FUNCTIONS_DIR = os.path.join(PROJECT_ROOT, "assisted_wayfinding_backend", "lambda_functions")
+LAYER_DIR = os.path.join(
+    PROJECT_ROOT, "assisted_wayfinding_backend", "lambda_layers", "common", "python"
+)
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+CHILD = """
+import json, sys, time
+sys.path[:0] = [{function_dir!r}, {layer_dir!r}]
+started = time.perf_counter()
+import index
+init_ms = (time.perf_counter() - started) * 1000
+
+class Context:
+    aws_request_id = "cold-start"
+    function_name = "cold-start"
+
+def invoke():
+    started = time.perf_counter()
+    from botocore.client import BaseClient
+    from botocore.exceptions import ClientError
+
+    def stubbed(self, operation_name, api_params):
+        raise ClientError({{"Error": {{"Code": "Stubbed", "Message": "stubbed"}}}}, operation_name)
+
+    BaseClient._make_api_call = stubbed
+    index.handler(json.loads({event!r}), Context())
+    return (time.perf_counter() - started) * 1000
+
+first_ms = invoke()
+warm_ms = invoke()
+sys.stderr.write("COLD_START %f %f %f\\n" % (init_ms, first_ms, warm_ms))
+"""
+
+# One event per function that reaches its first AWS call
+EVENTS = {
+    "directions": {"resource": "/directions/{from}/{to}", "httpMethod": "GET", "pathParameters": {"from": "checkin", "to": "gate_b4"}},
+    "enrolment_worker": {"Records": [{"messageId": "m1", "body": json.dumps({"jobId": "J1", "userId": "P1", "imageHashes": ["0" * 64], "passengerData": {}})}]},
+    "face_indexing": {"resource": "/index", "httpMethod": "POST", "body": json.dumps({"userId": "P1", "images": ["aW1hZ2U="], "passengerData": {}})},
+    "face_recognition": {"resource": "/recognize", "httpMethod": "POST", "body": json.dumps({"image": "aW1hZ2U="})},
+    "get_passenger_data": {"resource": "/passenger/{personaId}", "httpMethod": "GET", "pathParameters": {"personaId": "P1"}},
+    "manual_user_lookup": {"resource": "/manual-lookup", "httpMethod": "GET", "queryStringParameters": {"name": "a", "dateOfBirth": "b", "flightNumber": "c"}},
+    "orchestration": {"requestContext": {"connectionId": "c1"}, "body": json.dumps({"message": {"name": "conversationRequest", "body": {"personaId": "P1"}}})},
+    "remove_all_faces": {},
+}
+
+ENVIRONMENT = {
+    "AWS_DEFAULT_REGION": "ap-southeast-1",
+    "AWS_ACCESS_KEY_ID": "testing",
+    "AWS_SECRET_ACCESS_KEY": "testing",
+    "DYNAMODB_TABLE_NAME": "cold-start",
+    "REKOGNITION_COLLECTION_ID": "cold-start",
+    "S3_BUCKET_NAME": "cold-start",
+    "ENROLMENT_JOBS_TABLE": "cold-start",
+    "ENROLMENT_QUEUE_URL": "local",
+    "MAP_IMAGE_BUCKET": "cold-start",
+    "WEBSOCKET_API_ENDPOINT": "https://example.com",
+    "AWS_LAMBDA_FUNCTION_NAME": "cold-start",
+    "STAGE_TIMING": "0",
+}
+
+
+def parse_importtime(stderr):
+    """
+    Return the cumulative import time of ``index`` and of each module it
+    imports directly, in microseconds. The trace lists children before
+    their parent, indented two more spaces per level.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            _, cumulative, indent, module = match.groups()
+            entries.append(((len(indent) - 1) // 2, module, int(cumulative)))
+
+    position = max(i for i, (depth, module, _) in enumerate(entries) if module == "index")
+    depth = entries[position][0]
+    direct = {}
+    for child_depth, module, cumulative in reversed(entries[:position]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 1:
+            direct[module] = cumulative
+    return entries[position][2], direct
+
+
+def measure(function):
+    code = CHILD.format(
+        function_dir=os.path.join(FUNCTIONS_DIR, function),
+        layer_dir=LAYER_DIR,
+        event=json.dumps(EVENTS.get(function, {})),
+    )
+    env = {"PATH": os.environ.get("PATH", ""), **ENVIRONMENT}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.join(FUNCTIONS_DIR, function),
+    )
+    if result.returncode:
+        raise RuntimeError(f"Importing {function} failed:\n{result.stderr[-2000:]}")
+    init_ms, first_ms, warm_ms = map(
+        float, re.search(r"COLD_START ([\d.]+) ([\d.]+) ([\d.]+)", result.stderr).groups()
+    )
+    import_us, direct = parse_importtime(result.stderr)
+    return init_ms, first_ms, warm_ms, import_us, direct
+
+
+def profile(function, repeat):
+    runs = [measure(function) for _ in range(repeat)]
+    per_module = {}
+    for *_, direct in runs:
+        for module, us in direct.items():
+            per_module.setdefault(module, []).append(us / 1000)
+    heaviest = sorted(per_module.items(), key=lambda item: -statistics.median(item[1]))[:4]
+    medians = [round(statistics.median(run[column] for run in runs), 1) for column in range(3)]
+    return {
+        "init_ms": medians[0],
+        "first_invoke_ms": medians[1],
+        "warm_invoke_ms": medians[2],
+        "cold_start_ms": round(medians[0] + medians[1], 1),
+        "import_ms": round(statistics.median(run[3] / 1000 for run in runs), 1),
+        "heaviest": {module: round(statistics.median(values), 1) for module, values in heaviest},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier results to compare against")
+    args = parser.parse_args()
+
+    functions = sorted(
+        name
+        for name in os.listdir(FUNCTIONS_DIR)
+        if os.path.isfile(os.path.join(FUNCTIONS_DIR, name, "index.py"))
+    )
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as earlier:
+            baseline = json.load(earlier)
+
+    results = {}
+    print(
+        f"{'function':<20} {'init':>7} {'first':>7} {'cold':>7} {'change':>8} {'warm':>7} "
+        f"{'change':>8}  heaviest imports (ms)"
+    )
+    for function in functions:
+        results[function] = stats = profile(function, args.repeat)
+        cold_change = warm_change = ""
+        if function in baseline:
+            cold_change = f"{stats['cold_start_ms'] - baseline[function]['cold_start_ms']:+.1f}"
+            warm_change = f"{stats['warm_invoke_ms'] - baseline[function]['warm_invoke_ms']:+.1f}"
+        heaviest = ", ".join(f"{module} {ms:.1f}" for module, ms in stats["heaviest"].items())
+        print(
+            f"{function:<20} {stats['init_ms']:>7.1f} {stats['first_invoke_ms']:>7.1f} "
+            f"{stats['cold_start_ms']:>7.1f} {cold_change:>8} {stats['warm_invoke_ms']:>7.1f} "
+            f"{warm_change:>8}  {heaviest}"
+        )
+
+    if args.save:
+        with open(args.save, "w") as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
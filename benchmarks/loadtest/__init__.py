@@ -0,0 +1,12 @@
+"""
+Offline load test for the REST API.
+
+Serves every API route from a local HTTP adapter backed by the real handlers,
+with DynamoDB and S3 on moto and a latency-injecting Rekognition fake, then
+replays a kiosk traffic mix and reports throughput, latency percentiles and
+per-stage breakdowns. Absolute numbers reflect moto and the injected
+latencies, so compare runs with each other rather than with production.
+
+    python -m benchmarks.loadtest --mix kiosk --requests 500 --concurrency 4
+    python -m benchmarks.loadtest --compare benchmarks/results/<earlier>.json
+"""
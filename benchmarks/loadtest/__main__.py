@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+
+from benchmarks import PROJECT_ROOT
+from benchmarks.loadtest.adapter import LocalApi, serve
+from benchmarks.loadtest.driver import run_load
+from benchmarks.loadtest.report import (
+    print_comparison,
+    print_summary,
+    run_metadata,
+    summarize,
+    write_results,
+)
+from benchmarks.loadtest.stand_ins import MAP_BUCKET, local_aws
+from benchmarks.loadtest.traffic import MAPPED_ROUTES, TRAFFIC_MIXES, Population, TrafficMix
+
+
+def seed_data(api, rekognition, population, s3):
+    """Enrol the population through POST /index, without injected latency."""
+    scale = rekognition.latency.scale
+    rekognition.latency.scale = 0
+    try:
+        for passenger in population.passengers:
+            status = api.invoke("POST", "/index", body=population.enrolment_request(passenger))[0]
+            if status != 200:
+                raise RuntimeError(f"Seeding {passenger['userId']} failed with {status}")
+    finally:
+        rekognition.latency.scale = scale
+
+    for origin, destination in MAPPED_ROUTES:
+        s3.put_object(Bucket=MAP_BUCKET, Key=f"maps/{origin}_to_{destination}.png", Body=b"png")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the REST API.")
+    parser.add_argument("--mix", choices=sorted(TRAFFIC_MIXES), default="kiosk")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--passengers", type=int, default=200)
+    parser.add_argument("--image-kb", type=int, default=64)
+    parser.add_argument(
+        "--latency-scale",
+        type=float,
+        default=1.0,
+        help="Multiplier for the injected Rekognition latency; 0 disables it",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results-dir", default=os.path.join(PROJECT_ROOT, "benchmarks", "results"))
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    import boto3
+
+    with local_aws(latency_scale=args.latency_scale, seed=args.seed) as rekognition:
+        api = LocalApi()
+        population = Population(args.passengers, args.image_kb, seed=args.seed)
+        seed_data(api, rekognition, population, boto3.client("s3"))
+
+        with serve(api) as base_url:
+            samples, elapsed = run_load(
+                base_url,
+                TrafficMix(TRAFFIC_MIXES[args.mix]),
+                population,
+                requests=args.requests,
+                concurrency=args.concurrency,
+                warmup=args.warmup,
+                seed=args.seed,
+            )
+
+    settings = {key: value for key, value in vars(args).items() if key not in ("results_dir", "compare", "no_save")}
+    results = {
+        "meta": run_metadata(PROJECT_ROOT, settings),
+        "mix": TRAFFIC_MIXES[args.mix],
+        "summary": summarize(samples, elapsed),
+    }
+    print_summary(results["summary"])
+
+    if not args.no_save:
+        print(f"\nResults written to {write_results(results, args.results_dir)}")
+    if args.compare:
+        with open(args.compare) as baseline:
+            print_comparison(json.load(baseline), results)
+
+
+if __name__ == "__main__":
+    main()
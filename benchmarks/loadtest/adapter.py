@@ -0,0 +1,174 @@
+"""
+Local HTTP adapter serving the REST API routes with the function handlers.
+
+``ROUTES`` mirrors the resources ``AssistedWayfindingBackendStack`` adds to
+the RestApi; keep the two in step. Requests are turned into API Gateway
+proxy events (``resource``, ``pathParameters``, ``queryStringParameters``,
+``body``) and passed to the handler of the owning function.
+
+The process models one warm container: invocations are serialized, because
+the handlers keep per-container state (caches, the logging and timing
+recorders) that Lambda never shares between concurrent requests. Each
+response carries the handler time and stage durations in ``X-Handler-Ms``
+and ``X-Stage-Timings`` headers for the load driver.
+"""
+import contextlib
+import importlib
+import io
+import json
+import re
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# (method, resource, function directory under lambda_functions)
+ROUTES = [
+    ("POST", "/recognize", "face_recognition"),
+    ("POST", "/index", "face_indexing"),
+    ("POST", "/index/jobs", "face_indexing"),
+    ("GET", "/index/jobs/{jobId}", "face_indexing"),
+    ("POST", "/remove_all_faces", "remove_all_faces"),
+    ("GET", "/passenger/{personaId}", "get_passenger_data"),
+    ("POST", "/passenger/batch", "get_passenger_data"),
+    ("GET", "/flights/{flightNo}/passengers", "get_passenger_data"),
+    ("GET", "/directions/{from}/{to}", "directions"),
+    ("POST", "/directions/itinerary", "directions"),
+    ("GET", "/directions/nearest", "directions"),
+    ("GET", "/manual-lookup", "manual_user_lookup"),
+]
+
+
+def _route_pattern(resource):
+    parts = re.split(r"\{(\w+)\}", resource)
+    pattern = "".join(
+        re.escape(part) if index % 2 == 0 else f"(?P<{part}>[^/]+)"
+        for index, part in enumerate(parts)
+    )
+    return re.compile(f"^{pattern}$")
+
+
+class LambdaContext:
+    def __init__(self, function_name):
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.aws_request_id = str(uuid.uuid4())
+        self.memory_limit_in_mb = 128
+
+
+class LocalApi:
+    """Resolves a request to a function and invokes its handler in-process."""
+
+    def __init__(self, routes=ROUTES, quiet=True):
+        self.quiet = quiet
+        self._lock = threading.Lock()
+        self._handlers = {}
+        # Literal resources first, so /passenger/batch wins over /passenger/{personaId}
+        self.routes = sorted(
+            ((method, resource, _route_pattern(resource), function) for method, resource, function in routes),
+            key=lambda route: "{" in route[1],
+        )
+
+    def handler(self, function):
+        # Imported lazily so module-level clients are created inside the stand-ins
+        if function not in self._handlers:
+            module = importlib.import_module(
+                f"assisted_wayfinding_backend.lambda_functions.{function}.index"
+            )
+            self._handlers[function] = module.handler
+        return self._handlers[function]
+
+    def resolve(self, method, path):
+        for route_method, resource, pattern, function in self.routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                return resource, function, match.groupdict()
+        return None
+
+    def invoke(self, method, url, headers=None, body=None):
+        """Return ``(status, headers, body, handler_ms, stage_timings)``."""
+        from wayfinding_common.timing import stage_durations
+
+        parts = urlsplit(url)
+        resolved = self.resolve(method, parts.path.rstrip("/") or "/")
+        if resolved is None:
+            return 404, {}, json.dumps({"message": "Missing Authentication Token"}), 0.0, {}
+        resource, function, path_parameters = resolved
+
+        event = {
+            "resource": resource,
+            "path": parts.path,
+            "httpMethod": method,
+            "headers": dict(headers or {}),
+            "queryStringParameters": dict(parse_qsl(parts.query)) or None,
+            "pathParameters": path_parameters or None,
+            "body": body,
+            "isBase64Encoded": False,
+            "requestContext": {"requestId": str(uuid.uuid4()), "stage": "local"},
+        }
+        with self._lock:
+            output = io.StringIO() if self.quiet else None
+            started = time.perf_counter()
+            with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+                response = self.handler(function)(event, LambdaContext(function))
+            handler_ms = (time.perf_counter() - started) * 1000
+            stages = stage_durations()
+
+        return (
+            response.get("statusCode", 200),
+            response.get("headers") or {},
+            response.get("body") or "",
+            handler_ms,
+            stages,
+        )
+
+
+def make_request_handler(api):
+    class ApiRequestHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self):
+            super().setup()
+            # Headers and body go out in separate writes; without this the
+            # body waits for a delayed ACK and adds ~40 ms to every request
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def _dispatch(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode() if length else None
+            status, headers, payload, handler_ms, stages = api.invoke(
+                self.command, self.path, dict(self.headers), body
+            )
+            data = payload.encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("X-Handler-Ms", f"{handler_ms:.3f}")
+            self.send_header("X-Stage-Timings", json.dumps(stages))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = _dispatch
+        do_POST = _dispatch
+
+        def log_message(self, format, *args):
+            pass
+
+    return ApiRequestHandler
+
+
+@contextlib.contextmanager
+def serve(api, host="127.0.0.1", port=0):
+    """Run the adapter on a background thread; yields the base URL."""
+    server = ThreadingHTTPServer((host, port), make_request_handler(api))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
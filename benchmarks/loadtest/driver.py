@@ -0,0 +1,105 @@
+"""
+Closed-loop load driver: ``concurrency`` workers each send one request at a
+time over a keep-alive connection and record what came back.
+"""
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class Sample:
+    __slots__ = ("operation", "status", "latency_ms", "handler_ms", "stages")
+
+    def __init__(self, operation, status, latency_ms, handler_ms, stages):
+        self.operation = operation
+        self.status = status
+        self.latency_ms = latency_ms
+        self.handler_ms = handler_ms
+        self.stages = stages
+
+
+def _connection(base_url):
+    parts = urlsplit(base_url)
+    connection_class = (
+        http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    )
+    return connection_class(parts.netloc, timeout=60), parts.path.rstrip("/")
+
+
+def send(connection, prefix, method, path, body):
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    started = time.perf_counter()
+    connection.request(method, prefix + path, body=body, headers=headers)
+    response = connection.getresponse()
+    response.read()
+    latency_ms = (time.perf_counter() - started) * 1000
+
+    handler_ms = response.getheader("X-Handler-Ms")
+    stages = response.getheader("X-Stage-Timings")
+    return (
+        response.status,
+        latency_ms,
+        float(handler_ms) if handler_ms else None,
+        json.loads(stages) if stages else {},
+    )
+
+
+def run_load(base_url, mix, population, requests, concurrency, warmup=0, seed=0):
+    """
+    Replay ``requests`` requests drawn from ``mix`` (after ``warmup``
+    unrecorded ones). Returns the samples and the wall-clock seconds of the
+    recorded part.
+    """
+    samples = []
+    samples_lock = threading.Lock()
+    issued = {"count": 0}
+    recording = threading.Event()
+    if not warmup:
+        recording.set()
+    started = {"at": time.perf_counter()}
+
+    def next_ticket():
+        with samples_lock:
+            ticket = issued["count"]
+            if ticket >= warmup + requests:
+                return None
+            issued["count"] += 1
+            if ticket == warmup and not recording.is_set():
+                started["at"] = time.perf_counter()
+                recording.set()
+            return ticket
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        connection, prefix = _connection(base_url)
+        try:
+            while True:
+                ticket = next_ticket()
+                if ticket is None:
+                    return
+                operation, method, path, body = mix.next_request(rng, population)
+                try:
+                    status, latency_ms, handler_ms, stages = send(
+                        connection, prefix, method, path, body
+                    )
+                except (OSError, http.client.HTTPException):
+                    connection.close()
+                    connection, prefix = _connection(base_url)
+                    status, latency_ms, handler_ms, stages = 599, 0.0, None, {}
+                if ticket >= warmup:
+                    with samples_lock:
+                        samples.append(
+                            Sample(operation, status, latency_ms, handler_ms, stages)
+                        )
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - started["at"]
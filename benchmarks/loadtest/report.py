@@ -0,0 +1,135 @@
+"""
+Summaries of a load run: throughput, latency percentiles and per-stage
+breakdowns per operation, written as JSON and compared against earlier runs.
+"""
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+from collections import Counter, defaultdict
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def distribution(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    summary = {f"p{pct}": round(percentile(values, pct), 3) for pct in PERCENTILES}
+    summary["mean"] = round(sum(values) / len(values), 3)
+    summary["max"] = round(values[-1], 3)
+    return summary
+
+
+def summarize(samples, elapsed_seconds):
+    by_operation = defaultdict(list)
+    for sample in samples:
+        by_operation[sample.operation].append(sample)
+
+    operations = {}
+    for operation, group in sorted(by_operation.items()):
+        stages = defaultdict(list)
+        for sample in group:
+            for stage, ms in sample.stages.items():
+                stages[stage].append(ms)
+        handler_ms = [s.handler_ms for s in group if s.handler_ms is not None]
+        operations[operation] = {
+            "count": len(group),
+            "errors": sum(1 for s in group if s.status >= 500),
+            "statuses": dict(Counter(str(s.status) for s in group)),
+            "latency_ms": distribution([s.latency_ms for s in group]),
+            "handler_ms": distribution(handler_ms),
+            "stages_ms": {stage: distribution(values) for stage, values in sorted(stages.items())},
+        }
+
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s.status >= 500),
+        "elapsed_seconds": round(elapsed_seconds, 3),
+        "throughput_rps": round(len(samples) / elapsed_seconds, 2) if elapsed_seconds else None,
+        "latency_ms": distribution([s.latency_ms for s in samples]),
+        "operations": operations,
+    }
+
+
+def git_commit(cwd):
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=cwd,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(project_root, settings):
+    return {
+        "commit": git_commit(project_root),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": settings,
+    }
+
+
+def write_results(results, directory):
+    os.makedirs(directory, exist_ok=True)
+    meta = results["meta"]
+    name = f"loadtest-{meta['settings']['mix']}-{meta['commit'] or 'nocommit'}-{int(time.time())}.json"
+    path = os.path.join(directory, name)
+    with open(path, "w") as output:
+        json.dump(results, output, indent=2)
+    return path
+
+
+def print_summary(summary):
+    print(
+        f"{summary['requests']} requests in {summary['elapsed_seconds']} s "
+        f"({summary['throughput_rps']} req/s), {summary['errors']} errors"
+    )
+    print(
+        f"{'operation':<20} {'count':>6} {'err':>4} {'p50':>9} {'p95':>9} {'p99':>9} "
+        f"{'handler p50':>12}  slowest stages (p50)"
+    )
+    for operation, stats in summary["operations"].items():
+        latency = stats["latency_ms"]
+        stages = sorted(
+            ((stage, values["p50"]) for stage, values in stats["stages_ms"].items() if stage != "total"),
+            key=lambda item: -item[1],
+        )[:3]
+        print(
+            f"{operation:<20} {stats['count']:>6} {stats['errors']:>4} "
+            f"{latency['p50']:>9.1f} {latency['p95']:>9.1f} {latency['p99']:>9.1f} "
+            f"{stats['handler_ms'].get('p50', float('nan')):>12.1f}  "
+            + ", ".join(f"{stage} {ms:.1f}" for stage, ms in stages)
+        )
+
+
+def print_comparison(baseline, current):
+    """Latency percentile change per operation against an earlier results file."""
+    print(f"\nCompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    for operation, stats in current["summary"]["operations"].items():
+        previous = baseline["summary"]["operations"].get(operation)
+        if not previous:
+            print(f"{operation:<20} (not in baseline)")
+            continue
+        changes = []
+        for pct in PERCENTILES:
+            key = f"p{pct}"
+            before, after = previous["latency_ms"].get(key), stats["latency_ms"].get(key)
+            if before:
+                changes.append(f"{key} {after - before:+.1f} ms ({(after / before - 1) * 100:+.0f}%)")
+        print(f"{operation:<20} " + ", ".join(changes))
@@ -0,0 +1,229 @@
+"""
+Local stand-ins for the AWS services the functions call.
+
+DynamoDB and S3 run on moto. Rekognition is replaced by ``FakeRekognition``,
+which matches faces by the exact bytes of the image and sleeps for a
+deterministic, seeded latency on every call so runs are comparable.
+"""
+import contextlib
+import hashlib
+import random
+import threading
+import time
+import uuid
+from unittest.mock import patch
+
+import boto3
+
+from assisted_wayfinding_backend.config import get_config
+
+REGION = "us-east-1"
+TABLE_NAME = "AssistedWayfinding-PassengerTable-loadtest"
+JOBS_TABLE_NAME = "AssistedWayfinding-EnrolmentJobs-loadtest"
+PHOTO_BUCKET = "assistedwayfinding-passenger-photos-loadtest"
+MAP_BUCKET = "assistedwayfinding-map-images-loadtest"
+COLLECTION_ID = "AssistedWayfindingFaces"
+FLIGHT_LISTING = get_config("loadtest")["flight_listing"]
+
+# Median latency in milliseconds per operation, roughly what the service
+# reports for small collections. Each call draws from a log-normal around it.
+REKOGNITION_LATENCY_MS = {
+    "index_faces": 450.0,
+    "search_faces_by_image": 180.0,
+    "delete_faces": 60.0,
+    "list_faces": 40.0,
+}
+
+
+class LatencyModel:
+    """Seeded log-normal latencies; ``scale=0`` disables the sleeps."""
+
+    def __init__(self, medians_ms, sigma=0.35, scale=1.0, seed=0):
+        self.medians_ms = medians_ms
+        self.sigma = sigma
+        self.scale = scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, operation):
+        if not self.scale:
+            return 0.0
+        with self._lock:
+            factor = self._random.lognormvariate(0, self.sigma)
+        seconds = self.medians_ms.get(operation, 50.0) * factor * self.scale / 1000
+        time.sleep(seconds)
+        return seconds
+
+
+class FakeRekognition:
+    """
+    The subset of the Rekognition client used by the functions. Faces are
+    identified by the SHA-256 of the image, so searching with an enrolled
+    photo matches it and any other bytes do not.
+    """
+
+    def __init__(self, s3_client, latency):
+        self.s3 = s3_client
+        self.latency = latency
+        self._lock = threading.Lock()
+        # collection -> face ID -> (external image ID, image hash)
+        self.collections = {}
+
+    def _image_hash(self, image):
+        if "Bytes" in image:
+            data = image["Bytes"]
+        else:
+            location = image["S3Object"]
+            data = self.s3.get_object(Bucket=location["Bucket"], Key=location["Name"])["Body"].read()
+        return hashlib.sha256(data).hexdigest()
+
+    def index_faces(self, CollectionId, Image, ExternalImageId=None, **kwargs):
+        self.latency.delay("index_faces")
+        face_id = str(uuid.uuid4())
+        image_hash = self._image_hash(Image)
+        with self._lock:
+            self.collections.setdefault(CollectionId, {})[face_id] = (ExternalImageId, image_hash)
+        return {
+            "FaceRecords": [
+                {"Face": {"FaceId": face_id, "ExternalImageId": ExternalImageId, "Confidence": 99.9}}
+            ],
+            "UnindexedFaces": [],
+        }
+
+    def search_faces_by_image(self, CollectionId, Image, MaxFaces=1, FaceMatchThreshold=80, **kwargs):
+        self.latency.delay("search_faces_by_image")
+        image_hash = self._image_hash(Image)
+        with self._lock:
+            faces = dict(self.collections.get(CollectionId, {}))
+        matches = [
+            {
+                "Similarity": 99.5,
+                "Face": {"FaceId": face_id, "ExternalImageId": external_id, "Confidence": 99.9},
+            }
+            for face_id, (external_id, face_hash) in faces.items()
+            if face_hash == image_hash
+        ]
+        return {"FaceMatches": matches[:MaxFaces], "SearchedFaceConfidence": 99.9}
+
+    def delete_faces(self, CollectionId, FaceIds):
+        self.latency.delay("delete_faces")
+        with self._lock:
+            faces = self.collections.get(CollectionId, {})
+            deleted = [face_id for face_id in FaceIds if faces.pop(face_id, None)]
+        return {"DeletedFaces": deleted}
+
+    def list_faces(self, CollectionId, **kwargs):
+        self.latency.delay("list_faces")
+        with self._lock:
+            faces = dict(self.collections.get(CollectionId, {}))
+        return {
+            "Faces": [
+                {"FaceId": face_id, "ExternalImageId": external_id}
+                for face_id, (external_id, _) in faces.items()
+            ]
+        }
+
+
+def create_resources():
+    """Table and buckets as DynamoDBStack and StorageStack define them."""
+    boto3.client("dynamodb", region_name=REGION).create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{"AttributeName": "userId", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "userId", "AttributeType": "S"},
+            {"AttributeName": "lookupKey", "AttributeType": "S"},
+            {"AttributeName": "flightKey", "AttributeType": "S"},
+            {"AttributeName": "departureDate", "AttributeType": "S"},
+            {"AttributeName": "departureAt", "AttributeType": "N"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "lookup-index",
+                "KeySchema": [{"AttributeName": "lookupKey", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+            {
+                "IndexName": FLIGHT_LISTING["index_name"],
+                "KeySchema": [
+                    {"AttributeName": "flightKey", "KeyType": "HASH"},
+                    {"AttributeName": "userId", "KeyType": "RANGE"},
+                ],
+                "Projection": {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": FLIGHT_LISTING["projected_attributes"],
+                },
+            },
+            {
+                "IndexName": "departure-index",
+                "KeySchema": [
+                    {"AttributeName": "departureDate", "KeyType": "HASH"},
+                    {"AttributeName": "departureAt", "KeyType": "RANGE"},
+                ],
+                "Projection": {"ProjectionType": "INCLUDE", "NonKeyAttributes": ["imageUrls"]},
+            },
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    boto3.client("dynamodb", region_name=REGION).create_table(
+        TableName=JOBS_TABLE_NAME,
+        KeySchema=[{"AttributeName": "jobId", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "jobId", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    s3 = boto3.client("s3", region_name=REGION)
+    s3.create_bucket(Bucket=PHOTO_BUCKET)
+    s3.create_bucket(Bucket=MAP_BUCKET)
+    return s3
+
+
+def function_environment():
+    return {
+        "AWS_DEFAULT_REGION": REGION,
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "DYNAMODB_TABLE_NAME": TABLE_NAME,
+        "REKOGNITION_COLLECTION_ID": COLLECTION_ID,
+        "S3_BUCKET_NAME": PHOTO_BUCKET,
+        "MAP_IMAGE_BUCKET": MAP_BUCKET,
+        "ENROLMENT_JOBS_TABLE": JOBS_TABLE_NAME,
+        # Jobs queue in-process (wayfinding_common.jobs.LocalQueue)
+        "ENROLMENT_QUEUE_URL": "local",
+        "FLIGHT_INDEX_NAME": FLIGHT_LISTING["index_name"],
+        "FLIGHT_INDEX_ATTRIBUTES": ",".join(FLIGHT_LISTING["projected_attributes"]),
+        # The stand-in has no quota; keep the gateway's bucket out of the numbers
+        "REKOGNITION_TPS": "1000",
+        "LOG_LEVEL": "ERROR",
+    }
+
+
+@contextlib.contextmanager
+def local_aws(latency_scale=1.0, seed=0):
+    """
+    Start moto, create the resources and route ``boto3.client("rekognition")``
+    to a ``FakeRekognition``. Yields the fake so callers can inspect it.
+    """
+    from moto import mock_aws
+
+    with patch.dict("os.environ", function_environment()), mock_aws():
+        s3 = create_resources()
+        rekognition = FakeRekognition(
+            s3, LatencyModel(REKOGNITION_LATENCY_MS, scale=latency_scale, seed=seed)
+        )
+        real_client = boto3.client
+
+        def client(service_name, *args, **kwargs):
+            if service_name == "rekognition":
+                return rekognition
+            return real_client(service_name, *args, **kwargs)
+
+        from wayfinding_common import aws, rekognition as gateway
+
+        # Clients cached by the handlers must come from the patched factory
+        aws.reset()
+        gateway.reset()
+        try:
+            with patch("boto3.client", client):
+                yield rekognition
+        finally:
+            aws.reset()
+            gateway.reset()
@@ -0,0 +1,206 @@
+"""
+Synthetic passengers and the request mixes replayed by the load driver.
+
+Each operation builds one request from a seeded ``random.Random`` and the
+seeded population, so a given seed always replays the same sequence.
+Operations are reported by name, which separates e.g. recognitions that
+match an enrolled face from those that do not.
+"""
+import base64
+import json
+import random
+from urllib.parse import urlencode
+
+LOCATIONS = ["checkin", "security", "kiosk_1", "kiosk_2", "gate_b4", "gate_c12", "lounge"]
+MAPPED_ROUTES = [("checkin", "gate_b4"), ("kiosk_1", "gate_b4"), ("security", "lounge")]
+FLIGHTS = ["SQ221", "SQ308", "SQ12", "TR508", "SQ956"]
+
+# Relative weights per operation
+TRAFFIC_MIXES = {
+    # Kiosk sessions: recognise, greet, then ask for directions
+    "kiosk": {
+        "recognize_match": 30,
+        "recognize_unknown": 5,
+        "passenger_greeting": 25,
+        "directions": 25,
+        "itinerary": 3,
+        "nearest": 2,
+        "manual_lookup": 5,
+        "passenger_batch": 3,
+        "enrol": 2,
+    },
+    # Check-in counters enrolling passengers ahead of a departure wave
+    "enrolment": {"enrol": 70, "recognize_match": 30},
+    # Signage and staff tablets reading passenger and route data
+    "read_heavy": {
+        "passenger_full": 35,
+        "passenger_batch": 15,
+        "flight_listing": 10,
+        "directions": 40,
+    },
+}
+
+
+def synthetic_image(rng, image_kb):
+    """Random bytes stand in for a JPEG; the fake Rekognition only hashes them."""
+    return rng.randbytes(image_kb * 1024)
+
+
+class Population:
+    """Enrolled passengers, their photos and a counter for new enrolments."""
+
+    def __init__(self, size, image_kb, seed=0):
+        rng = random.Random(seed)
+        self.image_kb = image_kb
+        self.passengers = []
+        for index in range(size):
+            flight = FLIGHTS[index % len(FLIGHTS)]
+            self.passengers.append(
+                {
+                    "userId": f"P{index:05d}",
+                    "image": base64.b64encode(synthetic_image(rng, image_kb)).decode(),
+                    "passengerData": {
+                        "name": f"passenger {index}",
+                        "dateOfBirth": f"19{50 + index % 50}-0{1 + index % 9}-1{index % 10}",
+                        "language": rng.choice(["en", "zh", "es"]),
+                        "gender": rng.choice(["female", "male"]),
+                        "flightno": flight,
+                        "next_flight_id": flight,
+                        "scheduled_date": "2024-08-15",
+                        "flight_time": f"{10 + index % 12}:{index % 6}0",
+                        "gate": rng.choice(["B4", "C12", "D40"]),
+                        "has_lounge_access": index % 4 == 0,
+                        "accessibilityPreferences": {
+                            "increaseFontSize": index % 7 == 0,
+                            "wheelchairAccessibility": index % 11 == 0,
+                        },
+                    },
+                }
+            )
+        self.enrolments = 0
+
+    def enrolment_request(self, passenger):
+        return json.dumps(
+            {
+                "userId": passenger["userId"],
+                "images": [passenger["image"]],
+                "passengerData": passenger["passengerData"],
+            }
+        )
+
+
+def recognize_match(rng, population):
+    passenger = rng.choice(population.passengers)
+    return "POST", "/recognize", json.dumps({"image": passenger["image"]})
+
+
+def recognize_unknown(rng, population):
+    image = base64.b64encode(synthetic_image(rng, population.image_kb)).decode()
+    return "POST", "/recognize", json.dumps({"image": image})
+
+
+def passenger_greeting(rng, population):
+    persona_id = rng.choice(population.passengers)["userId"]
+    return "GET", f"/passenger/{persona_id}?profile=greeting", None
+
+
+def passenger_full(rng, population):
+    persona_id = rng.choice(population.passengers)["userId"]
+    return "GET", f"/passenger/{persona_id}", None
+
+
+def passenger_batch(rng, population):
+    sample = rng.sample(population.passengers, min(25, len(population.passengers)))
+    body = {"personaIds": [p["userId"] for p in sample], "profile": "boarding"}
+    return "POST", "/passenger/batch", json.dumps(body)
+
+
+def flight_listing(rng, population):
+    data = rng.choice(population.passengers)["passengerData"]
+    query = urlencode({"date": data["scheduled_date"], "limit": 50})
+    return "GET", f"/flights/{data['next_flight_id']}/passengers?{query}", None
+
+
+def directions(rng, population):
+    if rng.random() < 0.5:
+        origin, destination = rng.choice(MAPPED_ROUTES)
+    else:
+        origin, destination = rng.sample(LOCATIONS, 2)
+    query = urlencode({"language": rng.choice(["en", "zh", "es"])})
+    return "GET", f"/directions/{origin}/{destination}?{query}", None
+
+
+def itinerary(rng, population):
+    origin = rng.choice(["checkin", "kiosk_1", "kiosk_2", "security"])
+    stops = rng.sample(["lounge", "security", "gate_c12"], rng.randint(1, 3))
+    body = {"from": origin, "to": "gate_b4", "stops": stops, "ordered": rng.random() < 0.2}
+    return "POST", "/directions/itinerary", json.dumps(body)
+
+
+def nearest(rng, population):
+    query = urlencode(
+        {
+            "from": rng.choice(["kiosk_1", "kiosk_2", "security", "transit"]),
+            "category": rng.choice(["toilet", "charging", "prayer_room", "water"]),
+            "k": rng.choice([1, 3]),
+        }
+    )
+    return "GET", f"/directions/nearest?{query}", None
+
+
+def manual_lookup(rng, population):
+    data = rng.choice(population.passengers)["passengerData"]
+    name = data["name"]
+    if rng.random() < 0.3:
+        # Staff often type names in lower case or drop a letter
+        name = name.lower() if rng.random() < 0.5 else name[:1] + name[2:]
+    query = urlencode(
+        {
+            "name": name,
+            "dateOfBirth": data["dateOfBirth"],
+            "flightNumber": data["next_flight_id"],
+        }
+    )
+    return "GET", f"/manual-lookup?{query}", None
+
+
+def enrol(rng, population):
+    population.enrolments += 1
+    passenger = {
+        "userId": f"N{rng.getrandbits(32):08x}{population.enrolments}",
+        "image": base64.b64encode(synthetic_image(rng, population.image_kb)).decode(),
+        "passengerData": rng.choice(population.passengers)["passengerData"],
+    }
+    return "POST", "/index", population.enrolment_request(passenger)
+
+
+OPERATIONS = {
+    operation.__name__: operation
+    for operation in [
+        recognize_match,
+        recognize_unknown,
+        passenger_greeting,
+        passenger_full,
+        passenger_batch,
+        flight_listing,
+        directions,
+        itinerary,
+        nearest,
+        manual_lookup,
+        enrol,
+    ]
+}
+
+
+class TrafficMix:
+    def __init__(self, weights):
+        unknown = set(weights) - set(OPERATIONS)
+        if unknown:
+            raise ValueError(f"Unknown operations in traffic mix: {sorted(unknown)}")
+        self.weights = weights
+        self._names = list(weights)
+        self._weights = [weights[name] for name in self._names]
+
+    def next_request(self, rng, population):
+        name = rng.choices(self._names, weights=self._weights)[0]
+        return (name, *OPERATIONS[name](rng, population))
@@ -0,0 +1,127 @@
+"""
+Benchmark: per-request logging cost on the /recognize hot path.
+
+Replays the log calls face_recognition makes for one request with a ~300 KB
+base64 image, once the old way (eager f-string ``json.dumps`` of the event
+and of the Rekognition response) and once through
+``wayfinding_common.structured_logging`` for an unsampled and a sampled
+request. Reports time and bytes written per request.
+
+    python -m benchmarks.logging_overhead [--repeat 200] [--image-kb 300]
+"""
+import argparse
+import io
+import json
+import logging
+import timeit
+
+from wayfinding_common.structured_logging import (
+    JsonFormatter,
+    Redacted,
+    configure_logging,
+    request_log_stats,
+    start_request,
+)
+
+
+def recognize_event(image_kb):
+    return {
+        "resource": "/recognize",
+        "httpMethod": "POST",
+        "headers": {"Content-Type": "application/json", "x-api-key": "key"},
+        "requestContext": {"requestId": "req-1", "stage": "prod"},
+        "body": json.dumps({"image": "A" * (image_kb * 1024)}),
+    }
+
+
+def search_response():
+    return {
+        "SearchedFaceBoundingBox": {"Width": 0.4, "Height": 0.5, "Left": 0.3, "Top": 0.2},
+        "SearchedFaceConfidence": 99.9,
+        "FaceMatches": [
+            {
+                "Similarity": 99.1,
+                "Face": {
+                    "FaceId": "11111111-2222-3333-4444-555555555555",
+                    "BoundingBox": {"Width": 0.4, "Height": 0.5, "Left": 0.3, "Top": 0.2},
+                    "ImageId": "66666666-7777-8888-9999-000000000000",
+                    "ExternalImageId": "P12345",
+                    "Confidence": 99.9,
+                },
+            }
+        ],
+        "FaceModelVersion": "7.0",
+    }
+
+
+def previous_logging(logger, event, response):
+    logger.info("Face Recognition Lambda function invoked")
+    logger.info(f"Event: {json.dumps(event)}")
+    logger.info(f"Rekognition search response: {json.dumps(response)}")
+    logger.info("Face match found. FaceId: x, Similarity: 99.1")
+
+
+def structured_logging(logger, event, response, context):
+    start_request(logger, event, context)
+    logger.info("Face Recognition Lambda function invoked")
+    logger.debug("Event: %s", Redacted(event))
+    logger.info("Rekognition returned %d face match(es)", len(response["FaceMatches"]))
+    logger.debug("Rekognition search response: %s", Redacted(response))
+    logger.info("Face match found. FaceId: %s, Similarity: %s", "x", 99.1)
+
+
+def measure(label, call, stream, repeat):
+    stream.seek(0)
+    stream.truncate()
+    call()
+    written = len(stream.getvalue())
+    seconds = min(timeit.repeat(call, number=repeat, repeat=3)) / repeat
+    print(f"{label:<38} {seconds * 1e6:10.1f} us/request {written:>10} bytes/request")
+    stream.seek(0)
+    stream.truncate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--image-kb", type=int, default=300)
+    args = parser.parse_args()
+
+    event = recognize_event(args.image_kb)
+    response = search_response()
+
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+
+    old_logger = logging.getLogger("benchmark.previous")
+    old_logger.propagate = False
+    old_logger.setLevel(logging.INFO)
+    old_logger.addHandler(handler)
+
+    new_logger = configure_logging("benchmark.structured")
+    new_logger.propagate = False
+    new_logger.addHandler(handler)
+    json_handler = logging.StreamHandler(stream)
+    json_handler.setFormatter(JsonFormatter())
+
+    class Context:
+        aws_request_id = "req-1"
+
+    print(f"/recognize event with a {args.image_kb} KB image, {args.repeat} requests")
+    measure("previous (eager json.dumps)", lambda: previous_logging(old_logger, event, response), stream, args.repeat)
+    measure("structured, unsampled", lambda: structured_logging(new_logger, event, response, Context), stream, args.repeat)
+
+    new_logger.removeHandler(handler)
+    new_logger.addHandler(json_handler)
+    measure("structured JSON, unsampled", lambda: structured_logging(new_logger, event, response, Context), stream, args.repeat)
+
+    # Force every request to be sampled to show the upper bound
+    from wayfinding_common import structured_logging as module
+
+    module._request_filter.sample_rates = {"*": 1.0}
+    measure("structured JSON, sampled (DEBUG)", lambda: structured_logging(new_logger, event, response, Context), stream, args.repeat)
+    print(f"last request: {request_log_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Benchmark: segmented parallel scans of the passenger table.
+
+Compares, for a table of ``--items`` passenger records:
+
+- ``single page``: one ``table.scan()`` call, as remove_all_faces used to
+  make, which sees only the first 1 MB of the table;
+- ``list``: a sequential scan following ``LastEvaluatedKey`` that builds
+  the full item list before using it;
+- ``stream xN``: ``wayfinding_common.scan.parallel_scan`` with N segments,
+  consuming items as they arrive;
+- ``budget``: the widest stream capped at ``--rcu-budget`` units/s.
+
+Each row shows wall time, items seen, pages, consumed read units (and the
+rate achieved) and the peak traced allocation. tracemalloc slows Python
+down several times over, so the peak comes from a second, traced run.
+
+``--backend model`` (the default) serves the table from a stand-in that
+returns fresh copies of prebuilt items in 1 MB pages, reports the read
+units DynamoDB would charge for them (0.5 per 4 KB, eventually
+consistent) and adds ``--page-latency-ms`` per page for the service round
+trip. It leaves out boto3's parsing of each page, which holds the GIL and
+so limits how far more segments help in one process. ``--backend moto``
+loads a real moto table instead. moto walks the whole table for every
+page, so it suits correctness checks at a few thousand items, not
+timings at a million.
+
+    python -m benchmarks.parallel_scan [--items 1000000] [--backend model]
+        [--segments 1,2,4,8,16] [--page-latency-ms 60] [--rcu-budget 2000]
+"""
+import argparse
+import contextlib
+import math
+import time
+import tracemalloc
+
+from wayfinding_common.scan import ScanStats, parallel_scan
+
+PAGE_BYTES = 1024 * 1024
+READ_UNIT_BYTES = 4096
+
+
+def passenger(index):
+    return {
+        "userId": f"user-{index:07d}",
+        "name": f"Passenger {index}",
+        "flightNo": f"SQ{index % 500:03d}",
+        "seat": f"{index % 60 + 1}{'ABCDEF'[index % 6]}",
+        "faceIds": [f"face-{index:07d}"],
+    }
+
+
+def item_bytes(item):
+    """DynamoDB's item size: attribute names plus values."""
+    size = 0
+    for name, value in item.items():
+        size += len(name)
+        if isinstance(value, list):
+            size += 3 + sum(len(element) + 1 for element in value)
+        else:
+            size += len(value)
+    return size
+
+
+class ModelTable:
+    """
+    Scan-only stand-in for a table of ``items`` passengers. Segment ``s`` of
+    ``n`` holds the indexes congruent to ``s`` modulo ``n``.
+    """
+
+    def __init__(self, items, page_latency_ms):
+        self.items = items
+        self.page_latency = page_latency_ms / 1000
+        self.passengers = [passenger(index) for index in range(items)]
+        self.item_size = item_bytes(self.passengers[0])
+
+    def scan(self, Limit=None, Segment=0, TotalSegments=1, ExclusiveStartKey=None, **kwargs):
+        start = ExclusiveStartKey["index"] + TotalSegments if ExclusiveStartKey else Segment
+        per_page = PAGE_BYTES // self.item_size
+        if Limit:
+            per_page = min(per_page, Limit)
+        indexes = range(start, self.items, TotalSegments)[:per_page]
+        # Copies, as every real page is freshly parsed
+        page = [dict(self.passengers[index]) for index in indexes]
+        if "ProjectionExpression" in kwargs:
+            names = kwargs["ExpressionAttributeNames"]
+            attributes = [names[name.strip()] for name in kwargs["ProjectionExpression"].split(",")]
+            page = [{name: item[name] for name in attributes} for item in page]
+        time.sleep(self.page_latency)
+        units = math.ceil(len(indexes) * self.item_size / READ_UNIT_BYTES) * 0.5
+        response = {
+            "Items": page,
+            "Count": len(page),
+            "ScannedCount": len(page),
+            "ConsumedCapacity": {"TableName": "passengers", "CapacityUnits": units},
+        }
+        if indexes and indexes[-1] + TotalSegments < self.items:
+            response["LastEvaluatedKey"] = {"index": indexes[-1]}
+        return response
+
+
+@contextlib.contextmanager
+def moto_table(items):
+    from benchmarks.loadtest.stand_ins import REGION, TABLE_NAME, local_aws
+
+    with local_aws(latency_scale=0):
+        import boto3
+
+        table = boto3.resource("dynamodb", region_name=REGION).Table(TABLE_NAME)
+        with table.batch_writer() as batch:
+            for index in range(items):
+                batch.put_item(Item=passenger(index))
+        yield table
+
+
+def single_page(table, stats):
+    response = table.scan(ReturnConsumedCapacity="TOTAL")
+    stats.add_page(response)
+    return len(response["Items"])
+
+
+def full_list(table, stats):
+    items, kwargs = [], {"ReturnConsumedCapacity": "TOTAL"}
+    while True:
+        response = table.scan(**kwargs)
+        stats.add_page(response)
+        items.extend(response["Items"])
+        if "LastEvaluatedKey" not in response:
+            return len(items)
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def stream(segments, rcu_budget=None):
+    def run(table, stats):
+        count = 0
+        for _ in parallel_scan(table, segments=segments, rcu_budget=rcu_budget, stats=stats):
+            count += 1
+        return count
+
+    return run
+
+
+def measure(label, run, table):
+    stats = ScanStats()
+    started = time.perf_counter()
+    seen = run(table, stats)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    run(table, ScanStats())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<12} {elapsed:>8.2f} {seen:>9} {stats.pages:>6} "
+        f"{stats.consumed_capacity:>9.0f} {stats.consumed_capacity / elapsed:>8.0f} "
+        f"{peak / 1024 / 1024:>8.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=1_000_000)
+    parser.add_argument("--backend", choices=("model", "moto"), default="model")
+    parser.add_argument("--segments", default="1,2,4,8,16")
+    parser.add_argument("--page-latency-ms", type=float, default=60)
+    parser.add_argument("--rcu-budget", type=float, default=2000)
+    args = parser.parse_args()
+    segment_counts = [int(value) for value in args.segments.split(",")]
+
+    if args.backend == "moto":
+        tables = moto_table(args.items)
+    else:
+        tables = contextlib.nullcontext(ModelTable(args.items, args.page_latency_ms))
+
+    with tables as table:
+        print(f"{args.items:,} items, {args.backend} backend\n")
+        print(f"{'scan':<12} {'seconds':>8} {'items':>9} {'pages':>6} {'RCU':>9} {'RCU/s':>8} {'peak MB':>8}")
+        measure("single page", single_page, table)
+        measure("list", full_list, table)
+        for segments in segment_counts:
+            measure(f"stream x{segments}", stream(segments), table)
+        widest = max(segment_counts)
+        measure(f"budget x{widest}", stream(widest, args.rcu_budget), table)
+
+
+if __name__ == "__main__":
+    main()
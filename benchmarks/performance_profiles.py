@@ -0,0 +1,269 @@
+"""
+Report: estimated latency and cost of each function's performance profile.
+
+Combines a load-test results file (``python -m benchmarks.loadtest``) with
+cold-start measurements (``python -m benchmarks.cold_start``) and the
+``performance_profiles`` of ``config.get_config(env)``, and prints for every
+function:
+
+- candidates: estimated p50/p95 duration, cold start and monthly cost for
+  each memory size and architecture, with the configured profile marked;
+- the configured profile: memory, architecture, reserved and provisioned
+  concurrency, warmers, and what they add to the monthly bill.
+
+Model. Stages that wait on AWS (``s3_*``, ``dynamodb_*``, ``rekognition_*``
+and invocations) keep their measured time. The rest of the handler time is
+CPU work, measured here on roughly one full core, and scales with the CPU
+share Lambda allocates: ``max(1, 1769 / memory_mb)``. Init is not scaled,
+because Lambda runs it at full speed for on-demand environments. arm64 is
+assumed to run this code as fast as x86_64. Prices are us-east-1 list
+prices; ``--monthly-requests`` is split across functions by the load-test
+mix.
+
+    python -m benchmarks.performance_profiles [--env prod] [--loadtest FILE]
+        [--cold-start FILE] [--monthly-requests 3000000] [--save report.json]
+"""
+import argparse
+import glob
+import json
+import math
+import os
+
+from benchmarks import PROJECT_ROOT
+
+from assisted_wayfinding_backend.config import get_config
+
+# Load-test operations and the function that serves them
+OPERATION_FUNCTIONS = {
+    "recognize_match": "face_recognition",
+    "recognize_unknown": "face_recognition",
+    "passenger_greeting": "get_passenger_data",
+    "passenger_full": "get_passenger_data",
+    "passenger_batch": "get_passenger_data",
+    "flight_listing": "get_passenger_data",
+    "directions": "directions",
+    "itinerary": "directions",
+    "nearest": "directions",
+    "manual_lookup": "manual_user_lookup",
+    "enrol": "face_indexing",
+}
+
+IO_STAGE_PREFIXES = ("s3_", "dynamodb_", "rekognition_", "post_to_connection", "get_passenger_data_invoke")
+FULL_VCPU_MB = 1769
+MEMORY_SIZES = (128, 256, 512, 1024, 1769)
+ARCHITECTURES = ("x86_64", "arm64")
+# Time the runtime needs before the function's own init starts
+RUNTIME_START_MS = 150
+SECONDS_PER_MONTH = 30 * 24 * 3600
+
+# USD, us-east-1
+PRICE_PER_REQUEST = 0.20 / 1_000_000
+PRICE_PER_GB_SECOND = {"x86_64": 0.0000166667, "arm64": 0.0000133334}
+PROVISIONED_PRICE_PER_GB_SECOND = {"x86_64": 0.0000041667, "arm64": 0.0000033334}
+PROVISIONED_DURATION_PER_GB_SECOND = {"x86_64": 0.0000097222, "arm64": 0.0000077778}
+
+
+def latest_loadtest_results():
+    files = sorted(
+        glob.glob(os.path.join(PROJECT_ROOT, "benchmarks", "results", "loadtest-*.json")),
+        key=os.path.getmtime,
+    )
+    if not files:
+        raise SystemExit("No load-test results found; run python -m benchmarks.loadtest first")
+    return files[-1]
+
+
+def function_workloads(loadtest):
+    """Per function: request share and p50/p95 split into CPU and I/O time."""
+    operations = loadtest["summary"]["operations"]
+    total = sum(stats["count"] for stats in operations.values())
+    workloads = {}
+    for operation, stats in operations.items():
+        function = OPERATION_FUNCTIONS.get(operation)
+        if function is None or not stats["handler_ms"]:
+            continue
+        io_stages = [
+            values for stage, values in stats["stages_ms"].items() if stage.startswith(IO_STAGE_PREFIXES)
+        ]
+        io_p50 = sum(values["p50"] for values in io_stages)
+        # Summed stage p95s overstate the I/O tail, so the CPU tail is a lower bound
+        io_p95 = sum(values["p95"] for values in io_stages)
+        cpu_p50 = max(0.0, stats["handler_ms"]["p50"] - io_p50)
+        workload = workloads.setdefault(function, {"count": 0, "operations": []})
+        workload["count"] += stats["count"]
+        workload["operations"].append(
+            {
+                "count": stats["count"],
+                "io_p50_ms": io_p50,
+                "io_p95_ms": io_p95,
+                "cpu_p50_ms": cpu_p50,
+                "cpu_p95_ms": max(cpu_p50, stats["handler_ms"]["p95"] - io_p95),
+            }
+        )
+    for workload in workloads.values():
+        workload["share"] = workload["count"] / total
+    return workloads
+
+
+def cpu_scale(memory_mb):
+    return max(1.0, FULL_VCPU_MB / memory_mb)
+
+
+def estimate(workload, cold_start, memory_mb, architecture, monthly_requests):
+    """Duration, cold start and on-demand cost of one function at one size."""
+    scale = cpu_scale(memory_mb)
+    count = sum(op["count"] for op in workload["operations"])
+    p50 = sum(
+        op["count"] * (op["io_p50_ms"] + op["cpu_p50_ms"] * scale) for op in workload["operations"]
+    ) / count
+    p95 = max(op["io_p95_ms"] + op["cpu_p95_ms"] * scale for op in workload["operations"])
+    requests = monthly_requests * workload["share"]
+    gb_seconds = requests * (memory_mb / 1024) * math.ceil(p50) / 1000
+    cold_ms = None
+    if cold_start:
+        cold_ms = RUNTIME_START_MS + cold_start["init_ms"] + cold_start["first_invoke_ms"] * scale
+    return {
+        "memory_mb": memory_mb,
+        "architecture": architecture,
+        "p50_ms": round(p50, 1),
+        "p95_ms": round(p95, 1),
+        "cold_start_ms": round(cold_ms, 1) if cold_ms is not None else None,
+        "requests": round(requests),
+        "gb_seconds": gb_seconds,
+        "on_demand_usd": round(
+            requests * PRICE_PER_REQUEST + gb_seconds * PRICE_PER_GB_SECOND[architecture], 2
+        ),
+    }
+
+
+def fixed_costs(profile, memory_gb, architecture):
+    """Monthly cost of keeping environments warm, in USD."""
+    costs = {}
+    provisioned = profile.get("provisioned_concurrency") or 0
+    if provisioned:
+        costs["provisioned"] = round(
+            provisioned * memory_gb * SECONDS_PER_MONTH * PROVISIONED_PRICE_PER_GB_SECOND[architecture], 2
+        )
+    warmer = profile.get("warmer")
+    if warmer:
+        invocations = SECONDS_PER_MONTH / (warmer["rate_minutes"] * 60) * warmer["concurrency"]
+        seconds = invocations * warmer.get("hold_ms", 100) / 1000
+        costs["warmer"] = round(
+            invocations * PRICE_PER_REQUEST
+            + seconds * memory_gb * PRICE_PER_GB_SECOND[architecture],
+            2,
+        )
+    return costs
+
+
+def profile_report(name, profile, workload, cold_start, monthly_requests):
+    memory_mb, architecture = profile["memory_size"], profile["architecture"]
+    candidates = [
+        estimate(workload, cold_start, memory, arch, monthly_requests)
+        for memory in sorted(set(MEMORY_SIZES) | {memory_mb})
+        for arch in ARCHITECTURES
+    ]
+    chosen = estimate(workload, cold_start, memory_mb, architecture, monthly_requests)
+    if profile.get("provisioned_concurrency"):
+        # Requests served by provisioned environments pay the lower duration rate
+        chosen["on_demand_usd"] = round(
+            chosen["requests"] * PRICE_PER_REQUEST
+            + chosen["gb_seconds"] * PROVISIONED_DURATION_PER_GB_SECOND[architecture],
+            2,
+        )
+    fixed = fixed_costs(profile, memory_mb / 1024, architecture)
+    return {
+        "function": name,
+        "profile": profile,
+        "chosen": chosen,
+        "fixed_usd": fixed,
+        "total_usd": round(chosen["on_demand_usd"] + sum(fixed.values()), 2),
+        "candidates": candidates,
+    }
+
+
+def warm_pool(profile):
+    if profile.get("provisioned_concurrency"):
+        return f"{profile['provisioned_concurrency']} provisioned"
+    if profile.get("warmer"):
+        warmer = profile["warmer"]
+        return f"{warmer['concurrency']} warmed every {warmer['rate_minutes']} min"
+    return "on demand"
+
+
+def print_report(reports, env, monthly_requests):
+    print(f"Performance profiles for '{env}', {monthly_requests:,} requests/month\n")
+    for report in reports:
+        profile = report["profile"]
+        print(f"{report['function']} ({report['chosen']['requests']:,} requests/month)")
+        print(f"  {'memory':>6} {'arch':>7} {'p50 ms':>8} {'p95 ms':>8} {'cold ms':>8} {'$/month':>8}")
+        for candidate in report["candidates"]:
+            marker = "*" if (
+                candidate["memory_mb"] == profile["memory_size"]
+                and candidate["architecture"] == profile["architecture"]
+            ) else " "
+            cold = candidate["cold_start_ms"]
+            print(
+                f"{marker} {candidate['memory_mb']:>6} {candidate['architecture']:>7} "
+                f"{candidate['p50_ms']:>8.1f} {candidate['p95_ms']:>8.1f} "
+                f"{cold if cold is not None else float('nan'):>8.1f} {candidate['on_demand_usd']:>8.2f}"
+            )
+        print()
+
+    print(
+        f"{'function':<20} {'memory':>6} {'arch':>7} {'reserved':>8}  {'warm pool':<26} "
+        f"{'p50 ms':>7} {'cold ms':>8} {'usage $':>8} {'fixed $':>8} {'total $':>8}"
+    )
+    for report in reports:
+        profile, chosen = report["profile"], report["chosen"]
+        cold = chosen["cold_start_ms"]
+        print(
+            f"{report['function']:<20} {profile['memory_size']:>6} {profile['architecture']:>7} "
+            f"{str(profile.get('reserved_concurrency') or '-'):>8}  {warm_pool(profile):<26} "
+            f"{chosen['p50_ms']:>7.1f} {cold if cold is not None else float('nan'):>8.1f} "
+            f"{chosen['on_demand_usd']:>8.2f} {sum(report['fixed_usd'].values()):>8.2f} "
+            f"{report['total_usd']:>8.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--env", default="prod")
+    parser.add_argument("--loadtest", help="Load-test results file; defaults to the newest")
+    parser.add_argument("--cold-start", help="Results of benchmarks.cold_start --save; measured if omitted")
+    parser.add_argument("--monthly-requests", type=int, default=3_000_000)
+    parser.add_argument("--save", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.loadtest or latest_loadtest_results()) as results:
+        loadtest = json.load(results)
+    workloads = function_workloads(loadtest)
+
+    if args.cold_start:
+        with open(args.cold_start) as results:
+            cold_starts = json.load(results)
+    else:
+        from benchmarks.cold_start import profile as measure_cold_start
+
+        cold_starts = {function: measure_cold_start(function, 3) for function in workloads}
+
+    profiles = get_config(args.env)["performance_profiles"]
+    reports = [
+        profile_report(
+            function,
+            {**profiles["default"], **profiles.get(function, {})},
+            workload,
+            cold_starts.get(function),
+            args.monthly_requests,
+        )
+        for function, workload in sorted(workloads.items())
+    ]
+    print_report(reports, args.env, args.monthly_requests)
+
+    if args.save:
+        with open(args.save, "w") as output:
+            json.dump({"env": args.env, "loadtest": loadtest["meta"], "reports": reports}, output, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark: nearest facilities by walking time (wayfinding_common.pois).
+
+Builds a two-floor venue of ``--size`` x ``--size`` locations per floor,
+joined by lifts, with ``--pois`` POIs in ``--categories`` categories, and
+times:
+
+- ``build``: the ``PoiIndex``, once per container;
+- ``pruned``: ``PoiIndex.nearest`` for ``--k`` POIs from a kiosk whose
+  shortest-path tree the container already holds;
+- ``every POI``: the same answer from the walking time of every POI of
+  the category, listed up front, which is what the grid saves.
+
+Kiosks are ``--kiosks`` random locations; their trees are searched before
+timing, as a warm container has them. Both answers must agree.
+
+    python -m benchmarks.pois [--size 40] [--pois 5000] [--categories 6] [--k 3]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from wayfinding_common.pois import PoiIndex
+from wayfinding_common.venue import Venue
+
+
+def venue_description(size, poi_count, categories, seed):
+    rng = random.Random(seed)
+    nodes = {}
+    edges = []
+    for floor in ("1", "2"):
+        for x in range(size):
+            for y in range(size):
+                nodes[f"{floor}:{x}_{y}"] = {
+                    "name": f"{x},{y}",
+                    "floor": floor,
+                    "x": x * 30,
+                    "y": y * 30,
+                }
+        for x in range(size):
+            for y in range(size):
+                for neighbour in (f"{floor}:{x + 1}_{y}", f"{floor}:{x}_{y + 1}"):
+                    if neighbour in nodes:
+                        edges.append(
+                            {
+                                "from": f"{floor}:{x}_{y}",
+                                "to": neighbour,
+                                "seconds": rng.randint(20, 45),
+                            }
+                        )
+    for x in range(0, size, max(size // 4, 1)):
+        edges.append({"from": f"1:{x}_{x}", "to": f"2:{x}_{x}", "seconds": 60, "kind": "lift"})
+
+    locations = list(nodes)
+    pois = []
+    for index in range(poi_count):
+        location = rng.choice(locations)
+        pois.append(
+            {
+                "id": f"poi_{index}",
+                "name": f"POI {index}",
+                "category": f"category_{index % categories}",
+                "floor": nodes[location]["floor"],
+                "x": nodes[location]["x"],
+                "y": nodes[location]["y"],
+                "location": location,
+                "seconds": rng.randint(0, 40),
+            }
+        )
+    return {
+        "version": "benchmark",
+        "floors": {"1": {}, "2": {}},
+        "nodes": nodes,
+        "edges": edges,
+        "pois": pois,
+    }
+
+
+def every_poi(venue, origin, pois, k):
+    seconds, _ = venue.tree(origin)
+    walks = sorted(
+        seconds[poi["location"]] + poi.get("seconds", 0)
+        for poi in pois
+        if poi["location"] in seconds
+    )
+    return walks[:k]
+
+
+def microseconds(values):
+    values = sorted(values)
+    return (
+        statistics.median(values) * 1e6,
+        values[int(len(values) * 0.95)] * 1e6,
+        values[-1] * 1e6,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=40)
+    parser.add_argument("--pois", type=int, default=5000)
+    parser.add_argument("--categories", type=int, default=6)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--kiosks", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    venue = Venue(venue_description(args.size, args.pois, args.categories, args.seed))
+    rng = random.Random(args.seed)
+    kiosks = rng.sample(list(venue.nodes), args.kiosks)
+    for kiosk in kiosks:
+        venue.tree(kiosk)
+
+    started = time.perf_counter()
+    index = PoiIndex(venue)
+    build = time.perf_counter() - started
+
+    by_category = {}
+    for poi in venue.pois:
+        by_category.setdefault(poi["category"], []).append(poi)
+
+    timings = {"pruned": [], "every POI": []}
+    for _ in range(args.queries):
+        kiosk = rng.choice(kiosks)
+        category = rng.choice(index.categories)
+
+        started = time.perf_counter()
+        nearest = index.nearest(kiosk, category, args.k)
+        timings["pruned"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        expected = every_poi(venue, kiosk, by_category[category], args.k)
+        timings["every POI"].append(time.perf_counter() - started)
+
+        if [walk for walk, _ in nearest] != expected:
+            raise SystemExit(f"Nearest {category} from {kiosk} differs")
+
+    print(
+        f"{len(venue.nodes)} locations, {len(venue.pois)} POIs in "
+        f"{len(index.categories)} categories, k={args.k}; "
+        f"index built in {build * 1000:.1f} ms"
+    )
+    print(f"{'':<10} {'p50 us':>8} {'p95 us':>8} {'max us':>8}")
+    for label, values in timings.items():
+        p50, p95, slowest = microseconds(values)
+        print(f"{label:<10} {p50:8.0f} {p95:8.0f} {slowest:8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Benchmark: Rekognition calls under an account-level TPS quota.
+
+A stub Rekognition client shares one quota between every simulated
+container and answers calls over it with ``ThrottlingException``, the way
+the service does once the account's SearchFacesByImage TPS is used up.
+Each container is a thread that serves one request at a time, scheduled
+at ``--offered-tps / --containers`` so the offered load exceeds the quota.
+The same load runs through three callers:
+
+- ``raw``: one attempt per request (botocore retries off), so every
+  throttle reaches the kiosk as an error;
+- ``naive``: botocore-style retries, exponential backoff without jitter,
+  so the containers retry in lockstep;
+- ``gateway``: ``wayfinding_common.rekognition.RekognitionGateway`` per
+  container, starting at ``--container-tps`` and adapting from there.
+
+For each it prints successes, requests failed (503s), throttled upstream
+calls, goodput and p50/p95 latency of successful requests, counted from
+the request's scheduled start so queueing behind a slow call is included.
+
+A second run shows coalescing: ``--containers`` threads of one in-process
+host search the same photo at once, ``--rounds`` times, with and without
+a shared gateway, and prints how many calls reached Rekognition.
+
+    python -m benchmarks.rekognition_throttling [--quota-tps 20]
+        [--offered-tps 40] [--containers 8] [--container-tps 5]
+        [--duration 5] [--rounds 20] [--seed 0]
+"""
+import argparse
+import random
+import statistics
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from wayfinding_common.rekognition import RekognitionGateway, RekognitionUnavailable
+
+SERVICE_LATENCY_MS = (60, 140)
+
+
+class QuotaRekognition:
+    """Stub client: a shared token bucket standing in for the account quota."""
+
+    def __init__(self, quota_tps, seed):
+        self.quota_tps = quota_tps
+        self.tokens = float(quota_tps)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.calls = 0
+        self.throttled = 0
+
+    def search_faces_by_image(self, **params):
+        with self.lock:
+            self.calls += 1
+            now = time.monotonic()
+            self.tokens = min(self.quota_tps, self.tokens + (now - self.updated) * self.quota_tps)
+            self.updated = now
+            allowed = self.tokens >= 1
+            if allowed:
+                self.tokens -= 1
+            else:
+                self.throttled += 1
+            latency = self.rng.uniform(*SERVICE_LATENCY_MS) / 1000
+        if not allowed:
+            time.sleep(0.005)
+            raise ClientError(
+                {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+                "SearchFacesByImage",
+            )
+        time.sleep(latency)
+        return {"FaceMatches": []}
+
+
+def raw_caller(client):
+    return client.search_faces_by_image
+
+
+def naive_caller(client, max_attempts=4, base_delay=0.05):
+    def call(**params):
+        for attempt in range(max_attempts):
+            try:
+                return client.search_faces_by_image(**params)
+            except ClientError:
+                if attempt + 1 == max_attempts:
+                    raise
+                time.sleep(base_delay * 2 ** attempt)
+
+    return call
+
+
+def gateway_caller(client, container_tps, seed):
+    gateway = RekognitionGateway(
+        client_factory=lambda: client,
+        rate=container_tps,
+        burst=container_tps,
+        rng=random.Random(seed).random,
+    )
+    return gateway.search_faces_by_image
+
+
+def run_load(mode, args):
+    client = QuotaRekognition(args.quota_tps, args.seed)
+    interval = args.containers / args.offered_tps
+    deadline = time.monotonic() + args.duration
+    latencies, failures = [], []
+    lock = threading.Lock()
+
+    def container(index):
+        if mode == "raw":
+            call = raw_caller(client)
+        elif mode == "naive":
+            call = naive_caller(client)
+        else:
+            call = gateway_caller(client, args.container_tps, args.seed + index)
+        # Stagger the containers' schedules across one interval
+        scheduled = time.monotonic() + interval * index / args.containers
+        while scheduled < deadline:
+            pause = scheduled - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            try:
+                call(CollectionId="faces", Image={"Bytes": b"photo"})
+                outcome = time.monotonic() - scheduled
+            except ClientError as e:
+                outcome = e
+            with lock:
+                if isinstance(outcome, ClientError):
+                    failures.append(outcome)
+                else:
+                    latencies.append(outcome * 1000)
+            scheduled += interval
+
+    threads = [threading.Thread(target=container, args=(i,)) for i in range(args.containers)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": len(latencies) + len(failures),
+        "succeeded": len(latencies),
+        "failed": len(failures),
+        "shed": sum(isinstance(f, RekognitionUnavailable) for f in failures),
+        "upstream_calls": client.calls,
+        "throttled": client.throttled,
+        "goodput": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) if latencies else float("nan"),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] if latencies else float("nan"),
+    }
+
+
+def run_coalescing(args, shared):
+    client = QuotaRekognition(quota_tps=1000, seed=args.seed)
+    gateway = RekognitionGateway(client_factory=lambda: client, rate=1000, burst=1000)
+    for round_number in range(args.rounds):
+        photo = f"photo-{round_number}".encode()
+        barrier = threading.Barrier(args.containers)
+
+        def search():
+            barrier.wait()
+            gateway.search_faces_by_image(
+                coalesce_key=photo if shared else None,
+                CollectionId="faces",
+                Image={"Bytes": photo},
+            )
+
+        threads = [threading.Thread(target=search) for _ in range(args.containers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return client.calls, gateway.stats["coalesced"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quota-tps", type=float, default=20)
+    parser.add_argument("--offered-tps", type=float, default=40)
+    parser.add_argument("--containers", type=int, default=8)
+    parser.add_argument("--container-tps", type=float, default=5)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(
+        f"Quota {args.quota_tps:g} TPS, offered {args.offered_tps:g} TPS "
+        f"from {args.containers} containers for {args.duration:g}s\n"
+    )
+    print(
+        f"{'mode':<8} {'requests':>8} {'ok':>6} {'failed':>6} {'shed':>5} {'calls':>6} "
+        f"{'throttled':>9} {'ok/s':>6} {'p50 ms':>7} {'p95 ms':>7}"
+    )
+    for mode in ("raw", "naive", "gateway"):
+        result = run_load(mode, args)
+        print(
+            f"{mode:<8} {result['requests']:>8} {result['succeeded']:>6} {result['failed']:>6} "
+            f"{result['shed']:>5} {result['upstream_calls']:>6} {result['throttled']:>9} "
+            f"{result['goodput']:>6.1f} {result['p50_ms']:>7.0f} {result['p95_ms']:>7.0f}"
+        )
+
+    print(f"\nCoalescing: {args.rounds} rounds of {args.containers} identical searches")
+    for label, shared in (("separate", False), ("coalesced", True)):
+        calls, coalesced = run_coalescing(args, shared)
+        print(f"  {label:<10} {calls:>5} Rekognition calls, {coalesced:>5} requests shared a call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: size and build cost of error responses.
+
+Compares the previous inline responses with ``wayfinding_common.responses``
+for the cases that differed most:
+
+- directions 400/500, which used to echo the whole request event (and, on a
+  500, the stack trace) in the body;
+- a plain 500 carrying a long ``ClientError`` text;
+- a 200 whose headers used to be a new dict on every call.
+
+Size is the response as the Lambda runtime serializes it (``json.dumps`` of
+the returned dict), which is what API Gateway receives and the client
+downloads. Build time includes that serialization; peak is the largest
+allocation made while building one response, from ``tracemalloc``.
+
+    python -m benchmarks.response_size [--repeat 5000]
+"""
+import argparse
+import json
+import timeit
+import traceback
+import tracemalloc
+
+from wayfinding_common.responses import error_response, json_response
+
+INLINE_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+}
+
+
+def proxy_event():
+    """A GET /directions event as API Gateway delivers it, headers included."""
+    return {
+        "resource": "/directions/{from}/{to}",
+        "path": "/directions/checkin/gate_b4",
+        "httpMethod": "GET",
+        "headers": {
+            "Accept": "application/json",
+            "Accept-Encoding": "gzip, deflate, br",
+            "Accept-Language": "en-SG,en;q=0.9",
+            "CloudFront-Forwarded-Proto": "https",
+            "CloudFront-Is-Desktop-Viewer": "true",
+            "CloudFront-Viewer-Country": "SG",
+            "Host": "abcdef1234.execute-api.ap-southeast-1.amazonaws.com",
+            "User-Agent": "Mozilla/5.0 (Linux; Android 12; Kiosk) AppleWebKit/537.36 "
+            "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            "Via": "2.0 0123456789abcdef0123456789abcdef.cloudfront.net (CloudFront)",
+            "X-Amz-Cf-Id": "Zx" * 28,
+            "X-Amzn-Trace-Id": "Root=1-65a1b2c3-0123456789abcdef01234567",
+            "X-Forwarded-For": "203.0.113.10, 130.176.1.1",
+            "X-Forwarded-Port": "443",
+            "X-Forwarded-Proto": "https",
+        },
+        "multiValueHeaders": {},
+        "queryStringParameters": None,
+        "pathParameters": {"to": "gate_b4"},
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": "/directions/{from}/{to}",
+            "httpMethod": "GET",
+            "requestId": "c6af9ac6-7b61-11e6-9a41-93e8deadbeef",
+            "stage": "prod",
+            "identity": {"sourceIp": "203.0.113.10", "userAgent": "Kiosk"},
+        },
+        "body": None,
+        "isBase64Encoded": False,
+    }
+
+
+def stacktrace():
+    try:
+        {}["from"]["nested"]
+    except KeyError:
+        return traceback.format_exc()
+
+
+def previous_directions_400(event):
+    return {
+        "statusCode": 400,
+        "body": json.dumps(
+            {
+                "error": "Bad Request",
+                "message": "Missing required parameter: 'from'",
+                "details": {"event": event, "missing_key": "'from'"},
+            }
+        ),
+        "headers": dict(INLINE_HEADERS),
+    }
+
+
+def previous_directions_500(event, trace):
+    return {
+        "statusCode": 500,
+        "body": json.dumps(
+            {
+                "error": "Internal Server Error",
+                "message": "'NoneType' object is not subscriptable",
+                "details": {
+                    "event": event,
+                    "exception_type": "TypeError",
+                    "stacktrace": trace,
+                },
+            }
+        ),
+        "headers": dict(INLINE_HEADERS),
+    }
+
+
+def previous_client_error(text):
+    return {"statusCode": 500, "body": json.dumps({"error": text})}
+
+
+def previous_ok(body):
+    return {
+        "statusCode": 200,
+        "headers": {
+            "Access-Control-Allow-Origin": "*",
+            "Access-Control-Allow-Headers": "Content-Type",
+            "Access-Control-Allow-Methods": "OPTIONS,POST,GET",
+        },
+        "body": body,
+    }
+
+
+def peak_bytes(build):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5000)
+    args = parser.parse_args()
+
+    event = proxy_event()
+    trace = stacktrace()
+    client_error_text = (
+        "An error occurred (ValidationException) when calling the Query operation: "
+        + "One or more parameter values were invalid: " * 40
+    )
+    ok_body = json.dumps({"message": "Face recognized", "passengerData": {"userId": "P1"}})
+
+    cases = [
+        (
+            "directions 400",
+            lambda: previous_directions_400(event),
+            lambda: error_response(400, "Bad Request", message="Missing required parameter: 'from'"),
+        ),
+        (
+            "directions 500",
+            lambda: previous_directions_500(event, trace),
+            lambda: error_response(
+                500, "Internal Server Error", message="'NoneType' object is not subscriptable"
+            ),
+        ),
+        (
+            "long ClientError 500",
+            lambda: previous_client_error(client_error_text),
+            lambda: error_response(500, client_error_text),
+        ),
+        ("200 with CORS headers", lambda: previous_ok(ok_body), lambda: json_response(200, ok_body)),
+    ]
+
+    print(
+        f"{'case':<24} {'bytes before':>12} {'after':>7} {'us before':>10} {'after':>7} "
+        f"{'peak before':>12} {'after':>7}"
+    )
+    for label, before, after in cases:
+        sizes, times, peaks = [], [], []
+        for build in (before, after):
+            # Serialized the way the runtime returns the response
+            run = lambda: json.dumps(build())  # noqa: E731
+            sizes.append(len(run().encode()))
+            times.append(min(timeit.repeat(run, number=args.repeat, repeat=5)) / args.repeat * 1e6)
+            peaks.append(peak_bytes(run))
+        print(
+            f"{label:<24} {sizes[0]:>12} {sizes[1]:>7} {times[0]:>10.1f} {times[1]:>7.1f} "
+            f"{peaks[0]:>12} {peaks[1]:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
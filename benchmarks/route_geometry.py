@@ -0,0 +1,131 @@
+"""
+Benchmark: route geometry against map images for directions responses.
+
+For every route between the packaged venue's locations, compares what a
+kiosk downloads and how long until the route is on screen:
+
+- ``image``: the directions response with a ``map_image`` URL, then the
+  PNG (wayfinding_common.route_maps), decoded for display;
+- ``geometry``: the response with ``route_geometry``
+  (wayfinding_common.route_geometry), whose polylines are decoded and drawn
+  over the kiosk's cached plans of the floors crossed.
+
+Time to render is modelled as one round trip per request plus the bytes
+at ``--bandwidth-mbps``, then the measured client work: PNG decoding for
+images, decoding and drawing with Pillow for geometry (a stand-in for the
+kiosk's canvas). Map images are already stored, as on a cache hit; the
+drawing itself is timed by ``benchmarks.route_maps``.
+
+    python -m benchmarks.route_geometry [--bandwidth-mbps 2] [--rtt-ms 80]
+        [--plan-size 1200x800]
+"""
+import argparse
+import io
+import json
+import statistics
+import time
+
+from PIL import Image, ImageDraw
+
+from benchmarks.route_maps import BUCKET, StandInS3, base_plan, scaled_venue
+from wayfinding_common.route_geometry import decode_polyline, route_geometry
+from wayfinding_common.route_maps import ROUTE_COLOUR, ROUTE_WIDTH, RouteMaps
+
+
+def response_body(route, **fields):
+    """A directions response for ``route``; steps as the handler writes them."""
+    steps = [{"step": "Walk along the corridor", "duration": "2 min"}] * 5
+    return json.dumps(
+        {
+            "from": route.nodes[0],
+            "to": route.nodes[-1],
+            "direction_steps": steps,
+            **fields,
+        }
+    ).encode()
+
+
+def client_draw(geometry, plans):
+    """Decode the polylines and draw them over copies of the cached plans."""
+    panels = []
+    for leg in geometry["legs"]:
+        panel = plans[leg["floor"]].copy()
+        ImageDraw.Draw(panel).line(
+            decode_polyline(leg["polyline"]), fill=ROUTE_COLOUR, width=ROUTE_WIDTH
+        )
+        panels.append(panel)
+    return panels
+
+
+def client_decode(png):
+    image = Image.open(io.BytesIO(png))
+    image.load()
+    return image
+
+
+def milliseconds(call):
+    started = time.perf_counter()
+    call()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--bandwidth-mbps", type=float, default=2)
+    parser.add_argument("--rtt-ms", type=float, default=80)
+    parser.add_argument("--plan-size", default="1200x800")
+    args = parser.parse_args()
+
+    width, height = map(int, args.plan_size.split("x"))
+    venue = scaled_venue(width, height)
+    routes = [
+        venue.route(origin, destination)
+        for origin in venue.nodes
+        for destination in venue.nodes
+        if origin != destination
+    ]
+    s3 = StandInS3(0)
+    for index, floor in enumerate(venue.floors.values()):
+        s3.objects[floor["plan"]] = base_plan(width, height, index)
+    maps = RouteMaps(s3, BUCKET)
+    # The kiosk's cached plans
+    plans = {floor: maps.base_plan(venue, floor) for floor in venue.floors}
+
+    def transfer_ms(size):
+        return size * 8 / (args.bandwidth_mbps * 1e6) * 1000
+
+    rows = {"image": ([], []), "geometry": ([], [])}
+    for route in routes:
+        url = maps.url(route)
+        png = s3.objects[url.split(".com/", 1)[1]]
+        body = response_body(route, map_image=url)
+        size = len(body) + len(png)
+        total = 2 * args.rtt_ms + transfer_ms(size) + milliseconds(lambda: client_decode(png))
+        rows["image"][0].append(size)
+        rows["image"][1].append(total)
+
+        geometry = route_geometry(route)
+        body = response_body(route, map_image="", route_geometry=geometry)
+        total = (
+            args.rtt_ms
+            + transfer_ms(len(body))
+            + milliseconds(lambda: client_draw(geometry, plans))
+        )
+        rows["geometry"][0].append(len(body))
+        rows["geometry"][1].append(total)
+
+    print(
+        f"{len(routes)} routes, {width}x{height} plans, "
+        f"{args.bandwidth_mbps:g} Mbit/s, {args.rtt_ms:g} ms round trip"
+    )
+    print(f"{'format':<10} {'bytes p50':>10} {'bytes max':>10} {'render p50 ms':>14} {'p95 ms':>8}")
+    for label, (sizes, times) in rows.items():
+        times = sorted(times)
+        print(
+            f"{label:<10} {statistics.median(sizes):10.0f} {max(sizes):10d} "
+            f"{statistics.median(times):14.1f} {times[int(len(times) * 0.95)]:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark: route maps drawn on demand (wayfinding_common.route_maps).
+
+For every route between the packaged venue's locations, times:
+
+- ``render, cold plans``: a new container's first map, which reads the
+  base plans before drawing;
+- ``render, warm plans``: drawing and encoding a map once the container
+  holds the plans;
+- ``hit, stored``: a map another container drew, found with a HEAD request;
+- ``hit, known``: a map this container has already stored or seen.
+
+S3 is an in-memory stand-in that adds ``--s3-latency-ms`` per request, so
+the hits show what a cached route costs against the drawing it saves.
+Base plans are ``--plan-size`` pixel drawings of overlapping rooms,
+standing in for real plans; the venue's coordinates are scaled onto them.
+
+    python -m benchmarks.route_maps [--s3-latency-ms 20] [--plan-size 1200x800]
+"""
+import argparse
+import io
+import json
+import random
+import statistics
+import time
+
+from botocore.exceptions import ClientError
+from PIL import Image
+
+from wayfinding_common.route_maps import RouteMaps
+from wayfinding_common.venue import DEFAULT_VENUE_FILE, Venue
+
+BUCKET = "map-images"
+
+
+class StandInS3:
+    """Objects in a dict, ``latency`` seconds per request."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.objects = {}
+
+    def head_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        return {"ContentLength": len(self.objects[Key])}
+
+    def get_object(self, Bucket, Key):
+        time.sleep(self.latency)
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        time.sleep(self.latency)
+        self.objects[Key] = Body
+
+
+def base_plan(width, height, seed):
+    """A PNG of room outlines and shaded areas, like an architect's plan."""
+    from PIL import ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (250, 250, 247))
+    draw = ImageDraw.Draw(image)
+    for _ in range(120):
+        x, y = rng.randrange(width), rng.randrange(height)
+        w, h = rng.randrange(20, width // 5), rng.randrange(20, height // 5)
+        shade = rng.randrange(215, 245)
+        draw.rectangle(
+            (x, y, x + w, y + h),
+            fill=(shade, shade, shade - 5),
+            outline=(120, 120, 120),
+            width=2,
+        )
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def scaled_venue(width, height):
+    with open(DEFAULT_VENUE_FILE) as f:
+        description = json.load(f)
+    scales = {}
+    for name, floor in description["floors"].items():
+        scales[name] = (width / floor["width"], height / floor["height"])
+        floor["width"], floor["height"] = width, height
+    for node in description["nodes"].values():
+        scale_x, scale_y = scales[node["floor"]]
+        node["x"], node["y"] = int(node["x"] * scale_x), int(node["y"] * scale_y)
+    return Venue(description)
+
+
+def timed(call):
+    started = time.perf_counter()
+    result = call()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def summary(label, samples, extra=""):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{label:<20} {len(samples):5d} {statistics.median(samples):9.1f} {p95:9.1f}  {extra}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--s3-latency-ms", type=float, default=20)
+    parser.add_argument("--plan-size", default="1200x800")
+    args = parser.parse_args()
+
+    width, height = map(int, args.plan_size.split("x"))
+    venue = scaled_venue(width, height)
+    routes = [
+        venue.route(origin, destination)
+        for origin in venue.nodes
+        for destination in venue.nodes
+        if origin != destination
+    ]
+    s3 = StandInS3(args.s3_latency_ms / 1000)
+    for index, floor in enumerate(venue.floors.values()):
+        s3.objects[floor["plan"]] = base_plan(width, height, index)
+
+    cold, warm, sizes = [], [], []
+    for index, route in enumerate(routes):
+        # Every tenth route plays a fresh container
+        fresh = index % 10 == 0
+        if fresh:
+            maps = RouteMaps(s3, BUCKET)
+        elapsed, url = timed(lambda: maps.url(route))
+        (cold if fresh else warm).append(elapsed)
+        sizes.append(len(s3.objects[url.split(".com/", 1)[1]]))
+
+    stored = RouteMaps(s3, BUCKET)
+    stored_hits = [timed(lambda: stored.url(route))[0] for route in routes]
+    known_hits = [timed(lambda: stored.url(route))[0] for route in routes]
+
+    print(
+        f"{len(routes)} routes, {width}x{height} plans, "
+        f"{args.s3_latency_ms:g} ms per S3 request"
+    )
+    print(f"{'case':<20} {'runs':>5} {'p50 ms':>9} {'p95 ms':>9}")
+    summary("render, cold plans", cold, "reads plans, draws, stores")
+    summary("render, warm plans", warm, f"maps {statistics.median(sizes) / 1024:.0f} KB median")
+    summary("hit, stored", stored_hits, "one HEAD")
+    summary("hit, known", known_hits, "no request")
+
+
+if __name__ == "__main__":
+    main()
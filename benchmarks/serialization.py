@@ -0,0 +1,119 @@
+"""
+Microbenchmark: serializing passenger items for a response.
+
+Compares the previous path (resource-API deserialization into Decimal, then
+``json.dumps(..., default=decimal_default)`` for the scan log, the user log
+and the body) with ``wayfinding_common.serialization.item_to_json`` applied
+once to the low-level item.
+
+    python -m benchmarks.serialization [--repeat 2000] [--flights 40]
+"""
+import argparse
+import json
+import timeit
+from decimal import Decimal
+
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+
+from wayfinding_common.serialization import dumps, item_to_json
+
+
+def decimal_default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+
+def large_passenger(flights):
+    """A passenger record with ``flights`` itinerary legs of flight data."""
+    item = {
+        "userId": "P12345",
+        "name": "fake person",
+        "dateOfBirth": "2000-05-01",
+        "language": "en",
+        "has_lounge_access": True,
+        "lounge_name": "SilverKris Business Class Lounge",
+        "accessibilityPreferences": {
+            "increaseFontSize": False,
+            "wheelchairAccessibility": False,
+        },
+        "faceIds": [f"{i:08x}-0000-0000-0000-000000000000" for i in range(5)],
+        "imageUrls": [
+            f"https://bucket.s3.amazonaws.com/user_photos/P12345_{i:064x}.jpg"
+            for i in range(5)
+        ],
+        "recordVersion": Decimal(7),
+        "itinerary": [],
+    }
+    for leg in range(flights):
+        item["itinerary"].append(
+            {
+                "flightno": f"SQ{100 + leg}",
+                "scheduled_date": "2024-08-15",
+                "scheduled_time": "1150",
+                "terminal": Decimal(3),
+                "gate": f"D{40 + leg}",
+                "aircraft_type": "A320",
+                "origin": "SYD",
+                "distance_km": Decimal("6291.5"),
+                "fare": Decimal("1234.56"),
+                "seat_row": Decimal(leg % 60),
+                "flight_status": "Landed",
+            }
+        )
+    return item
+
+
+def previous_path(low_level_item, deserializer):
+    item = {name: deserializer.deserialize(value) for name, value in low_level_item.items()}
+    scan_log = json.dumps({"Items": [item], "Count": 1}, default=decimal_default)
+    user_log = json.dumps(item, default=decimal_default)
+    body = json.dumps(
+        {"message": "Face recognized", "passengerData": item}, default=decimal_default
+    )
+    return scan_log, user_log, body
+
+
+def resource_single_pass(low_level_item, deserializer):
+    item = {name: deserializer.deserialize(value) for name, value in low_level_item.items()}
+    return dumps(item)
+
+
+def low_level_single_pass(low_level_item):
+    return item_to_json(low_level_item)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--flights", type=int, default=40)
+    args = parser.parse_args()
+
+    serializer = TypeSerializer()
+    deserializer = TypeDeserializer()
+    passenger = large_passenger(args.flights)
+    low_level_item = {name: serializer.serialize(value) for name, value in passenger.items()}
+
+    cases = {
+        "previous (deserialize + 3x json.dumps)": lambda: previous_path(
+            low_level_item, deserializer
+        ),
+        "resource item, single dumps": lambda: resource_single_pass(
+            low_level_item, deserializer
+        ),
+        "low-level item_to_json": lambda: low_level_single_pass(low_level_item),
+    }
+
+    print(
+        f"Item: {args.flights} itinerary legs, "
+        f"{len(item_to_json(low_level_item))} bytes serialized, {args.repeat} runs"
+    )
+    baseline = None
+    for label, case in cases.items():
+        seconds = min(timeit.repeat(case, number=args.repeat, repeat=5)) / args.repeat
+        baseline = baseline or seconds
+        print(f"{label:<42} {seconds * 1e6:9.1f} us/op  {baseline / seconds:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Microbenchmark: cost of the stage spans from ``wayfinding_common.timing``.
+
+Times a handler with eight spans (the shape of face_indexing with a few
+images) without instrumentation, with ``STAGE_TIMING=0`` and with timing
+enabled, including printing the metrics line.
+
+    python -m benchmarks.timing_overhead [--repeat 20000] [--spans 8]
+"""
+import argparse
+import contextlib
+import io
+import timeit
+
+from wayfinding_common import timing
+from wayfinding_common.timing import span, traced_handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--spans", type=int, default=8)
+    args = parser.parse_args()
+
+    stages = [f"stage_{index}" for index in range(args.spans)]
+
+    def plain(event, context):
+        for _ in stages:
+            pass
+        return {"statusCode": 200}
+
+    @traced_handler("benchmark")
+    def instrumented(event, context):
+        for stage in stages:
+            with span(stage):
+                pass
+        return {"statusCode": 200}
+
+    event = {"resource": "/index", "httpMethod": "POST"}
+    cases = [
+        ("uninstrumented", plain, True),
+        ("STAGE_TIMING=0", instrumented, False),
+        ("enabled, EMF line printed", instrumented, True),
+    ]
+
+    print(f"{args.spans} spans per request, {args.repeat} requests")
+    baseline = None
+    for label, handler, enabled in cases:
+        timing._recorder.enabled = enabled
+        with contextlib.redirect_stdout(io.StringIO()):
+            seconds = min(
+                timeit.repeat(lambda: handler(event, None), number=args.repeat, repeat=5)
+            ) / args.repeat
+        baseline = baseline if baseline is not None else seconds
+        print(f"{label:<28} {seconds * 1e6:8.2f} us/request  +{(seconds - baseline) * 1e6:7.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: live walking conditions, repaired trees against rebuilt ones.
+
+A directions container keeps a shortest-path tree per location routes are
+asked from (wayfinding_common.venue). When a walkway slows down, closes or
+reopens (wayfinding_common.venue_conditions), it can either repair the
+trees it holds (``Venue.set_walk``) or drop them and search again. This
+times both on a ``--size`` x ``--size`` grid of walkways with ``--sources``
+kept trees, for ``--updates`` random changes, each followed by a route
+from every kept source to a random location:
+
+- ``repair``: ``set_walk`` then the routes, as the container does;
+- ``rebuild``: the same change, then every tree searched from scratch.
+
+Both must agree on every walking time; the run stops if they do not.
+
+    python -m benchmarks.venue_conditions [--size 40] [--sources 50] [--updates 300]
+"""
+import argparse
+import random
+import statistics
+import time
+
+from wayfinding_common.venue import Venue
+
+
+def grid_description(size, seed):
+    """A one-floor venue of ``size`` x ``size`` locations joined to their neighbours."""
+    rng = random.Random(seed)
+    nodes = {
+        f"n{x}_{y}": {"name": f"{x},{y}", "floor": "1", "x": x * 20, "y": y * 20}
+        for x in range(size)
+        for y in range(size)
+    }
+    edges = []
+    for x in range(size):
+        for y in range(size):
+            for neighbour in (f"n{x + 1}_{y}", f"n{x}_{y + 1}"):
+                if neighbour in nodes:
+                    edges.append(
+                        {"from": f"n{x}_{y}", "to": neighbour, "seconds": rng.randint(10, 60)}
+                    )
+    return {"version": "grid", "floors": {"1": {}}, "nodes": nodes, "edges": edges}
+
+
+def changes(description, count, seed):
+    """``(a, b, seconds)`` updates: queues, closures and reopenings."""
+    rng = random.Random(seed)
+    walkways = [(edge["from"], edge["to"], edge["seconds"]) for edge in description["edges"]]
+    closed = []
+    for _ in range(count):
+        roll = rng.random()
+        if closed and roll < 0.3:
+            yield closed.pop(rng.randrange(len(closed)))
+        elif roll < 0.6:
+            a, b, usual = rng.choice(walkways)
+            closed.append((a, b, usual))
+            yield a, b, None
+        else:
+            a, b, usual = rng.choice(walkways)
+            yield a, b, usual * rng.choice([2, 3, 5])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=40)
+    parser.add_argument("--sources", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    description = grid_description(args.size, args.seed)
+    rng = random.Random(args.seed)
+    locations = list(description["nodes"])
+    sources = rng.sample(locations, args.sources)
+
+    repaired = Venue(description)
+    rebuilt = Venue(description)
+    for source in sources:
+        repaired.tree(source)
+        rebuilt.tree(source)
+
+    timings = {"repair": [], "rebuild": []}
+    touched = []
+    for a, b, seconds in changes(description, args.updates, args.seed):
+        targets = [rng.choice(locations) for _ in sources]
+
+        started = time.perf_counter()
+        touched.append(len(repaired.set_walk(a, b, seconds)))
+        for source, target in zip(sources, targets):
+            repaired.route(source, target)
+        timings["repair"].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        rebuilt.set_walk(a, b, seconds)
+        rebuilt._trees.clear()
+        for source, target in zip(sources, targets):
+            rebuilt.route(source, target)
+        timings["rebuild"].append((time.perf_counter() - started) * 1000)
+
+        for source in sources:
+            if repaired.tree(source)[0] != rebuilt.tree(source)[0]:
+                raise SystemExit(f"Repaired tree of {source} differs after {a}-{b}")
+
+    print(
+        f"{len(locations)} locations, {len(description['edges'])} walkways, "
+        f"{args.sources} kept trees, {args.updates} updates; "
+        f"{statistics.mean(touched):.1f} trees changed per update on average"
+    )
+    print(f"{'':<8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for label, values in timings.items():
+        values = sorted(values)
+        print(
+            f"{label:<8} {statistics.median(values):8.2f} "
+            f"{values[int(len(values) * 0.95)]:8.2f} {values[-1]:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
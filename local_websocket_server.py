@@ -6,6 +6,8 @@ import os
 
 # Add the path to your Lambda function
 sys.path.append('./assisted_wayfinding_backend/lambda_functions/orchestration')
+# Shared helpers deployed as the common Lambda layer
+sys.path.append('./assisted_wayfinding_backend/lambda_layers/common/python')
 from index import handler
 
 class MockContext:
@@ -1,5 +1,76 @@
 import os
 import sys
 
+import pytest
+
 # Add the project root directory to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Make the shared Lambda layer importable the way the Lambda runtime sees it
+sys.path.insert(
+    0,
+    os.path.abspath(
+        os.path.join(
+            os.path.dirname(__file__),
+            "..",
+            "assisted_wayfinding_backend",
+            "lambda_layers",
+            "common",
+            "python",
+        )
+    ),
+)
+
+
+@pytest.fixture(autouse=True)
+def fresh_aws_clients():
+    """Handlers cache boto3 clients per container; tests patch boto3 per test."""
+    from wayfinding_common import aws, pois, rekognition, route_maps, venue_conditions
+
+    aws.reset()
+    rekognition.reset()
+    route_maps.reset()
+    venue_conditions.reset()
+    pois.reset()
+    yield
+    aws.reset()
+    rekognition.reset()
+    route_maps.reset()
+    venue_conditions.reset()
+    pois.reset()
+
+
+@pytest.fixture(autouse=True)
+def fresh_request_logging():
+    """Logging requests left open by one test are not reported by the next."""
+    from wayfinding_common import structured_logging
+
+    structured_logging.finish_request()
+    yield
+
+
+@pytest.fixture
+def venue_description():
+    """Two floors joined by a lift, with one location that cannot be reached."""
+    return {
+        "version": "test",
+        "floors": {
+            "1": {"name": "Ground", "width": 100, "height": 100, "plan": "floorplans/1.png"},
+            "2": {"name": "Upper", "width": 100, "height": 100, "plan": "floorplans/2.png"},
+        },
+        "nodes": {
+            "a": {"name": "A", "floor": "1", "x": 10, "y": 10},
+            "b": {"name": "B", "floor": "1", "x": 50, "y": 10},
+            "c": {"name": "C", "floor": "1", "x": 90, "y": 10},
+            "up": {"name": "Lift", "floor": "2", "x": 90, "y": 10},
+            "d": {"name": "D", "floor": "2", "x": 90, "y": 90},
+            "island": {"name": "Island", "floor": "2", "x": 10, "y": 90},
+        },
+        "edges": [
+            {"from": "a", "to": "b", "seconds": 10},
+            {"from": "b", "to": "c", "seconds": 10},
+            {"from": "a", "to": "c", "seconds": 30},
+            {"from": "c", "to": "up", "seconds": 20},
+            {"from": "up", "to": "d", "seconds": 5},
+        ],
+    }
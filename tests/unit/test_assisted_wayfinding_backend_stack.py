@@ -6,9 +6,12 @@ from assisted_wayfinding_backend.assisted_wayfinding_backend_stack import (
 )
 from assisted_wayfinding_backend.config import get_config
 
+# Skip Docker builds of bundled layers; the templates are the same
+NO_BUNDLING = {"aws:cdk:bundling-stacks": []}
+
 
 def test_stack_creates_nested_stacks():
-    app = core.App()
+    app = core.App(context=NO_BUNDLING)
     config = get_config("dev")
     stack = AssistedWayfindingBackendStack(
         app, "AssistedWayfindingBackendStack", config=config
@@ -35,7 +38,7 @@ def test_stack_creates_nested_stacks():
 
 
 def test_nested_stack_properties():
-    app = core.App()
+    app = core.App(context=NO_BUNDLING)
     config = get_config("dev")
     stack = AssistedWayfindingBackendStack(
         app, "AssistedWayfindingBackendStack", config=config
@@ -63,7 +66,7 @@ def test_nested_stack_properties():
 
 
 def test_main_stack_iam_role():
-    app = core.App()
+    app = core.App(context=NO_BUNDLING)
     config = get_config("dev")
     stack = AssistedWayfindingBackendStack(
         app, "AssistedWayfindingBackendStack", config=config
@@ -99,7 +102,7 @@ def test_main_stack_iam_role():
 
 
 def test_api_gateway():
-    app = core.App()
+    app = core.App(context=NO_BUNDLING)
     config = get_config("dev")
     stack = AssistedWayfindingBackendStack(
         app, "AssistedWayfindingBackendStack", config=config
@@ -117,3 +120,30 @@ def test_api_gateway():
             "Description": "API for Assisted Wayfinding",
         },
     )
+
+
+def index_names(config):
+    """The global secondary indexes DynamoDBStack gives the passenger table."""
+    from assisted_wayfinding_backend.nested_stacks.dynamodb_stack import DynamoDBStack
+
+    app = core.App(context=NO_BUNDLING)
+    dynamodb_stack = DynamoDBStack(core.Stack(app, "Parent"), "DynamoDBStack", config=config)
+    template = assertions.Template.from_stack(dynamodb_stack)
+    (table,) = [
+        resource["Properties"]
+        for resource in template.find_resources("AWS::DynamoDB::Table").values()
+        if resource["Properties"]["KeySchema"][0]["AttributeName"] == "userId"
+    ]
+    return [index["IndexName"] for index in table.get("GlobalSecondaryIndexes", [])]
+
+
+def test_dynamodb_indexes_follow_their_switches():
+    config = get_config("dev")
+    assert index_names(config) == ["lookup-index", "flight-index", "departure-index"]
+
+    # One index per deploy: each is switched on separately
+    for section in ("manual_lookup", "flight_listing", "hot_collection"):
+        config[section] = {**config[section], "index_enabled": False}
+    assert index_names(config) == []
+    config["manual_lookup"] = {**config["manual_lookup"], "index_enabled": True}
+    assert index_names(config) == ["lookup-index"]
@@ -21,10 +21,8 @@ def context():
 # Mocking the S3 client
 @pytest.fixture
 def s3_client_mock():
-    with patch(
-        "assisted_wayfinding_backend.lambda_functions.directions.index.s3_client"
-    ) as mock:
-        yield mock
+    with patch("boto3.client") as mock_client:
+        yield mock_client.return_value
 
 
 # Mocking environment variables
@@ -52,17 +50,47 @@ def test_successful_direction_retrieval(valid_event, context, s3_client_mock, mo
     assert len(body["direction_steps"]) == 5  # 4 steps + arrival step
 
 
-def test_map_image_not_found(valid_event, context, s3_client_mock, mock_env):
+def test_map_image_not_found(context, s3_client_mock, mock_env):
     # Mock S3 head_object to raise a 404 error indicating the object does not exist
     s3_client_mock.head_object.side_effect = ClientError(
         {"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject"
     )
+    # Not a location in the venue, so there is no route to draw either
+    event = {"pathParameters": {"from": "checkin", "to": "car_park"}}
 
-    response = handler(valid_event, context)
+    response = handler(event, context)
 
     assert response["statusCode"] == 200
     body = json.loads(response["body"])
     assert body["map_image"] == ""
+    s3_client_mock.put_object.assert_not_called()
+
+
+def test_route_map_drawn_once_without_hand_drawn_map(
+    valid_event, context, s3_client_mock, mock_env
+):
+    s3_client_mock.head_object.side_effect = ClientError(
+        {"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject"
+    )
+    # No base plans uploaded: floors are drawn from their walkways
+    s3_client_mock.get_object.side_effect = ClientError(
+        {"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject"
+    )
+
+    first = json.loads(handler(valid_event, context)["body"])
+    second = json.loads(handler(valid_event, context)["body"])
+
+    assert first["map_image"].startswith(
+        "https://assistedwayfinding-map-images-dev.s3.amazonaws.com/maps/routes/"
+    )
+    assert second["map_image"] == first["map_image"]
+    put = s3_client_mock.put_object.call_args.kwargs
+    assert first["map_image"].endswith(put["Key"])
+    assert put["ContentType"] == "image/png"
+    assert put["Body"].startswith(b"\x89PNG")
+    # Drawn and stored once; the container remembers it
+    s3_client_mock.put_object.assert_called_once()
+    assert s3_client_mock.get_object.call_count == 2  # one plan per floor
 
 
 def test_map_image_bucket_missing(valid_event, context, s3_client_mock, monkeypatch):
@@ -122,3 +150,253 @@ def test_additional_locations(valid_event, context, s3_client_mock, mock_env):
     )
     assert "direction_steps" in body
     assert len(body["direction_steps"]) >= 4  # Depending on random steps
+
+
+def test_route_geometry_format(context, s3_client_mock, mock_env):
+    event = {
+        "pathParameters": {"from": "checkin", "to": "gate_b4"},
+        "queryStringParameters": {"format": "geometry"},
+    }
+
+    response = handler(event, context)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    geometry = body["route_geometry"]
+    assert [leg["floor"] for leg in geometry["legs"]] == ["1", "2"]
+    assert geometry["transitions"][0]["kind"] == "escalator"
+    assert len(geometry["bbox"]) == 4
+    # No map image is looked up or drawn
+    assert body["map_image"] == ""
+    s3_client_mock.head_object.assert_not_called()
+
+
+def test_route_geometry_for_unknown_location(context, s3_client_mock, mock_env):
+    event = {
+        "pathParameters": {"from": "checkin", "to": "car_park"},
+        "queryStringParameters": {"format": "geometry"},
+    }
+
+    body = json.loads(handler(event, context)["body"])
+
+    assert body["route_geometry"] is None
+
+
+def test_unknown_format(valid_event, context, s3_client_mock, mock_env):
+    event = {**valid_event, "queryStringParameters": {"format": "svg"}}
+
+    response = handler(event, context)
+
+    assert response["statusCode"] == 400
+    assert "Unknown format 'svg'" in json.loads(response["body"])["message"]
+
+
+def itinerary_event(body, **query):
+    return {
+        "resource": "/directions/itinerary",
+        "httpMethod": "POST",
+        "body": json.dumps(body),
+        "queryStringParameters": query or None,
+    }
+
+
+def test_itinerary_visits_stops_in_fastest_order(context, s3_client_mock, mock_env):
+    event = itinerary_event(
+        {"from": "checkin", "to": "gate_b4", "stops": ["lounge", "security"]},
+        format="geometry",
+    )
+
+    response = handler(event, context)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["stops"] == ["security", "lounge"]
+    assert body["method"] == "exact"
+    assert [(leg["from"], leg["to"]) for leg in body["legs"]] == [
+        ("checkin", "security"),
+        ("security", "lounge"),
+        ("lounge", "gate_b4"),
+    ]
+    assert body["seconds"] == sum(leg["seconds"] for leg in body["legs"])
+    assert all(leg["route_geometry"]["legs"] for leg in body["legs"])
+
+
+def test_itinerary_legs_carry_map_images(context, s3_client_mock, mock_env):
+    s3_client_mock.head_object.return_value = {}
+    event = itinerary_event(
+        {"from": "checkin", "to": "gate_b4", "stops": ["lounge"], "ordered": True}
+    )
+
+    body = json.loads(handler(event, context)["body"])
+
+    assert body["method"] == "ordered"
+    assert body["legs"][0]["map_image"].endswith("/maps/checkin_to_lounge.png")
+    assert body["legs"][1]["map_image"].endswith("/maps/lounge_to_gate_b4.png")
+
+
+@pytest.mark.parametrize(
+    "body, message",
+    [
+        ({"stops": ["lounge"]}, "'from' must be a location"),
+        ({"from": "checkin", "stops": "lounge"}, "'from' must be a location"),
+        ({"from": "checkin", "stops": ["car_park"]}, "Unknown location(s): car_park"),
+    ],
+)
+def test_itinerary_rejects_bad_requests(context, s3_client_mock, mock_env, body, message):
+    response = handler(itinerary_event(body), context)
+
+    assert response["statusCode"] == 400
+    assert message in json.loads(response["body"])["message"]
+
+
+@pytest.fixture
+def conditions_table(monkeypatch):
+    monkeypatch.setenv("VENUE_CONDITIONS_TABLE", "VenueConditions")
+    with patch("wayfinding_common.venue_conditions.aws.resource") as resource:
+        table = resource.return_value.Table.return_value
+        table.name = "VenueConditions"
+        table.get_item.return_value = {}
+        yield table
+
+
+def conditions_event(method, body=None):
+    return {
+        "resource": "/directions/conditions",
+        "httpMethod": method,
+        "body": json.dumps(body) if body is not None else None,
+    }
+
+
+def test_closed_escalator_reroutes_by_lift(context, s3_client_mock, mock_env, conditions_table):
+    closure = {"walkways": [{"from": "escalator_1", "to": "escalator_2", "closed": True}]}
+
+    response = handler(conditions_event("POST", closure), context)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["snapshot"] == 1
+    assert body["walkways"] == [{"from": "escalator_1", "to": "escalator_2", "closed": True}]
+
+    event = {
+        "pathParameters": {"from": "checkin", "to": "gate_b4"},
+        "queryStringParameters": {"format": "geometry"},
+    }
+    geometry = json.loads(handler(event, context)["body"])["route_geometry"]
+    assert [transition["kind"] for transition in geometry["transitions"]] == ["lift"]
+    assert geometry["seconds"] == 705
+
+
+def test_altered_walkways_pass_over_hand_drawn_maps(
+    context, s3_client_mock, mock_env, conditions_table
+):
+    conditions_table.get_item.return_value = {
+        "Item": {"venue": "2024-08-01", "snapshot": 2, "walks": {"hall|security": 600}}
+    }
+    s3_client_mock.head_object.return_value = {}
+
+    event = {"pathParameters": {"from": "checkin", "to": "gate_b4"}}
+
+    body = json.loads(handler(event, context)["body"])
+
+    assert "/maps/routes/" in body["map_image"]
+    s3_client_mock.head_object.assert_called_once()
+    assert "routes/" in s3_client_mock.head_object.call_args.kwargs["Key"]
+
+
+def test_get_conditions(context, mock_env, conditions_table):
+    conditions_table.get_item.return_value = {
+        "Item": {"venue": "2024-08-01", "snapshot": 2, "walks": {"hall|security": 600}}
+    }
+
+    body = json.loads(handler(conditions_event("GET"), context)["body"])
+
+    assert body == {
+        "venue": "2024-08-01",
+        "snapshot": 2,
+        "walkways": [{"from": "hall", "to": "security", "seconds": 600}],
+    }
+
+
+def test_conditions_reject_unknown_walkways(context, mock_env, conditions_table):
+    body = {"walkways": [{"from": "checkin", "to": "gate_b4", "seconds": 10}]}
+
+    response = handler(conditions_event("POST", body), context)
+
+    assert response["statusCode"] == 400
+    conditions_table.put_item.assert_not_called()
+
+
+def test_conditions_not_configured(context, mock_env, monkeypatch):
+    monkeypatch.delenv("VENUE_CONDITIONS_TABLE", raising=False)
+
+    response = handler(conditions_event("GET"), context)
+
+    assert response["statusCode"] == 404
+
+
+def nearest_event(**query):
+    return {"resource": "/directions/nearest", "httpMethod": "GET", "queryStringParameters": query}
+
+
+def test_nearest_toilets_from_a_kiosk(context, mock_env):
+    event = nearest_event(**{"from": "kiosk_1", "category": "toilet", "k": "2"})
+
+    response = handler(event, context)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert [(poi["id"], poi["seconds"]) for poi in body["pois"]] == [
+        ("toilet_hall", 80),
+        ("toilet_security", 205),
+    ]
+    assert "route_geometry" not in body["pois"][0]
+
+
+def test_nearest_with_geometry(context, mock_env):
+    event = nearest_event(**{"from": "kiosk_1", "category": "charging", "format": "geometry"})
+
+    body = json.loads(handler(event, context)["body"])
+
+    first = body["pois"][0]
+    assert first["id"] == "charging_checkin"
+    assert first["route_geometry"]["seconds"] == 70
+
+
+@pytest.mark.parametrize(
+    "query, message",
+    [
+        ({"from": "kiosk_1"}, "'from' and 'category' are required"),
+        ({"from": "kiosk_1", "category": "toilet", "k": "0"}, "'k' must be between 1 and 10"),
+        ({"from": "kiosk_1", "category": "toilet", "k": "many"}, "invalid literal"),
+        ({"from": "kiosk_1", "category": "spa"}, "Unknown category 'spa'"),
+    ],
+)
+def test_nearest_rejects_bad_requests(context, mock_env, query, message):
+    response = handler(nearest_event(**query), context)
+
+    assert response["statusCode"] == 400
+    assert message in json.loads(response["body"])["message"]
+
+
+@pytest.mark.parametrize(
+    "language, first, duration",
+    [
+        ("zh", "离开Check-in Row 5后右转", "1 分钟"),
+        ("es", "Salga de Check-in Row 5 y gire a la derecha", "1 min"),
+        ("fr", "Leave Check-in Row 5 and turn right", "1 min"),
+    ],
+)
+def test_directions_in_the_passengers_language(
+    context, s3_client_mock, mock_env, language, first, duration
+):
+    s3_client_mock.head_object.return_value = {}
+    event = {
+        "pathParameters": {"from": "checkin", "to": "gate_b4"},
+        "queryStringParameters": {"language": language},
+    }
+
+    body = json.loads(handler(event, context)["body"])
+
+    assert body["language"] == ("en" if language == "fr" else language)
+    assert body["direction_steps"][0] == {"step": first, "duration": duration}
+    assert len(body["direction_steps"]) == 5
@@ -0,0 +1,249 @@
+import base64
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+from wayfinding_common import jobs
+from wayfinding_common.enrolment import Enrolment
+
+from assisted_wayfinding_backend.lambda_functions.enrolment_worker.index import handler
+from assisted_wayfinding_backend.lambda_functions.face_indexing.index import (
+    handler as face_indexing_handler,
+)
+
+
+@pytest.fixture
+def mock_environment(monkeypatch):
+    monkeypatch.setenv("DYNAMODB_TABLE_NAME", "test-table")
+    monkeypatch.setenv("REKOGNITION_COLLECTION_ID", "test-collection")
+    monkeypatch.setenv("S3_BUCKET_NAME", "test-bucket")
+    monkeypatch.setenv("ENROLMENT_JOBS_TABLE", "test-jobs")
+    monkeypatch.setenv("ENROLMENT_QUEUE_URL", "local")
+    monkeypatch.setenv("ENROLMENT_MAX_RECEIVES", "2")
+    jobs.reset_local_queue()
+    yield
+    jobs.reset_local_queue()
+
+
+@pytest.fixture
+def tables():
+    """Separate mocks for the passenger and jobs tables."""
+    passengers = MagicMock()
+    passengers.get_item.return_value = {}
+    job_table = MagicMock()
+    job_table.update_item.side_effect = lambda **kwargs: {
+        "Attributes": {
+            "jobId": kwargs["Key"]["jobId"],
+            **{
+                kwargs["ExpressionAttributeNames"][f"#f{i}"]: value
+                for i, value in enumerate(kwargs["ExpressionAttributeValues"].values())
+            },
+        }
+    }
+    with patch("boto3.resource") as mock_resource, patch("boto3.client") as mock_client:
+        mock_resource.return_value.Table.side_effect = lambda name: (
+            job_table if name == "test-jobs" else passengers
+        )
+        mock_client.return_value.index_faces.return_value = {
+            "FaceRecords": [{"Face": {"FaceId": "test-face-id"}}]
+        }
+        yield passengers, job_table, mock_client.return_value
+
+
+@pytest.fixture
+def image():
+    path = os.path.join(os.path.dirname(__file__), "images", "test_fake_person.jpg")
+    with open(path, "rb") as f:
+        return base64.b64encode(f.read()).decode("utf-8")
+
+
+def record(message, receive_count=1, message_id="m1"):
+    return {
+        "messageId": message_id,
+        "body": json.dumps(message),
+        "attributes": {"ApproximateReceiveCount": str(receive_count)},
+    }
+
+
+def job_message(**overrides):
+    return {
+        "jobId": "job-1",
+        "userId": "test-user-id",
+        "imageHashes": ["a" * 64],
+        "passengerData": {"name": "fake person"},
+        **overrides,
+    }
+
+
+def statuses(job_table):
+    return [
+        call.kwargs["ExpressionAttributeValues"][":v0"]
+        for call in job_table.update_item.call_args_list
+    ]
+
+
+def test_submit_job_stages_photos_and_queues(mock_environment, tables, image):
+    passengers, job_table, aws_client = tables
+    event = {
+        "resource": "/index/jobs",
+        "httpMethod": "POST",
+        "body": json.dumps(
+            {"userId": "test-user-id", "images": [image, image], "passengerData": {}}
+        ),
+    }
+
+    response = face_indexing_handler(event, MagicMock())
+
+    assert response["statusCode"] == 202
+    body = json.loads(response["body"])
+    assert body["status"] == "queued"
+    # Staged once, indexed later by the worker
+    aws_client.put_object.assert_called_once()
+    aws_client.index_faces.assert_not_called()
+    job = job_table.put_item.call_args.kwargs["Item"]
+    assert job["jobId"] == body["jobId"] and job["imageCount"] == 1
+
+    (queued,) = jobs.local_queue().messages
+    message = json.loads(queued["body"])
+    assert message["jobId"] == body["jobId"]
+    assert len(message["imageHashes"]) == 1
+
+
+def test_submit_job_uses_the_passengers_shard(mock_environment, tables, image, monkeypatch):
+    monkeypatch.setenv("COLLECTION_SHARDS", json.dumps({"1": "test-collection-t1"}))
+    event = {
+        "resource": "/index/jobs",
+        "httpMethod": "POST",
+        "body": json.dumps(
+            {"userId": "test-user-id", "images": [image], "passengerData": {"terminal": "T1"}}
+        ),
+    }
+    module = "assisted_wayfinding_backend.lambda_functions.face_indexing.index"
+
+    with patch(f"{module}.Enrolment", wraps=Enrolment) as enrolment:
+        assert face_indexing_handler(event, MagicMock())["statusCode"] == 202
+
+    assert enrolment.call_args.args[3] == "test-collection-t1"
+
+
+def test_job_status(mock_environment, tables):
+    _, job_table, _ = tables
+    job_table.get_item.return_value = {"Item": {"jobId": "job-1", "status": "running"}}
+    event = {
+        "resource": "/index/jobs/{jobId}",
+        "httpMethod": "GET",
+        "pathParameters": {"jobId": "job-1"},
+    }
+
+    response = face_indexing_handler(event, MagicMock())
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["status"] == "running"
+
+    job_table.get_item.return_value = {}
+    assert face_indexing_handler(event, MagicMock())["statusCode"] == 404
+
+
+def test_worker_indexes_and_commits(mock_environment, tables):
+    passengers, job_table, aws_client = tables
+
+    response = handler({"Records": [record(job_message())]}, MagicMock())
+
+    assert response == {"batchItemFailures": []}
+    assert aws_client.index_faces.call_args.kwargs["Image"]["S3Object"]["Name"] == (
+        f"user_photos/test-user-id_{'a' * 64}.jpg"
+    )
+    assert passengers.put_item.call_args.kwargs["Item"]["faceIds"] == ["test-face-id"]
+    assert statuses(job_table) == ["running", "succeeded"]
+
+
+def test_worker_retries_conflicts_then_fails(mock_environment, tables):
+    passengers, job_table, aws_client = tables
+    passengers.put_item.side_effect = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "conflict"}},
+        "PutItem",
+    )
+
+    first = handler({"Records": [record(job_message(), receive_count=1)]}, MagicMock())
+    assert first == {"batchItemFailures": [{"itemIdentifier": "m1"}]}
+    assert statuses(job_table) == ["running", "queued"]
+    # The faces indexed by the losing attempt are released
+    aws_client.delete_faces.assert_called_once_with(
+        CollectionId="test-collection", FaceIds=["test-face-id"]
+    )
+
+    aws_client.delete_object.assert_not_called()
+
+    # The record that won keeps its photo; the job's other photo goes
+    kept = f"user_photos/test-user-id_{'b' * 64}.jpg"
+    passengers.get_item.return_value = {
+        "Item": {
+            "userId": "test-user-id",
+            "imageUrls": [f"https://test-bucket.s3.amazonaws.com/{kept}"],
+        }
+    }
+    message = job_message(imageHashes=["a" * 64, "b" * 64])
+    last = handler({"Records": [record(message, receive_count=2)]}, MagicMock())
+    assert last == {"batchItemFailures": []}
+    assert statuses(job_table)[-1] == "failed"
+    aws_client.delete_object.assert_called_once_with(
+        Bucket="test-bucket", Key=f"user_photos/test-user-id_{'a' * 64}.jpg"
+    )
+
+
+def test_worker_does_not_retry_client_errors(mock_environment, tables):
+    _, job_table, aws_client = tables
+    aws_client.index_faces.return_value = {"FaceRecords": []}
+
+    response = handler({"Records": [record(job_message())]}, MagicMock())
+
+    assert response == {"batchItemFailures": []}
+    assert statuses(job_table) == ["running", "failed"]
+    final = job_table.update_item.call_args.kwargs["ExpressionAttributeValues"]
+    assert "No faces detected" in final[":v3"]
+
+
+def test_worker_batch_reports_only_failed_records(mock_environment, tables, monkeypatch):
+    monkeypatch.setenv("REKOGNITION_MAX_ATTEMPTS", "2")
+    passengers, job_table, aws_client = tables
+    throttled = ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "IndexFaces"
+    )
+    # Job 2 is still throttled after the gateway's retry
+    aws_client.index_faces.side_effect = [
+        {"FaceRecords": [{"Face": {"FaceId": "face-1"}}]},
+        throttled,
+        throttled,
+    ]
+    records = [
+        record(job_message(jobId="job-1"), message_id="m1"),
+        record(job_message(jobId="job-2"), message_id="m2"),
+        {"messageId": "m3", "body": "not json"},
+    ]
+
+    response = handler({"Records": records}, MagicMock())
+
+    assert response == {"batchItemFailures": [{"itemIdentifier": "m2"}]}
+    assert aws_client.index_faces.call_count == 3
+
+
+def test_local_queue_redelivers_then_dead_letters():
+    queue = jobs.LocalQueue(max_receives=2)
+    queue.send({"jobId": "job-1"})
+    queue.send({"jobId": "job-2"})
+    seen = []
+
+    def consumer(event, context):
+        seen.extend(json.loads(r["body"])["jobId"] for r in event["Records"])
+        return {
+            "batchItemFailures": [
+                {"itemIdentifier": r["messageId"]}
+                for r in event["Records"]
+                if json.loads(r["body"])["jobId"] == "job-2"
+            ]
+        }
+
+    assert queue.drain(consumer) == 3
+    assert seen == ["job-1", "job-2", "job-2"]
+    assert [json.loads(m["body"])["jobId"] for m in queue.dead_letters] == ["job-2"]
@@ -1,6 +1,8 @@
 import base64
+import hashlib
 import json
 import os
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -109,6 +111,9 @@ def test_face_indexing_no_faces_detected(
         "No faces detected in the provided images"
         in json.loads(response["body"])["error"]
     )
+    # The photo staged for the attempt is not left behind
+    staged = mock_rekognition.put_object.call_args.kwargs["Key"]
+    mock_rekognition.delete_object.assert_called_once_with(Bucket="test-bucket", Key=staged)
 
 
 def test_face_indexing_missing_env_vars(mock_context, sample_event):
@@ -203,3 +208,262 @@ def test_face_indexing_unexpected_error(
 
     assert response["statusCode"] == 500
     assert "An unexpected error occurred" in json.loads(response["body"])["error"]
+
+
+def _enrolled_item(test_images, face_id="old-face-id", **extra):
+    image_bytes = base64.b64decode(test_images["fake_person_image"])
+    content_hash = hashlib.sha256(image_bytes).hexdigest()
+    image_url = (
+        f"https://test-bucket.s3.amazonaws.com/user_photos/test-user-id_{content_hash}.jpg"
+    )
+    return {
+        "userId": "test-user-id",
+        "faceIds": [face_id],
+        "imageUrls": [image_url],
+        "enrolledImages": {content_hash: {"faceId": face_id, "imageUrl": image_url}},
+        "recordVersion": 3,
+        "rekognition_collection_id": "test-collection",
+        "name": "fake person",
+        "passengerId": "P12345",
+        # Written by earlier enrolments for manual lookup
+        "nameTokens": ["fake", "person"],
+        "namePhonetic": ["F200", "P625"],
+        "expiresAt": 1723700000,
+        **extra,
+    }
+
+
+def test_face_indexing_unchanged_reenrolment_is_skipped(
+    mock_environment, mock_context, sample_event, test_images, mock_aws_clients
+):
+    mock_resource, mock_client = mock_aws_clients
+    mock_table = MagicMock()
+    mock_resource.return_value.Table.return_value = mock_table
+    mock_table.get_item.return_value = {"Item": _enrolled_item(test_images)}
+    mock_aws = mock_client.return_value
+
+    response = handler(sample_event, mock_context)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["faceIds"] == ["old-face-id"]
+    mock_aws.put_object.assert_not_called()
+    mock_aws.index_faces.assert_not_called()
+    mock_aws.delete_faces.assert_not_called()
+    mock_table.put_item.assert_not_called()
+
+
+def test_face_indexing_stamps_expiry_on_records_without_one(
+    mock_environment, mock_context, sample_event, test_images, mock_aws_clients
+):
+    mock_resource, mock_client = mock_aws_clients
+    mock_table = MagicMock()
+    mock_resource.return_value.Table.return_value = mock_table
+    item = _enrolled_item(test_images)
+    del item["expiresAt"]
+    mock_table.get_item.return_value = {"Item": item}
+
+    response = handler(sample_event, mock_context)
+
+    assert response["statusCode"] == 200
+    mock_client.return_value.index_faces.assert_not_called()
+    # No flight date: expires after the undated retention period
+    assert mock_table.put_item.call_args.kwargs["Item"]["expiresAt"] > time.time()
+
+
+@pytest.mark.parametrize("days_ahead, hot", [(0, True), (30, False)])
+def test_face_indexing_adds_travellers_departing_soon_to_hot_collection(
+    mock_environment, monkeypatch, mock_context, test_images, mock_aws_clients, days_ahead, hot
+):
+    monkeypatch.setenv("HOT_COLLECTION_ID", "test-collection-hot")
+    monkeypatch.setenv("HOT_WINDOW_HOURS", "48")
+    mock_resource, mock_client = mock_aws_clients
+    mock_table = mock_resource.return_value.Table.return_value
+    mock_table.get_item.return_value = {}
+    mock_rekognition = mock_client.return_value
+    mock_rekognition.index_faces.return_value = {
+        "FaceRecords": [{"Face": {"FaceId": "test-face-id"}}]
+    }
+    scheduled_date = time.strftime("%Y-%m-%d", time.gmtime(time.time() + days_ahead * 86400))
+    event = {
+        "body": json.dumps(
+            {
+                "userId": "test-user-id",
+                "images": [test_images["fake_person_image"]],
+                "passengerData": {"name": "fake person", "scheduled_date": scheduled_date},
+            }
+        )
+    }
+
+    response = handler(event, mock_context)
+
+    assert response["statusCode"] == 200
+    item = mock_table.put_item.call_args.kwargs["Item"]
+    assert item["departureDate"] == scheduled_date
+    collections = [call.kwargs["CollectionId"] for call in mock_rekognition.index_faces.call_args_list]
+    expected = ["test-collection", "test-collection-hot"] if hot else ["test-collection"]
+    assert collections == expected
+    if hot:
+        hot_call = mock_rekognition.index_faces.call_args_list[1].kwargs
+        assert hot_call["ExternalImageId"].startswith("test-user-id:")
+        assert hot_call["Image"]["S3Object"]["Bucket"] == "test-bucket"
+
+
+def test_face_indexing_reenrolment_updates_data_without_reindexing(
+    mock_environment, mock_context, sample_event, test_images, mock_aws_clients
+):
+    mock_resource, mock_client = mock_aws_clients
+    mock_table = MagicMock()
+    mock_resource.return_value.Table.return_value = mock_table
+    mock_table.get_item.return_value = {
+        "Item": _enrolled_item(test_images, name="old name")
+    }
+    mock_aws = mock_client.return_value
+
+    response = handler(sample_event, mock_context)
+
+    assert response["statusCode"] == 200
+    mock_aws.index_faces.assert_not_called()
+    kwargs = mock_table.put_item.call_args.kwargs
+    assert kwargs["Item"]["name"] == "fake person"
+    assert kwargs["Item"]["faceIds"] == ["old-face-id"]
+    assert kwargs["Item"]["recordVersion"] == 4
+    assert kwargs["Item"]["nameTokens"] == ["fake", "person"]
+    assert kwargs["ConditionExpression"] == "recordVersion = :version"
+    assert kwargs["ExpressionAttributeValues"] == {":version": 3}
+
+
+def test_face_indexing_reenrolment_replaces_superseded_faces(
+    mock_environment, mock_context, test_images, mock_aws_clients
+):
+    mock_resource, mock_client = mock_aws_clients
+    mock_table = MagicMock()
+    mock_resource.return_value.Table.return_value = mock_table
+    mock_table.get_item.return_value = {"Item": _enrolled_item(test_images)}
+    mock_aws = mock_client.return_value
+    mock_aws.index_faces.return_value = {
+        "FaceRecords": [{"Face": {"FaceId": "new-face-id"}}]
+    }
+
+    event = {
+        "body": json.dumps(
+            {
+                "userId": "test-user-id",
+                "images": [test_images["no_face_image"]],
+                "passengerData": {"name": "fake person", "passengerId": "P12345"},
+            }
+        )
+    }
+
+    response = handler(event, mock_context)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["faceIds"] == ["new-face-id"]
+    assert body["removedFaceIds"] == ["old-face-id"]
+    mock_aws.delete_faces.assert_called_once_with(
+        CollectionId="test-collection", FaceIds=["old-face-id"]
+    )
+    mock_aws.delete_object.assert_called_once()
+
+
+def test_face_indexing_moves_faces_to_new_terminal_collection(
+    mock_environment, monkeypatch, mock_context, test_images, mock_aws_clients
+):
+    monkeypatch.setenv("COLLECTION_SHARDS", json.dumps({"1": "test-collection-t1"}))
+    mock_resource, mock_client = mock_aws_clients
+    mock_table = mock_resource.return_value.Table.return_value
+    mock_table.get_item.return_value = {"Item": _enrolled_item(test_images)}
+    mock_aws = mock_client.return_value
+    mock_aws.index_faces.return_value = {
+        "FaceRecords": [{"Face": {"FaceId": "t1-face-id"}}]
+    }
+    event = {
+        "body": json.dumps(
+            {
+                "userId": "test-user-id",
+                "images": [test_images["fake_person_image"]],
+                "passengerData": {"name": "fake person", "passengerId": "P12345", "terminal": "T1"},
+            }
+        )
+    }
+
+    response = handler(event, mock_context)
+
+    assert response["statusCode"] == 200
+    # The same photo, indexed again in the terminal's collection
+    assert mock_aws.index_faces.call_args.kwargs["CollectionId"] == "test-collection-t1"
+    item = mock_table.put_item.call_args.kwargs["Item"]
+    assert item["rekognition_collection_id"] == "test-collection-t1"
+    assert item["faceIds"] == ["t1-face-id"]
+    mock_aws.delete_faces.assert_called_once_with(
+        CollectionId="test-collection", FaceIds=["old-face-id"]
+    )
+    mock_aws.delete_object.assert_not_called()
+
+
+def test_face_indexing_legacy_record_is_fully_replaced(
+    mock_environment, mock_context, sample_event, mock_aws_clients
+):
+    mock_resource, mock_client = mock_aws_clients
+    mock_table = MagicMock()
+    mock_resource.return_value.Table.return_value = mock_table
+    mock_table.get_item.return_value = {
+        "Item": {
+            "userId": "test-user-id",
+            "faceIds": ["legacy-face-id"],
+            "imageUrls": [
+                "https://test-bucket.s3.amazonaws.com/user_photos/test-user-id_face_0.jpg"
+            ],
+        }
+    }
+    mock_aws = mock_client.return_value
+    mock_aws.index_faces.return_value = {
+        "FaceRecords": [{"Face": {"FaceId": "new-face-id"}}]
+    }
+
+    response = handler(sample_event, mock_context)
+
+    assert response["statusCode"] == 200
+    assert "attribute_not_exists(recordVersion)" in (
+        mock_table.put_item.call_args.kwargs["ConditionExpression"]
+    )
+    mock_aws.delete_faces.assert_called_once_with(
+        CollectionId="test-collection", FaceIds=["legacy-face-id"]
+    )
+    mock_aws.delete_object.assert_called_once_with(
+        Bucket="test-bucket", Key="user_photos/test-user-id_face_0.jpg"
+    )
+
+
+def test_face_indexing_concurrent_enrolment_conflict(
+    mock_environment, mock_context, sample_event, mock_aws_clients
+):
+    mock_resource, mock_client = mock_aws_clients
+    mock_table = MagicMock()
+    mock_resource.return_value.Table.return_value = mock_table
+    mock_aws = mock_client.return_value
+    mock_aws.index_faces.return_value = {
+        "FaceRecords": [{"Face": {"FaceId": "test-face-id"}}]
+    }
+    mock_table.put_item.side_effect = ClientError(
+        {
+            "Error": {
+                "Code": "ConditionalCheckFailedException",
+                "Message": "The conditional request failed",
+            }
+        },
+        "PutItem",
+    )
+
+    response = handler(sample_event, mock_context)
+
+    assert response["statusCode"] == 409
+    assert (
+        mock_table.put_item.call_args.kwargs["ConditionExpression"]
+        == "attribute_not_exists(userId)"
+    )
+    # The faces indexed by the losing request must not be orphaned
+    mock_aws.delete_faces.assert_called_once_with(
+        CollectionId="test-collection", FaceIds=["test-face-id"]
+    )
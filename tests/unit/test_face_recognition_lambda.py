@@ -170,6 +170,24 @@ def test_face_recognition_dynamodb_error(
     assert "Table not found" in json.loads(response["body"])["error"]
 
 
+def test_face_recognition_sustained_throttling(
+    mock_environment, mock_boto3_clients, mock_context, test_images, monkeypatch
+):
+    """Throttling that outlasts the gateway's retries is a 503, not a 500."""
+    monkeypatch.setenv("REKOGNITION_MAX_ATTEMPTS", "2")
+    _, mock_client = mock_boto3_clients
+    mock_client.return_value.search_faces_by_image.side_effect = ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+        "SearchFacesByImage",
+    )
+
+    event = {"body": json.dumps({"image": test_images["fake_person_image"]})}
+    response = recognition_handler(event, mock_context)
+
+    assert response["statusCode"] == 503
+    assert mock_client.return_value.search_faces_by_image.call_count == 2
+
+
 def test_face_recognition_missing_env_vars():
     """Test behavior when environment variables are missing."""
     with patch.dict("os.environ", {}, clear=True):
@@ -201,3 +219,247 @@ def test_face_recognition_invalid_json(mock_environment, mock_context):
 
     assert response["statusCode"] == 400
     assert "Invalid JSON in request body" in json.loads(response["body"])["error"]
+
+
+def tier_hits(output):
+    """The tier hit metrics on the invocation's single metrics line."""
+    (record,) = [json.loads(line) for line in output.splitlines() if '"_aws"' in line]
+    return {name: value for name, value in record.items() if name.endswith("CollectionHit")}
+
+
+def search_results(*face_ids):
+    """One SearchFacesByImage response per search, a miss for None."""
+    return [
+        {
+            "FaceMatches": [
+                {"Face": {"FaceId": face_id, "ExternalImageId": "P12345"}, "Similarity": 99.0}
+            ]
+            if face_id
+            else []
+        }
+        for face_id in face_ids
+    ]
+
+
+def test_face_recognition_hot_collection_hit(
+    mock_environment, monkeypatch, mock_boto3_clients, mock_context, test_images, capsys
+):
+    monkeypatch.setenv("HOT_COLLECTION_ID", "test-collection-hot")
+    mock_resource, mock_client = mock_boto3_clients
+    mock_table = mock_resource.return_value.Table.return_value
+    mock_rekognition = mock_client.return_value
+    mock_rekognition.search_faces_by_image.side_effect = search_results("hot-face-id")
+    mock_table.get_item.return_value = {"Item": {"userId": "P12345", "name": "fake person"}}
+
+    event = {"body": json.dumps({"image": test_images["fake_person_image"]})}
+    response = recognition_handler(event, mock_context)
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["passengerData"]["name"] == "fake person"
+    search = mock_rekognition.search_faces_by_image.call_args.kwargs
+    assert search["CollectionId"] == "test-collection-hot"
+    # Resolved by the user ID on the hot face, without scanning
+    mock_table.get_item.assert_called_once_with(Key={"userId": "P12345"})
+    mock_table.scan.assert_not_called()
+
+    assert tier_hits(capsys.readouterr().out) == {"HotCollectionHit": 1}
+
+
+def test_face_recognition_falls_back_to_full_collection(
+    mock_environment, monkeypatch, mock_boto3_clients, mock_context, test_images, capsys
+):
+    monkeypatch.setenv("HOT_COLLECTION_ID", "test-collection-hot")
+    mock_resource, mock_client = mock_boto3_clients
+    mock_table = mock_resource.return_value.Table.return_value
+    mock_rekognition = mock_client.return_value
+    mock_rekognition.search_faces_by_image.side_effect = search_results(None, "test-face-id")
+    mock_table.scan.return_value = {
+        "Items": [{"userId": "P12345", "name": "fake person", "faceIds": ["test-face-id"]}]
+    }
+
+    event = {"body": json.dumps({"image": test_images["fake_person_image"]})}
+    response = recognition_handler(event, mock_context)
+
+    assert response["statusCode"] == 200
+    assert [
+        call.kwargs["CollectionId"]
+        for call in mock_rekognition.search_faces_by_image.call_args_list
+    ] == ["test-collection-hot", "test-collection"]
+    mock_table.get_item.assert_not_called()
+
+    output = capsys.readouterr().out
+    assert tier_hits(output) == {"HotCollectionHit": 0, "FullCollectionHit": 1}
+    # Per-tier latency in the stage timings
+    timings = [json.loads(line) for line in output.splitlines() if '"rekognition_search_hot"' in line]
+    assert timings and "rekognition_search_full" in timings[0]
+
+
+def test_face_recognition_skips_missing_hot_collection(
+    mock_environment, monkeypatch, mock_boto3_clients, mock_context, test_images
+):
+    monkeypatch.setenv("HOT_COLLECTION_ID", "test-collection-hot")
+    mock_resource, mock_client = mock_boto3_clients
+    mock_rekognition = mock_client.return_value
+    mock_rekognition.search_faces_by_image.side_effect = [
+        ClientError({"Error": {"Code": "ResourceNotFoundException"}}, "SearchFacesByImage"),
+        {"FaceMatches": []},
+    ]
+
+    event = {"body": json.dumps({"image": test_images["fake_person_image"]})}
+    response = recognition_handler(event, mock_context)
+
+    assert response["statusCode"] == 404
+    assert mock_rekognition.search_faces_by_image.call_count == 2
+
+
+@pytest.fixture
+def sharded_environment(mock_environment, monkeypatch):
+    monkeypatch.setenv(
+        "COLLECTION_SHARDS",
+        json.dumps({"1": "test-collection-t1", "3": "test-collection-t3"}),
+    )
+
+
+def search_by_collection(matches):
+    """Answer SearchFacesByImage per collection, a miss for the others."""
+
+    def search(**kwargs):
+        face_id = matches.get(kwargs["CollectionId"])
+        return search_results(face_id)[0]
+
+    return search
+
+
+def test_face_recognition_searches_kiosk_terminal(
+    sharded_environment, mock_boto3_clients, mock_context, test_images, capsys
+):
+    mock_resource, mock_client = mock_boto3_clients
+    mock_table = mock_resource.return_value.Table.return_value
+    mock_rekognition = mock_client.return_value
+    mock_rekognition.search_faces_by_image.side_effect = search_by_collection(
+        {"test-collection-t3": "t3-face-id"}
+    )
+    mock_table.scan.return_value = {"Items": [{"userId": "P12345", "name": "fake person"}]}
+
+    event = {
+        "body": json.dumps(
+            {"image": test_images["fake_person_image"], "location": {"terminal": "Terminal 3"}}
+        )
+    }
+    response = recognition_handler(event, mock_context)
+
+    assert response["statusCode"] == 200
+    assert [
+        call.kwargs["CollectionId"]
+        for call in mock_rekognition.search_faces_by_image.call_args_list
+    ] == ["test-collection-t3"]
+    assert tier_hits(capsys.readouterr().out) == {"ShardCollectionHit": 1}
+
+
+def test_face_recognition_kiosk_falls_back_to_default_collection(
+    sharded_environment, mock_boto3_clients, mock_context, test_images
+):
+    mock_resource, mock_client = mock_boto3_clients
+    mock_rekognition = mock_client.return_value
+    mock_rekognition.search_faces_by_image.side_effect = search_by_collection({})
+
+    event = {
+        "body": json.dumps({"image": test_images["fake_person_image"], "location": {"terminal": "T1"}})
+    }
+    response = recognition_handler(event, mock_context)
+
+    assert response["statusCode"] == 404
+    # Never the other terminal's shard
+    assert [
+        call.kwargs["CollectionId"]
+        for call in mock_rekognition.search_faces_by_image.call_args_list
+    ] == ["test-collection-t1", "test-collection"]
+
+
+@pytest.mark.parametrize(
+    "request_fields",
+    [{"transfer": True, "location": {"terminal": "1"}}, {}, {"location": {"terminal": "9"}}],
+    ids=["transfer", "no-location", "unknown-terminal"],
+)
+def test_face_recognition_searches_all_shards_in_parallel(
+    sharded_environment, mock_boto3_clients, mock_context, test_images, request_fields
+):
+    mock_resource, mock_client = mock_boto3_clients
+    mock_table = mock_resource.return_value.Table.return_value
+    mock_rekognition = mock_client.return_value
+    mock_rekognition.search_faces_by_image.side_effect = search_by_collection(
+        {"test-collection-t3": "t3-face-id"}
+    )
+    mock_table.scan.return_value = {"Items": [{"userId": "P12345", "name": "fake person"}]}
+
+    event = {"body": json.dumps({"image": test_images["fake_person_image"], **request_fields})}
+    response = recognition_handler(event, mock_context)
+
+    assert response["statusCode"] == 200
+    assert sorted(
+        call.kwargs["CollectionId"]
+        for call in mock_rekognition.search_faces_by_image.call_args_list
+    ) == ["test-collection", "test-collection-t1", "test-collection-t3"]
+    condition = mock_table.scan.call_args.kwargs["FilterExpression"]
+    assert condition.get_expression()["values"][1] == "t3-face-id"
+
+
+def test_face_recognition_hot_match_from_another_terminal(
+    sharded_environment, monkeypatch, mock_boto3_clients, mock_context, test_images, capsys
+):
+    monkeypatch.setenv("HOT_COLLECTION_ID", "test-collection-hot")
+    mock_resource, mock_client = mock_boto3_clients
+    mock_table = mock_resource.return_value.Table.return_value
+    mock_rekognition = mock_client.return_value
+    mock_rekognition.search_faces_by_image.side_effect = search_by_collection(
+        {"test-collection-hot": "hot-face-id", "test-collection-t1": "t1-face-id"}
+    )
+    mock_table.get_item.return_value = {
+        "Item": {
+            "userId": "P12345",
+            "name": "T3 passenger",
+            "rekognition_collection_id": "test-collection-t3",
+        }
+    }
+    mock_table.scan.return_value = {"Items": [{"userId": "P67890", "name": "T1 passenger"}]}
+
+    event = {
+        "body": json.dumps({"image": test_images["fake_person_image"], "location": {"terminal": "T1"}})
+    }
+    response = recognition_handler(event, mock_context)
+
+    # The departing T3 passenger is not recognized at a T1 kiosk
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["passengerData"]["name"] == "T1 passenger"
+    assert [
+        call.kwargs["CollectionId"]
+        for call in mock_rekognition.search_faces_by_image.call_args_list
+    ] == ["test-collection-hot", "test-collection-t1"]
+    assert tier_hits(capsys.readouterr().out) == {"HotCollectionHit": 0, "ShardCollectionHit": 1}
+
+
+def test_face_recognition_hot_match_from_kiosk_terminal(
+    sharded_environment, monkeypatch, mock_boto3_clients, mock_context, test_images, capsys
+):
+    monkeypatch.setenv("HOT_COLLECTION_ID", "test-collection-hot")
+    mock_resource, mock_client = mock_boto3_clients
+    mock_table = mock_resource.return_value.Table.return_value
+    mock_rekognition = mock_client.return_value
+    mock_rekognition.search_faces_by_image.side_effect = search_by_collection(
+        {"test-collection-hot": "hot-face-id"}
+    )
+    # Recorded before sharding: the collection follows from the terminal
+    mock_table.get_item.return_value = {
+        "Item": {"userId": "P12345", "name": "T1 passenger", "terminal": "Terminal 1"}
+    }
+
+    event = {
+        "body": json.dumps({"image": test_images["fake_person_image"], "location": {"terminal": "T1"}})
+    }
+    response = recognition_handler(event, mock_context)
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["passengerData"]["name"] == "T1 passenger"
+    assert mock_rekognition.search_faces_by_image.call_count == 1
+    mock_table.scan.assert_not_called()
+    assert tier_hits(capsys.readouterr().out) == {"HotCollectionHit": 1}
@@ -0,0 +1,51 @@
+import pytest
+from wayfinding_common.flights import (
+    decode_page_token,
+    encode_page_token,
+    flight_key,
+    index_attributes,
+)
+
+
+def test_flight_key_normalizes_flight_number():
+    assert flight_key("sq 0123", "2024-08-15") == "SQ123#2024-08-15"
+
+
+@pytest.mark.parametrize("scheduled_date", ["15/08/2024", "2024-8-15", "tomorrow"])
+def test_flight_key_rejects_malformed_dates(scheduled_date):
+    with pytest.raises(ValueError):
+        flight_key("SQ123", scheduled_date)
+
+
+def test_index_attributes():
+    assert index_attributes({"next_flight_id": "SQ 221", "scheduled_date": "2024-08-15"}) == {
+        "flightKey": "SQ221#2024-08-15"
+    }
+    assert index_attributes({"flightno": "TR508", "scheduled_date": "2024-08-15"}) == {
+        "flightKey": "TR508#2024-08-15"
+    }
+    # Without a usable flight and date the record stays out of the index
+    assert index_attributes({"next_flight_id": "SQ221"}) == {}
+    assert index_attributes({"next_flight_id": "SQ221", "scheduled_date": "soon"}) == {}
+
+
+def test_page_token_round_trip():
+    last_key = {"flightKey": {"S": "SQ221#2024-08-15"}, "userId": {"S": "P00042"}}
+    token = encode_page_token(last_key)
+
+    assert "=" not in token
+    assert decode_page_token(token, "SQ221#2024-08-15") == last_key
+
+
+@pytest.mark.parametrize(
+    "token",
+    [
+        "not a token",
+        encode_page_token({"flightKey": {"S": "SQ308#2024-08-15"}, "userId": {"S": "P1"}}),
+        encode_page_token({"flightKey": {"S": "SQ221#2024-08-15"}}),
+        encode_page_token(["SQ221#2024-08-15", "P1"]),
+    ],
+)
+def test_decode_page_token_rejects_other_tokens(token):
+    with pytest.raises(ValueError, match="Invalid nextToken"):
+        decode_page_token(token, "SQ221#2024-08-15")
@@ -0,0 +1,485 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from assisted_wayfinding_backend.lambda_functions.get_passenger_data.index import (
+    BATCH_GET_MAX_ATTEMPTS,
+    FIELD_PROFILES,
+    MAX_BATCH_IDS,
+    PassengerCache,
+    handler,
+    invalidate_passenger,
+    passenger_cache,
+    resolve_fields,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_passenger_cache():
+    passenger_cache.clear()
+    yield
+    passenger_cache.clear()
+
+
+@pytest.fixture
+def mock_environment(monkeypatch):
+    monkeypatch.setenv("DYNAMODB_TABLE_NAME", "test-table")
+    monkeypatch.setenv("REKOGNITION_COLLECTION_ID", "test-collection")
+
+
+@pytest.fixture
+def mock_context():
+    return MagicMock()
+
+
+@pytest.fixture
+def mock_dynamodb():
+    with patch("boto3.client") as mock_client, patch("time.sleep"):
+        yield mock_client.return_value
+
+
+def passenger_item(persona_id, **attributes):
+    """Low-level item as returned by the DynamoDB client."""
+    item = {"userId": {"S": persona_id}}
+    for name, value in attributes.items():
+        if isinstance(value, bool):
+            item[name] = {"BOOL": value}
+        elif isinstance(value, (int, float)):
+            item[name] = {"N": str(value)}
+        else:
+            item[name] = {"S": value}
+    return item
+
+
+def batch_event(body):
+    return {"resource": "/passenger/batch", "body": json.dumps(body)}
+
+
+def serve_batch_get(items, unprocessed_rounds=0):
+    """Fake batch_get_item that holds back the last key for a few rounds."""
+    calls = {"count": 0}
+
+    def batch_get_item(RequestItems):
+        calls["count"] += 1
+        request = RequestItems["test-table"]
+        keys = request["Keys"]
+        if calls["count"] <= unprocessed_rounds:
+            served, held = keys[:-1], keys[-1:]
+        else:
+            served, held = keys, []
+        response = {
+            "Responses": {
+                "test-table": [
+                    items[key["userId"]["S"]]
+                    for key in served
+                    if key["userId"]["S"] in items
+                ]
+            }
+        }
+        if held:
+            response["UnprocessedKeys"] = {"test-table": {**request, "Keys": held}}
+        return response
+
+    return batch_get_item
+
+
+def test_get_passenger_data_success(mock_environment, mock_context, mock_dynamodb):
+    mock_dynamodb.get_item.return_value = {
+        "Item": passenger_item(
+            "P12345", name="fake person", age=42, has_lounge_access=True
+        )
+    }
+
+    response = handler({"pathParameters": {"personaId": "P12345"}}, mock_context)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["message"] == "Passenger data retrieved"
+    assert body["passengerData"] == {
+        "userId": "P12345",
+        "name": "fake person",
+        "age": 42,
+        "has_lounge_access": True,
+    }
+    mock_dynamodb.get_item.assert_called_once_with(
+        TableName="test-table", Key={"userId": {"S": "P12345"}}
+    )
+
+
+def test_get_passenger_data_not_found(mock_environment, mock_context, mock_dynamodb):
+    mock_dynamodb.get_item.return_value = {}
+
+    response = handler({"pathParameters": {"personaId": "P404"}}, mock_context)
+
+    assert response["statusCode"] == 404
+
+
+def test_get_passenger_data_missing_persona_id(
+    mock_environment, mock_context, mock_dynamodb
+):
+    response = handler({"pathParameters": {}}, mock_context)
+
+    assert response["statusCode"] == 400
+    mock_dynamodb.get_item.assert_not_called()
+
+
+def test_get_passenger_data_profile_projection(
+    mock_environment, mock_context, mock_dynamodb
+):
+    mock_dynamodb.get_item.return_value = {
+        "Item": passenger_item("P12345", name="fake person", recordVersion=2)
+    }
+    event = {
+        "pathParameters": {"personaId": "P12345"},
+        "queryStringParameters": {"profile": "greeting"},
+    }
+
+    response = handler(event, mock_context)
+
+    assert response["statusCode"] == 200
+    kwargs = mock_dynamodb.get_item.call_args.kwargs
+    # The version is always read so cached entries can be validated later
+    assert sorted(kwargs["ExpressionAttributeNames"].values()) == sorted(
+        FIELD_PROFILES["greeting"] + ["recordVersion"]
+    )
+    assert kwargs["ProjectionExpression"] == ", ".join(kwargs["ExpressionAttributeNames"])
+    assert "recordVersion" not in json.loads(response["body"])["passengerData"]
+
+
+def test_get_passenger_data_invalid_field(
+    mock_environment, mock_context, mock_dynamodb
+):
+    event = {
+        "pathParameters": {"personaId": "P12345"},
+        "queryStringParameters": {"fields": "name,faceIds[0]"},
+    }
+
+    response = handler(event, mock_context)
+
+    assert response["statusCode"] == 400
+    assert "Invalid field name" in json.loads(response["body"])["error"]
+    mock_dynamodb.get_item.assert_not_called()
+
+
+def test_get_passenger_data_dynamodb_error(
+    mock_environment, mock_context, mock_dynamodb
+):
+    mock_dynamodb.get_item.side_effect = ClientError(
+        {"Error": {"Code": "ResourceNotFoundException", "Message": "Table not found"}},
+        "GetItem",
+    )
+
+    response = handler({"pathParameters": {"personaId": "P12345"}}, mock_context)
+
+    assert response["statusCode"] == 500
+    assert "Table not found" in json.loads(response["body"])["error"]
+
+
+@pytest.mark.parametrize(
+    "query_params,expected",
+    [
+        ({}, None),
+        ({"profile": "full"}, None),
+        ({"profile": "full", "fields": "name"}, None),
+        ({"fields": "name, gate,name"}, ["userId", "name", "gate"]),
+        (
+            {"profile": "greeting", "fields": "gate"},
+            FIELD_PROFILES["greeting"] + ["gate"],
+        ),
+    ],
+)
+def test_resolve_fields(query_params, expected):
+    assert resolve_fields(query_params) == expected
+
+
+def test_resolve_fields_unknown_profile():
+    with pytest.raises(ValueError):
+        resolve_fields({"profile": "everything"})
+
+
+def test_batch_returns_results_in_request_order(mock_environment, mock_context, mock_dynamodb):
+    items = {pid: passenger_item(pid, name=pid.upper()) for pid in ["a", "b", "c"]}
+    mock_dynamodb.batch_get_item.side_effect = serve_batch_get(items)
+
+    response = handler(batch_event({"personaIds": ["c", "x", "a", "c", "b"]}), mock_context)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert [p["userId"] for p in body["passengers"]] == ["c", "a", "b"]
+    assert body["passengers"][0]["name"] == "C"
+    assert body["notFound"] == ["x"]
+    assert body["unprocessed"] == []
+    mock_dynamodb.batch_get_item.assert_called_once()
+
+
+def test_batch_chunks_requests_of_100(mock_environment, mock_context, mock_dynamodb):
+    persona_ids = [f"P{i:04d}" for i in range(250)]
+    items = {pid: passenger_item(pid) for pid in persona_ids}
+    mock_dynamodb.batch_get_item.side_effect = serve_batch_get(items)
+
+    response = handler(
+        batch_event({"personaIds": persona_ids, "profile": "greeting"}), mock_context
+    )
+
+    assert response["statusCode"] == 200
+    assert len(json.loads(response["body"])["passengers"]) == 250
+    chunk_sizes = [
+        len(call.kwargs["RequestItems"]["test-table"]["Keys"])
+        for call in mock_dynamodb.batch_get_item.call_args_list
+    ]
+    assert chunk_sizes == [100, 100, 50]
+    request = mock_dynamodb.batch_get_item.call_args.kwargs["RequestItems"]["test-table"]
+    assert "ProjectionExpression" in request
+
+
+def test_batch_retries_unprocessed_keys(mock_environment, mock_context, mock_dynamodb):
+    items = {pid: passenger_item(pid) for pid in ["a", "b"]}
+    mock_dynamodb.batch_get_item.side_effect = serve_batch_get(items, unprocessed_rounds=2)
+
+    response = handler(batch_event({"personaIds": ["a", "b"]}), mock_context)
+
+    body = json.loads(response["body"])
+    assert [p["userId"] for p in body["passengers"]] == ["a", "b"]
+    assert mock_dynamodb.batch_get_item.call_count == 3
+
+
+def test_batch_reports_keys_left_unprocessed(mock_environment, mock_context, mock_dynamodb):
+    items = {pid: passenger_item(pid) for pid in ["a", "b"]}
+    mock_dynamodb.batch_get_item.side_effect = serve_batch_get(items, unprocessed_rounds=99)
+
+    response = handler(batch_event({"personaIds": ["a", "b"]}), mock_context)
+
+    body = json.loads(response["body"])
+    assert body["unprocessed"] == ["b"]
+    assert body["notFound"] == []
+    assert mock_dynamodb.batch_get_item.call_count == BATCH_GET_MAX_ATTEMPTS
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {},
+        {"personaIds": []},
+        {"personaIds": "P12345"},
+        {"personaIds": [f"P{i}" for i in range(MAX_BATCH_IDS + 1)]},
+    ],
+)
+def test_batch_rejects_invalid_requests(mock_environment, mock_context, mock_dynamodb, body):
+    response = handler(batch_event(body), mock_context)
+
+    assert response["statusCode"] == 400
+    mock_dynamodb.batch_get_item.assert_not_called()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def versioned_client(version=1, name="fake person"):
+    dynamodb = MagicMock()
+    dynamodb.get_item.side_effect = lambda **kwargs: {
+        "Item": passenger_item(
+            kwargs["Key"]["userId"]["S"], name=name, recordVersion=version
+        )
+    }
+    return dynamodb
+
+
+def test_get_passenger_data_served_from_cache(
+    mock_environment, mock_context, mock_dynamodb, capsys
+):
+    mock_dynamodb.get_item.return_value = {
+        "Item": passenger_item("P12345", name="fake person")
+    }
+    event = {"pathParameters": {"personaId": "P12345"}}
+
+    first = handler(event, mock_context)
+    second = handler(event, mock_context)
+
+    assert first["body"] == second["body"]
+    mock_dynamodb.get_item.assert_called_once()
+    # Cache counters ride on the stage timing line, one metrics line per request
+    records = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines() if '"_aws"' in line
+    ]
+    assert [record["PassengerCacheHit"] for record in records] == [0, 1]
+    assert all("total" in record for record in records)
+
+    invalidate_passenger("P12345")
+    handler(event, mock_context)
+
+    assert mock_dynamodb.get_item.call_count == 2
+
+
+def test_passenger_cache_revalidates_with_version_read():
+    clock = FakeClock()
+    cache = PassengerCache(max_entries=8, ttl=60, revalidate_after=5, clock=clock)
+    dynamodb = versioned_client()
+
+    item, hit = cache.get(dynamodb, "test-table", "P1")
+    assert hit is False
+    assert json.loads(item) == {"userId": "P1", "name": "fake person", "recordVersion": 1}
+    assert cache.get(dynamodb, "test-table", "P1")[1] is True
+    assert dynamodb.get_item.call_count == 1
+
+    clock.now = 10
+    item, hit = cache.get(dynamodb, "test-table", "P1")
+
+    assert hit is True
+    assert dynamodb.get_item.call_count == 2
+    assert dynamodb.get_item.call_args.kwargs["ExpressionAttributeNames"] == {
+        "#v": "recordVersion"
+    }
+    assert cache.hit_ratio == pytest.approx(2 / 3)
+
+
+def test_passenger_cache_refetches_stale_version():
+    clock = FakeClock()
+    cache = PassengerCache(max_entries=8, ttl=60, revalidate_after=5, clock=clock)
+    cache.get(versioned_client(version=1), "test-table", "P1")
+
+    clock.now = 10
+    item, hit = cache.get(
+        versioned_client(version=2, name="re-enrolled"), "test-table", "P1"
+    )
+
+    assert hit is False
+    assert json.loads(item)["name"] == "re-enrolled"
+    assert cache.stale == 1
+
+
+def test_passenger_cache_expires_and_bounds_entries():
+    clock = FakeClock()
+    cache = PassengerCache(max_entries=2, ttl=30, revalidate_after=30, clock=clock)
+    dynamodb = versioned_client()
+
+    for persona_id in ["P1", "P2", "P3"]:
+        cache.get(dynamodb, "test-table", persona_id)
+
+    assert len(cache) == 2
+    # Least recently used was evicted
+    assert cache.get(dynamodb, "test-table", "P1")[1] is False
+
+    clock.now = 31
+    assert cache.get(dynamodb, "test-table", "P3")[1] is False  # Past the TTL
+
+
+def test_passenger_cache_does_not_store_missing_items():
+    cache = PassengerCache(max_entries=8, ttl=60, revalidate_after=5)
+    dynamodb = MagicMock()
+    dynamodb.get_item.return_value = {}
+
+    assert cache.get(dynamodb, "test-table", "P404") == (None, False)
+    assert len(cache) == 0
+
+
+def flight_event(flight_number="sq 221", **query_params):
+    return {
+        "resource": "/flights/{flightNo}/passengers",
+        "pathParameters": {"flightNo": flight_number},
+        "queryStringParameters": query_params or None,
+    }
+
+
+@pytest.fixture
+def flight_index(monkeypatch):
+    monkeypatch.setenv("FLIGHT_INDEX_NAME", "flight-index")
+    projected = [field for field in FIELD_PROFILES["boarding"] if field != "userId"]
+    monkeypatch.setenv("FLIGHT_INDEX_ATTRIBUTES", ",".join(projected))
+
+
+def test_flight_listing_queries_the_flight_partition(
+    mock_environment, flight_index, mock_context, mock_dynamodb
+):
+    last_key = {"flightKey": {"S": "SQ221#2024-08-15"}, "userId": {"S": "P2"}}
+    mock_dynamodb.query.return_value = {
+        "Items": [passenger_item("P1", name="A"), passenger_item("P2", name="B")],
+        "Count": 2,
+        "LastEvaluatedKey": last_key,
+    }
+
+    response = handler(flight_event(date="2024-08-15", limit="2"), mock_context)
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["flightNo"] == "SQ221"
+    assert body["count"] == 2
+    assert [p["userId"] for p in body["passengers"]] == ["P1", "P2"]
+
+    query = mock_dynamodb.query.call_args.kwargs
+    assert query["IndexName"] == "flight-index"
+    assert query["Limit"] == 2
+    assert query["ExpressionAttributeValues"] == {":key": {"S": "SQ221#2024-08-15"}}
+    # The boarding profile by default, all of it projected by the index
+    assert sorted(query["ExpressionAttributeNames"].values()) == sorted(
+        ["flightKey", *FIELD_PROFILES["boarding"]]
+    )
+    assert "ExclusiveStartKey" not in query
+
+    # The token resumes after the last key
+    handler(flight_event(date="2024-08-15", nextToken=body["nextToken"]), mock_context)
+    assert mock_dynamodb.query.call_args.kwargs["ExclusiveStartKey"] == last_key
+
+
+def test_flight_listing_last_page_has_no_token(
+    mock_environment, flight_index, mock_context, mock_dynamodb
+):
+    mock_dynamodb.query.return_value = {"Items": [], "Count": 0}
+
+    body = json.loads(handler(flight_event(date="2024-08-15"), mock_context)["body"])
+
+    assert body["passengers"] == []
+    assert body["nextToken"] is None
+
+
+@pytest.mark.parametrize(
+    "query_params",
+    [
+        {},
+        {"date": "15/08/2024"},
+        {"date": "2024-08-15", "limit": "0"},
+        {"date": "2024-08-15", "limit": "many"},
+        {"date": "2024-08-15", "nextToken": "bogus"},
+        # Not projected into the index
+        {"date": "2024-08-15", "fields": "name,faceIds"},
+    ],
+)
+def test_flight_listing_rejects_invalid_requests(
+    mock_environment, flight_index, mock_context, mock_dynamodb, query_params
+):
+    response = handler(flight_event(**query_params), mock_context)
+
+    assert response["statusCode"] == 400
+    mock_dynamodb.query.assert_not_called()
+
+
+def test_flight_listing_rejects_tokens_from_another_flight(
+    mock_environment, flight_index, mock_context, mock_dynamodb
+):
+    mock_dynamodb.query.return_value = {
+        "Items": [],
+        "LastEvaluatedKey": {"flightKey": {"S": "SQ221#2024-08-15"}, "userId": {"S": "P2"}},
+    }
+    token = json.loads(handler(flight_event(date="2024-08-15"), mock_context)["body"])["nextToken"]
+
+    response = handler(flight_event("SQ308", date="2024-08-15", nextToken=token), mock_context)
+
+    assert response["statusCode"] == 400
+
+
+def test_flight_listing_unavailable_without_its_index(
+    mock_environment, flight_index, monkeypatch, mock_context, mock_dynamodb
+):
+    monkeypatch.setenv("FLIGHT_INDEX_NAME", "")
+
+    response = handler(flight_event(date="2024-08-15"), mock_context)
+
+    assert response["statusCode"] == 503
+    mock_dynamodb.query.assert_not_called()
+    mock_dynamodb.scan.assert_not_called()
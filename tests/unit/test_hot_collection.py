@@ -0,0 +1,154 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+from wayfinding_common.hot_collection import HotCollection, hot_user_id, photo_tag
+from wayfinding_common.retention import RetentionPolicy
+
+# 2024-08-15 22:00 in Singapore (UTC+8)
+NOW = datetime(2024, 8, 15, 14, 0, tzinfo=timezone.utc).timestamp()
+HOUR = 3600
+
+
+def photo(user_id):
+    return f"https://test-bucket.s3.amazonaws.com/user_photos/{user_id}_abc.jpg"
+
+
+def hot_collection():
+    return HotCollection("hot", window_hours=6, hours_after_departure=2, clock=lambda: NOW)
+
+
+def policy():
+    return RetentionPolicy(utc_offset_minutes=480)
+
+
+def test_departure_attributes_use_the_local_date():
+    attributes = policy().departure_attributes(
+        {"scheduled_date": "2024-08-16", "flight_time": "01:30"}
+    )
+
+    assert attributes == {
+        "departureDate": "2024-08-16",
+        "departureAt": int(datetime(2024, 8, 15, 17, 30, tzinfo=timezone.utc).timestamp()),
+    }
+    assert policy().departure_attributes({}) == {}
+
+
+def test_includes_departures_inside_the_window():
+    hot = hot_collection()
+
+    assert hot.includes(NOW + 5 * HOUR)
+    assert hot.includes(NOW - 1 * HOUR)
+    assert not hot.includes(NOW + 7 * HOUR)
+    assert not hot.includes(NOW - 3 * HOUR)
+    assert not hot.includes(None)
+
+
+def test_due_queries_each_local_date_in_the_window():
+    table = MagicMock()
+    table.query.side_effect = [
+        {"Items": [{"userId": "P1", "imageUrls": [photo("P1")]}], "LastEvaluatedKey": {"k": 1}},
+        {"Items": [{"userId": "P2", "imageUrls": [photo("P2")]}]},
+        {"Items": [{"userId": "P3"}]},
+    ]
+
+    due = hot_collection().due(table, policy())
+
+    # The window runs from 20:00 on the 15th to 04:00 on the 16th, local time
+    assert due == {"P1": [photo("P1")], "P2": [photo("P2")], "P3": []}
+    assert table.query.call_count == 3
+    assert table.query.call_args_list[1].kwargs["ExclusiveStartKey"] == {"k": 1}
+
+
+def test_rotate_adds_new_members_and_removes_departed_ones():
+    table = MagicMock()
+    table.query.return_value = {
+        "Items": [
+            {"userId": "P1", "imageUrls": [photo("P1")]},
+            {"userId": "P2", "imageUrls": [photo("P2"), "https://elsewhere/x.jpg"]},
+        ]
+    }
+    gateway = MagicMock()
+    gateway.call.return_value = {
+        "Faces": [
+            {"FaceId": "f1", "ExternalImageId": f"P1:{photo_tag(photo('P1'))}"},
+            {"FaceId": "f9", "ExternalImageId": f"P9:{photo_tag(photo('P9'))}"},
+            {"FaceId": "f10", "ExternalImageId": "P9"},
+        ]
+    }
+    gateway.index_faces.return_value = {"FaceRecords": [{"Face": {"FaceId": "f2"}}]}
+
+    stats = hot_collection().rotate(table, gateway, policy())
+
+    gateway.delete_faces.assert_called_once_with(CollectionId="hot", FaceIds=["f9", "f10"])
+    gateway.index_faces.assert_called_once_with(
+        CollectionId="hot",
+        Image={"S3Object": {"Bucket": "test-bucket", "Name": "user_photos/P2_abc.jpg"}},
+        ExternalImageId=f"P2:{photo_tag(photo('P2'))}",
+        MaxFaces=1,
+    )
+    assert stats == {
+        "members": 2,
+        "addedUsers": 1,
+        "addedFaces": 1,
+        "removedUsers": 1,
+        "removedFaces": 2,
+        "failedUsers": 0,
+    }
+
+
+def test_rotate_replaces_the_faces_of_photos_a_record_changed():
+    new_photo = photo("P1").replace("_abc", "_def")
+    table = MagicMock()
+    table.query.return_value = {"Items": [{"userId": "P1", "imageUrls": [photo("P1"), new_photo]}]}
+    gateway = MagicMock()
+    gateway.call.return_value = {
+        "Faces": [
+            # Added at enrolment from the new photo only
+            {"FaceId": "f-new", "ExternalImageId": f"P1:{photo_tag(new_photo)}"},
+            # Of a photo the re-enrolment replaced, and from before photos were tagged
+            {"FaceId": "f-old", "ExternalImageId": f"P1:{photo_tag(photo('P0'))}"},
+            {"FaceId": "f-untagged", "ExternalImageId": "P1"},
+        ]
+    }
+    gateway.index_faces.return_value = {"FaceRecords": [{"Face": {"FaceId": "f1"}}]}
+
+    stats = hot_collection().rotate(table, gateway, policy())
+
+    gateway.delete_faces.assert_called_once_with(
+        CollectionId="hot", FaceIds=["f-old", "f-untagged"]
+    )
+    gateway.index_faces.assert_called_once()
+    assert gateway.index_faces.call_args.kwargs["ExternalImageId"] == (
+        f"P1:{photo_tag(photo('P1'))}"
+    )
+    assert stats["removedUsers"] == 0 and stats["addedFaces"] == 1
+
+
+def test_hot_user_id():
+    assert hot_user_id(f"P1:{photo_tag(photo('P1'))}") == "P1"
+    assert hot_user_id("P1") == "P1"
+
+
+def test_rotate_leaves_failed_adds_for_the_next_run():
+    table = MagicMock()
+    table.query.return_value = {"Items": [{"userId": "P1", "imageUrls": [photo("P1")]}]}
+    gateway = MagicMock()
+    gateway.call.return_value = {"Faces": []}
+    gateway.index_faces.side_effect = ClientError(
+        {"Error": {"Code": "InvalidS3ObjectException"}}, "IndexFaces"
+    )
+
+    stats = hot_collection().rotate(table, gateway, policy())
+
+    assert stats["failedUsers"] == 1
+    assert stats["addedUsers"] == 0
+
+
+def test_from_environment_is_disabled_without_a_collection(monkeypatch):
+    monkeypatch.delenv("HOT_COLLECTION_ID", raising=False)
+    assert HotCollection.from_environment() is None
+
+    monkeypatch.setenv("HOT_COLLECTION_ID", "hot")
+    monkeypatch.setenv("HOT_WINDOW_HOURS", "3")
+    assert HotCollection.from_environment().window == 3 * HOUR
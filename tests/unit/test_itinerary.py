@@ -0,0 +1,111 @@
+import random
+from itertools import permutations
+
+import pytest
+from wayfinding_common import itinerary as itinerary_module
+from wayfinding_common.itinerary import plan_itinerary
+from wayfinding_common.venue import Venue
+
+
+@pytest.fixture
+def venue(venue_description):
+    return Venue(venue_description)
+
+
+def grid_venue(size, seed=0):
+    """A ``size`` x ``size`` grid of locations with random walking times."""
+    rng = random.Random(seed)
+    nodes = {
+        f"n{x}_{y}": {"name": f"{x},{y}", "floor": "1", "x": x * 10, "y": y * 10}
+        for x in range(size)
+        for y in range(size)
+    }
+    edges = []
+    for x in range(size):
+        for y in range(size):
+            for neighbour in (f"n{x + 1}_{y}", f"n{x}_{y + 1}"):
+                if neighbour in nodes:
+                    edges.append(
+                        {"from": f"n{x}_{y}", "to": neighbour, "seconds": rng.randint(5, 60)}
+                    )
+    floors = {"1": {"name": "Grid", "width": size * 10, "height": size * 10, "plan": "p.png"}}
+    return Venue({"version": "grid", "floors": floors, "nodes": nodes, "edges": edges})
+
+
+def brute_force(venue, start, stops, end):
+    def cost(order):
+        path = [start, *order, *([end] if end else [])]
+        return sum(venue.route(a, b).seconds for a, b in zip(path, path[1:]))
+
+    return min(cost(list(order)) for order in permutations(stops))
+
+
+def test_unordered_stops_are_visited_in_the_fastest_order(venue):
+    itinerary = plan_itinerary(venue, "a", ["d", "b", "c"], end=None)
+
+    assert itinerary.order == ["b", "c", "d"]
+    assert itinerary.method == "exact"
+    assert itinerary.seconds == 45
+    assert [(leg.nodes[0], leg.nodes[-1]) for leg in itinerary.legs] == [
+        ("a", "b"),
+        ("b", "c"),
+        ("c", "d"),
+    ]
+
+
+def test_ordered_stops_keep_their_order(venue):
+    itinerary = plan_itinerary(venue, "a", ["d", "b"], end="c", ordered=True)
+
+    assert itinerary.order == ["d", "b"]
+    assert itinerary.method == "ordered"
+    assert itinerary.seconds == 45 + 35 + 10
+
+
+def test_duplicates_and_endpoints_are_not_stops(venue):
+    itinerary = plan_itinerary(venue, "a", ["b", "a", "b", "d"], end="d")
+
+    assert itinerary.order == ["b"]
+
+
+@pytest.mark.parametrize("stops", [["nowhere"], ["island"]])
+def test_unknown_or_unconnected_stops_are_rejected(venue, stops):
+    with pytest.raises(ValueError):
+        plan_itinerary(venue, "a", stops, end="d")
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("with_end", [True, False])
+def test_exact_order_is_optimal(seed, with_end):
+    venue = grid_venue(5, seed)
+    rng = random.Random(seed)
+    locations = rng.sample(sorted(venue.nodes), 7)
+    start, stops, end = locations[0], locations[1:6], locations[6] if with_end else None
+
+    itinerary = plan_itinerary(venue, start, stops, end)
+
+    assert itinerary.method == "exact"
+    assert itinerary.seconds == brute_force(venue, start, stops, end)
+
+
+def test_heuristic_for_many_stops_is_close_to_optimal(monkeypatch):
+    venue = grid_venue(6, seed=3)
+    rng = random.Random(3)
+    locations = rng.sample(sorted(venue.nodes), 9)
+    start, stops, end = locations[0], locations[1:8], locations[8]
+    optimal = plan_itinerary(venue, start, stops, end).seconds
+
+    monkeypatch.setattr(itinerary_module, "EXACT_LIMIT", 3)
+    itinerary = plan_itinerary(venue, start, stops, end)
+
+    assert itinerary.method == "heuristic"
+    assert sorted(itinerary.order) == sorted(stops)
+    assert optimal <= itinerary.seconds <= optimal * 1.25
+
+
+def test_legs_reuse_the_cached_trees(venue):
+    plan_itinerary(venue, "a", ["b", "c", "d"])
+    trees = dict(venue._trees)
+
+    plan_itinerary(venue, "a", ["d", "c", "b"])
+
+    assert venue._trees == trees
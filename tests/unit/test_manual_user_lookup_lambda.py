@@ -0,0 +1,129 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+from wayfinding_common.name_index import index_attributes
+
+from assisted_wayfinding_backend.lambda_functions.manual_user_lookup.index import (
+    LEGACY_SCAN_LIMIT,
+    handler,
+)
+
+
+@pytest.fixture
+def mock_environment(monkeypatch):
+    monkeypatch.setenv("DYNAMODB_TABLE_NAME", "test-table")
+    monkeypatch.setenv("NAME_LOOKUP_INDEX", "lookup-index")
+    monkeypatch.setenv("NAME_LOOKUP_FALLBACK_SCAN", "0")
+
+
+@pytest.fixture
+def mock_table():
+    with patch("boto3.resource") as mock_resource:
+        table = MagicMock()
+        mock_resource.return_value.Table.return_value = table
+        yield table
+
+
+def passenger(user_id, name, flight="SQ123", date_of_birth="1990-01-01"):
+    data = {"name": name, "dateOfBirth": date_of_birth, "next_flight_id": flight}
+    return {"userId": user_id, **data, **index_attributes(data)}
+
+
+def lookup(name, date_of_birth="1990-01-01", flight_number="sq 0123"):
+    return handler(
+        {
+            "queryStringParameters": {
+                "name": name,
+                "dateOfBirth": date_of_birth,
+                "flightNumber": flight_number,
+            }
+        },
+        MagicMock(),
+    )
+
+
+def test_fuzzy_lookup_queries_the_flight_and_birth_date_partition(mock_environment, mock_table):
+    mock_table.query.return_value = {
+        "Items": [passenger("u1", "John Doe"), passenger("u2", "Mary Smith")]
+    }
+
+    response = lookup("jon doe")
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body["userData"]["userId"] == "u1"
+    assert "lookupKey" not in body["userData"]
+    assert body["match"]["exact"] is False
+    query = mock_table.query.call_args.kwargs
+    assert query["IndexName"] == "lookup-index"
+    assert query["KeyConditionExpression"].get_expression()["values"][1] == "SQ123#1990-01-01"
+    mock_table.scan.assert_not_called()
+
+
+def test_ambiguous_names_are_not_guessed(mock_environment, mock_table):
+    mock_table.query.return_value = {
+        "Items": [passenger("u1", "John Doe"), passenger("u2", "Joan Doe")]
+    }
+
+    assert lookup("Jon Doe")["statusCode"] == 409
+    assert json.loads(lookup("Joan Doe")["body"])["userData"]["userId"] == "u2"
+
+
+def test_no_candidates(mock_environment, mock_table):
+    mock_table.query.return_value = {"Items": []}
+
+    response = lookup("John Doe")
+
+    assert response["statusCode"] == 404
+    mock_table.scan.assert_not_called()
+
+
+def test_fallback_scan_finds_records_without_index_keys(
+    mock_environment, mock_table, monkeypatch
+):
+    monkeypatch.setenv("NAME_LOOKUP_FALLBACK_SCAN", "1")
+    mock_table.query.return_value = {"Items": []}
+    mock_table.scan.return_value = {
+        "Items": [{"userId": "legacy", "name": "John Doe", "dateOfBirth": "1990-01-01"}]
+    }
+
+    response = lookup("John Doe", flight_number="SQ123")
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["userData"]["userId"] == "legacy"
+    # One bounded page, however large the table
+    assert mock_table.scan.call_count == 1
+    assert mock_table.scan.call_args.kwargs["Limit"] == LEGACY_SCAN_LIMIT
+
+
+def test_disabled_index_looks_up_by_scan(mock_environment, mock_table, monkeypatch):
+    monkeypatch.setenv("NAME_LOOKUP_INDEX", "")
+    mock_table.scan.return_value = {
+        "Items": [{"userId": "legacy", "name": "John Doe", "dateOfBirth": "1990-01-01"}]
+    }
+
+    response = lookup("John Doe", flight_number="SQ123")
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["userData"]["userId"] == "legacy"
+    mock_table.query.assert_not_called()
+    assert mock_table.scan.call_args.kwargs["Limit"] == LEGACY_SCAN_LIMIT
+
+
+def test_missing_fields(mock_environment, mock_table):
+    assert lookup("")["statusCode"] == 400
+    assert handler({}, MagicMock())["statusCode"] == 400
+
+
+def test_dynamodb_error(mock_environment, mock_table):
+    mock_table.query.side_effect = ClientError(
+        {"Error": {"Code": "ResourceNotFoundException", "Message": "Index not found"}},
+        "Query",
+    )
+
+    response = lookup("John Doe")
+
+    assert response["statusCode"] == 500
+    assert json.loads(response["body"])["error"] == "Internal server error"
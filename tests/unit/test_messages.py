@@ -0,0 +1,90 @@
+import json
+import os
+
+import pytest
+from wayfinding_common import messages
+from wayfinding_common.messages import (
+    LOCALES,
+    MESSAGES_DIR,
+    Template,
+    catalogue,
+    compile_catalogue,
+    locale_of,
+)
+
+
+@pytest.mark.parametrize(
+    "language, locale",
+    [
+        ("zh", "zh"),
+        ("zh-CN", "zh"),
+        ("ES_mx", "es"),
+        ("Spanish", "es"),
+        ("Mandarin", "zh"),
+        ("fr", "en"),
+        ("", "en"),
+        (None, "en"),
+    ],
+)
+def test_locale_of(language, locale):
+    assert locale_of(language) == locale
+
+
+def test_template_fills_placeholders():
+    template = Template("greeting", "Hi there, {name}! Gate {gate}.")
+
+    assert template.fields == {"name", "gate"}
+    assert template.render(name="Ana", gate="B4") == "Hi there, Ana! Gate B4."
+
+
+def test_template_needs_every_placeholder():
+    with pytest.raises(KeyError):
+        Template("greeting", "Hi there, {name}!").render()
+
+
+@pytest.mark.parametrize("text", ["{0} min", "{minutes:>3} min", "{name!r}", "{}"])
+def test_template_rejects_other_placeholders(text):
+    with pytest.raises(ValueError, match="only {name} placeholders"):
+        Template("key", text)
+
+
+def test_missing_messages_fall_back_to_english():
+    english = compile_catalogue("en", {"hello": "Hello {name}", "bye": "Bye"})
+    spanish = compile_catalogue("es", {"hello": "Hola {name}"}, english)
+
+    assert spanish.render("hello", name="Ana") == "Hola Ana"
+    assert spanish.render("bye") == "Bye"
+    with pytest.raises(KeyError):
+        spanish.render("unknown")
+
+
+def test_translations_keep_the_placeholders():
+    english = compile_catalogue("en", {"hello": "Hello {name}"})
+
+    with pytest.raises(ValueError, match="hello in es has placeholders"):
+        compile_catalogue("es", {"hello": "Hola {nombre}"}, english)
+
+
+def test_catalogues_are_read_once(monkeypatch):
+    messages._load.cache_clear()
+    opened = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(os.path.basename(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", counting_open)
+    for language in ["zh", "zh-CN", "Chinese", "en", "zh"]:
+        catalogue(language).render("orchestration.greeting", name="Li")
+
+    assert sorted(opened) == ["en.json", "zh.json"]
+
+
+def test_packaged_catalogues_translate_every_message():
+    english = set(json.load(open(os.path.join(MESSAGES_DIR, "en.json"), encoding="utf-8")))
+
+    for locale in LOCALES:
+        with open(os.path.join(MESSAGES_DIR, f"{locale}.json"), encoding="utf-8") as f:
+            assert set(json.load(f)) == english
+        assert catalogue(locale).locale == locale
@@ -0,0 +1,109 @@
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+from wayfinding_common import name_index
+from wayfinding_common.name_index import best_match, index_attributes, soundex
+
+
+@pytest.mark.parametrize(
+    "token, code",
+    [
+        ("robert", "R163"),
+        ("rupert", "R163"),
+        ("ashcraft", "A261"),
+        ("tymczak", "T522"),
+        ("pfister", "P236"),
+        ("lee", "L000"),
+    ],
+)
+def test_soundex(token, code):
+    assert soundex(token) == code
+
+
+def test_index_attributes_normalize_name_flight_and_date():
+    attributes = index_attributes(
+        {"name": "José  O'Brien-Smith", "next_flight_id": "sq 0123", "dateOfBirth": "1990/01/02"}
+    )
+    assert attributes == {
+        "nameTokens": ["jose", "obrien", "smith"],
+        "namePhonetic": ["J200", "O165", "S530"],
+        "lookupKey": "SQ123#1990-01-02",
+    }
+    # No flight or date of birth: nothing to partition on
+    assert "lookupKey" not in index_attributes({"name": "Jane Doe"})
+    assert index_attributes({"dateOfBirth": "1990-01-02"}) == {}
+
+
+PASSENGERS = [
+    {"userId": "u1", "name": "John Michael Doe"},
+    {"userId": "u2", "name": "Joan Doe"},
+    {"userId": "u3", "name": "Mary Smith"},
+]
+
+
+@pytest.mark.parametrize(
+    "query, user_id",
+    [
+        ("john doe", "u1"),
+        ("DOE, John", "u1"),
+        ("Joan Doe", "u2"),
+        ("Mary Smyth", "u3"),
+        ("Marie Smith", "u3"),
+    ],
+)
+def test_best_match(query, user_id):
+    match, ambiguous = best_match(query, PASSENGERS)
+    assert match.item["userId"] == user_id
+    assert not ambiguous
+
+
+def test_close_fuzzy_matches_are_ambiguous():
+    match, ambiguous = best_match("Jon Doe", PASSENGERS)
+    assert match is not None and ambiguous
+
+
+def test_unrelated_names_do_not_match():
+    assert best_match("Bob Jones", PASSENGERS) == (None, False)
+
+
+def test_stored_tokens_are_used_and_hidden():
+    item = {"userId": "u4", "name": "ignored", **index_attributes({"name": "Wei Zhang"})}
+    match, _ = best_match("zhang wei", [item])
+    assert match.exact
+    assert name_index.public_view(item) == {"userId": "u4", "name": "ignored"}
+
+
+def test_backfill_writes_missing_index_keys():
+    table = MagicMock()
+    table.scan.return_value = {
+        "Items": [
+            {"userId": "u1", "name": "José Núñez", "next_flight_id": "sq 12",
+             "dateOfBirth": "1990/01/01"},
+            {"userId": "u2", "name": "Ann Lee", "next_flight_id": "SQ12",
+             "dateOfBirth": "1985-02-03"},
+        ]
+    }
+    table.update_item.side_effect = [
+        {},
+        ClientError(
+            {"Error": {"Code": "ConditionalCheckFailedException", "Message": "changed"}},
+            "UpdateItem",
+        ),
+    ]
+
+    assert name_index.backfill(table, segments=1) == 1
+
+    assert "attribute_not_exists(lookupKey)" in table.scan.call_args.kwargs["FilterExpression"]
+    kwargs = table.update_item.call_args_list[0].kwargs
+    assert kwargs["Key"] == {"userId": "u1"}
+    written = {
+        kwargs["ExpressionAttributeNames"][name]: kwargs["ExpressionAttributeValues"][value]
+        for name, value in (
+            assignment.split(" = ")
+            for assignment in kwargs["UpdateExpression"][len("SET "):].split(", ")
+        )
+    }
+    assert written == index_attributes(table.scan.return_value["Items"][0])
+    assert written["lookupKey"] == "SQ12#1990-01-01"
+    assert kwargs["ExpressionAttributeValues"][":name"] == "José Núñez"
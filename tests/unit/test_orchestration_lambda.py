@@ -73,3 +73,52 @@ def test_handle_request(mock_get_passenger_data, input_text, expected_output, mo
     
     response = handle_request(request)
     assert response['output']['text'] == expected_output
+
+@patch('boto3.client')
+def test_call_get_passenger_data_lambda_requests_greeting_profile(mock_boto3_client, mock_environment):
+    from assisted_wayfinding_backend.lambda_functions.orchestration.index import call_get_passenger_data_lambda
+
+    mock_lambda = mock_boto3_client.return_value
+    mock_lambda.invoke.return_value = {
+        'Payload': MagicMock(read=MagicMock(return_value=json.dumps({
+            'statusCode': 200,
+            'body': json.dumps({'passengerData': {'name': 'Test User'}})
+        })))
+    }
+
+    response = call_get_passenger_data_lambda('test-user-id')
+
+    assert response['passengerData']['name'] == 'Test User'
+    payload = json.loads(mock_lambda.invoke.call_args[1]['Payload'])
+    assert payload['pathParameters'] == {'personaId': 'test-user-id'}
+    assert payload['queryStringParameters'] == {'profile': 'greeting'}
+
+@pytest.mark.parametrize("language,greeting,assist", [
+    ("zh", "李明，您好！", "李明，您好，请问有什么可以帮您？"),
+    ("es", "¡Hola, 李明!", "Hola 李明, ¿en qué puedo ayudarle hoy?"),
+    (None, "Hi there, 李明!", "Hello 李明, how can I assist you today?"),
+])
+@patch('assisted_wayfinding_backend.lambda_functions.orchestration.index.call_get_passenger_data_lambda')
+def test_greeting_in_the_passengers_language(mock_get_passenger_data, language, greeting, assist, mock_environment):
+    from assisted_wayfinding_backend.lambda_functions.orchestration.index import handle_request
+
+    mock_get_passenger_data.return_value = {
+        'passengerData': {'name': '李明', 'language': language, 'userId': 'test-user-id'}
+    }
+
+    init = handle_request({'input': {'text': ''}, 'optionalArgs': {'kind': 'init'}})
+    reply = handle_request({'input': {'text': 'Hello'}})
+
+    assert init['output']['text'] == greeting
+    assert reply['output']['text'] == assist
+
+@patch('assisted_wayfinding_backend.lambda_functions.orchestration.index.call_get_passenger_data_lambda')
+def test_unknown_traveller_is_greeted_as_a_guest(mock_get_passenger_data, mock_environment):
+    from assisted_wayfinding_backend.lambda_functions.orchestration.index import handle_request
+
+    mock_get_passenger_data.return_value = {'passengerData': {}}
+
+    response = handle_request({'input': {'text': ''}, 'optionalArgs': {'kind': 'init'}})
+
+    assert response['output']['text'] == "Hi there, Guest!"
+    assert response['variables'] == {'language': 'en'}
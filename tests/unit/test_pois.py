@@ -0,0 +1,122 @@
+import random
+
+import pytest
+from wayfinding_common.pois import PoiIndex, poi_index
+from wayfinding_common.venue import DEFAULT_VENUE_FILE, Venue, load_venue
+
+
+def poi(poi_id, category, floor, location, **fields):
+    return {
+        "id": poi_id,
+        "name": poi_id,
+        "category": category,
+        "floor": floor,
+        "x": 0,
+        "y": 0,
+        "location": location,
+        **fields,
+    }
+
+
+@pytest.fixture
+def venue(venue_description):
+    venue_description["pois"] = [
+        poi("wc_b", "toilet", "1", "b", seconds=5),
+        poi("wc_d", "toilet", "2", "d", seconds=0),
+        poi("wc_island", "toilet", "2", "island"),
+        poi("plug_c", "charging", "1", "c", seconds=2),
+    ]
+    return Venue(venue_description)
+
+
+def grid_venue(size=20, pois=600, seed=5):
+    """One floor of walkways with POIs of a few categories scattered over it."""
+    rng = random.Random(seed)
+    nodes = {
+        f"n{x}_{y}": {"name": f"{x},{y}", "floor": "1", "x": x * 30, "y": y * 30}
+        for x in range(size)
+        for y in range(size)
+    }
+    edges = []
+    for x in range(size):
+        for y in range(size):
+            for neighbour in (f"n{x + 1}_{y}", f"n{x}_{y + 1}"):
+                if neighbour in nodes:
+                    edges.append(
+                        {"from": f"n{x}_{y}", "to": neighbour, "seconds": rng.randint(15, 60)}
+                    )
+    locations = list(nodes)
+    points = []
+    for index in range(pois):
+        location = rng.choice(locations)
+        category = rng.choice(["toilet", "charging", "water"])
+        points.append(poi(f"poi_{index}", category, "1", location, seconds=rng.randint(0, 30)))
+    return Venue(
+        {"version": "grid", "floors": {"1": {}}, "nodes": nodes, "edges": edges, "pois": points}
+    )
+
+
+def test_nearest_by_walking_time(venue):
+    nearest = PoiIndex(venue).nearest("a", "toilet", k=3)
+
+    assert [(seconds, poi["id"]) for seconds, poi in nearest] == [(15, "wc_b"), (45, "wc_d")]
+
+
+def test_nearest_on_one_floor(venue):
+    nearest = PoiIndex(venue).nearest("a", "toilet", k=3, floor="2")
+
+    assert [poi["id"] for _, poi in nearest] == ["wc_d"]
+
+
+def test_nearest_follows_live_conditions(venue):
+    index = PoiIndex(venue)
+    index.nearest("a", "toilet")
+
+    venue.set_walk("a", "b", None)
+
+    assert index.nearest("a", "toilet", k=1)[0][0] == 45
+
+
+@pytest.mark.parametrize(
+    "origin, category, message",
+    [("nowhere", "toilet", "Unknown location"), ("a", "spa", "Unknown category 'spa'")],
+)
+def test_nearest_rejects_unknown_input(venue, origin, category, message):
+    with pytest.raises(ValueError, match=message):
+        PoiIndex(venue).nearest(origin, category)
+
+
+def test_pois_must_be_reached_from_a_location(venue_description):
+    venue_description["pois"] = [poi("lost", "toilet", "1", "nowhere")]
+
+    with pytest.raises(ValueError, match="POI lost is reached from unknown location nowhere"):
+        PoiIndex(Venue(venue_description))
+
+
+@pytest.mark.parametrize("k", [1, 3, 10])
+def test_pruned_search_matches_every_poi_checked(k):
+    venue = grid_venue()
+    index = PoiIndex(venue)
+    rng = random.Random(k)
+
+    for origin in rng.sample(list(venue.nodes), 20):
+        seconds, _ = venue.tree(origin)
+        for category in ("toilet", "charging", "water"):
+            walks = {
+                poi["id"]: seconds[poi["location"]] + poi["seconds"]
+                for poi in venue.pois
+                if poi["category"] == category
+            }
+
+            nearest = index.nearest(origin, category, k)
+
+            # POIs as far as each other may come in either order
+            assert [walk for walk, _ in nearest] == sorted(walks.values())[:k]
+            assert all(walks[poi["id"]] == walk for walk, poi in nearest)
+
+
+def test_index_is_built_once_per_venue():
+    venue = load_venue(DEFAULT_VENUE_FILE)
+
+    assert poi_index(venue) is poi_index(venue)
+    assert "toilet" in poi_index(venue).categories
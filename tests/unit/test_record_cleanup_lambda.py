@@ -0,0 +1,132 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from assisted_wayfinding_backend.lambda_functions.record_cleanup.index import (
+    MAX_FACE_IDS_PER_CALL,
+    handler,
+)
+
+TTL_IDENTITY = {"type": "Service", "principalId": "dynamodb.amazonaws.com"}
+
+
+@pytest.fixture
+def mock_environment(monkeypatch):
+    monkeypatch.setenv("REKOGNITION_COLLECTION_ID", "test-collection")
+    monkeypatch.setenv("REKOGNITION_MAX_ATTEMPTS", "1")
+
+
+@pytest.fixture
+def mock_aws():
+    with patch("boto3.client") as mock_client:
+        mock_client.return_value.delete_objects.return_value = {}
+        yield mock_client.return_value
+
+
+def removal(sequence_number, user_id, face_ids, identity=TTL_IDENTITY, **old_image):
+    """A stream record of a deleted passenger record."""
+    image = {
+        "userId": {"S": user_id},
+        "faceIds": {"L": [{"S": face_id} for face_id in face_ids]},
+        "imageUrls": {
+            "L": [
+                {"S": f"https://test-bucket.s3.amazonaws.com/user_photos/{user_id}_{face_id}.jpg"}
+                for face_id in face_ids
+            ]
+        },
+        **old_image,
+    }
+    record = {
+        "eventName": "REMOVE",
+        "dynamodb": {"SequenceNumber": sequence_number, "OldImage": image},
+    }
+    if identity:
+        record["userIdentity"] = identity
+    return record
+
+
+def deleted_keys(mock_aws):
+    return [
+        entry["Key"]
+        for call in mock_aws.delete_objects.call_args_list
+        for entry in call.kwargs["Delete"]["Objects"]
+    ]
+
+
+def test_batches_faces_and_photos_of_expired_records(mock_environment, mock_aws):
+    event = {
+        "Records": [
+            removal("100", "P1", ["f1", "f2"]),
+            removal("200", "P2", ["f3"]),
+            # Other collection, as recorded on the item
+            removal("300", "P3", ["f4"], rekognition_collection_id={"S": "old-collection"}),
+        ]
+    }
+
+    assert handler(event, MagicMock()) == {"batchItemFailures": []}
+
+    calls = {
+        call.kwargs["CollectionId"]: call.kwargs["FaceIds"]
+        for call in mock_aws.delete_faces.call_args_list
+    }
+    assert calls == {"test-collection": ["f1", "f2", "f3"], "old-collection": ["f4"]}
+    mock_aws.delete_objects.assert_called_once()
+    assert mock_aws.delete_objects.call_args.kwargs["Bucket"] == "test-bucket"
+    assert deleted_keys(mock_aws) == [
+        "user_photos/P1_f1.jpg",
+        "user_photos/P1_f2.jpg",
+        "user_photos/P2_f3.jpg",
+        "user_photos/P3_f4.jpg",
+    ]
+
+
+def test_ignores_records_not_deleted_by_ttl(mock_environment, mock_aws):
+    event = {"Records": [removal("100", "P1", ["f1"], identity=None)]}
+
+    assert handler(event, MagicMock()) == {"batchItemFailures": []}
+    mock_aws.delete_faces.assert_not_called()
+    mock_aws.delete_objects.assert_not_called()
+
+
+def test_splits_face_deletes_at_the_api_limit(mock_environment, mock_aws):
+    face_ids = [f"f{i}" for i in range(MAX_FACE_IDS_PER_CALL + 1)]
+    event = {"Records": [removal("100", "P1", face_ids)]}
+
+    handler(event, MagicMock())
+
+    sizes = [len(call.kwargs["FaceIds"]) for call in mock_aws.delete_faces.call_args_list]
+    assert sizes == [MAX_FACE_IDS_PER_CALL, 1]
+    assert mock_aws.delete_objects.call_count == 5  # 1000 keys per call
+
+
+def test_reports_earliest_failed_record(mock_environment, mock_aws):
+    mock_aws.delete_objects.return_value = {
+        "Errors": [{"Key": "user_photos/P3_f3.jpg", "Code": "AccessDenied"}]
+    }
+    mock_aws.delete_faces.side_effect = [
+        ClientError({"Error": {"Code": "InternalServerError"}}, "DeleteFaces"),
+        {},
+    ]
+    event = {
+        "Records": [
+            removal("900", "P2", ["f2"], rekognition_collection_id={"S": "second"}),
+            removal("1000", "P3", ["f3"]),
+        ]
+    }
+
+    response = handler(event, MagicMock())
+
+    # The stream resumes from the earlier of the two failures
+    assert response == {"batchItemFailures": [{"itemIdentifier": "900"}]}
+
+
+def test_missing_collection_counts_as_released(mock_environment, mock_aws):
+    mock_aws.delete_faces.side_effect = ClientError(
+        {"Error": {"Code": "ResourceNotFoundException"}}, "DeleteFaces"
+    )
+
+    response = handler({"Records": [removal("100", "P1", ["f1"])]}, MagicMock())
+
+    assert response == {"batchItemFailures": []}
+    mock_aws.delete_objects.assert_called_once()
@@ -0,0 +1,221 @@
+import json
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError, ReadTimeoutError
+from wayfinding_common import rekognition
+from wayfinding_common.rekognition import (
+    RekognitionGateway,
+    RekognitionUnavailable,
+    TokenBucket,
+)
+from wayfinding_common.responses import aws_error_response
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": code}}, "SearchFacesByImage")
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def client():
+    client = MagicMock()
+    client.search_faces_by_image.return_value = {"FaceMatches": []}
+    return client
+
+
+def make_gateway(client, clock, **options):
+    return RekognitionGateway(
+        client_factory=lambda: client,
+        clock=clock,
+        sleep=clock.sleep,
+        rng=lambda: 1.0,
+        **options,
+    )
+
+
+def test_token_bucket_waits_and_adapts(clock):
+    bucket = TokenBucket(rate=10, burst=2, clock=clock)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1)
+
+    bucket.throttled()
+    assert bucket.rate == 5
+    for _ in range(20):
+        bucket.succeeded()
+    assert bucket.rate == 10
+
+
+def test_retries_throttling_with_backoff(client, clock):
+    client.search_faces_by_image.side_effect = [
+        client_error("ThrottlingException"),
+        client_error("ThrottlingException"),
+        {"FaceMatches": []},
+    ]
+    gateway = make_gateway(client, clock, base_delay=0.1)
+
+    assert gateway.search_faces_by_image(CollectionId="c") == {"FaceMatches": []}
+    assert client.search_faces_by_image.call_count == 3
+    assert gateway.stats["throttled"] == 2
+    # Full jitter with rng=1: 0.1 then 0.2 seconds
+    assert clock.now == pytest.approx(0.3)
+    assert gateway.bucket.rate < 10
+
+
+def test_does_not_retry_request_errors(client, clock):
+    client.search_faces_by_image.side_effect = client_error("InvalidImageFormatException")
+    gateway = make_gateway(client, clock)
+
+    with pytest.raises(ClientError):
+        gateway.search_faces_by_image(CollectionId="c")
+    assert client.search_faces_by_image.call_count == 1
+    assert gateway.breaker.state == "closed"
+
+
+def test_rate_limit_rejects_after_max_wait(client, clock):
+    gateway = make_gateway(client, clock, rate=1, burst=1, max_wait=0.5)
+    gateway.search_faces_by_image(CollectionId="c")
+
+    with pytest.raises(RekognitionUnavailable) as raised:
+        gateway.search_faces_by_image(CollectionId="c")
+    assert raised.value.retry_after == 1
+    assert client.search_faces_by_image.call_count == 1
+
+
+def test_circuit_opens_then_recovers(client, clock):
+    client.search_faces_by_image.side_effect = client_error("InternalServerError")
+    gateway = make_gateway(client, clock, max_attempts=1, failure_threshold=2, reset_timeout=5)
+    for _ in range(2):
+        with pytest.raises(ClientError):
+            gateway.search_faces_by_image(CollectionId="c")
+
+    with pytest.raises(RekognitionUnavailable) as raised:
+        gateway.search_faces_by_image(CollectionId="c")
+    assert raised.value.retry_after == 5
+    assert client.search_faces_by_image.call_count == 2
+
+    clock.now += 5
+    client.search_faces_by_image.side_effect = None
+    assert gateway.search_faces_by_image(CollectionId="c") == {"FaceMatches": []}
+    assert gateway.breaker.state == "closed"
+
+
+def open_circuit(client, clock, gateway):
+    client.search_faces_by_image.side_effect = client_error("InternalServerError")
+    with pytest.raises(ClientError):
+        gateway.search_faces_by_image(CollectionId="c")
+    assert gateway.breaker.state == "open"
+    clock.now += 5
+
+
+def test_throttled_trial_reopens_the_circuit(client, clock):
+    gateway = make_gateway(client, clock, max_attempts=1, failure_threshold=1, reset_timeout=5)
+    open_circuit(client, clock, gateway)
+
+    client.search_faces_by_image.side_effect = client_error("ThrottlingException")
+    with pytest.raises(ClientError):
+        gateway.search_faces_by_image(CollectionId="c")
+
+    assert gateway.breaker.state == "open"
+    with pytest.raises(RekognitionUnavailable):
+        gateway.search_faces_by_image(CollectionId="c")
+
+
+def test_trial_ending_in_a_connection_error_reopens_the_circuit(client, clock):
+    gateway = make_gateway(client, clock, max_attempts=1, failure_threshold=1, reset_timeout=5)
+    open_circuit(client, clock, gateway)
+
+    client.search_faces_by_image.side_effect = ReadTimeoutError(endpoint_url="https://rekognition")
+    with pytest.raises(ReadTimeoutError):
+        gateway.search_faces_by_image(CollectionId="c")
+
+    assert gateway.breaker.state == "open"
+
+
+def test_retries_connection_errors_then_opens_the_circuit(client, clock):
+    client.search_faces_by_image.side_effect = [
+        EndpointConnectionError(endpoint_url="https://rekognition"),
+        {"FaceMatches": []},
+    ]
+    gateway = make_gateway(client, clock, max_attempts=2, failure_threshold=1)
+
+    assert gateway.search_faces_by_image(CollectionId="c") == {"FaceMatches": []}
+    assert gateway.stats["retries"] == 1
+
+    client.search_faces_by_image.side_effect = EndpointConnectionError(
+        endpoint_url="https://rekognition"
+    )
+    with pytest.raises(EndpointConnectionError):
+        gateway.search_faces_by_image(CollectionId="c")
+    assert client.search_faces_by_image.call_count == 4
+    assert gateway.breaker.state == "open"
+
+
+def test_coalesces_identical_in_flight_calls(client):
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_search(**params):
+        started.set()
+        release.wait(5)
+        return {"FaceMatches": [{"Similarity": 99.0}]}
+
+    client.search_faces_by_image.side_effect = slow_search
+    gateway = RekognitionGateway(client_factory=lambda: client)
+    results = []
+
+    def search():
+        results.append(gateway.search_faces_by_image(coalesce_key="same", CollectionId="c"))
+
+    leader = threading.Thread(target=search)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=search) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while gateway.stats["coalesced"] < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert client.search_faces_by_image.call_count == 1
+    assert len(results) == 4 and all(result is results[0] for result in results)
+    assert not gateway._inflight
+
+
+def test_unavailable_maps_to_503_with_retry_after():
+    response = aws_error_response(RekognitionUnavailable("SearchFacesByImage", "busy", 3))
+    assert response["statusCode"] == 503
+    assert response["headers"]["Retry-After"] == "3"
+    assert json.loads(response["body"])["error"]
+
+
+def test_gateway_is_configured_from_environment(monkeypatch):
+    monkeypatch.setenv("REKOGNITION_TPS", "4")
+    monkeypatch.setenv("REKOGNITION_MAX_ATTEMPTS", "7")
+    with patch("boto3.client") as mock_client:
+        gateway = rekognition.gateway()
+        gateway.index_faces(CollectionId="c")
+
+    assert rekognition.gateway() is gateway
+    assert gateway.bucket.rate == 4 and gateway.max_attempts == 7
+    # botocore's own retries are off; the gateway retries instead
+    config = mock_client.call_args.kwargs["config"]
+    assert config.retries["total_max_attempts"] == 1
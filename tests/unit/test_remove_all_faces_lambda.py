@@ -80,6 +80,40 @@ class TestRemoveAllFaces(unittest.TestCase):
         mock_table.scan.assert_called_once()
         mock_table.batch_writer.assert_not_called()
 
+    @patch("boto3.resource")
+    @patch("boto3.client")
+    def test_remove_all_faces_deletes_every_page_of_every_segment(
+        self, mock_client, mock_resource
+    ):
+        mock_table = MagicMock()
+        mock_resource.return_value.Table.return_value = mock_table
+        mock_client.return_value.list_faces.return_value = {"Faces": []}
+
+        def scan(**kwargs):
+            segment = kwargs["Segment"]
+            if "ExclusiveStartKey" not in kwargs:
+                return {
+                    "Items": [{"userId": f"user{segment}-1"}],
+                    "LastEvaluatedKey": {"userId": f"user{segment}-1"},
+                }
+            return {"Items": [{"userId": f"user{segment}-2"}]}
+
+        mock_table.scan.side_effect = scan
+
+        with patch.dict("os.environ", {"SCAN_SEGMENTS": "2"}):
+            response = handler({}, {})
+
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(mock_table.scan.call_count, 4)
+        first_call = mock_table.scan.call_args_list[0].kwargs
+        self.assertEqual(first_call["TotalSegments"], 2)
+        self.assertEqual(first_call["ExpressionAttributeNames"], {"#p0": "userId"})
+        deleted = {
+            call.kwargs["Key"]["userId"]
+            for call in mock_table.batch_writer.return_value.__enter__.return_value.delete_item.call_args_list
+        }
+        self.assertEqual(deleted, {"user0-1", "user0-2", "user1-1", "user1-2"})
+
     @patch("boto3.client")
     def test_remove_all_faces_error(self, mock_client):
         mock_client.return_value.list_faces.side_effect = ClientError(
@@ -148,3 +182,67 @@ class TestRemoveAllFaces(unittest.TestCase):
         mock_rekognition = mock_client.return_value
 
         mock_rekognition.list_faces.return_value = {"Faces": []}
+
+    @patch("boto3.resource")
+    @patch("boto3.client")
+    def test_remove_all_faces_clears_hot_collection(self, mock_client, mock_resource):
+        mock_table = MagicMock()
+        mock_resource.return_value.Table.return_value = mock_table
+        mock_table.scan.return_value = {"Items": []}
+        mock_rekognition = mock_client.return_value
+        mock_rekognition.list_faces.side_effect = [
+            {"Faces": [{"FaceId": "face1"}]},
+            {"Faces": [{"FaceId": "hot-face1"}]},
+        ]
+
+        with patch.dict("os.environ", {"HOT_COLLECTION_ID": "test-collection-hot"}):
+            response = handler({}, {})
+
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(
+            [call.kwargs for call in mock_rekognition.delete_faces.call_args_list],
+            [
+                {"CollectionId": "test-collection", "FaceIds": ["face1"]},
+                {"CollectionId": "test-collection-hot", "FaceIds": ["hot-face1"]},
+            ],
+        )
+
+    @patch("boto3.resource")
+    @patch("boto3.client")
+    def test_remove_all_faces_clears_terminal_collections(self, mock_client, mock_resource):
+        mock_table = MagicMock()
+        mock_resource.return_value.Table.return_value = mock_table
+        mock_table.scan.return_value = {"Items": []}
+        mock_rekognition = mock_client.return_value
+        mock_rekognition.list_faces.return_value = {"Faces": []}
+
+        shards = '{"1": "test-collection-t1", "2": "test-collection-t2"}'
+        with patch.dict("os.environ", {"COLLECTION_SHARDS": shards}):
+            response = handler({}, {})
+
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(
+            [call.kwargs["CollectionId"] for call in mock_rekognition.list_faces.call_args_list],
+            ["test-collection-t1", "test-collection-t2", "test-collection"],
+        )
+
+    @patch("boto3.resource")
+    @patch("boto3.client")
+    def test_remove_all_faces_follows_every_page_of_faces(self, mock_client, mock_resource):
+        mock_resource.return_value.Table.return_value.scan.return_value = {"Items": []}
+        mock_rekognition = mock_client.return_value
+        mock_rekognition.list_faces.side_effect = [
+            {"Faces": [{"FaceId": "face1"}], "NextToken": "page-2"},
+            {"Faces": [{"FaceId": "face2"}]},
+        ]
+
+        response = handler({}, {})
+
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(
+            mock_rekognition.list_faces.call_args.kwargs,
+            {"CollectionId": "test-collection", "NextToken": "page-2"},
+        )
+        mock_rekognition.delete_faces.assert_called_once_with(
+            CollectionId="test-collection", FaceIds=["face1", "face2"]
+        )
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+from wayfinding_common.responses import (
+    CORS_HEADERS,
+    MAX_ERROR_CHARS,
+    aws_error_response,
+    bounded,
+    error_response,
+    json_response,
+)
+
+
+def client_error(code, message="boom"):
+    return ClientError({"Error": {"Code": code, "Message": message}}, "Operation")
+
+
+def test_json_response_serializes_objects_and_passes_text_through():
+    response = json_response(200, {"a": 1})
+    assert response == {"statusCode": 200, "headers": CORS_HEADERS, "body": '{"a":1}'}
+    assert json_response(200, '{"b":2}')["body"] == '{"b":2}'
+
+
+def test_headers_are_shared_and_read_only():
+    first = error_response(400, "bad")
+    second = json_response(200, {})
+    assert first["headers"] is second["headers"] is CORS_HEADERS
+    with pytest.raises(TypeError):
+        first["headers"]["X-Extra"] = "1"
+    with pytest.raises(TypeError):
+        first["headers"].update({"X-Extra": "1"})
+    assert "X-Extra" not in CORS_HEADERS
+    # Still a plain dict as far as the runtime's serializer is concerned
+    assert json.loads(json.dumps(CORS_HEADERS))["Access-Control-Allow-Origin"] == "*"
+
+
+def test_error_response_bounds_strings():
+    response = error_response(500, "x" * 5000, message="y" * 5000, count=3)
+    body = json.loads(response["body"])
+    assert len(body["error"]) < MAX_ERROR_CHARS + 30
+    assert body["error"].endswith(f"(+{5000 - MAX_ERROR_CHARS} chars)")
+    assert len(body["message"]) < MAX_ERROR_CHARS + 30
+    assert body["count"] == 3
+    assert bounded("short") == "short"
+
+
+@pytest.mark.parametrize(
+    "code, status",
+    [
+        ("ConditionalCheckFailedException", 409),
+        ("ImageTooLargeException", 400),
+        ("ProvisionedThroughputExceededException", 503),
+        ("ThrottlingException", 503),
+        ("ResourceNotFoundException", 500),
+        ("InvalidParameterException", 500),
+    ],
+)
+def test_aws_error_status_mapping(code, status):
+    response = aws_error_response(client_error(code, "Table not found"))
+    assert response["statusCode"] == status
+    assert "Table not found" in json.loads(response["body"])["error"]
+
+
+def test_aws_error_response_custom_message():
+    response = aws_error_response(client_error("ThrottlingException"), "Internal server error")
+    assert response["statusCode"] == 503
+    assert json.loads(response["body"]) == {"error": "Internal server error"}
@@ -0,0 +1,61 @@
+from datetime import datetime, timezone
+
+import pytest
+from wayfinding_common.retention import RetentionPolicy, is_ttl_removal
+
+NOW = datetime(2024, 8, 1, tzinfo=timezone.utc).timestamp()
+
+
+def utc_timestamp(*fields):
+    return int(datetime(*fields, tzinfo=timezone.utc).timestamp())
+
+
+@pytest.fixture
+def policy():
+    # Singapore: UTC+8
+    return RetentionPolicy(
+        hours_after_departure=6, undated_days=30, utc_offset_minutes=480, clock=lambda: NOW
+    )
+
+
+def test_expires_after_local_departure(policy):
+    expires_at = policy.expires_at({"scheduled_date": "2024-08-15", "flight_time": "13:30"})
+
+    # 13:30 in Singapore is 05:30 UTC, plus six hours
+    assert expires_at == utc_timestamp(2024, 8, 15, 11, 30)
+
+
+@pytest.mark.parametrize("flight_time", [None, "", "late", "25:00"])
+def test_date_without_time_expires_after_the_day(policy, flight_time):
+    expires_at = policy.expires_at({"scheduled_date": "2024-08-15", "flight_time": flight_time})
+
+    # The end of the day in Singapore, plus six hours
+    assert expires_at == utc_timestamp(2024, 8, 15, 21, 59, 59)
+
+
+@pytest.mark.parametrize(
+    "passenger_data",
+    [{}, {"scheduled_date": "15/08/2024"}, {"scheduled_date": "2024-02-30"}],
+)
+def test_undated_records_expire_after_retention_days(policy, passenger_data):
+    assert policy.expires_at(passenger_data) == int(NOW) + 30 * 24 * 3600
+
+
+def test_policy_from_environment(monkeypatch):
+    monkeypatch.setenv("RECORD_HOURS_AFTER_DEPARTURE", "2")
+    monkeypatch.setenv("AIRPORT_UTC_OFFSET_MINUTES", "0")
+
+    policy = RetentionPolicy.from_environment()
+
+    assert policy.expires_at(
+        {"scheduled_date": "2024-08-15", "flight_time": "10:00"}
+    ) == utc_timestamp(2024, 8, 15, 12, 0)
+
+
+def test_is_ttl_removal():
+    ttl_identity = {"type": "Service", "principalId": "dynamodb.amazonaws.com"}
+
+    assert is_ttl_removal({"eventName": "REMOVE", "userIdentity": ttl_identity})
+    # Deleted by a caller, or not a deletion
+    assert not is_ttl_removal({"eventName": "REMOVE"})
+    assert not is_ttl_removal({"eventName": "MODIFY", "userIdentity": ttl_identity})
@@ -0,0 +1,46 @@
+import pytest
+from wayfinding_common.route_geometry import decode_polyline, encode_polyline, route_geometry
+from wayfinding_common.venue import Venue
+
+
+@pytest.fixture
+def venue(venue_description):
+    return Venue(venue_description)
+
+
+def test_polyline_matches_the_published_algorithm():
+    # Google's worked example, coordinates pre-scaled by 1e5
+    points = [(3850000, -12020000), (4070000, -12095000), (4325200, -12645300)]
+
+    assert encode_polyline(points) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+@pytest.mark.parametrize(
+    "points", [[], [(0, 0)], [(10, 10), (50, 10), (90, 10)], [(1200, 800), (3, -4), (0, 0)]]
+)
+def test_polyline_round_trip(points):
+    assert decode_polyline(encode_polyline(points)) == points
+
+
+def test_geometry_per_floor_with_transition(venue):
+    geometry = route_geometry(venue.route("a", "d"))
+
+    assert geometry["venue"] == "test"
+    assert geometry["seconds"] == 45
+    assert geometry["bbox"] == [10, 10, 90, 90]
+    assert [leg["floor"] for leg in geometry["legs"]] == ["1", "2"]
+    assert decode_polyline(geometry["legs"][0]["polyline"]) == [(10, 10), (50, 10), (90, 10)]
+    assert decode_polyline(geometry["legs"][1]["polyline"]) == [(90, 10), (90, 90)]
+    assert geometry["transitions"] == [
+        {"from_floor": "1", "to_floor": "2", "location": "c", "kind": "walk"}
+    ]
+
+
+def test_transition_kind_comes_from_the_walkway(venue_description):
+    venue_description["edges"][3]["kind"] = "lift"
+
+    geometry = route_geometry(Venue(venue_description).route("d", "a"))
+
+    assert geometry["transitions"] == [
+        {"from_floor": "2", "to_floor": "1", "location": "up", "kind": "lift"}
+    ]
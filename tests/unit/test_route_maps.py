@@ -0,0 +1,121 @@
+import io
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+from PIL import Image
+from wayfinding_common import route_maps
+from wayfinding_common.route_maps import ROUTE_PREFIX, RouteMaps, route_key, schematic_plan
+from wayfinding_common.venue import Venue
+
+
+def not_found(operation):
+    return ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, operation)
+
+
+def png(width, height, colour=(10, 20, 30)):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), colour).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def venue(venue_description):
+    return Venue(venue_description)
+
+
+@pytest.fixture
+def s3():
+    s3 = MagicMock()
+    s3.head_object.side_effect = not_found("HeadObject")
+    s3.get_object.side_effect = lambda Bucket, Key: {"Body": io.BytesIO(png(100, 100))}
+    return s3
+
+
+def test_route_key_is_content_addressed(venue, venue_description):
+    key = route_key(venue.route("a", "d"))
+
+    assert key.startswith(ROUTE_PREFIX) and key.endswith(".png")
+    assert route_key(venue.route("a", "d")) == key
+    assert route_key(venue.route("d", "a")) != key
+    assert route_key(Venue({**venue_description, "version": "next"}).route("a", "d")) != key
+
+
+def test_render_stacks_the_floors_crossed(venue, s3):
+    image = Image.open(io.BytesIO(RouteMaps(s3, "maps").render(venue.route("a", "d"))))
+
+    assert image.size == (100, 200)
+    # The route is drawn over the base plans
+    assert image.getpixel((30, 10)) != (10, 20, 30)
+    assert image.getpixel((5, 60)) == (10, 20, 30)
+
+
+def test_new_route_is_drawn_and_stored(venue, s3):
+    maps = RouteMaps(s3, "maps")
+
+    url = maps.url(venue.route("a", "c"))
+
+    put = s3.put_object.call_args.kwargs
+    assert url == f"https://maps.s3.amazonaws.com/{put['Key']}"
+    assert put["ContentType"] == "image/png"
+    assert "immutable" in put["CacheControl"]
+    s3.get_object.assert_called_once_with(Bucket="maps", Key="floorplans/1.png")
+
+
+def test_stored_route_is_not_drawn_again(venue, s3):
+    s3.head_object.side_effect = None
+    maps = RouteMaps(s3, "maps")
+
+    maps.url(venue.route("a", "d"))
+    maps.url(venue.route("a", "d"))
+
+    s3.put_object.assert_not_called()
+    s3.get_object.assert_not_called()
+    # Known to the container after the first check
+    s3.head_object.assert_called_once()
+
+
+def test_base_plans_are_read_once_per_container(venue, s3):
+    maps = RouteMaps(s3, "maps")
+
+    maps.url(venue.route("a", "d"))
+    maps.url(venue.route("b", "d"))
+
+    assert s3.get_object.call_count == 2
+
+
+def test_floor_without_base_plan_is_drawn_from_walkways(venue, s3):
+    s3.get_object.side_effect = ClientError(
+        {"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject"
+    )
+
+    image = Image.open(io.BytesIO(RouteMaps(s3, "maps").render(venue.route("a", "b"))))
+
+    assert image.size == (100, 100)
+
+
+def test_schematic_plan_keeps_walkways_closed_when_first_drawn(venue, venue_description, s3):
+    s3.get_object.side_effect = ClientError(
+        {"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject"
+    )
+    venue.set_walk("a", "c", None)
+    venue.set_walk("b", "c", None)
+
+    plan = RouteMaps(s3, "maps").base_plan(venue, "1")
+
+    assert plan.getpixel((75, 10)) == (200, 200, 195)
+    assert plan.tobytes() == schematic_plan(Venue(venue_description), "1").tobytes()
+
+
+def test_other_storage_errors_are_raised(venue, s3):
+    s3.head_object.side_effect = ClientError(
+        {"Error": {"Code": "403", "Message": "Forbidden"}}, "HeadObject"
+    )
+
+    with pytest.raises(ClientError):
+        RouteMaps(s3, "maps").url(venue.route("a", "b"))
+
+
+def test_container_keeps_one_renderer_per_bucket(s3):
+    assert route_maps.route_maps(s3, "maps") is route_maps.route_maps(s3, "maps")
+    assert route_maps.route_maps(s3, "other").bucket_name == "other"
@@ -0,0 +1,145 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from wayfinding_common.scan import (
+    CapacityLimiter,
+    ScanStats,
+    _segment_tables,
+    parallel_scan,
+)
+
+
+class PagedTable:
+    """A Table stand-in with ``items_per_segment`` items split into pages."""
+
+    def __init__(self, segments, items_per_segment, page_size, units_per_page=1.0):
+        self.pages = {
+            segment: [
+                [
+                    {"userId": f"{segment}-{i}"}
+                    for i in range(start, min(start + page_size, items_per_segment))
+                ]
+                for start in range(0, items_per_segment, page_size)
+            ]
+            for segment in range(segments)
+        }
+        self.units_per_page = units_per_page
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def scan(self, **kwargs):
+        with self.lock:
+            self.calls.append(kwargs)
+        pages = self.pages[kwargs.get("Segment", 0)]
+        index = kwargs.get("ExclusiveStartKey", {}).get("page", 0)
+        response = {
+            "Items": pages[index],
+            "Count": len(pages[index]),
+            "ScannedCount": len(pages[index]),
+            "ConsumedCapacity": {"CapacityUnits": self.units_per_page},
+        }
+        if index + 1 < len(pages):
+            response["LastEvaluatedKey"] = {"page": index + 1}
+        return response
+
+
+def test_reads_every_page_of_every_segment():
+    table = PagedTable(segments=4, items_per_segment=25, page_size=10)
+    stats = ScanStats()
+
+    items = list(parallel_scan(table, segments=4, stats=stats))
+
+    assert sorted(item["userId"] for item in items) == sorted(
+        f"{s}-{i}" for s in range(4) for i in range(25)
+    )
+    assert stats.as_dict()["pages"] == 12
+    assert stats.consumed_capacity == 12
+    assert {call["TotalSegments"] for call in table.calls} == {4}
+    assert all(call["ReturnConsumedCapacity"] == "TOTAL" for call in table.calls)
+
+
+def test_projection_and_filter_arguments():
+    table = PagedTable(segments=1, items_per_segment=3, page_size=10)
+
+    list(
+        parallel_scan(
+            table,
+            segments=1,
+            projection=("userId", "name"),
+            page_size=50,
+            FilterExpression="#n = :n",
+            ExpressionAttributeNames={"#n": "name"},
+            ExpressionAttributeValues={":n": "x"},
+        )
+    )
+
+    (call,) = table.calls
+    assert "Segment" not in call
+    assert call["ProjectionExpression"] == "#p0, #p1"
+    assert call["ExpressionAttributeNames"] == {"#p0": "userId", "#p1": "name", "#n": "name"}
+    assert call["Limit"] == 50
+    assert call["FilterExpression"] == "#n = :n"
+
+
+def test_closing_early_stops_the_workers():
+    table = PagedTable(segments=2, items_per_segment=1000, page_size=1)
+    items = parallel_scan(table, segments=2, buffer_pages=1)
+
+    assert next(items)
+    items.close()
+
+    # Workers stop after at most a few pages each instead of reading 2000
+    assert len(table.calls) < 20
+
+
+def test_segment_errors_reach_the_consumer():
+    table = MagicMock()
+    table.scan.side_effect = RuntimeError("boom")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        list(parallel_scan(table, segments=3))
+
+
+def test_capacity_limiter_paces_to_budget():
+    now = [0.0]
+    limiter = CapacityLimiter(
+        10, clock=lambda: now[0], sleep=lambda seconds: now.__setitem__(0, now[0] + seconds)
+    )
+
+    assert limiter.wait() == 0
+    limiter.consume(5)
+    assert limiter.wait() == pytest.approx(0.5)
+    limiter.consume(5)
+    now[0] += 2.0
+    # Already under budget after idling
+    assert limiter.wait() == 0
+
+
+def test_rcu_budget_is_tracked_in_stats():
+    table = PagedTable(segments=2, items_per_segment=4, page_size=1, units_per_page=0.5)
+    stats = ScanStats()
+
+    assert len(list(parallel_scan(table, segments=2, rcu_budget=100, stats=stats))) == 8
+    assert stats.consumed_capacity == 4
+    assert stats.throttle_seconds < 0.2
+
+
+def test_each_segment_scans_through_its_own_table():
+    import boto3
+
+    table = boto3.resource("dynamodb", region_name="eu-west-1").Table("passengers")
+
+    tables = _segment_tables(table, 3)
+
+    assert len({id(segment_table) for segment_table in [table, *tables]}) == 4
+    assert len({id(segment_table.meta.client) for segment_table in [table, *tables]}) == 4
+    for segment_table in tables:
+        assert segment_table.name == "passengers"
+        assert segment_table.meta.client.meta.region_name == "eu-west-1"
+
+
+def test_stand_in_tables_are_shared():
+    table = PagedTable(segments=2, items_per_segment=1, page_size=1)
+
+    assert _segment_tables(table, 2) == [table, table]
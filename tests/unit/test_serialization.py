@@ -0,0 +1,67 @@
+import json
+from decimal import Decimal
+
+import pytest
+from boto3.dynamodb.types import TypeSerializer
+from wayfinding_common.serialization import (
+    dumps,
+    item_to_json,
+    items_to_json,
+    json_object,
+)
+
+
+@pytest.fixture
+def passenger():
+    return {
+        "userId": "P12345",
+        "name": "Zoë \"fake\" person",
+        "age": Decimal("42"),
+        "height": Decimal("1.75"),
+        "has_lounge_access": True,
+        "lounge_name": None,
+        "faceIds": ["face-1", "face-2"],
+        "accessibilityPreferences": {
+            "increaseFontSize": False,
+            "wheelchairAccessibility": True,
+        },
+        "tags": {"vip", "wheelchair"},
+        "seats": {Decimal("12"), Decimal("14")},
+    }
+
+
+def low_level(item):
+    serializer = TypeSerializer()
+    return {name: serializer.serialize(value) for name, value in item.items()}
+
+
+def test_item_to_json_matches_resource_api_encoding(passenger):
+    encoded = json.loads(item_to_json(low_level(passenger)))
+
+    assert encoded == json.loads(dumps(passenger))
+    assert encoded["age"] == 42
+    assert isinstance(encoded["age"], int)
+    assert encoded["height"] == 1.75
+    assert encoded["lounge_name"] is None
+    assert sorted(encoded["tags"]) == ["vip", "wheelchair"]
+
+
+def test_item_to_json_encodes_binary_as_base64():
+    assert json.loads(item_to_json({"photo": {"B": b"\x00\xff"}})) == {"photo": "AP8="}
+
+
+def test_item_to_json_rejects_unknown_descriptors():
+    with pytest.raises(TypeError):
+        item_to_json({"bad": {"X": "1"}})
+
+
+def test_items_to_json():
+    items = [{"userId": {"S": "a"}}, {"userId": {"S": "b"}}]
+
+    assert json.loads(items_to_json(items)) == [{"userId": "a"}, {"userId": "b"}]
+
+
+def test_json_object_splices_raw_members():
+    body = json_object({"message": "ok"}, raw={"passengerData": '{"age":42}'})
+
+    assert json.loads(body) == {"message": "ok", "passengerData": {"age": 42}}
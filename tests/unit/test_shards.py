@@ -0,0 +1,62 @@
+import pytest
+from wayfinding_common.shards import CollectionShards, normalize_shard
+
+
+@pytest.fixture
+def shards():
+    return CollectionShards(
+        "faces", {"T1": "faces-t1", "2": "faces-t2", "3": "faces-t3"}, attribute="terminal"
+    )
+
+
+@pytest.mark.parametrize("value", ["3", "T3", "t3", "Terminal 3", " terminal-3 ", 3])
+def test_terminal_spellings_normalize_alike(value):
+    assert normalize_shard(value) == "3"
+
+
+def test_other_values_keep_their_letters():
+    assert normalize_shard("jewel") == "JEWEL"
+
+
+def test_passengers_are_indexed_into_their_terminal(shards):
+    assert shards.for_passenger({"terminal": "Terminal 1"}) == "faces-t1"
+    assert shards.for_passenger({"terminal": "T2"}) == "faces-t2"
+
+
+@pytest.mark.parametrize("passenger_data", [{}, {"terminal": ""}, {"terminal": "T9"}])
+def test_passengers_without_known_terminal_stay_in_default(shards, passenger_data):
+    assert shards.for_passenger(passenger_data) == "faces"
+
+
+def test_kiosk_location(shards):
+    assert shards.for_location({"terminal": "3", "kiosk": "kiosk_1"}) == "faces-t3"
+    assert shards.for_location({"terminal": "9"}) is None
+    assert shards.for_location(None) is None
+    assert shards.for_location("T3") is None
+
+
+def test_all_lists_shards_then_default(shards):
+    assert shards.all() == ["faces-t1", "faces-t2", "faces-t3", "faces"]
+
+
+def test_unsharded_environment_behaves_as_one_collection(monkeypatch):
+    monkeypatch.setenv("REKOGNITION_COLLECTION_ID", "faces")
+    monkeypatch.delenv("COLLECTION_SHARDS", raising=False)
+
+    shards = CollectionShards.from_environment()
+
+    assert not shards.enabled
+    assert shards.for_passenger({"terminal": "T1"}) == "faces"
+    assert shards.all() == ["faces"]
+
+
+def test_from_environment(monkeypatch):
+    monkeypatch.setenv("REKOGNITION_COLLECTION_ID", "faces")
+    monkeypatch.setenv("COLLECTION_SHARDS", '{"4": "faces-t4"}')
+    monkeypatch.setenv("COLLECTION_SHARD_ATTRIBUTE", "departureTerminal")
+
+    shards = CollectionShards.from_environment()
+
+    assert shards.enabled
+    assert shards.for_passenger({"departureTerminal": "T4"}) == "faces-t4"
+    assert shards.for_passenger({"terminal": "T4"}) == "faces"
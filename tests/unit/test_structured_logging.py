@@ -0,0 +1,113 @@
+import json
+import logging
+from unittest.mock import MagicMock, patch
+
+import pytest
+from wayfinding_common import structured_logging
+from wayfinding_common.structured_logging import (
+    MAX_RECORDS_PER_REQUEST,
+    JsonFormatter,
+    Redacted,
+    configure_logging,
+    redact,
+    request_log_stats,
+    route_key,
+    start_request,
+)
+
+
+@pytest.fixture
+def logger(monkeypatch):
+    monkeypatch.setenv("LOG_LEVEL", "INFO")
+    monkeypatch.setenv("LOG_SAMPLE_RATES", json.dumps({"POST /recognize": 0.5}))
+    logger = configure_logging("wayfinding.test")
+    yield logger
+    logger.removeFilter(structured_logging._request_filter)
+    structured_logging._request_filter.sample_rates = {}
+
+
+@pytest.fixture
+def recognize_event():
+    return {
+        "resource": "/recognize",
+        "httpMethod": "POST",
+        "headers": {"x-api-key": "secret-key", "Content-Type": "application/json"},
+        "body": json.dumps({"image": "A" * 300_000}),
+    }
+
+
+def test_redact_masks_sensitive_and_large_values(recognize_event):
+    safe = redact({**recognize_event, "photo": b"\xff" * 10, "ids": list(range(50))})
+
+    assert safe["headers"]["x-api-key"] == "<redacted 10>"
+    assert safe["headers"]["Content-Type"] == "application/json"
+    assert len(safe["body"]) < 300
+    assert safe["body"].endswith("chars)")
+    assert safe["photo"] == "<bytes 10>"
+    assert safe["ids"][-1] == "<+30 items>"
+
+
+def test_redacted_is_not_rendered_below_the_level(logger):
+    payload = MagicMock()
+    start_request(logger, {}, None)
+
+    logger.debug("Event: %s", Redacted(payload))
+
+    assert request_log_stats()["records"] == 0
+
+
+def test_route_key():
+    assert route_key({"resource": "/recognize", "httpMethod": "POST"}) == "POST /recognize"
+    assert route_key({"personaId": "P12345"}) == "direct"
+
+
+def test_sampled_requests_log_at_debug(logger, recognize_event):
+    with patch("random.random", return_value=0.1):
+        assert start_request(logger, recognize_event, None) is True
+    assert logger.level == logging.DEBUG
+
+    with patch("random.random", return_value=0.9):
+        assert start_request(logger, recognize_event, None) is False
+    assert logger.level == logging.INFO
+
+    # Routes without a rate and no "*" default are never sampled
+    assert start_request(logger, {"resource": "/index", "httpMethod": "POST"}, None) is False
+
+
+def test_sampling_leaves_library_loggers_at_the_base_level(logger, recognize_event):
+    with patch("random.random", return_value=0.1):
+        start_request(logger, recognize_event, None)
+
+    assert logger.isEnabledFor(logging.DEBUG)
+    for name in ("botocore", "botocore.endpoint", "urllib3.connectionpool", "boto3"):
+        assert not logging.getLogger(name).isEnabledFor(logging.DEBUG)
+    assert logging.getLogger().level == logging.INFO
+
+
+def test_record_budget_keeps_errors(logger):
+    start_request(logger, {}, None)
+
+    for _ in range(MAX_RECORDS_PER_REQUEST + 10):
+        logger.info("noise")
+    logger.error("still logged")
+
+    stats = request_log_stats()
+    assert stats["records"] == MAX_RECORDS_PER_REQUEST + 1
+    assert stats["dropped"] == 10
+
+
+def test_json_formatter_includes_request_context(logger, recognize_event):
+    context = MagicMock(aws_request_id="req-1")
+    start_request(logger, recognize_event, context)
+    record = logger.makeRecord(
+        logger.name, logging.INFO, __file__, 1, "Event: %s", (Redacted(recognize_event),), None
+    )
+    structured_logging._request_filter.filter(record)
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["level"] == "INFO"
+    assert entry["requestId"] == "req-1"
+    assert entry["route"] == "POST /recognize"
+    assert "secret-key" not in entry["message"]
+    assert len(entry["message"]) < 1000
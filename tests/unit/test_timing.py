@@ -0,0 +1,154 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+from wayfinding_common import structured_logging, timing
+from wayfinding_common.structured_logging import configure_logging, start_request
+from wayfinding_common.timing import metric, span, stage_durations, timed, traced_handler
+
+
+@pytest.fixture
+def clock():
+    """perf_counter advancing one second per reading."""
+    ticks = iter(range(1000))
+    with patch("time.perf_counter", side_effect=lambda: float(next(ticks))):
+        yield
+
+
+def emitted_metrics(capsys):
+    lines = [line for line in capsys.readouterr().out.splitlines() if '"_aws"' in line]
+    assert len(lines) == 1
+    return json.loads(lines[0])
+
+
+@timed("lookup")
+def lookup(value):
+    return value * 2
+
+
+@traced_handler("test_function")
+def handler(event, context):
+    with span("decode"):
+        pass
+    for value in range(2):
+        lookup(value)
+    return {"statusCode": 200}
+
+
+def test_traced_handler_emits_stage_metrics(capsys, clock):
+    context = MagicMock(aws_request_id="req-1")
+
+    assert handler({"resource": "/recognize", "httpMethod": "POST"}, context) == {
+        "statusCode": 200
+    }
+
+    record = emitted_metrics(capsys)
+    directive = record["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Namespace"] == "AssistedWayfinding"
+    assert directive["Dimensions"] == [["FunctionName", "Route"]]
+    assert {metric["Name"] for metric in directive["Metrics"]} == {"total", "decode", "lookup"}
+    assert record["FunctionName"] == "test_function"
+    assert record["Route"] == "POST /recognize"
+    assert record["requestId"] == "req-1"
+    assert record["statusCode"] == 200
+    # Each span takes one tick; the two lookups are summed
+    assert record["decode"] == 1000
+    assert record["lookup"] == 2000
+    assert record["total"] == 7000
+
+
+def test_handler_metrics_join_the_stage_metrics(capsys):
+    @traced_handler("cached")
+    def cached(event, context):
+        metric("CacheHit", 0)
+        metric("CacheHit", 1)
+        metric("CacheHitRatio", 0.5, unit="None")
+        return {"statusCode": 200}
+
+    cached({}, None)
+
+    record = emitted_metrics(capsys)
+    units = {
+        entry["Name"]: entry["Unit"] for entry in record["_aws"]["CloudWatchMetrics"][0]["Metrics"]
+    }
+    assert units["CacheHit"] == "Count" and units["CacheHitRatio"] == "None"
+    assert units["total"] == "Milliseconds"
+    assert record["CacheHit"] == 1 and record["CacheHitRatio"] == 0.5
+
+
+def test_logging_overhead_joins_the_metrics(capsys):
+    logger = configure_logging("wayfinding.timing_test")
+
+    @traced_handler("logged")
+    def logged(event, context):
+        start_request(logger, event, context)
+        logger.info("one")
+        logger.debug("not kept")
+        return {"statusCode": 200}
+
+    try:
+        logged({}, None)
+        record = emitted_metrics(capsys)
+        assert record["LogRecords"] == 1 and record["LogRecordsDropped"] == 0
+        assert record["LogRenderMs"] >= 0
+
+        # A handler that does not start a logging request reports nothing
+        handler({}, None)
+        assert "LogRecords" not in emitted_metrics(capsys)
+    finally:
+        logger.removeFilter(structured_logging._request_filter)
+
+
+def test_metrics_are_emitted_when_the_handler_raises(capsys):
+    @traced_handler("failing")
+    def failing(event, context):
+        with span("rekognition_search"):
+            raise RuntimeError("throttled")
+
+    with pytest.raises(RuntimeError):
+        failing({}, None)
+
+    record = emitted_metrics(capsys)
+    assert "rekognition_search" in record
+    assert "statusCode" not in record
+
+
+def test_trace_file_records_nesting(tmp_path, monkeypatch, capsys):
+    trace_file = tmp_path / "trace.jsonl"
+    monkeypatch.setattr(timing._recorder, "trace_file", str(trace_file))
+
+    handler({}, None)
+    handler({}, None)
+
+    traces = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    assert len(traces) == 2
+    spans = traces[0]["spans"]
+    assert [(s["name"], s["depth"]) for s in spans] == [
+        ("total", 0),
+        ("decode", 1),
+        ("lookup", 1),
+        ("lookup", 1),
+    ]
+    assert traces[0]["route"] == "direct"
+
+
+def test_disabled_timing_is_a_pass_through(monkeypatch, capsys):
+    monkeypatch.setattr(timing._recorder, "enabled", False)
+
+    assert span("decode") is span("s3_put")
+    assert lookup(21) == 42
+    assert handler({}, None) == {"statusCode": 200}
+    assert capsys.readouterr().out == ""
+
+
+def test_span_budget_is_bounded(capsys):
+    @traced_handler("busy")
+    def busy(event, context):
+        for _ in range(timing.MAX_SPANS_PER_REQUEST + 5):
+            with span("loop"):
+                pass
+        assert len(stage_durations()) == 1
+
+    busy({}, None)
+
+    assert emitted_metrics(capsys)["droppedSpans"] == 6
@@ -0,0 +1,161 @@
+import json
+import random
+
+import pytest
+from wayfinding_common.venue import DEFAULT_VENUE_FILE, Venue, load_venue
+
+@pytest.fixture
+def venue(venue_description):
+    return Venue(venue_description)
+
+
+def test_route_takes_the_fastest_walkways(venue):
+    route = venue.route("a", "d")
+
+    assert route.nodes == ["a", "b", "c", "up", "d"]
+    assert route.seconds == 45
+
+
+def test_walkways_go_both_ways(venue):
+    assert venue.route("d", "a").nodes == ["d", "up", "c", "b", "a"]
+
+
+def test_route_to_itself(venue):
+    route = venue.route("b", "b")
+
+    assert route.nodes == ["b"]
+    assert route.seconds == 0
+
+
+@pytest.mark.parametrize("origin, destination", [("a", "island"), ("a", "nowhere"), ("nowhere", "a")])
+def test_no_route_for_unknown_or_unconnected_locations(venue, origin, destination):
+    assert venue.route(origin, destination) is None
+
+
+def test_legs_split_the_route_by_floor(venue):
+    route = venue.route("a", "d")
+
+    assert route.legs() == [("1", ["a", "b", "c"]), ("2", ["up", "d"])]
+    assert route.points(["up", "d"]) == [(90, 10), (90, 90)]
+
+
+def test_shortest_path_trees_are_kept_per_source(venue):
+    tree = venue.tree("a")
+    venue.route("a", "c")
+    venue.route("a", "d")
+
+    assert venue.tree("a") is tree
+
+
+def grid_description(size=6, seed=3):
+    rng = random.Random(seed)
+    nodes = {
+        f"n{x}_{y}": {"name": f"N{x}{y}", "floor": "1", "x": x * 10, "y": y * 10}
+        for x in range(size)
+        for y in range(size)
+    }
+    edges = []
+    for x in range(size):
+        for y in range(size):
+            for neighbour in (f"n{x + 1}_{y}", f"n{x}_{y + 1}"):
+                if neighbour in nodes:
+                    edges.append(
+                        {"from": f"n{x}_{y}", "to": neighbour, "seconds": rng.randint(5, 60)}
+                    )
+    return {"version": "grid", "floors": {"1": {}}, "nodes": nodes, "edges": edges}
+
+
+def test_closing_a_walkway_reroutes_around_it(venue):
+    venue.route("a", "d")
+
+    changed = venue.set_walk("b", "c", None)
+
+    assert changed == {"a"}
+    route = venue.route("a", "d")
+    assert route.nodes == ["a", "c", "up", "d"]
+    assert route.seconds == 55
+    assert venue.altered == {("b", "c")}
+
+
+def test_closing_the_only_walkway_disconnects(venue):
+    venue.set_walk("up", "d", None)
+
+    assert venue.route("a", "d") is None
+    assert venue.route("a", "up").seconds == 40
+
+
+def test_reopening_restores_the_usual_route(venue):
+    venue.route("a", "d")
+    venue.set_walk("b", "c", None)
+
+    assert venue.set_walk("b", "c", 10) == {"a"}
+    assert venue.route("a", "d").nodes == ["a", "b", "c", "up", "d"]
+    assert venue.altered == set()
+
+
+def test_walkways_off_a_tree_leave_it_alone(venue):
+    tree = venue.tree("a")
+    seconds = dict(tree[0])
+
+    assert venue.set_walk("a", "c", 90) == set()
+    assert venue.tree("a") is tree
+    assert tree[0] == seconds
+
+
+def test_set_walk_rejects_unknown_walkways(venue):
+    with pytest.raises(ValueError, match="No walkway between a and d"):
+        venue.set_walk("a", "d", 5)
+
+
+def test_repaired_trees_match_a_fresh_search():
+    description = grid_description()
+    venue = Venue(description)
+    sources = list(venue.nodes)[::5]
+    for source in sources:
+        venue.tree(source)
+    walkways = [(edge["from"], edge["to"]) for edge in description["edges"]]
+    rng = random.Random(11)
+
+    for _ in range(60):
+        a, b = rng.choice(walkways)
+        venue.set_walk(a, b, rng.choice([None, rng.randint(1, 120)]))
+
+        fresh = Venue(description)
+        for a_, b_ in walkways:
+            if b_ not in venue.edges[a_]:
+                fresh.set_walk(a_, b_, None)
+            else:
+                fresh.set_walk(a_, b_, venue.edges[a_][b_])
+        for source in sources:
+            assert venue.tree(source)[0] == fresh.tree(source)[0]
+            route = venue.route(source, "n5_5")
+            if route:
+                walked = sum(venue.edges[x][y] for x, y in zip(route.nodes, route.nodes[1:]))
+                assert walked == route.seconds
+
+
+def test_load_venue_reads_each_file_once(venue_description, tmp_path, monkeypatch):
+    path = tmp_path / "venue.json"
+    path.write_text(json.dumps(venue_description))
+    monkeypatch.setenv("VENUE_FILE", str(path))
+
+    assert load_venue() is load_venue()
+    assert load_venue().version == "test"
+
+
+def test_packaged_venue_connects_every_location():
+    venue = load_venue(DEFAULT_VENUE_FILE)
+
+    for location in venue.nodes:
+        assert venue.route("checkin", location) is not None
+
+
+def test_pace_bounds_every_walk_and_only_falls(venue):
+    # up-d: 5 s over 80 px is the quickest; the lift does not move across the plan
+    assert venue.pace == 0.0625
+
+    venue.set_walk("a", "b", 2)
+    assert venue.pace == 0.05
+
+    venue.set_walk("a", "b", 10)
+    assert venue.pace == 0.05
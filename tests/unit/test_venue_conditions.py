@@ -0,0 +1,194 @@
+from decimal import Decimal
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+from wayfinding_common import venue_conditions
+from wayfinding_common.venue import Venue
+from wayfinding_common.venue_conditions import (
+    CLOSED,
+    VenueConditions,
+    parse_changes,
+    walk_key,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def venue(venue_description):
+    return Venue(venue_description)
+
+
+@pytest.fixture
+def table():
+    table = MagicMock()
+    table.get_item.return_value = {}
+    return table
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def conditions(table, venue, clock):
+    return VenueConditions(table, venue, check_seconds=5, clock=clock)
+
+
+def stored(snapshot, walks):
+    return {"Item": {"venue": "test", "snapshot": Decimal(snapshot), "walks": walks}}
+
+
+def conflict():
+    return ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "conflict"}},
+        "PutItem",
+    )
+
+
+def test_walk_key_is_the_same_either_way_round():
+    assert walk_key("up", "c") == walk_key("c", "up") == "c|up"
+
+
+def test_parse_changes(venue):
+    changes = parse_changes(
+        venue,
+        [
+            {"from": "b", "to": "c", "seconds": 90},
+            {"from": "up", "to": "c", "closed": True},
+            {"from": "a", "to": "b"},
+        ],
+    )
+
+    assert changes == {"b|c": 90, "c|up": CLOSED, "a|b": None}
+
+
+@pytest.mark.parametrize(
+    "walkways, message",
+    [
+        ([], "non-empty list"),
+        ("b|c", "non-empty list"),
+        ([{"from": "a", "to": "d", "seconds": 5}], "No walkway between a and d"),
+        ([{"from": "a", "to": "b", "seconds": 0}], "positive number"),
+        ([{"from": "a", "to": "b", "seconds": "5"}], "positive number"),
+        ([{"from": "a", "to": "b", "seconds": True}], "positive number"),
+    ],
+)
+def test_parse_changes_rejects_bad_walkways(venue, walkways, message):
+    with pytest.raises(ValueError, match=message):
+        parse_changes(venue, walkways)
+
+
+def test_current_applies_a_new_snapshot(conditions, table, venue):
+    venue.route("a", "d")
+    table.get_item.return_value = stored(3, {"b|c": CLOSED, "c|up": Decimal(45)})
+
+    assert conditions.current() is venue
+
+    assert conditions.snapshot == 3
+    route = venue.route("a", "d")
+    assert route.nodes == ["a", "c", "up", "d"]
+    assert route.seconds == 80
+    table.get_item.assert_called_once_with(Key={"venue": "test"}, ConsistentRead=True)
+
+
+def test_current_checks_at_most_every_check_seconds(conditions, table, clock):
+    conditions.current()
+    clock.now = 4.9
+    conditions.current()
+    assert table.get_item.call_count == 1
+
+    clock.now = 5
+    conditions.current()
+    assert table.get_item.call_count == 2
+
+
+def test_only_changed_walkways_are_applied(conditions, table, venue):
+    table.get_item.return_value = stored(1, {"b|c": CLOSED, "c|up": Decimal(45)})
+    conditions.current()
+    venue.set_walk = MagicMock(return_value=set())
+
+    changed = conditions.apply(2, {"b|c": CLOSED})
+
+    assert changed == set()
+    venue.set_walk.assert_called_once_with("c", "up", 20)
+
+
+def test_a_snapshot_without_walks_restores_the_usual_times(conditions, table, venue):
+    table.get_item.return_value = stored(1, {"b|c": CLOSED})
+    conditions.current()
+
+    conditions.apply(2, {})
+
+    assert venue.route("a", "d").seconds == 45
+    assert venue.altered == set()
+
+
+def test_unreadable_conditions_keep_the_last_snapshot(conditions, table, venue):
+    table.get_item.return_value = stored(1, {"b|c": CLOSED})
+    conditions.current()
+    conditions._checked_at = -10
+    table.get_item.side_effect = ClientError(
+        {"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "GetItem"
+    )
+
+    assert conditions.current() is venue
+
+    assert conditions.snapshot == 1
+    assert venue.route("a", "d").seconds == 55
+
+
+def test_update_writes_the_next_snapshot(conditions, table, venue):
+    table.get_item.return_value = stored(4, {"a|b": Decimal(12)})
+
+    snapshot, walks = conditions.update({"b|c": CLOSED, "a|b": None})
+
+    assert (snapshot, walks) == (5, {"b|c": CLOSED})
+    item = table.put_item.call_args.kwargs["Item"]
+    assert item["snapshot"] == 5
+    assert item["walks"] == {"b|c": CLOSED}
+    assert table.put_item.call_args.kwargs["ConditionExpression"] == "snapshot = :snapshot"
+    assert table.put_item.call_args.kwargs["ExpressionAttributeValues"] == {":snapshot": 4}
+    # Applied here straight away
+    assert conditions.snapshot == 5
+    assert venue.route("a", "d").seconds == 55
+
+
+def test_first_update_creates_the_snapshot(conditions, table):
+    conditions.update({"a|b": 12.5})
+
+    kwargs = table.put_item.call_args.kwargs
+    assert kwargs["ConditionExpression"] == "attribute_not_exists(venue)"
+    assert kwargs["Item"]["walks"] == {"a|b": Decimal("12.5")}
+
+
+def test_update_retries_on_a_concurrent_update(conditions, table):
+    table.get_item.side_effect = [stored(1, {}), stored(2, {"a|b": Decimal(12)})]
+    table.put_item.side_effect = [conflict(), {}]
+
+    snapshot, walks = conditions.update({"b|c": 30})
+
+    assert (snapshot, walks) == (3, {"a|b": 12, "b|c": 30})
+
+
+def test_update_gives_up_when_updates_keep_colliding(conditions, table):
+    table.put_item.side_effect = conflict()
+
+    with pytest.raises(ClientError):
+        conditions.update({"b|c": 30})
+
+    assert table.put_item.call_count == venue_conditions.MAX_UPDATE_ATTEMPTS
+
+
+def test_no_conditions_without_a_table(monkeypatch):
+    monkeypatch.delenv("VENUE_CONDITIONS_TABLE", raising=False)
+
+    assert venue_conditions.venue_conditions() is None
@@ -0,0 +1,39 @@
+from unittest.mock import MagicMock, patch
+
+from wayfinding_common.warmer import is_warmer, skip_warmers
+
+from assisted_wayfinding_backend.lambda_functions.face_recognition.index import handler
+
+
+def test_is_warmer():
+    assert is_warmer({"warmer": True})
+    assert not is_warmer({"warmer": "true"})
+    assert not is_warmer({"body": "{}"})
+    assert not is_warmer(None)
+
+
+def test_skip_warmers_passes_other_events_through():
+    inner = MagicMock(return_value={"statusCode": 200})
+    wrapped = skip_warmers(inner)
+
+    assert wrapped({"warmer": True}, None) == {"warmed": True}
+    inner.assert_not_called()
+    assert wrapped({"body": "{}"}, None) == {"statusCode": 200}
+
+
+def test_skip_warmers_holds_within_bounds():
+    with patch("wayfinding_common.warmer.time.sleep") as sleep:
+        skip_warmers(MagicMock())({"warmer": True, "holdMs": 60000}, None)
+    sleep.assert_called_once_with(1.0)
+
+
+def test_handler_short_circuits_without_aws_calls(monkeypatch, capsys):
+    monkeypatch.setenv("STAGE_TIMING", "1")
+    with patch("boto3.client") as mock_client, patch("boto3.resource") as mock_resource:
+        response = handler({"warmer": True, "holdMs": 0}, MagicMock())
+
+    assert response == {"warmed": True}
+    mock_client.assert_not_called()
+    mock_resource.assert_not_called()
+    # No stage metrics for warm-up invocations
+    assert "_aws" not in capsys.readouterr().out